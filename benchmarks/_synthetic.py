@@ -0,0 +1,191 @@
+"""
+Synthetic fixtures for benchmarks
+=================================
+Builds frames shaped like the pipeline artifacts (same column names and
+dtypes) so benchmarks run without the CMS source files.
+"""
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = ["JOHN", "MARY", "DAVID", "SARAH", "MICHAEL", "JENNIFER", "JOSE",
+               "LI", "ANNA", "ROBERT", "PRIYA", "AHMED", "MARIA", "JAMES"]
+LAST_NAMES = ["SMITH", "JOHNSON", "WILLIAMS", "BROWN", "JONES", "GARCIA", "MILLER",
+              "DAVIS", "NGUYEN", "PATEL", "KIM", "LEE", "O'BRIEN", "MARTINEZ"]
+STATES = ["CA", "TX", "NY", "FL", "PA", "IL", "OH", "GA", "NC", "MI", "NJ", "VA",
+          "WA", "AZ", "MA", "TN", "IN", "MO", "MD", "WI", "CO", "MN", "SC", "AL"]
+
+
+def zipf_names(n: int, base: list, n_unique: int, rng) -> np.ndarray:
+    """Draw n names from a Zipf-like vocabulary of n_unique distinct values."""
+    vocab = np.array(
+        [base[i % len(base)] + ("" if i < len(base) else f"{i // len(base)}") for i in range(n_unique)],
+        dtype=object,
+    )
+    weights = 1.0 / np.arange(1, n_unique + 1)
+    return vocab[rng.choice(n_unique, size=n, p=weights / weights.sum())]
+
+
+def make_unified(n: int = 1_237_145, seed: int = 0) -> pd.DataFrame:
+    """Return a frame with the schema of unified_provider_entities.parquet."""
+    rng = np.random.default_rng(seed)
+    entity_type = np.where(rng.random(n) < 0.07, "O", "I").astype(object)
+    first = zipf_names(n, FIRST_NAMES, 40_000, rng)
+    first[entity_type == "O"] = None
+    last = zipf_names(n, LAST_NAMES, 250_000, rng)
+    state = np.array(STATES, dtype=object)[rng.integers(0, len(STATES), n)]
+    has_op = rng.random(n) < 0.45
+    has_pecos = rng.random(n) < 0.93
+
+    n_payments = pd.array(rng.integers(1, 200, n), dtype="Int64")
+    n_payments[~has_op] = pd.NA
+    sum_payment = np.where(has_op, rng.gamma(1.2, 900.0, n), np.nan)
+    first_date = pd.Series(
+        pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 300, n), unit="D")
+    ).where(has_op)
+
+    sources = np.where(entity_type == "O", "Medicare+Org", "Medicare").astype(object)
+    sources = sources + np.where(has_op, "+OP", "") + np.where(has_pecos, "+PECOS", "")
+
+    return pd.DataFrame({
+        "npi": 1_003_000_000 + np.arange(n, dtype="int64") * 7,
+        "first_med": first,
+        "last_med": last,
+        "state_med": state,
+        "provider_id": np.arange(n, dtype="int64"),
+        "entity_type": entity_type,
+        "pecos_enrollment_id": np.where(has_pecos, "I20200101000001", None),
+        "pecos_enrollment_year": np.where(has_pecos, 2020.0, np.nan),
+        "pecos_first_name": first,
+        "pecos_last_name": last,
+        "pecos_state": state,
+        "n_payments": n_payments,
+        "sum_payment": sum_payment,
+        "avg_payment": sum_payment / 4,
+        "max_payment": sum_payment / 2,
+        "first_payment_date": first_date,
+        "last_payment_date": first_date + pd.Timedelta(days=45),
+        "unique_manufacturers": np.where(has_op, 3.0, np.nan),
+        "first_name_reconciled": first,
+        "last_name_reconciled": last,
+        "state_reconciled": state,
+        "has_op_payments": has_op,
+        "has_pecos_enrollment": has_pecos,
+        "linkage_coverage": has_op.astype("int64") + has_pecos.astype("int64"),
+        "data_sources": sources,
+    })
+
+
+STREET_SUFFIXES = ["STREET", "St", "Avenue", "AVE", "Road", "rd", "Boulevard", "Blvd.", "Suite", "LANE"]
+CITIES = ["New York", "LOS ANGELES", "chicago", "Houston", "  Phoenix", "San  Antonio", "SAN JOSÉ",
+          "Philadelphia.", "Dallas", "Austin"]
+
+
+def _messy(values, rng) -> np.ndarray:
+    """Raw-CSV style variants: random case, doubled/edge spaces, stray punctuation."""
+    out = []
+    for v, r in zip(values, rng.random((len(values), 4))):
+        v = v.lower() if r[0] < 0.3 else (v.title() if r[0] < 0.5 else v)
+        if r[1] < 0.2:
+            v = v.replace(" ", "  ")
+        if r[2] < 0.2:
+            v = f" {v} "
+        if r[3] < 0.1:
+            v = v + "."
+        out.append(v)
+    return np.array(out, dtype=object)
+
+
+def make_raw_provider_columns(n: int = 10_000_000, seed: int = 0, n_unique: int = 200_000) -> pd.DataFrame:
+    """Uncleaned name/address/ZIP columns shaped like the source CSVs.
+
+    Cells are drawn from a Zipf-weighted vocabulary of n_unique messy values
+    per column; ~1% of names are non-ASCII and ~8% of cells are NaN, the way
+    pd.read_csv reports missing strings.
+    """
+    rng = np.random.default_rng(seed)
+    first = _messy(zipf_names(n_unique, FIRST_NAMES + ["JOSÉ", "RENÉE"], 40_000, rng), rng)
+    last = _messy(zipf_names(n_unique, LAST_NAMES + ["MÜLLER"], n_unique // 2, rng), rng)
+    numbers = rng.integers(1, 9999, n_unique)
+    streets = _messy(np.array(
+        [f"{num} {name} {STREET_SUFFIXES[i % len(STREET_SUFFIXES)]}"
+         for i, (num, name) in enumerate(zip(numbers, zipf_names(n_unique, LAST_NAMES, 5_000, rng)))],
+        dtype=object), rng)
+    cities = _messy(np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), n_unique)], rng)
+    states = _messy(np.array(STATES, dtype=object)[rng.integers(0, len(STATES), n_unique)], rng)
+    zips = np.array([f"{z:05d}-{p:04d}" if p % 3 == 0 else f"{z:05d}"
+                     for z, p in zip(rng.integers(501, 99950, n_unique), rng.integers(0, 9999, n_unique))],
+                    dtype=object)
+
+    weights = 1.0 / np.arange(1, n_unique + 1)
+    weights /= weights.sum()
+    columns = {}
+    for name, vocab in (("first_name", first), ("last_name", last), ("street", streets),
+                        ("city", cities), ("state", states), ("zip", zips)):
+        col = vocab[rng.choice(n_unique, size=n, p=weights)]
+        col[rng.random(n) < 0.08] = np.nan
+        columns[name] = col
+    return pd.DataFrame(columns)
+
+
+MEDICARE_PROVIDER_TYPES = ["Internal Medicine", "Family Practice", "Diagnostic Radiology", "Cardiology",
+                           "Nurse Practitioner", "Ambulance Service Provider", "Clinical Laboratory"]
+HCPCS_CODES = [f"99{c}" for c in range(201, 216)] + ["G0439", "36415", "85025", "80053", "93000", "71046"]
+
+
+def write_raw_medicare_csv(path: str, n: int, seed: int = 0, rows_per_provider: int = 10,
+                           block: int = 500_000) -> int:
+    """Write an n-row service-level CSV shaped like the Medicare Physician & Other Practitioners file.
+
+    Providers appear in contiguous runs of about rows_per_provider service
+    rows, like the CMS file, with messy names and addresses. Rows are
+    generated and appended block by block, so the generator's own memory
+    stays flat. Returns the number of distinct NPIs.
+    """
+    rng = np.random.default_rng(seed)
+    n_prov = max(1, n // rows_per_provider)
+    first = _messy(zipf_names(n_prov, FIRST_NAMES + ["JOSÉ", "RENÉE"], 40_000, rng), rng)
+    last = _messy(zipf_names(n_prov, LAST_NAMES + ["MÜLLER"], max(1, n_prov // 2), rng), rng)
+    streets = _messy(np.array([f"{num} {LAST_NAMES[num % len(LAST_NAMES)]} {STREET_SUFFIXES[num % 10]}"
+                               for num in rng.integers(1, 9999, n_prov)], dtype=object), rng)
+    cities = _messy(np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), n_prov)], rng)
+    states = np.array(STATES, dtype=object)[rng.integers(0, len(STATES), n_prov)]
+    entity = np.where(rng.random(n_prov) < 0.07, "O", "I").astype(object)
+    first[entity == "O"] = None
+    npi = 1_003_000_000 + np.arange(n_prov, dtype="int64") * 7
+    provider_of_row = np.minimum(np.arange(n) // rows_per_provider, n_prov - 1)
+
+    for start in range(0, n, block):
+        p = provider_of_row[start:start + block]
+        m = len(p)
+        srvcs = rng.integers(11, 2_000, m).astype(float)
+        pd.DataFrame({
+            "Rndrng_NPI": npi[p],
+            "Rndrng_Prvdr_Last_Org_Name": last[p],
+            "Rndrng_Prvdr_First_Name": first[p],
+            "Rndrng_Prvdr_MI": np.array(["A", "J.", None, "m"], dtype=object)[p % 4],
+            "Rndrng_Prvdr_Crdntls": np.array(["M.D.", "MD", "D.O.", "NP", None], dtype=object)[p % 5],
+            "Rndrng_Prvdr_Ent_Cd": entity[p],
+            "Rndrng_Prvdr_St1": streets[p],
+            "Rndrng_Prvdr_St2": np.where(p % 3 == 0, "SUITE 100", None),
+            "Rndrng_Prvdr_City": cities[p],
+            "Rndrng_Prvdr_State_Abrvtn": states[p],
+            "Rndrng_Prvdr_State_FIPS": (p % 56).astype(str),
+            "Rndrng_Prvdr_Zip5": np.char.zfill((501 + p % 99_000).astype(str), 5),
+            "Rndrng_Prvdr_RUCA": (1 + p % 10).astype(float),
+            "Rndrng_Prvdr_RUCA_Desc": "Metropolitan area core: primary flow within an urbanized area of 50,000 and greater",
+            "Rndrng_Prvdr_Cntry": "US",
+            "Rndrng_Prvdr_Type": np.array(MEDICARE_PROVIDER_TYPES, dtype=object)[p % len(MEDICARE_PROVIDER_TYPES)],
+            "Rndrng_Prvdr_Mdcr_Prtcptg_Ind": "Y",
+            "HCPCS_Cd": np.array(HCPCS_CODES, dtype=object)[rng.integers(0, len(HCPCS_CODES), m)],
+            "HCPCS_Desc": "Established patient office or other outpatient visit",
+            "HCPCS_Drug_Ind": "N",
+            "Place_Of_Srvc": np.where(p % 2 == 0, "O", "F"),
+            "Tot_Benes": rng.integers(11, 1_000, m),
+            "Tot_Srvcs": srvcs,
+            "Tot_Bene_Day_Srvcs": srvcs,
+            "Avg_Sbmtd_Chrg": rng.gamma(2.0, 90.0, m).round(2),
+            "Avg_Mdcr_Alowd_Amt": rng.gamma(2.0, 40.0, m).round(2),
+            "Avg_Mdcr_Pymt_Amt": rng.gamma(2.0, 30.0, m).round(2),
+            "Avg_Mdcr_Stdzd_Amt": rng.gamma(2.0, 30.0, m).round(2),
+        }).to_csv(path, index=False, mode="w" if start == 0 else "a", header=start == 0)
+    return n_prov
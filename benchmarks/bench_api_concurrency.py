@@ -0,0 +1,100 @@
+"""
+Benchmark — Event-Loop Responsiveness Under CPU-Heavy Load
+==========================================================
+Starts one uvicorn worker and keeps N clients busy with slow searches
+(short name queries that scan the whole name vocabulary). Meanwhile it
+measures /health latency, which is answered on the event loop. The run is
+repeated with API_CPU_THREADS=40, which matches Starlette's default
+threadpool that the sync handlers used before, and with the default pool
+of 4.
+
+Run:  python benchmarks/bench_api_concurrency.py [--rows 1237145] [--clients 32]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _synthetic import make_unified  # noqa: E402
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "web-api")
+PORT = 8766
+HEAVY = "/providers?name=a&limit=500"
+
+
+def _get(path: str) -> float:
+    start = time.perf_counter()
+    urllib.request.urlopen(f"http://127.0.0.1:{PORT}{path}", timeout=120).read()
+    return time.perf_counter() - start
+
+
+def run(parquet: str, threads: int, clients: int, seconds: float) -> dict:
+    env = dict(os.environ, PARQUET_PATH=parquet, API_CPU_THREADS=str(threads), SHARED_STORE_DIR="")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                _get("/health")
+                break
+            except OSError:
+                time.sleep(0.5)
+
+        stop = time.perf_counter() + seconds
+        heavy = []
+
+        def client():
+            while time.perf_counter() < stop:
+                heavy.append(_get(HEAVY))
+
+        workers = [threading.Thread(target=client) for _ in range(clients)]
+        for w in workers:
+            w.start()
+        health = []
+        while time.perf_counter() < stop:
+            health.append(_get("/health"))
+            time.sleep(0.05)
+        for w in workers:
+            w.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    def pct(xs, q):
+        return statistics.quantiles(xs, n=100)[q - 1] * 1000 if len(xs) > 1 else float("nan")
+
+    return {
+        "health_p50": pct(health, 50), "health_p99": pct(health, 99),
+        "heavy_p50": pct(heavy, 50), "heavy_per_s": len(heavy) / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_237_145)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet = os.path.join(tmp, "unified_provider_entities.parquet")
+        make_unified(args.rows).to_parquet(parquet, index=False)
+        print(f"{args.rows:,} rows, {args.clients} clients on {HEAVY}")
+        print(f"{'threads':>7} {'/health p50':>12} {'/health p99':>12} {'search p50':>11} {'search/s':>9}")
+        for threads in (40, 4):
+            r = run(parquet, threads, args.clients, args.seconds)
+            print(f"{threads:>7} {r['health_p50']:>10.1f}ms {r['health_p99']:>10.1f}ms "
+                  f"{r['heavy_p50']:>9.0f}ms {r['heavy_per_s']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
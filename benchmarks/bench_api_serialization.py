@@ -0,0 +1,70 @@
+"""
+Benchmark — /providers Page Serialization
+=========================================
+Compares the original iterrows-based `_safe_dict` (plus FastAPI's
+jsonable_encoder + JSONResponse, which ran on its output) against the
+columnar `_records` + `_json_response` path in web-api/app.py.
+
+Run:  python benchmarks/bench_api_serialization.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "web-api"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app  # noqa: E402
+from _synthetic import make_unified  # noqa: E402
+
+
+def legacy_safe_dict(row_or_df):
+    """The pre-columnar serializer, kept verbatim for comparison."""
+    records = []
+    for _, row in row_or_df.iterrows():
+        d = {}
+        for k, v in row.items():
+            if pd.isna(v):
+                d[k] = None
+            elif isinstance(v, (np.integer,)):
+                d[k] = int(v)
+            elif isinstance(v, (np.floating,)):
+                d[k] = float(v)
+            elif isinstance(v, (np.bool_,)):
+                d[k] = bool(v)
+            else:
+                d[k] = v
+        records.append(d)
+    return records
+
+
+def legacy_body(page):
+    payload = {"total": len(page), "limit": len(page), "offset": 0, "results": legacy_safe_dict(page)}
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def columnar_body(page):
+    payload = {"total": len(page), "limit": len(page), "offset": 0, "results": app._records(page)}
+    return app._json_response(payload).body
+
+
+def main():
+    frame = make_unified(50_000)
+    print(f"{'limit':>6} {'legacy ms':>10} {'columnar ms':>12} {'speedup':>8}")
+    print("-" * 40)
+    for limit in (50, 500):
+        page = frame.iloc[1_000:1_000 + limit]
+        assert legacy_body(page) == columnar_body(page), "serializers disagree"
+        reps = 200 if limit == 50 else 40
+        t_old = min(timeit.repeat(lambda: legacy_body(page), number=reps, repeat=3)) / reps
+        t_new = min(timeit.repeat(lambda: columnar_body(page), number=reps, repeat=3)) / reps
+        print(f"{limit:>6} {t_old * 1e3:>10.2f} {t_new * 1e3:>12.2f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
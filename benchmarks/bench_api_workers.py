@@ -0,0 +1,123 @@
+"""
+Benchmark — API Memory per uvicorn Worker
+=========================================
+Starts `uvicorn app:app --workers N` for N = 1 and 8, first reading the
+parquet into every worker and then mapping a shared store
+(SHARED_STORE_DIR). It sends a short mixed workload so each worker touches
+the table and its indexes, then reads /proc/<pid>/smaps_rollup for every
+worker:
+
+    RSS  resident pages, shared ones counted in full by every worker
+    PSS  shared pages split evenly between the processes mapping them
+    USS  pages private to the worker
+
+PSS × workers is what the machine actually spends. Linux only.
+
+Run:  python benchmarks/bench_api_workers.py [--rows 1237145] [--workers 1 8] [--modes parquet mmap]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _synthetic import make_unified  # noqa: E402
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "web-api")
+PORT = 8765
+WORKLOAD = [
+    "/providers/1003000126",
+    "/providers?name=SMITH&limit=50",
+    "/providers?state=NY&limit=50",
+    "/providers?name=PATEL&state=CA",
+    "/stats?by_state=true",
+    "/stats/coverage",
+]
+
+
+def _memory(pid: int) -> dict:
+    """RSS / PSS / USS of one process in MB, from smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _workers(master: int, n: int) -> list:
+    """PIDs of the uvicorn worker processes (a single worker runs in the master)."""
+    if n == 1:
+        return [master]
+    with open(f"/proc/{master}/task/{master}/children") as f:
+        children = [int(p) for p in f.read().split()]
+    # the multiprocess supervisor also forks a resource tracker; workers are the big ones
+    return sorted(children, key=lambda pid: _memory(pid)["rss"], reverse=True)[:n]
+
+
+def run(parquet: str, workers: int, store: str = "") -> list:
+    env = dict(os.environ, PARQUET_PATH=parquet, SHARED_STORE_DIR=store, RELOAD_POLL_SECONDS="0")
+    with tempfile.TemporaryFile("w+") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--port", str(PORT),
+             "--workers", str(workers), "--log-level", "info"],
+            cwd=API_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            while True:
+                time.sleep(1)
+                log.seek(0)
+                if log.read().count("Application startup complete") >= workers:
+                    break
+                if proc.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"uvicorn exited:\n{log.read()}")
+            for _ in range(10 * workers):
+                for path in WORKLOAD:
+                    urllib.request.urlopen(f"http://127.0.0.1:{PORT}{path}").read()
+            return [_memory(pid) for pid in _workers(proc.pid, workers)]
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_237_145)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--modes", nargs="+", choices=["parquet", "mmap"], default=["parquet", "mmap"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet = os.path.join(tmp, "unified_provider_entities.parquet")
+        make_unified(args.rows).to_parquet(parquet, index=False)
+        store = os.path.join(tmp, "store")
+        # convert once up front, the way a deploy would before starting workers
+        subprocess.run([sys.executable, "-c", "import app"], cwd=API_DIR, check=True,
+                       env=dict(os.environ, PARQUET_PATH=parquet, SHARED_STORE_DIR=store),
+                       stdout=subprocess.DEVNULL)
+
+        print(f"{args.rows:,} rows")
+        print(f"{'mode':<8} {'workers':>7} {'RSS/worker':>11} {'PSS/worker':>11} "
+              f"{'USS/worker':>11} {'total PSS':>10}")
+        for mode in args.modes:
+            store_dir = store if mode == "mmap" else ""
+            for n in args.workers:
+                mem = run(parquet, n, store_dir)
+                avg = {k: sum(m[k] for m in mem) / len(mem) for k in ("rss", "pss", "uss")}
+                total = sum(m["pss"] for m in mem)
+                print(f"{mode:<8} {n:>7} {avg['rss']:>9.0f}MB {avg['pss']:>9.0f}MB "
+                      f"{avg['uss']:>9.0f}MB {total:>8.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark — Phase 4 Feature Matrix: CSV vs Typed Parquet Store
+==============================================================
+A synthetic feature matrix shaped like the Phase 4 export (492,427 pairs
+x 22 columns; 482 match, 76 possible) is written and read back the way
+Phases 5 and 7 consume it:
+
+    csv        to_csv, then pd.read_csv of the whole file and a
+               match_tier filter (5_entity_resolution 5.2,
+               7_temporal_drift 5.8)
+    parquet    pandas to_parquet / pd.read_parquet of the whole file,
+               then the same filter
+    store      artifact_store.write_feature_matrix, then
+               read_feature_matrix: only the match/possible row groups
+               and, for Phase 5, only 3 columns
+
+Run:  python benchmarks/bench_artifact_store.py [--rows 492427]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import artifact_store as store  # noqa: E402
+
+EXPORT_COLS = ['index_op', 'index_med', 'first_jw', 'first_lev', 'last_jw', 'last_lev',
+               'first_soundex_match', 'last_soundex_match', 'first_metaphone_match', 'last_metaphone_match',
+               'street_jw', 'city_match', 'zip5_match', 'name_avg', 'addr_avg', 'raw_score',
+               'name_len_ratio', 'full_name_jw', 'match_tier', 'which_path', 'ml_match_prob', 'ml_match_pred']
+PHASE5_COLS = ["index_op", "index_med", "match_tier"]
+
+
+def make_matrix(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({c: rng.random(n) for c in EXPORT_COLS})
+    frame["index_op"] = np.sort(rng.integers(0, 4_683, n))
+    frame["index_med"] = rng.integers(0, 1_175_281, n)
+    for col in ("first_soundex_match", "last_soundex_match", "first_metaphone_match", "last_metaphone_match",
+                "city_match", "zip5_match"):
+        frame[col] = (frame[col] < 0.1).astype(float)
+    tier = np.full(n, "non_match", dtype=object)
+    picked = rng.choice(n, 482 + 76, replace=False)
+    tier[picked[:482]], tier[picked[482:]] = "match", "possible"
+    frame["match_tier"] = tier
+    frame["which_path"] = np.where(tier == "non_match", None, "C_fuzzy_name_addr")
+    frame["ml_match_pred"] = (frame["ml_match_prob"] > 0.45).astype(int)
+    return frame
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=492_427)
+    args = parser.parse_args()
+
+    matrix = make_matrix(args.rows)
+    matched = ["match", "possible"]
+    print(f"{args.rows:,} pairs x {len(EXPORT_COLS)} columns")
+    print(f"{'format':>8} {'write':>7} {'file':>8} {'Phase 5 read':>13} {'Phase 7 read':>13} {'rows':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv, plain, typed = (os.path.join(tmp, f) for f in ("fm.csv", "fm_plain.parquet", "fm.parquet"))
+        runs = [
+            ("csv", lambda: matrix.to_csv(csv, index=False), csv,
+             lambda: (lambda f: f[f["match_tier"].isin(matched)][PHASE5_COLS])(pd.read_csv(csv)),
+             lambda: (lambda f: f[f["match_tier"].isin(matched)])(pd.read_csv(csv))),
+            ("parquet", lambda: matrix.to_parquet(plain, index=False), plain,
+             lambda: (lambda f: f[f["match_tier"].isin(matched)][PHASE5_COLS])(pd.read_parquet(plain)),
+             lambda: (lambda f: f[f["match_tier"].isin(matched)])(pd.read_parquet(plain))),
+            ("store", lambda: store.write_feature_matrix(matrix, typed), typed,
+             lambda: store.read_feature_matrix(typed, columns=PHASE5_COLS),
+             lambda: store.read_feature_matrix(typed)),
+        ]
+        for name, write, path, phase5, phase7 in runs:
+            _, t_write = _timed(write)
+            rows, t5 = _timed(phase5)
+            _, t7 = _timed(phase7)
+            size = os.path.getsize(path) / 1_048_576
+            print(f"{name:>8} {t_write:>6.2f}s {size:>6.1f}MB {t5 * 1000:>11.0f}ms {t7 * 1000:>11.0f}ms {len(rows):>6}")
+        print(f"store row groups read: {store.row_groups_read(typed, [('match_tier', 'in', matched)])}"
+              f" of {-(-args.rows // store.ROW_GROUP_ROWS)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark — Phase 3 Strategies A/B/C: String-Key Merge vs Integer Codes
+=======================================================================
+Blocks OP tier-2 records against 1,175,281 synthetic Medicare providers
+with Strategies A, B and C and takes the union, two ways:
+
+    notebook  string keys + DataFrame.merge per strategy, then Python
+              sets of (index_op, index_med) tuples for the union (3.3-3.8)
+    engine    lib/blocking: shared int32 key codes, sort-based expansion
+              and packed int64 pair ids
+
+Each run happens in a forked child process. Peak RSS (VmHWM) is reset
+after the inputs are built, so it covers the blocking and union alone;
+the RSS of the inputs is shown for reference.
+
+Run:  python benchmarks/bench_blocking.py [--op 1000 2000 4683] [--med 1175281]   (Linux only)
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import pandas as pd  # noqa: E402
+
+import blocking  # noqa: E402
+from bench_lsh_blocking import make_frames  # noqa: E402
+from preprocessing import soundex_code_series  # noqa: E402
+
+
+def _status_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field + ":")) / 1024
+
+
+def _reset_peak():
+    with open("/proc/self/clear_refs", "w") as f:  # resets VmHWM to the current RSS (Linux)
+        f.write("5")
+
+
+def make_inputs(n_op: int, n_med: int):
+    op, med = make_frames(n_op, n_med)
+    for frame, first, last in ((op, "Covered_Recipient_First_Name", "Covered_Recipient_Last_Name"),
+                               (med, "Rndrng_Prvdr_First_Name", "Rndrng_Prvdr_Last_Org_Name")):
+        frame["FIRST_NAME_SOUNDEX"] = soundex_code_series(frame[first])
+        frame["LAST_NAME_SOUNDEX"] = soundex_code_series(frame[last])
+    return op, med
+
+
+def notebook_union(op: pd.DataFrame, med: pd.DataFrame) -> int:
+    st_op, st_med = op["Recipient_State"].fillna(""), med["Rndrng_Prvdr_State_Abrvtn"].fillna("")
+    keys = [
+        (op["LAST_NAME_SOUNDEX"].fillna("") + "_" + st_op, med["LAST_NAME_SOUNDEX"].fillna("") + "_" + st_med),
+        (op["Covered_Recipient_Last_Name"].fillna("").str.upper() + "_" + st_op,
+         med["Rndrng_Prvdr_Last_Org_Name"].fillna("").str.upper() + "_" + st_med),
+        (op["FIRST_NAME_SOUNDEX"].fillna("") + "_" + op["LAST_NAME_SOUNDEX"].fillna("") + "_" + st_op,
+         med["FIRST_NAME_SOUNDEX"].fillna("") + "_" + med["LAST_NAME_SOUNDEX"].fillna("") + "_" + st_med),
+    ]
+    sets = []
+    for op_key, med_key in keys:
+        pairs = (op_key.rename("_block").reset_index().rename(columns={"index": "index_op"})
+                 .merge(med_key.rename("_block").reset_index().rename(columns={"index": "index_med"}),
+                        on="_block")[["index_op", "index_med"]])
+        sets.append(set(map(tuple, pairs.values)))
+        del pairs
+    return len(set().union(*sets))
+
+
+def engine_union(op: pd.DataFrame, med: pd.DataFrame) -> int:
+    union, _ = blocking.union_pairs(blocking.run_strategies(op, med), len(op), len(med))
+    return len(union)
+
+
+def _child(path: str, n_op: int, n_med: int, queue):
+    op, med = make_inputs(n_op, n_med)
+    _reset_peak()
+    before = _status_mb("VmRSS")
+    start = time.perf_counter()
+    n = (notebook_union if path == "notebook" else engine_union)(op, med)
+    queue.put((n, time.perf_counter() - start, before, _status_mb("VmHWM")))
+
+
+def measure(path: str, n_op: int, n_med: int):
+    queue = mp.get_context("fork").Queue()
+    child = mp.get_context("fork").Process(target=_child, args=(path, n_op, n_med, queue))
+    child.start()
+    result = queue.get()
+    child.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--op", type=int, nargs="+", default=[1_000, 2_000, 4_683])
+    parser.add_argument("--med", type=int, default=1_175_281)
+    args = parser.parse_args()
+
+    print(f"Strategies A+B+C vs {args.med:,} Medicare providers")
+    print(f"{'OP':>6} {'path':>9} {'union pairs':>12} {'time':>8} {'inputs RSS':>11} {'peak RSS':>9}")
+    for n_op in args.op:
+        for path in ("notebook", "engine"):
+            n, elapsed, before, peak = measure(path, n_op, args.med)
+            print(f"{n_op:>6,} {path:>9} {n:>12,} {elapsed:>7.1f}s {before:>9,.0f}MB {peak:>7,.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark — Canopy Blocking: Dense Per-State Loop vs Sparse Top-k
+=================================================================
+Canopy blocking of 4,683 OP tier-2 records against 1,175,281 synthetic
+Medicare providers (T1=0.6, T2=0.4), in three ways:
+
+    notebook   per-state TfidfVectorizer, dense cosine_distances matrix
+               and a Python loop over OP rows (3_linkage.ipynb 3.6)
+    sparse     canopy_blocking.canopy_block, all pairs within T1
+    sparse k   the same, capped at the --k nearest per OP record
+
+Each run happens in a forked child. Peak RSS (VmHWM) is reset after the
+inputs are built. The notebook's T2 pairs must equal the sparse run's
+tight pairs.
+
+Run:  python benchmarks/bench_canopy_blocking.py [--op 4683] [--med 1175281] [--k 10] [--workers 1]   (Linux only)
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import canopy_blocking as cb  # noqa: E402
+from bench_blocking import _reset_peak, _status_mb  # noqa: E402
+from bench_lsh_blocking import make_frames  # noqa: E402
+
+
+def notebook_canopy(op: pd.DataFrame, med: pd.DataFrame) -> set:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_distances
+
+    op_can = cb.name_strings(op["Covered_Recipient_First_Name"], op["Covered_Recipient_Last_Name"],
+                             op["Recipient_State"])
+    med_can = cb.name_strings(med["Rndrng_Prvdr_First_Name"], med["Rndrng_Prvdr_Last_Org_Name"],
+                              med["Rndrng_Prvdr_State_Abrvtn"])
+    states = sorted(set(op["Recipient_State"].dropna()) & set(med["Rndrng_Prvdr_State_Abrvtn"].dropna()))
+    pairs = []
+    for state in states:
+        op_st, med_st = op_can[op["Recipient_State"] == state], med_can[med["Rndrng_Prvdr_State_Abrvtn"] == state]
+        all_str = pd.concat([op_st.reset_index(drop=True), med_st.reset_index(drop=True)], ignore_index=True)
+        mat = TfidfVectorizer(analyzer="char", ngram_range=(3, 3)).fit_transform(all_str)
+        dist = cosine_distances(mat[:len(op_st)], mat[len(op_st):])
+        for i in range(len(op_st)):
+            for j in np.where(dist[i] <= cb.T2)[0]:
+                pairs.append((op_st.index[i], med_st.index[j]))
+    return set(pairs)
+
+
+def _child(mode: str, args, queue):
+    op, med = make_frames(args.op, args.med)
+    _reset_peak()
+    start = time.perf_counter()
+    if mode == "notebook":
+        tight = notebook_canopy(op, med)
+        n_pairs = len(tight)
+    else:
+        pairs = cb.canopy_block(op, med, k=args.k if mode == "sparse k" else None, workers=args.workers)
+        tight = set(zip(pairs.loc[pairs["tight"], "index_op"], pairs.loc[pairs["tight"], "index_med"]))
+        n_pairs = len(pairs)
+    queue.put((n_pairs, len(tight), hash(frozenset(tight)), time.perf_counter() - start, _status_mb("VmHWM")))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--op", type=int, default=4_683)
+    parser.add_argument("--med", type=int, default=1_175_281)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("fork")
+    print(f"{args.op:,} OP x {args.med:,} Medicare, T1={cb.T1}, T2={cb.T2}, k={args.k}, workers={args.workers}")
+    print(f"{'mode':>9} {'pairs':>10} {'T2 pairs':>10} {'time':>8} {'peak RSS':>9} {'T2 same':>8}")
+    reference = None
+    for mode in ("notebook", "sparse", "sparse k"):
+        queue = ctx.Queue()
+        child = ctx.Process(target=_child, args=(mode, args, queue))
+        child.start()
+        n_pairs, n_tight, digest, elapsed, peak = queue.get()
+        child.join()
+        reference = digest if reference is None else reference
+        same = "—" if mode == "sparse k" else ("yes" if digest == reference else "NO")
+        print(f"{mode:>9} {n_pairs:>10,} {n_tight:>10,} {elapsed:>7.1f}s {peak:>7,.0f}MB {same:>8}")
+
+
+if __name__ == "__main__":
+    main()
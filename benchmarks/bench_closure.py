@@ -0,0 +1,146 @@
+"""
+Benchmark — Phase 5 Transitive Closure: Chained Merges vs Union-Find
+====================================================================
+A synthetic 5M-edge record graph: 2,000,000 OP records, 1,237,145
+backbone providers and 1,300,000 PECOS enrollments. OP records link to
+1-8 providers (skewed) of one 16-provider name block, every PECOS row
+links to a provider, and 150,000 provider-provider links join duplicate
+NPIs in nearby blocks, chaining blocks. Compared:
+
+    notebook  5.9 / 5.10: op_links merged with the PECOS links on
+              provider_id (chains), groupby("index_op") sizes for
+              multi-match, NPI counts per OP record. Provider-provider
+              links would need another merge per hop and are left out
+    loop      textbook union-find, one edge at a time in Python lists
+              (path compression, union by rank)
+    closure   closure.UnionFind over all edges in vectorized rounds, then
+              components and cluster_summary (sizes, per-source counts,
+              NPI conflicts)
+
+Components are checked against scipy.sparse.csgraph.connected_components.
+
+Run:  python benchmarks/bench_closure.py [--op 2000000] [--edges 5000000] [--skip-loop]
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from scipy.sparse import coo_matrix  # noqa: E402
+from scipy.sparse.csgraph import connected_components  # noqa: E402
+
+import closure  # noqa: E402
+
+N_MED, N_PECOS, N_DUP, BLOCK = 1_237_145, 1_300_000, 150_000, 16
+
+
+def make_graph(n_op: int, n_edges: int, seed: int = 0):
+    """Sizes, link tables and per-provider NPIs; OP-Med links fill what PECOS and duplicate links leave of n_edges."""
+    rng = np.random.default_rng(seed)
+    n_op_links = n_edges - N_PECOS - N_DUP
+    # candidates per OP record: 1 for most, up to 8 for common names
+    per_op = np.minimum(rng.geometric(0.55, n_op), 8)
+    index_op = np.repeat(np.arange(n_op), per_op)[:n_op_links]
+    index_op = np.concatenate([index_op, rng.integers(0, n_op, n_op_links - len(index_op))])
+    # candidates share a name block of BLOCK providers, as blocking would give
+    block = rng.integers(0, N_MED // BLOCK, n_op)[index_op]
+    op_links = pd.DataFrame({"index_op": index_op, "provider_id": block * BLOCK + rng.integers(0, BLOCK, len(index_op))})
+    pecos = pd.DataFrame({"pecos_row": np.arange(N_PECOS), "provider_id": rng.integers(0, N_MED, N_PECOS),
+                          "ENRLMT_ID": np.arange(N_PECOS)})
+    npi = 1_003_000_000 + np.arange(N_MED, dtype=np.int64) * 7
+    # duplicate NPIs sit in nearby blocks (a re-enrolled provider under a changed name), chaining blocks
+    dup_a = rng.integers(0, N_MED - 64, N_DUP)
+    dup_b = dup_a + rng.integers(BLOCK, 64, N_DUP)
+    npi[dup_b] = npi[dup_a]
+    dups = pd.DataFrame({"a": dup_a, "b": dup_b})
+    sizes = {"op": n_op, "med": N_MED, "pecos": N_PECOS}
+    return sizes, op_links, pecos, dups, npi
+
+
+def notebook_merges(op_links: pd.DataFrame, pecos: pd.DataFrame, npi: np.ndarray):
+    chains = op_links.merge(pecos[["provider_id", "ENRLMT_ID"]], on="provider_id", how="left")
+    chains["linkage_path"] = np.where(chains["ENRLMT_ID"].notna(), "OP → NPI → PECOS", "OP → NPI → no PECOS")
+    n_candidates = op_links.groupby("index_op").size()
+    multi_npi = (op_links.assign(npi=npi[op_links["provider_id"]]).groupby("index_op")["npi"].nunique() > 1).sum()
+    return chains, int((n_candidates > 1).sum()), int(multi_npi)
+
+
+def loop_union_find(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    parent, rank = list(range(n)), [0] * n
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for a, b in zip(left.tolist(), right.tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            if rank[ra] < rank[rb]:
+                ra, rb = rb, ra
+            parent[rb] = ra
+            rank[ra] += rank[ra] == rank[rb]
+    return pd.factorize(np.array([find(x) for x in range(n)]))[0]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--op", type=int, default=2_000_000)
+    parser.add_argument("--edges", type=int, default=5_000_000)
+    parser.add_argument("--skip-loop", action="store_true", help="skip the pure-Python union-find")
+    args = parser.parse_args()
+
+    sizes, op_links, pecos, dups, npi = make_graph(args.op, args.edges)
+    links = [("op", op_links["index_op"].to_numpy(), "med", op_links["provider_id"].to_numpy()),
+             ("pecos", pecos["pecos_row"].to_numpy(), "med", pecos["provider_id"].to_numpy()),
+             ("med", dups["a"].to_numpy(), "med", dups["b"].to_numpy())]
+    start = closure.offsets(sizes)
+    left = np.concatenate([start[a] + rows_a for a, rows_a, _, _ in links])
+    right = np.concatenate([start[b] + rows_b for _, _, b, rows_b in links])
+    n = sum(sizes.values())
+    print(f"{n:,} records, {len(left):,} edges")
+
+    (chains, n_multi, n_multi_npi), t_nb = _timed(lambda: notebook_merges(op_links, pecos, npi))
+
+    def run_closure():
+        labels = closure.link_graph(sizes, links).components()
+        keys = {"npi": closure.node_values(sizes, {"med": npi})}
+        return labels, closure.cluster_summary(labels, sizes, keys)
+
+    (labels, summary), t_uf = _timed(run_closure)
+    (k, reference), t_scipy = _timed(lambda: connected_components(
+        coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n)), directed=False))
+    same = labels.max() + 1 == k and np.array_equal(labels, pd.factorize(reference)[0])
+    if not args.skip_loop:
+        loop_labels, t_loop = _timed(lambda: loop_union_find(n, left, right))
+        same_loop = np.array_equal(loop_labels, labels)
+
+    linked = summary[summary["size"] > 1]
+    print(f"notebook: {len(chains):,} chain rows, {n_multi:,} multi-match OP records ({n_multi_npi:,} with >1 NPI)")
+    print(f"closure:  {len(linked):,} linked clusters, largest {summary['size'].max():,}, "
+          f"{int(linked['conflict_npi'].sum()):,} with >1 NPI")
+    print(f"{'method':>34} {'time':>8} {'same':>5}")
+    print(f"{'notebook merges (5.9 / 5.10)':>34} {t_nb:>7.2f}s {'—':>5}")
+    if not args.skip_loop:
+        print(f"{'Python union-find loop':>34} {t_loop:>7.2f}s {'yes' if same_loop else 'NO':>5}")
+    print(f"{'closure UnionFind + summary':>34} {t_uf:>7.2f}s {'yes' if same else 'NO':>5}")
+    print(f"{'scipy connected_components':>34} {t_scipy:>7.2f}s {'ref':>5}")
+
+
+if __name__ == "__main__":
+    main()
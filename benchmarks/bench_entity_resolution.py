@@ -0,0 +1,142 @@
+"""
+Benchmark — Phase 5 Full Rebuild vs Incremental Delta
+=====================================================
+A synthetic Phase 5 build over 1,175,281 Medicare providers, a year of
+Open Payments (4,683 tier-2 and 200,000 tier-1 rows) and 1,175,281 PECOS
+enrollments, then one monthly OP drop and one quarterly PECOS drop, each
+folded in two ways:
+
+    rebuild   entity_resolution.build over base + delta: every tier-2 row
+              re-blocked and re-scored, payments,
+              enrollments, chains and the unified table from scratch
+    delta     entity_resolution.apply_delta on the base state: only the
+              delta's tier-2 rows are blocked and scored; partials,
+              enrollments, chains and unified rows of touched
+              provider_ids are updated
+
+Both states are checked to agree (payment sums to float tolerance). The
+synthetic names share few Soundex codes, so strategy A alone gives 11.4M
+pairs (the real A/B/C union is 492K); blocking defaults to strategy B.
+
+Run:  python benchmarks/bench_entity_resolution.py [--med 1175281] [--tier2 4683] [--tier1 200000] [--strategies B]
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import entity_resolution as er  # noqa: E402
+from blocking import run_strategies, union_pairs  # noqa: E402
+from bench_pair_features import make_inputs  # noqa: E402
+
+
+def payment_columns(n: int, rng) -> dict:
+    return {
+        "payment_count": rng.integers(1, 40, n),
+        "total_payment_amount": rng.gamma(1.2, 900.0, n).round(2),
+        "max_payment": rng.gamma(1.2, 400.0, n).round(2),
+        "min_payment_date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 180, n), unit="D"),
+        "max_payment_date": pd.Timestamp("2023-07-01") + pd.to_timedelta(rng.integers(0, 180, n), unit="D"),
+        "unique_manufacturers": rng.integers(1, 8, n),
+    }
+
+
+def make_sources(n_med: int, n_tier2: int, n_tier1: int, seed: int = 0):
+    """Medicare, Open Payments (tier-2 rows, then tier-1) and PECOS frames."""
+    rng = np.random.default_rng(seed)
+    tier2, med, _, _ = make_inputs(n_tier2, n_med, 1, seed)
+    med["Rndrng_NPI"] = 1_003_000_000 + np.arange(n_med, dtype="int64") * 7
+    med["Rndrng_Prvdr_Ent_Cd"] = np.where(med["Rndrng_Prvdr_First_Name"].isna(), "O", "I")
+    med["NPI_VALID"] = rng.random(n_med) < 0.98
+
+    tier2["Covered_Recipient_NPI"] = np.nan
+    tier2["linkage_tier"] = "tier2_fuzzy"
+    tier1 = pd.DataFrame({"Covered_Recipient_NPI": med["Rndrng_NPI"].to_numpy()[rng.integers(0, n_med, n_tier1)]
+                          .astype(float), "linkage_tier": "tier1_npi"})
+    op = pd.concat([tier2, tier1], ignore_index=True)
+    for col, values in payment_columns(len(op), rng).items():
+        op[col] = values
+
+    rows = rng.integers(0, n_med, n_med)
+    pecos = pd.DataFrame({
+        "NPI": med["Rndrng_NPI"].to_numpy()[rows].astype(str),
+        "ENRLMT_ENTITY": med["Rndrng_Prvdr_Ent_Cd"].to_numpy()[rows],
+        "ENRLMT_ID": np.char.add("I", np.arange(n_med).astype(str)).astype(object),
+        "ENRLMT_YEAR": pd.array(rng.integers(2005, 2025, n_med), dtype="Int64"),
+        "FIRST_NAME": med["Rndrng_Prvdr_First_Name"].to_numpy()[rows],
+        "LAST_NAME": med["Rndrng_Prvdr_Last_Org_Name"].to_numpy()[rows],
+        "STATE_CD": med["Rndrng_Prvdr_State_Abrvtn"].to_numpy()[rows],
+    })
+    return med, op, pecos
+
+
+def split(frame: pd.DataFrame, fraction: float, rng):
+    """Base and delta rows: ``fraction`` of the rows, at random, arrive later."""
+    late = rng.random(len(frame)) < fraction
+    return frame[~late].reset_index(drop=True), frame[late].reset_index(drop=True)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def same_state(got: dict, expected: dict) -> bool:
+    try:
+        for name in er.STATE_FRAMES:
+            pd.testing.assert_frame_equal(got[name].reset_index(drop=True), expected[name].reset_index(drop=True),
+                                          check_dtype=False, check_categorical=False)
+    except AssertionError:
+        return False
+    return got["counts"] == expected["counts"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--med", type=int, default=1_175_281)
+    parser.add_argument("--tier2", type=int, default=4_683)
+    parser.add_argument("--tier1", type=int, default=200_000)
+    parser.add_argument("--strategies", nargs="+", default=["B"])
+    args = parser.parse_args()
+
+    def block(op_tier2, med_clean):
+        return union_pairs(run_strategies(op_tier2, med_clean, args.strategies), len(op_tier2), len(med_clean))[0]
+
+    rng = np.random.default_rng(1)
+    med, op, pecos = make_sources(args.med, args.tier2, args.tier1)
+    op_base, op_delta = split(op, 1 / 12, rng)
+    pecos_base, pecos_delta = split(pecos, 0.05, rng)
+    print(f"{args.med:,} Medicare, OP {len(op_base):,} + {len(op_delta):,}, "
+          f"PECOS {len(pecos_base):,} + {len(pecos_delta):,}")
+
+    base, t_base = _timed(lambda: er.build(op_base, med, pecos_base, block=block))
+    fls = er.key_counts(med)
+    rows = []
+    # a delta's rows follow the base's (tier-2 rows are numbered in file order)
+    for source, delta, full in (("op", op_delta,
+                                 lambda: er.build(pd.concat([op_base, op_delta], ignore_index=True), med, pecos_base,
+                                                  block=block)),
+                                ("pecos", pecos_delta,
+                                 lambda: er.build(op_base, med, pd.concat([pecos_base, pecos_delta], ignore_index=True),
+                                                  block=block))):
+        rebuilt, t_full = _timed(full)
+        (state, stats), t_delta = _timed(lambda: er.apply_delta(base, source, delta, med, fls, block))
+        rows.append((source, len(delta), stats, t_full, t_delta, same_state(state, rebuilt)))
+
+    print(f"base build: {t_base:.1f}s, {len(base['unified']):,} providers")
+    print(f"{'delta':>6} {'rows':>8} {'tier-2':>7} {'touched':>8} {'rebuild':>8} {'delta':>7} {'same':>5}")
+    for source, n, stats, t_full, t_delta, same in rows:
+        print(f"{source:>6} {n:>8,} {stats['tier2_scored']:>7,} {stats['providers_touched']:>8,} "
+              f"{t_full:>7.1f}s {t_delta:>6.1f}s {'yes' if same else 'NO':>5}")
+
+
+if __name__ == "__main__":
+    main()
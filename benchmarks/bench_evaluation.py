@@ -0,0 +1,105 @@
+"""
+Benchmark — Findable Records, Ground Truth and Blocking Metrics
+===============================================================
+4,683 OP tier-2 records against 1,175,281 synthetic Medicare providers:
+
+    notebook  3.9: set of Medicare (first, last, state) tuples and an
+              iterrows() probe over OP; 4.5: dict lookup built with
+              iterrows() over Medicare and a probe per findable OP row;
+              3.9's metrics loop over Python sets of pairs
+    harness   evaluation.findable / ground_truth on shared integer key
+              codes; evaluation.evaluate on packed pair ids
+
+Strategies B and C (and their union) are scored; Strategy A's synthetic
+blocks hold millions of pairs and would only measure set building.
+
+Run:  python benchmarks/bench_evaluation.py [--op 4683] [--med 1175281]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import blocking  # noqa: E402
+import evaluation as ev  # noqa: E402
+from bench_blocking import make_inputs  # noqa: E402
+
+
+def notebook_truth(op_tier2: pd.DataFrame, med_clean: pd.DataFrame):
+    med_keys = set(zip(med_clean['Rndrng_Prvdr_First_Name'].str.upper(),
+                       med_clean['Rndrng_Prvdr_Last_Org_Name'].str.upper(),
+                       med_clean['Rndrng_Prvdr_State_Abrvtn']))
+    findable = {idx for idx, r in op_tier2.iterrows()
+                if (str(r['Covered_Recipient_First_Name']).upper(), str(r['Covered_Recipient_Last_Name']).upper(),
+                    str(r['Recipient_State'])) in med_keys}
+    med_lookup = defaultdict(list)
+    for idx, row in med_clean.iterrows():
+        key = (str(row['Rndrng_Prvdr_First_Name']).upper().strip(),
+               str(row['Rndrng_Prvdr_Last_Org_Name']).upper().strip(),
+               str(row['Rndrng_Prvdr_State_Abrvtn']).strip())
+        med_lookup[key].append(idx)
+    gt_pairs = []
+    for idx, row in op_tier2.loc[sorted(findable)].iterrows():
+        key = (row['Covered_Recipient_First_Name'].upper(), row['Covered_Recipient_Last_Name'].upper(),
+               str(row['Recipient_State']).strip())
+        gt_pairs.extend((idx, med_idx) for med_idx in med_lookup.get(key, []))
+    return findable, set(gt_pairs)
+
+
+def notebook_metrics(strats: dict, findable: set, full_cross: int) -> pd.DataFrame:
+    rows = []
+    for name, ps in strats.items():
+        n = len(ps)
+        op_in = {p[0] for p in ps}
+        recall = len(findable & op_in) / len(findable) * 100 if findable else 0
+        rows.append({'strategy': name, 'pairs': n, 'reduction_ratio': 1 - n / full_cross,
+                     'op_coverage': len(op_in), 'recall_ceiling_pct': round(recall, 2)})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--op", type=int, default=4_683)
+    parser.add_argument("--med", type=int, default=1_175_281)
+    args = parser.parse_args()
+
+    op, med = make_inputs(args.op, args.med)
+    ids = blocking.run_strategies(op, med, strategies=("B", "C"))
+    print(f"{args.op:,} OP x {args.med:,} Medicare; B {len(ids['B']):,} pairs, C {len(ids['C']):,} pairs")
+
+    start = time.perf_counter()
+    findable, gt = notebook_truth(op, med)
+    t_truth_nb = time.perf_counter() - start
+    sets = {name: set(zip(*map(list, blocking.split_pair_ids(v)))) for name, v in ids.items()}
+    sets["Union"] = set().union(*sets.values())
+    start = time.perf_counter()
+    expected = notebook_metrics(sets, findable, len(op) * len(med))
+    t_metrics_nb = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mask, truth = ev.findable(op, med), ev.ground_truth(op, med)
+    t_truth = time.perf_counter() - start
+    start = time.perf_counter()
+    table = ev.evaluate(ids, op, med)
+    t_metrics = time.perf_counter() - start
+
+    same_truth = set(np.flatnonzero(mask).tolist()) == findable and \
+        set(zip(*map(list, blocking.split_pair_ids(truth)))) == gt
+    same_metrics = table[expected.columns].equals(expected)
+    print(f"findable {mask.sum():,}, ground-truth pairs {len(truth):,}")
+    print(f"{'step':>24} {'notebook':>9} {'harness':>9} {'same':>5}")
+    print(f"{'findable + ground truth':>24} {t_truth_nb:>8.1f}s {t_truth:>8.2f}s {'yes' if same_truth else 'NO':>5}")
+    print(f"{'metrics (B, C, Union)':>24} {t_metrics_nb:>8.2f}s {t_metrics:>8.2f}s {'yes' if same_metrics else 'NO':>5}")
+    print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark — Phase 6 LSH Sweep: Shared Signatures vs Per-Config Runs
+===================================================================
+Runs the 15-configuration grid (num_perm 64/128/256 x threshold
+0.3-0.7) on 12,813 OP x 1,175,281 Medicare synthetic providers three ways:
+
+    per-config    lsh_block for every configuration, signatures rebuilt
+                  each time (what the notebook loop would do)
+    sweep         lsh_sweep.sweep, signatures built once, --workers 1
+    sweep -w N    the same with N banding processes
+
+The candidate pair counts of the sweep must equal the per-config runs.
+
+Run:  python benchmarks/bench_lsh_sweep.py [--med 1175281] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+from bench_lsh_blocking import make_frames  # noqa: E402
+from preprocessing import soundex_code_series  # noqa: E402
+import lsh_blocking as lb  # noqa: E402
+import lsh_sweep  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--op", type=int, default=12_813)
+    parser.add_argument("--med", type=int, default=1_175_281)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    op, med = make_frames(args.op, args.med)
+    op["LAST_NAME_SOUNDEX"] = soundex_code_series(op["Covered_Recipient_Last_Name"])
+    med["LAST_NAME_SOUNDEX"] = soundex_code_series(med["Rndrng_Prvdr_Last_Org_Name"])
+    grid = [(p, t) for p in lsh_sweep.NUM_PERMS for t in lsh_sweep.THRESHOLDS]
+    for num_perm, threshold in grid:
+        lb.optimal_params(threshold, num_perm)  # cached once, outside all timings
+    print(f"{args.op:,} OP x {args.med:,} Medicare, {len(grid)} configurations, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    expected = [len(lb.lsh_block(op, med, threshold, num_perm)) for num_perm, threshold in grid]
+    per_config = time.perf_counter() - start
+    print(f"  per-config lsh_block   {per_config:8.1f}s")
+
+    for workers in (1, args.workers):
+        start = time.perf_counter()
+        results = lsh_sweep.sweep(op, med, workers=workers)
+        elapsed = time.perf_counter() - start
+        same = results["candidate_pairs"].tolist() == expected
+        print(f"  sweep, {workers} worker(s)     {elapsed:8.1f}s  {per_config / elapsed:5.1f}x  "
+              f"same pairs: {'yes' if same else 'NO'}")
+    print(results.drop(columns=["reduction_ratio", "pairs_per_sec"]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark — Five-Path Classification, Re-Tiering and ML Scoring
+===============================================================
+A synthetic Phase 4 comparison frame (492,427 pairs, feature values on
+and around the 4.3 thresholds) against 1,175,281 synthetic Medicare
+providers:
+
+    notebook  4.3: fls_key strings over Medicare and the pairs,
+              value_counts().map(), pandas path masks, string tiers;
+              4.8: the 4.3 masks re-run for each of 14 Path A settings;
+              4.7 Step 8: predict_proba + predict on the full X_all
+    module    match_classifier.key_counts gathered by index_med, then
+              classify (default and overridden thresholds); one batched
+              predict_proba pass, ml_match_pred from its probabilities
+
+The Random Forest (200 trees, depth 10, as in 4.7) is fit on 50,000
+pairs; fitting is not timed.
+
+Run:  python benchmarks/bench_match_classifier.py [--pairs 492427] [--med 1175281]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+
+import match_classifier as mc  # noqa: E402
+from _synthetic import make_unified  # noqa: E402
+
+GRID = [0.0, 0.5, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.92, 0.95, 1.0]
+BINARY = ['first_soundex_match', 'last_soundex_match', 'first_metaphone_match', 'last_metaphone_match',
+          'city_match', 'state_match', 'zip5_match']
+SWEEP = [(t, 0.85) for t in (0.80, 0.82, 0.85, 0.88, 0.90, 0.92, 0.95)] + \
+        [(0.85, t) for t in (0.80, 0.82, 0.85, 0.88, 0.90, 0.92, 0.95)]
+
+
+def make_inputs(n_pairs: int, n_med: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    unified = make_unified(n_med, seed)
+    med_clean = pd.DataFrame({mc.MED_FIRST: unified["first_med"], mc.MED_LAST: unified["last_med"],
+                              mc.MED_STATE: unified["state_med"]})
+    comp_df = pd.DataFrame({"index_op": np.sort(rng.integers(0, 4_683, n_pairs)),
+                            "index_med": rng.integers(0, n_med, n_pairs)})
+    for col in mc.ML_FEATURE_COLS + ["state_match"]:
+        comp_df[col] = rng.choice([0.0, 1.0], n_pairs) if col in BINARY else rng.choice(GRID, n_pairs)
+    for col, med_col in (("first_name_med", mc.MED_FIRST), ("last_name_med", mc.MED_LAST),
+                         ("state_med", mc.MED_STATE)):
+        comp_df[col] = med_clean[med_col].to_numpy()[comp_df["index_med"]]
+    return comp_df, med_clean
+
+
+def notebook_fls_count(comp_df: pd.DataFrame, med_clean: pd.DataFrame) -> pd.Series:
+    med_key = (med_clean['Rndrng_Prvdr_First_Name'].str.upper().fillna('') + '|' +
+               med_clean['Rndrng_Prvdr_Last_Org_Name'].str.upper().fillna('') + '|' +
+               med_clean['Rndrng_Prvdr_State_Abrvtn'].fillna(''))
+    fls_counts = med_key.value_counts()
+    fls_key_med = (comp_df['first_name_med'].str.upper().fillna('') + '|' +
+                   comp_df['last_name_med'].str.upper().fillna('') + '|' + comp_df['state_med'].fillna(''))
+    return fls_key_med.map(fls_counts).fillna(0).astype(int)
+
+
+def notebook_tiers(comp_df: pd.DataFrame, fls_count: pd.Series, a_first: float = 0.85, a_last: float = 0.85):
+    path_a = ((comp_df['first_jw'] >= a_first) & (comp_df['last_jw'] >= a_last) &
+              ((comp_df['zip5_match'] == 1.0) | (comp_df['street_jw'] >= 0.80)))
+    path_b = ((comp_df['last_lev'] == 1.0) & (comp_df['first_lev'] >= 0.60) &
+              (comp_df['zip5_match'] == 1.0) & (comp_df['city_match'] == 1.0))
+    path_c2 = ((comp_df['first_jw'] >= 0.92) & (comp_df['first_lev'] >= 0.75) & (comp_df['last_jw'] == 1.0) &
+               ((comp_df['zip5_match'] == 1.0) | (comp_df['city_match'] == 1.0)))
+    path_d = ((comp_df['first_lev'] == 1.0) & (comp_df['last_lev'] == 1.0) & (comp_df['state_match'] == 1.0) &
+              ((fls_count <= 3) | ((fls_count > 3) & ((comp_df['city_match'] == 1.0) | (comp_df['zip5_match'] == 1.0)))))
+    path_e = ((comp_df['last_lev'] == 1.0) & (comp_df['first_jw'] >= 0.90) & (comp_df['first_lev'] >= 0.80) &
+              (comp_df['city_match'] == 1.0) & (comp_df['state_match'] == 1.0))
+    match_mask = path_a | path_b | path_c2 | path_d | path_e
+    possible_mask = (~match_mask & (comp_df['first_jw'] >= 0.65) & (comp_df['first_lev'] >= 0.60) &
+                     (comp_df['last_jw'] >= 0.90) &
+                     ((comp_df['zip5_match'] == 1.0) | (comp_df['city_match'] == 1.0) | (comp_df['street_jw'] >= 0.70)))
+    tier = pd.Series('non_match', index=comp_df.index)
+    tier[possible_mask] = 'possible'
+    tier[match_mask] = 'match'
+    which = pd.Series(np.select([path_a, path_b, path_c2, path_d, path_e, possible_mask],
+                                ['A', 'B', 'C2', 'D', 'E', 'possible'], default='none'), index=comp_df.index)
+    return tier, which
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1_048_576
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=492_427)
+    parser.add_argument("--med", type=int, default=1_175_281)
+    args = parser.parse_args()
+
+    comp_df, med_clean = make_inputs(args.pairs, args.med)
+    print(f"{args.pairs:,} pairs x {args.med:,} Medicare")
+
+    (nb_count, (nb_tier, nb_which)), t_nb = _timed(
+        lambda: (lambda c: (c, notebook_tiers(comp_df, c)))(notebook_fls_count(comp_df, med_clean)))
+    (fls_count, tiers), t_mod = _timed(lambda: (lambda c: (c, mc.classify(comp_df, c)))(
+        mc.pair_counts(comp_df["index_med"], *mc.key_counts(med_clean))))
+    same = (fls_count.tolist() == nb_count.tolist() and tiers["match_tier"].astype(str).tolist() == nb_tier.tolist()
+            and tiers["which_path"].astype(str).tolist() == nb_which.tolist())
+
+    nb_sweep, t_nb_sweep = _timed(lambda: [(notebook_tiers(comp_df, nb_count, a, b)[0] == 'match').sum()
+                                           for a, b in SWEEP])
+    sweep, t_sweep = _timed(lambda: [(mc.classify(comp_df, fls_count, {"a_first_jw": a, "a_last_jw": b})
+                                      ["match_tier"] == "match").sum() for a, b in SWEEP])
+
+    sample = comp_df.sample(50_000, random_state=42)
+    model = RandomForestClassifier(n_estimators=200, max_depth=10, class_weight='balanced', random_state=42)
+    model.fit(sample[mc.ML_FEATURE_COLS].values, (tiers["match_tier"].to_numpy()[sample.index] == "match").astype(int))
+
+    def notebook_scores():
+        X_all = comp_df[mc.ML_FEATURE_COLS].values
+        return model.predict_proba(X_all)[:, 1], model.predict(X_all)
+
+    def module_scores():
+        prob = mc.predict_proba(model, comp_df)
+        return prob, mc.classify(comp_df, fls_count, ml_prob=prob)["ml_match_pred"].to_numpy()
+
+    (nb_prob, nb_pred), t_nb_ml, mb_nb = _peak_mb(notebook_scores)
+    (prob, pred), t_ml, mb_ml = _peak_mb(module_scores)
+
+    counts = tiers["match_tier"].value_counts()
+    print(f"tiers: match {counts['match']:,}, possible {counts['possible']:,}, non_match {counts['non_match']:,}")
+    print(f"{'step':>28} {'notebook':>9} {'module':>9} {'same':>5}")
+    print(f"{'4.3 rarity + five paths':>28} {t_nb:>8.2f}s {t_mod:>8.2f}s {'yes' if same else 'NO':>5}")
+    print(f"{'4.8 re-tier x14 (Path A)':>28} {t_nb_sweep:>8.2f}s {t_sweep:>8.2f}s "
+          f"{'yes' if list(map(int, sweep)) == list(map(int, nb_sweep)) else 'NO':>5}")
+    print(f"{'4.7 score + predict (RF)':>28} {t_nb_ml:>8.2f}s {t_ml:>8.2f}s "
+          f"{'yes' if np.array_equal(prob, nb_prob) and np.array_equal(pred, nb_pred) else 'NO':>5}")
+    print(f"{'peak traced memory, scoring':>28} {mb_nb:>7.0f}MB {mb_ml:>7.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
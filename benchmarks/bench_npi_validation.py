@@ -0,0 +1,61 @@
+"""
+Benchmark — Scalar vs Bulk NPI Luhn Validation
+==============================================
+Times `Series.apply(is_valid_npi)`, the way notebook 2 fills `NPI_VALID`,
+against `is_valid_npi_array` on synthetic NPI columns (10M rows by default).
+The column shapes covered are int64 (Medicare `Rndrng_NPI`), str (PECOS
+`NPI`) as object and as pyarrow-backed strings, and float64 with NaN (Open
+Payments recipient NPIs). Each pair is checked for identical output.
+
+Run:  python benchmarks/bench_npi_validation.py [--rows 10000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lib"))
+
+from preprocessing import is_valid_npi, is_valid_npi_array  # noqa: E402
+
+
+def make_npis(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    npis = rng.integers(1_000_000_000, 2_000_000_000, n)
+    npis[rng.random(n) < 0.01] //= 10  # a few truncated IDs
+    with_nan = npis.astype("float64")
+    with_nan[rng.random(n) < 0.05] = np.nan
+    return {
+        "int64": pd.Series(npis),
+        "str": pd.Series(npis.astype(str).astype(object)),
+        "str[arrow]": pd.Series(npis.astype(str), dtype="string[pyarrow]"),
+        "float64+NaN": pd.Series(with_nan),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} rows")
+    print(f"{'input':<12} {'apply':>9} {'array':>9} {'speedup':>8} {'Mrows/s':>8}")
+    for label, s in make_npis(args.rows).items():
+        start = time.perf_counter()
+        expected = s.apply(is_valid_npi).to_numpy()
+        scalar = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = is_valid_npi_array(s)
+        vector = time.perf_counter() - start
+
+        assert np.array_equal(actual, expected), label
+        print(f"{label:<12} {scalar:>8.2f}s {vector:>8.2f}s {scalar / vector:>7.0f}x "
+              f"{args.rows / vector / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark — Out-of-Core Phase 5 / Phase 7 Peak Memory
+=====================================================
+Writes synthetic Phase 2 / Phase 4 artifacts: 1,175,281 Medicare rows,
+2,000,000 PECOS rows, a 492K-pair feature matrix, Med -> PECOS tier-1
+links, and a growing Open Payments file (11M rows is one year).
+It then runs Phase 5 (unified table, payments, chains) and Phase 7
+(year / cohort CSVs) two ways. Each run is a child process, so
+ru_maxrss is that run's peak:
+
+    pandas    the notebooks' shape: every artifact read whole with
+              pd.read_parquet, entity_resolution.build + write_outputs,
+              then 7_temporal_drift.ipynb's groupbys and merges
+    duckdb    outofcore.entity_resolution_outputs and
+              temporal_drift_outputs under --memory-limit, spilling to a
+              temp directory
+
+The pandas run is skipped above --pandas-max OP rows; a run the kernel
+kills for memory is reported as such.
+
+Run:  python benchmarks/bench_outofcore.py [--op-rows 2750000 11000000 33000000] [--memory-limit 1GB] [--pandas-max 11000000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+LIB_DIR = os.path.join(BENCH_DIR, "..", "lib")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, LIB_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from _synthetic import FIRST_NAMES, LAST_NAMES, STATES, zipf_names  # noqa: E402
+
+N_MED, N_PECOS, N_PAIRS = 1_175_281, 2_000_000, 492_427
+OP_PER_YEAR, TIER2_PER_YEAR, CHUNK = 11_000_000, 4_683, 1_000_000
+
+
+def write_artifacts(root: str, n_op: int, seed: int = 0):
+    """Phase 2 / Phase 4 parquet under ``root``: ``n_op`` OP rows, tier-2 at the real 4,683 per year."""
+    rng = np.random.default_rng(seed)
+    p2, p4 = os.path.join(root, "phase2"), os.path.join(root, "phase4")
+    os.makedirs(p2, exist_ok=True), os.makedirs(p4, exist_ok=True)
+    npi = 1_003_000_000 + np.arange(N_MED, dtype=np.int64) * 7
+    org = rng.random(N_MED) < 0.05
+    med = pd.DataFrame({
+        "Rndrng_NPI": npi,
+        "Rndrng_Prvdr_First_Name": np.where(org, None, zipf_names(N_MED, FIRST_NAMES, 5_000, rng)),
+        "Rndrng_Prvdr_Last_Org_Name": zipf_names(N_MED, LAST_NAMES, 50_000, rng),
+        "Rndrng_Prvdr_State_Abrvtn": rng.choice(STATES, N_MED),
+        "Rndrng_Prvdr_Ent_Cd": np.where(org, "O", "I"),
+        "NPI_VALID": rng.random(N_MED) < 0.98,
+    })
+    med.to_parquet(os.path.join(p2, "medicare_clean.parquet"), index=False)
+
+    rows = rng.integers(0, N_MED, N_PECOS)
+    pecos = pd.DataFrame({
+        "NPI": npi[rows].astype(str),
+        "ENRLMT_ENTITY": med["Rndrng_Prvdr_Ent_Cd"].to_numpy()[rows],
+        "ENRLMT_ID": np.char.add("I", np.arange(N_PECOS).astype(str)).astype(object),
+        "ENRLMT_YEAR": rng.integers(2003, 2024, N_PECOS),
+        "FIRST_NAME": np.where(rng.random(N_PECOS) < 0.03, zipf_names(N_PECOS, FIRST_NAMES, 5_000, rng),
+                               med["Rndrng_Prvdr_First_Name"].to_numpy()[rows]),
+        "LAST_NAME": np.where(rng.random(N_PECOS) < 0.03, zipf_names(N_PECOS, LAST_NAMES, 50_000, rng),
+                              med["Rndrng_Prvdr_Last_Org_Name"].to_numpy()[rows]),
+        "STATE_CD": np.where(rng.random(N_PECOS) < 0.05, rng.choice(STATES, N_PECOS),
+                             med["Rndrng_Prvdr_State_Abrvtn"].to_numpy()[rows]),
+    })
+    pecos.to_parquet(os.path.join(p2, "pecos_clean.parquet"), index=False)
+    indiv = pecos[pecos["ENRLMT_ENTITY"] == "I"].drop_duplicates("NPI")
+    mp = indiv.merge(med.assign(NPI=med["Rndrng_NPI"].astype(str)), on="NPI")
+    mp.to_parquet(os.path.join(p4, "med_pecos_tier1_npi.parquet"), index=False)
+    del pecos, indiv, mp
+
+    tier2_rows = np.sort(rng.choice(n_op, n_op * TIER2_PER_YEAR // OP_PER_YEAR, replace=False))
+    writer = None
+    for start in range(0, n_op, CHUNK):
+        n = min(CHUNK, n_op - start)
+        tier2 = np.isin(np.arange(start, start + n), tier2_rows)
+        chunk = pd.DataFrame({
+            "Covered_Recipient_NPI": np.where(tier2, np.nan, npi[rng.integers(0, N_MED, n)].astype(float)),
+            "Covered_Recipient_First_Name": zipf_names(n, FIRST_NAMES, 5_000, rng),
+            "Covered_Recipient_Last_Name": zipf_names(n, LAST_NAMES, 50_000, rng),
+            "Recipient_City": zipf_names(n, ["AUSTIN", "BOSTON", "DENVER", "MIAMI"], 2_000, rng),
+            "Recipient_State": rng.choice(STATES, n),
+            "Recipient_Zip5": rng.integers(10_000, 99_999, n).astype(str),
+            "linkage_tier": np.where(tier2, "tier2_fuzzy", "tier1_npi"),
+            "payment_count": rng.integers(1, 40, n),
+            "total_payment_amount": rng.gamma(1.2, 900.0, n).round(2),
+            "max_payment": rng.gamma(1.2, 400.0, n).round(2),
+            "min_payment_date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 180, n), unit="D"),
+            "max_payment_date": pd.Timestamp("2023-07-01") + pd.to_timedelta(rng.integers(0, 180, n), unit="D"),
+            "unique_manufacturers": rng.integers(1, 8, n),
+        })
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(os.path.join(p2, "open_payments_clean.parquet"), table.schema)
+        writer.write_table(table)
+    writer.close()
+
+    from artifact_store import write_feature_matrix
+    pairs = pd.DataFrame({"index_op": rng.integers(0, len(tier2_rows), N_PAIRS),
+                          "index_med": rng.integers(0, N_MED, N_PAIRS),
+                          "match_tier": np.where(rng.random(N_PAIRS) < 0.0015, "match", "non_match")})
+    write_feature_matrix(pairs.drop_duplicates(["index_op", "index_med"]), os.path.join(p4, "feature_matrix.parquet"))
+
+
+def notebook_phase7(p2: str, p4: str, p5: str, out: str):
+    """7_temporal_drift.ipynb 5.1-5.9: whole frames, groupbys and merges."""
+    unified = pd.read_parquet(os.path.join(p5, "unified_provider_entities.parquet"))
+    mp = pd.read_parquet(os.path.join(p4, "med_pecos_tier1_npi.parquet"))
+    pecos = pd.read_parquet(os.path.join(p2, "pecos_clean.parquet"))
+    mp["med_first"] = mp["Rndrng_Prvdr_First_Name"].str.upper().str.strip()
+    mp["med_last"] = mp["Rndrng_Prvdr_Last_Org_Name"].str.upper().str.strip()
+    mp["pecos_first"] = mp["FIRST_NAME"].str.upper().str.strip()
+    mp["pecos_last"] = mp["LAST_NAME"].str.upper().str.strip()
+    mp["first_mismatch"] = (mp["med_first"] != mp["pecos_first"]) & mp["med_first"].notna() & mp["pecos_first"].notna()
+    mp["last_mismatch"] = (mp["med_last"] != mp["pecos_last"]) & mp["med_last"].notna() & mp["pecos_last"].notna()
+    mp["any_mismatch"] = mp["first_mismatch"] | mp["last_mismatch"]
+    year_stats = mp.groupby("ENRLMT_YEAR").agg(
+        total=("any_mismatch", "count"), n_mismatch=("any_mismatch", "sum"),
+        n_first_mm=("first_mismatch", "sum"), n_last_mm=("last_mismatch", "sum")).reset_index()
+    year_stats.to_csv(os.path.join(out, "name_mismatch_by_year.csv"), index=False)
+    mp["state_changed"] = ((mp["Rndrng_Prvdr_State_Abrvtn"] != mp["STATE_CD"])
+                           & mp["Rndrng_Prvdr_State_Abrvtn"].notna() & mp["STATE_CD"].notna())
+    state_drift = mp.groupby("ENRLMT_YEAR").agg(total=("state_changed", "count"),
+                                                n_changed=("state_changed", "sum")).reset_index()
+    state_drift.to_csv(os.path.join(out, "state_drift_by_year.csv"), index=False)
+    pecos_indiv = pecos[pecos["ENRLMT_ENTITY"] == "I"].copy()
+    enrl_per_npi = pecos_indiv.groupby("NPI").agg(
+        n_enrollments=("ENRLMT_ID", "nunique"), n_years=("ENRLMT_YEAR", "nunique"),
+        first_year=("ENRLMT_YEAR", "min"), last_year=("ENRLMT_YEAR", "max"),
+        n_states=("STATE_CD", "nunique"), n_names=("LAST_NAME", "nunique")).reset_index()
+    enrl_per_npi["tenure"] = 2023 - enrl_per_npi["first_year"]
+    enrl_per_npi["cohort"] = pd.cut(enrl_per_npi["tenure"], bins=[0, 2, 5, 10, 15, 50],
+                                    labels=["0-2yr", "3-5yr", "6-10yr", "11-15yr", "16+yr"], right=True)
+    unified_slim = unified[["npi", "has_op_payments", "has_pecos_enrollment", "linkage_coverage"]].copy()
+    unified_slim["npi"] = pd.to_numeric(unified_slim["npi"], errors="coerce")
+    enrl_per_npi["NPI"] = pd.to_numeric(enrl_per_npi["NPI"], errors="coerce")
+    cohort_merged = enrl_per_npi.merge(unified_slim, left_on="NPI", right_on="npi", how="left")
+    cohort_merged.groupby("cohort", observed=True).agg(
+        n_providers=("NPI", "count"), has_op_pct=("has_op_payments", lambda x: x.mean() * 100),
+        avg_enrollments=("n_enrollments", "mean")).round(2).reset_index().to_csv(
+        os.path.join(out, "tenure_cohort_analysis.csv"), index=False)
+
+
+def child(mode: str, root: str, memory_limit: str):
+    p2, p4 = os.path.join(root, "phase2"), os.path.join(root, "phase4")
+    p5, p7 = os.path.join(root, f"phase5_{mode}"), os.path.join(root, f"phase7_{mode}")
+    os.makedirs(p5, exist_ok=True), os.makedirs(p7, exist_ok=True)
+    start = time.perf_counter()
+    if mode == "pandas":
+        import entity_resolution as er
+        from artifact_store import read_feature_matrix
+        pairs = read_feature_matrix(os.path.join(p4, "feature_matrix.parquet"),
+                                    columns=["index_op", "index_med", "match_tier"])
+        state = er.build(pd.read_parquet(os.path.join(p2, "open_payments_clean.parquet")),
+                         pd.read_parquet(os.path.join(p2, "medicare_clean.parquet")),
+                         pd.read_parquet(os.path.join(p2, "pecos_clean.parquet")), pairs)
+        er.write_outputs(state, p5)
+        del state
+        t5 = time.perf_counter() - start
+        notebook_phase7(p2, p4, p5, p7)
+    else:
+        import outofcore
+        con = outofcore.connect(memory_limit, os.path.join(root, "spill"))
+        outofcore.entity_resolution_outputs(con, p2, os.path.join(p4, "feature_matrix.parquet"), p5)
+        t5 = time.perf_counter() - start
+        outofcore.temporal_drift_outputs(con, p2, p4, p5, p7)
+    elapsed = time.perf_counter() - start
+    unified = pq.read_table(os.path.join(p5, "unified_provider_entities.parquet"), columns=["has_op_payments"])
+    print(f"{t5:.1f} {elapsed:.1f} {pa.compute.sum(unified['has_op_payments']).as_py()}")
+
+
+def _measure(mode: str, root: str, memory_limit: str) -> tuple:
+    """Run one child under a fresh wrapper process so RUSAGE_CHILDREN covers only that child."""
+    code = (
+        "import resource, subprocess, sys\n"
+        "r = subprocess.run(sys.argv[1:], capture_output=True, text=True)\n"
+        "print(r.stdout.strip() if r.returncode == 0 else f'nan nan killed({-r.returncode})',\n"
+        "      resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, sys.executable, __file__, "--child", mode, root,
+         "--memory-limit", memory_limit],
+        capture_output=True, text=True, check=True,
+    )
+    t5, elapsed, with_op, peak_kb = result.stdout.split()
+    return float(t5), float(elapsed), with_op, int(peak_kb) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--op-rows", type=int, nargs="+", default=[2_750_000, 11_000_000, 33_000_000])
+    parser.add_argument("--memory-limit", default="1GB")
+    parser.add_argument("--pandas-max", type=int, default=11_000_000)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "ROOT"))
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.memory_limit)
+        return
+
+    print(f"{N_MED:,} Medicare, {N_PECOS:,} PECOS, duckdb memory_limit {args.memory_limit}")
+    print(f"{'OP rows':>11} {'mode':>7} {'Phase 5':>8} {'5 + 7':>8} {'peak RSS':>9} {'with OP':>9}")
+    for n_op in args.op_rows:
+        with tempfile.TemporaryDirectory() as root:
+            write_artifacts(root, n_op)
+            for mode in ("duckdb", "pandas"):
+                if mode == "pandas" and n_op > args.pandas_max:
+                    continue
+                t5, elapsed, with_op, peak = _measure(mode, root, args.memory_limit)
+                print(f"{n_op:>11,} {mode:>7} {t5:>7.1f}s {elapsed:>7.1f}s {peak:>7.0f}MB {with_op:>9}")
+
+
+if __name__ == "__main__":
+    main()
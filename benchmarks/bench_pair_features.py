@@ -0,0 +1,130 @@
+"""
+Benchmark — Phase 4 Pairwise Features: Comparison DataFrame vs Feature Engine
+=============================================================================
+Computes the 17 Phase 4 similarity features for candidate pairs between
+4,683 OP tier-2 records and 1,175,281 synthetic Medicare providers, two ways:
+
+    notebook  merge the pairs with both tables into comp_df, score each
+              field with list comprehensions over zip(s1, s2), then write
+              feature_matrix.csv (4_unified.ipynb 4.1, 4.2, 4.9)
+    engine    pair_features.write_features: shared codes, distinct string
+              pairs scored with rapidfuzz cpdist, parquet (float32, the
+              4.3 rule scores float64)
+
+Pairs are Strategy B (upper last name + state) pairs, sampled down to
+--pairs. Both outputs are checked to agree at the stored precision.
+
+Run:  python benchmarks/bench_pair_features.py [--pairs 492427] [--workers 1 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from rapidfuzz.distance import JaroWinkler, Levenshtein  # noqa: E402
+
+import blocking  # noqa: E402
+import pair_features as pf  # noqa: E402
+from _synthetic import LAST_NAMES, STREET_SUFFIXES, CITIES  # noqa: E402
+from bench_lsh_blocking import make_frames  # noqa: E402
+from preprocessing import metaphone_code_series, soundex_code_series  # noqa: E402
+
+
+def make_inputs(n_op: int, n_med: int, n_pairs: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    op, med = make_frames(n_op, n_med, seed)
+    streets = np.array([f"{num} {LAST_NAMES[num % len(LAST_NAMES)]} {STREET_SUFFIXES[num % 10].upper()}"
+                        for num in range(1, 20_001)], dtype=object)
+    for frame, side in ((op, 0), (med, 1)):
+        n = len(frame)
+        cols = {field: cols[side] for field, cols in pf.FIELDS.items()}
+        frame[cols["street"]] = streets[rng.integers(0, len(streets), n)]
+        frame[cols["city"]] = np.array([c.strip().upper() for c in CITIES], dtype=object)[rng.integers(0, 10, n)]
+        frame[cols["zip5"]] = np.char.zfill(rng.integers(501, 2_000, n).astype(str), 5).astype(object)
+        for field, column, encode in (("first_soundex", cols["first_name"], soundex_code_series),
+                                      ("last_soundex", cols["last_name"], soundex_code_series),
+                                      ("first_metaphone", cols["first_name"], metaphone_code_series),
+                                      ("last_metaphone", cols["last_name"], metaphone_code_series)):
+            frame[cols[field]] = encode(frame[column])
+    pairs = blocking.strategy_pairs(op, med, "B")
+    pairs = pairs.iloc[np.sort(rng.choice(len(pairs), min(n_pairs, len(pairs)), replace=False))]
+    return op, med, pairs["index_op"].to_numpy(), pairs["index_med"].to_numpy()
+
+
+def notebook_cell(op, med, index_op, index_med, path) -> pd.DataFrame:
+    op_fields = op[pf.OP_COLUMNS].set_axis([f"{f}_op" for f in pf.FIELDS], axis=1)
+    med_fields = med[pf.MED_COLUMNS].set_axis([f"{f}_med" for f in pf.FIELDS], axis=1)
+    c = pd.DataFrame({"index_op": index_op, "index_med": index_med})
+    c = c.merge(op_fields, left_on='index_op', right_index=True, how='left')
+    c = c.merge(med_fields, left_on='index_med', right_index=True, how='left')
+
+    def jw_sim(s1, s2):
+        return pd.Series([JaroWinkler.similarity(str(a), str(b)) if (pd.notna(a) and pd.notna(b)) else 0.0
+                          for a, b in zip(s1, s2)], index=s1.index)
+
+    def norm_lev(s1, s2):
+        return pd.Series([Levenshtein.normalized_similarity(str(a), str(b)) if (pd.notna(a) and pd.notna(b))
+                          else 0.0 for a, b in zip(s1, s2)], index=s1.index)
+
+    def exact_match(s1, s2):
+        return (s1.fillna('').astype(str).str.upper() == s2.fillna('').astype(str).str.upper()).astype(float)
+
+    c['first_jw'] = jw_sim(c['first_name_op'], c['first_name_med'])
+    c['first_lev'] = norm_lev(c['first_name_op'], c['first_name_med'])
+    c['last_jw'] = jw_sim(c['last_name_op'], c['last_name_med'])
+    c['last_lev'] = norm_lev(c['last_name_op'], c['last_name_med'])
+    for field in ("first_soundex", "last_soundex", "first_metaphone", "last_metaphone", "city", "state", "zip5"):
+        c[f'{field}_match'] = exact_match(c[f'{field}_op'], c[f'{field}_med'])
+    c['street_jw'] = jw_sim(c['street_op'], c['street_med'])
+    c['name_avg'] = (c['first_jw'] + c['last_jw']) / 2
+    c['addr_avg'] = (c['street_jw'] + c['city_match'] + c['zip5_match']) / 3
+    c['raw_score'] = (c['name_avg'] + c['addr_avg']) / 2
+    fn_op_len = c['first_name_op'].fillna('').astype(str).str.len()
+    fn_med_len = c['first_name_med'].fillna('').astype(str).str.len()
+    min_len = pd.concat([fn_op_len, fn_med_len], axis=1).min(axis=1)
+    max_len = pd.concat([fn_op_len, fn_med_len], axis=1).max(axis=1)
+    c['name_len_ratio'] = (min_len / max_len).fillna(0)
+    full_op = c['first_name_op'].fillna('').astype(str) + ' ' + c['last_name_op'].fillna('').astype(str)
+    full_med = c['first_name_med'].fillna('').astype(str) + ' ' + c['last_name_med'].fillna('').astype(str)
+    c['full_name_jw'] = jw_sim(full_op, full_med)
+    c[["index_op", "index_med"] + pf.FEATURE_COLS].to_csv(path, index=False)
+    return c
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--op", type=int, default=4_683)
+    parser.add_argument("--med", type=int, default=1_175_281)
+    parser.add_argument("--pairs", type=int, default=492_427)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    op, med, index_op, index_med = make_inputs(args.op, args.med, args.pairs)
+    print(f"{len(index_op):,} pairs, {args.op:,} OP x {args.med:,} Medicare, {os.cpu_count()} CPUs")
+    print(f"{'path':>18} {'time':>8} {'file':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        expected = notebook_cell(op, med, index_op, index_med, os.path.join(tmp, "feature_matrix.csv"))
+        size = os.path.getsize(os.path.join(tmp, "feature_matrix.csv")) / 1_048_576
+        print(f"{'notebook + csv':>18} {time.perf_counter() - start:>7.1f}s {size:>7.1f}MB")
+        for workers in args.workers:
+            path = os.path.join(tmp, "pair_features.parquet")
+            start = time.perf_counter()
+            pf.write_features(index_op, index_med, op, med, path, workers=workers)
+            elapsed = time.perf_counter() - start
+            got = pd.read_parquet(path)
+            same = all(np.array_equal(got[col], expected[col].to_numpy().astype(got[col].dtype))
+                       for col in pf.FEATURE_COLS)
+            print(f"{f'engine, {workers} thr':>18} {elapsed:>7.1f}s {os.path.getsize(path) / 1_048_576:>7.1f}MB"
+                  f"   same: {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark — Process-Parallel Phase 2 Cleaning
+=============================================
+Writes a synthetic Medicare service-level CSV and cleans it with 1, 2, 4,
+8 and 16 worker processes:
+
+    clean     pass 1 only: Arrow CSV chunks -> map_tables -> cleaned tables
+    pipeline  preprocess_medicare end to end (pass 2 dedup stays serial)
+
+Each pipeline output is checked against the 1-worker output.
+
+Run:  python benchmarks/bench_preprocessing_parallel.py [--rows 4000000] [--workers 1 2 4 8 16]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "lib"))
+
+import pandas as pd  # noqa: E402
+
+import preprocessing_pipeline as pipeline  # noqa: E402
+from preprocessing_parallel import map_tables  # noqa: E402
+from _synthetic import write_raw_medicare_csv  # noqa: E402
+
+
+def clean_only(csv_path: str, chunksize: int, workers: int) -> float:
+    start = time.perf_counter()
+    chunks = pipeline._read_tables(csv_path, chunksize, pipeline.MEDICARE_DTYPES, usecols=pipeline.MEDICARE_USECOLS)
+    for _ in map_tables(partial(pipeline._clean_medicare_table, parts=8), chunks, workers):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=4_000_000)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "medicare.csv")
+        write_raw_medicare_csv(csv_path, args.rows)
+        print(f"{args.rows:,} service rows, {os.path.getsize(csv_path) / 1024 ** 2:.0f}MB CSV, "
+              f"chunksize {args.chunksize:,}, {os.cpu_count()} CPUs")
+        print(f"{'workers':>7} {'clean':>8} {'speedup':>8} {'pipeline':>9} {'speedup':>8} {'same':>5}")
+        baseline = None
+        for workers in args.workers:
+            clean = clean_only(csv_path, args.chunksize, workers)
+            out = os.path.join(tmp, f"medicare_{workers}.parquet")
+            start = time.perf_counter()
+            pipeline.preprocess_medicare(csv_path, out, chunksize=args.chunksize, workers=workers)
+            total = time.perf_counter() - start
+            result = pd.read_parquet(out)
+            if baseline is None:
+                baseline = (clean, total, result)
+            same = result.equals(baseline[2])
+            print(f"{workers:>7} {clean:>7.1f}s {baseline[0] / clean:>7.2f}x {total:>8.1f}s "
+                  f"{baseline[1] / total:>7.2f}x {'yes' if same else 'NO':>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark — Streaming Phase 2 Pipeline Peak Memory
+==================================================
+Writes synthetic Medicare service-level CSVs of growing size and turns
+each one into medicare_clean.parquet two ways, each in its own child
+process so ru_maxrss is that run's peak:
+
+    whole     the notebook's shape: read the whole CSV, clean it, dedup
+              (the same vectorized cleaners, so only memory differs)
+    stream    preprocessing_pipeline.preprocess_medicare (bounded chunks,
+              spill partitions)
+
+The whole-file run is skipped above --whole-max rows.
+
+Run:  python benchmarks/bench_preprocessing_pipeline.py [--rows 1000000 2000000 4000000 8000000]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+LIB_DIR = os.path.join(BENCH_DIR, "..", "lib")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, LIB_DIR)
+
+from _synthetic import write_raw_medicare_csv  # noqa: E402
+
+
+def child(mode: str, csv_path: str, out_path: str, chunksize: int):
+    import pandas as pd
+    import preprocessing_pipeline as pipeline
+
+    start = time.perf_counter()
+    if mode == "stream":
+        pipeline.preprocess_medicare(csv_path, out_path, chunksize=chunksize)
+    else:
+        raw = pd.read_csv(csv_path, usecols=pipeline.MEDICARE_USECOLS,
+                          dtype=defaultdict(lambda: str, pipeline.MEDICARE_DTYPES))
+        frame = pipeline.clean_medicare_chunk(raw)
+        frame["_row"] = range(len(frame))
+        pipeline.dedup_medicare(frame).drop(columns="_row").to_parquet(out_path, index=False)
+    elapsed = time.perf_counter() - start
+    rows = len(pd.read_parquet(out_path, columns=["Rndrng_NPI"]))
+    print(f"{elapsed:.2f} {rows}")
+
+
+def _measure(mode: str, csv_path: str, out_path: str, chunksize: int) -> tuple:
+    """Run one child under a fresh wrapper process so RUSAGE_CHILDREN covers only that child."""
+    code = (
+        "import resource, subprocess, sys\n"
+        "r = subprocess.run(sys.argv[1:], capture_output=True, text=True, check=True)\n"
+        "print(r.stdout.strip(), resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, sys.executable, __file__, "--child", mode, csv_path, out_path,
+         "--chunksize", str(chunksize)],
+        capture_output=True, text=True, check=True,
+    )
+    elapsed, rows, peak_kb = result.stdout.split()
+    return float(elapsed), int(rows), int(peak_kb) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 2_000_000, 4_000_000, 8_000_000])
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--whole-max", type=int, default=4_000_000)
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "CSV", "OUT"))
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.chunksize)
+        return
+
+    print(f"chunksize {args.chunksize:,}")
+    print(f"{'rows':>10} {'CSV':>8} {'mode':>7} {'time':>8} {'peak RSS':>9} {'out rows':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "medicare.csv")
+        for n in args.rows:
+            write_raw_medicare_csv(csv_path, n)
+            size = os.path.getsize(csv_path) / 1024 ** 2
+            for mode in ("stream", "whole"):
+                if mode == "whole" and n > args.whole_max:
+                    continue
+                elapsed, rows, peak = _measure(mode, csv_path, os.path.join(tmp, f"{mode}.parquet"),
+                                               args.chunksize)
+                print(f"{n:>10,} {size:>6.0f}MB {mode:>7} {elapsed:>7.1f}s {peak:>7.0f}MB {rows:>9,}")
+
+
+if __name__ == "__main__":
+    main()
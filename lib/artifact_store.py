@@ -0,0 +1,139 @@
+# artifact_store.py
+"""
+Typed parquet store for artifacts passed between phases.
+
+Phase 4 wrote feature_matrix.csv and Phases 5 and 7 read it back in full
+with pd.read_csv, although they only use a few columns of the match and
+possible pairs. Here:
+
+    types       each artifact has fixed column types: float32 features
+                (float64 for the ones the 4.3 rules compare),
+                dictionary-encoded low-cardinality strings (match_tier,
+                which_path), int64 row positions. Dictionary columns are
+                stored as parquet strings with dictionary pages and listed
+                in the file metadata: Arrow does not prune row groups on
+                dictionary-typed fields, so they are filtered as strings
+                and re-encoded after the read
+    layout      rows are sorted so the ones readers ask for are contiguous
+                (match, then possible, then non_match), in row groups of
+                ``ROW_GROUP_ROWS``; parquet keeps min/max per row group
+    reads       ``read_artifact`` projects columns and pushes filters down,
+                so row groups whose statistics cannot match are skipped
+                and unused columns are never decoded
+
+``read_feature_matrix(path)`` returns just the matched pairs.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+ROW_GROUP_ROWS = 64_000
+
+TIERS = ["match", "possible", "non_match"]
+MATCHED = ("match", "possible")
+
+_DICT = pa.dictionary(pa.int8(), pa.string())
+_DICTIONARY_KEY = b"dictionary_columns"
+
+# Scores the 4.3 thresholds are applied to. They stay float64 on disk: a
+# float32 score just under a threshold can round onto it (0.8999999999999999
+# -> 0.9), so re-tiering a stored matrix would flip the pair.
+RULE_FEATURE_COLS = ['first_jw', 'first_lev', 'last_jw', 'last_lev', 'street_jw']
+
+# Phase 4 feature matrix (4_unified.ipynb 4.9 export_cols). Columns not
+# listed keep the type pyarrow infers.
+FEATURE_MATRIX_TYPES = {
+    "index_op": pa.int64(), "index_med": pa.int64(),
+    **{col: pa.float32() for col in ['first_soundex_match', 'last_soundex_match',
+                                     'first_metaphone_match', 'last_metaphone_match',
+                                     'city_match', 'state_match', 'zip5_match',
+                                     'name_avg', 'addr_avg', 'raw_score',
+                                     'name_len_ratio', 'full_name_jw', 'ml_match_prob']},
+    **{col: pa.float64() for col in RULE_FEATURE_COLS},
+    "match_tier": _DICT, "which_path": _DICT, "ml_match_pred": pa.int8(),
+}
+
+
+# -----------------------------
+# Write
+# -----------------------------
+
+def to_table(frame: pd.DataFrame, types: dict = None) -> pa.Table:
+    """Arrow table of ``frame`` with the columns in ``types`` cast to their type."""
+    types = types or {}
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    fields = [f.with_type(types[f.name]) if f.name in types else f for f in table.schema]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def write_artifact(frame: pd.DataFrame, path: str, types: dict = None, sort_by: list = None,
+                   row_group_size: int = ROW_GROUP_ROWS) -> int:
+    """Write ``frame`` as typed parquet, optionally sorted by ``sort_by``. Returns rows.
+
+    ``sort_by`` is a list of column names or ``(column, order)`` pairs;
+    an order is a list of values giving their rank (unlisted values last).
+    """
+    if sort_by:
+        keys = []
+        for key in sort_by:
+            col, order = key if isinstance(key, tuple) else (key, None)
+            values = frame[col]
+            if order is not None:
+                values = pd.Categorical(values, categories=list(order)).codes.astype(np.int64)
+                values = np.where(values < 0, len(order), values)
+            keys.append(np.asarray(values))
+        frame = frame.iloc[np.lexsort(keys[::-1])]
+    table = to_table(frame, types)
+    dictionary = [f.name for f in table.schema if pa.types.is_dictionary(f.type)]
+    table = table.cast(pa.schema([f.with_type(f.type.value_type) if f.name in dictionary else f
+                                  for f in table.schema], metadata=table.schema.metadata))
+    # keep the pandas metadata (extension dtypes such as Int64) next to the dictionary list
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           _DICTIONARY_KEY: ",".join(dictionary).encode()})
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    pq.write_table(table, path, row_group_size=row_group_size, use_dictionary=True, write_statistics=True)
+    return len(frame)
+
+
+def write_feature_matrix(frame: pd.DataFrame, path: str, row_group_size: int = ROW_GROUP_ROWS) -> int:
+    """Phase 4 feature matrix, matched tiers first."""
+    sort_by = [("match_tier", TIERS)] if "match_tier" in frame.columns else []
+    sort_by += [c for c in ("index_op", "index_med") if c in frame.columns]
+    return write_artifact(frame, path, FEATURE_MATRIX_TYPES, sort_by, row_group_size)
+
+
+# -----------------------------
+# Read
+# -----------------------------
+
+def read_artifact(path: str, columns: list = None, filters=None) -> pd.DataFrame:
+    """Read ``columns`` of the rows matching ``filters`` (pyarrow DNF, e.g. ``[("match_tier", "in", [...])]``).
+
+    Dictionary columns come back as categoricals of the values read; other
+    columns get the pandas dtype they were written with (Int64 stays Int64).
+    """
+    metadata = pq.read_schema(path).metadata or {}
+    dictionary = set(metadata.get(_DICTIONARY_KEY, b"").decode().split(","))
+    table = pq.read_table(path, columns=columns, filters=filters)
+    for i, name in enumerate(table.column_names):
+        if name in dictionary:
+            table = table.set_column(i, name, table[name].dictionary_encode())
+    return table.to_pandas()
+
+
+def read_feature_matrix(path: str, columns: list = None, tiers=MATCHED) -> pd.DataFrame:
+    """Feature matrix rows whose ``match_tier`` is in ``tiers`` (all rows when ``tiers`` is None)."""
+    filters = None if tiers is None else [("match_tier", "in", list(tiers))]
+    return read_artifact(path, columns, filters)
+
+
+def row_groups_read(path: str, filters) -> int:
+    """Row groups of ``path`` whose statistics can satisfy ``filters`` (the ones a read decodes)."""
+    fragment = next(ds.dataset(path, format="parquet").get_fragments())
+    expression = pq.filters_to_expression(filters)
+    return len(fragment.split_by_row_group(expression))
@@ -0,0 +1,170 @@
+# blocking.py
+"""
+Standard blocking on integer-coded keys (Phase 3 strategies A, B, C).
+
+notebooks/3_linkage.ipynb builds string keys such as
+``LAST_NAME_SOUNDEX + '_' + state`` on both sides, merges them, and then
+turns every strategy's pairs into a Python set of tuples for the union.
+Here each key column is factorized once over both sides into shared int32
+codes, and pairs come out as int64 arrays:
+
+    keys      every column is factorized over OP + Medicare together
+              (missing -> "", as the notebook's fillna('')), and composite
+              keys are combined column by column into one dense int32 code
+    pairs     both sides are sorted by code; each OP row is expanded
+              against the contiguous run of Medicare rows with its code
+              (sort-based cartesian product), giving (index_op, index_med)
+              sorted by OP then Medicare position
+    union     a pair is one int64 id, ``index_op << 32 | index_med``; the
+              union, the per-strategy counts and the pairs unique to one
+              strategy all come from one sorted-unique pass over those ids
+
+``max_block_pairs`` caps a block's OP x Medicare product. Larger blocks are
+skipped, and a warning names how many blocks and pairs were dropped.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+OP_STATE, MED_STATE = "Recipient_State", "Rndrng_Prvdr_State_Abrvtn"
+
+# strategy -> (OP key columns, Medicare key columns); "upper:" columns are upper-cased first
+STRATEGIES = {
+    "A": (["LAST_NAME_SOUNDEX", OP_STATE], ["LAST_NAME_SOUNDEX", MED_STATE]),
+    "B": (["upper:Covered_Recipient_Last_Name", OP_STATE], ["upper:Rndrng_Prvdr_Last_Org_Name", MED_STATE]),
+    "C": (["FIRST_NAME_SOUNDEX", "LAST_NAME_SOUNDEX", OP_STATE],
+          ["FIRST_NAME_SOUNDEX", "LAST_NAME_SOUNDEX", MED_STATE]),
+}
+
+
+# -----------------------------
+# Keys
+# -----------------------------
+
+def _column(frame: pd.DataFrame, spec: str) -> pd.Series:
+    if spec.startswith("upper:"):
+        return frame[spec[len("upper:"):]].fillna("").str.upper()
+    return frame[spec].fillna("")
+
+
+def key_codes(left_cols, right_cols):
+    """Shared dense int32 block codes for two lists of key columns.
+
+    Equal codes mean every column is equal on both sides. Missing values
+    get a code of their own and match each other, like the notebook's
+    ``fillna('')`` keys.
+    """
+    n_left = len(left_cols[0])
+    codes = np.zeros(n_left + len(right_cols[0]), dtype=np.int64)
+    for left, right in zip(left_cols, right_cols):
+        col_codes, uniques = pd.factorize(np.concatenate([np.asarray(left, dtype=object),
+                                                           np.asarray(right, dtype=object)]),
+                                          use_na_sentinel=False)
+        # re-densify after every column so the mixed-radix code never overflows
+        codes = pd.factorize(codes * len(uniques) + col_codes)[0]
+    codes = codes.astype(np.int32)
+    return codes[:n_left], codes[n_left:]
+
+
+def strategy_codes(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, strategy: str):
+    """Block codes for one of the Phase 3 strategies ("A", "B" or "C")."""
+    op_specs, med_specs = STRATEGIES[strategy]
+    return key_codes([_column(op_tier2, c) for c in op_specs], [_column(med_clean, c) for c in med_specs])
+
+
+# -----------------------------
+# Pairs
+# -----------------------------
+
+def block_pairs(left_codes: np.ndarray, right_codes: np.ndarray, max_block_pairs: int = None):
+    """All (left, right) positions with equal codes, as two int64 arrays.
+
+    Pairs are sorted by left then right position. Blocks whose
+    left x right size exceeds ``max_block_pairs`` are skipped with a
+    RuntimeWarning.
+    """
+    n_codes = int(max(left_codes.max(initial=-1), right_codes.max(initial=-1))) + 1
+    right_order = np.argsort(right_codes, kind="stable")
+    right_sizes = np.bincount(right_codes, minlength=n_codes)
+    right_starts = np.cumsum(right_sizes) - right_sizes
+
+    sizes = right_sizes[left_codes]
+    if max_block_pairs is not None:
+        block_totals = np.bincount(left_codes, minlength=n_codes) * right_sizes
+        oversized = block_totals > max_block_pairs
+        if oversized.any():
+            warnings.warn(f"{int(oversized.sum()):,} blocks over max_block_pairs={max_block_pairs:,} skipped "
+                          f"({int(block_totals[oversized].sum()):,} pairs, largest "
+                          f"{int(block_totals.max()):,})", RuntimeWarning, stacklevel=2)
+            sizes = np.where(oversized[left_codes], 0, sizes)
+
+    left = np.repeat(np.arange(len(left_codes), dtype=np.int64), sizes)
+    offsets = np.repeat(right_starts[left_codes] - (np.cumsum(sizes) - sizes), sizes)
+    right = right_order[offsets + np.arange(len(left))].astype(np.int64)
+    return left, right
+
+
+def strategy_pairs(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, strategy: str,
+                   max_block_pairs: int = None) -> pd.DataFrame:
+    """``index_op`` / ``index_med`` pairs of one Phase 3 strategy, by frame index label."""
+    left, right = block_pairs(*strategy_codes(op_tier2, med_clean, strategy), max_block_pairs)
+    return pd.DataFrame({"index_op": op_tier2.index.to_numpy()[left],
+                         "index_med": med_clean.index.to_numpy()[right]})
+
+
+# -----------------------------
+# Packed pair ids and union statistics
+# -----------------------------
+
+def pair_ids(index_op, index_med) -> np.ndarray:
+    """One int64 per pair, ``index_op << 32 | index_med`` (both must be < 2**31)."""
+    return (np.asarray(index_op, dtype=np.int64) << 32) | np.asarray(index_med, dtype=np.int64)
+
+
+def split_pair_ids(ids: np.ndarray):
+    """Inverse of :func:`pair_ids`: ``(index_op, index_med)`` int64 arrays."""
+    return ids >> 32, ids & 0xFFFFFFFF
+
+
+def sorted_distinct(ids: np.ndarray):
+    """np.unique(ids, return_counts=True) by sort and mask (NumPy 2's hash-based unique is slower here)."""
+    ids = np.sort(ids)
+    starts = np.flatnonzero(np.concatenate([[True], ids[1:] != ids[:-1]])) if len(ids) else np.zeros(0, np.intp)
+    return ids[starts], np.diff(np.append(starts, len(ids)))
+
+
+def op_coverage(sorted_ids: np.ndarray) -> int:
+    """Distinct OP rows among sorted pair ids."""
+    op = sorted_ids >> 32
+    return int(len(op) > 0) + int(np.count_nonzero(op[1:] != op[:-1]))
+
+
+def union_pairs(strategies: dict, n_left: int = None, n_right: int = None):
+    """Union of several strategies' pair ids, plus per-strategy statistics.
+
+    ``strategies`` maps a name to an array of pair ids. Returns
+    ``(union_ids, stats)``; ``stats`` has one row per strategy (pairs,
+    pairs found by no other strategy, OP records covered, and the
+    reduction ratio when both sides' sizes are given) and a final "Union"
+    row, whose ``unique_pairs`` counts pairs found by exactly one strategy.
+    """
+    distinct = {name: sorted_distinct(ids)[0] for name, ids in strategies.items()}
+    union, counts = sorted_distinct(np.concatenate(list(distinct.values()) or [np.zeros(0, np.int64)]))
+    once = union[counts == 1]
+    rows = [{"strategy": name, "pairs": len(ids), "unique_pairs": int(np.isin(ids, once, assume_unique=True).sum()),
+             "op_coverage": op_coverage(ids)} for name, ids in distinct.items()]
+    rows.append({"strategy": "Union", "pairs": len(union), "unique_pairs": len(once),
+                 "op_coverage": op_coverage(union)})
+    stats = pd.DataFrame(rows)
+    if n_left is not None and n_right is not None:
+        stats["reduction_ratio"] = 1 - stats["pairs"] / (n_left * n_right)
+    return union, stats
+
+
+def run_strategies(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, strategies=("A", "B", "C"),
+                   max_block_pairs: int = None) -> dict:
+    """Pair ids (by position) for each named Phase 3 strategy."""
+    return {name: pair_ids(*block_pairs(*strategy_codes(op_tier2, med_clean, name), max_block_pairs))
+            for name in strategies}
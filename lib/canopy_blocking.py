@@ -0,0 +1,212 @@
+# canopy_blocking.py
+"""
+Canopy blocking on sparse character-trigram TF-IDF (Phase 3 section 3.6).
+
+notebooks/3_linkage.ipynb fits a TfidfVectorizer per state, builds the
+dense n_op x n_med cosine distance matrix and loops over every OP row in
+Python. Here:
+
+    vocabulary  the distinct name strings of both sides are shingled once
+                into char trigrams (lsh_blocking.shingle, analysed as
+                TfidfVectorizer does) -> one sparse count matrix
+    weights     per state, IDF is computed from that state's document
+                frequencies with TfidfVectorizer's smoothing, rows are
+                L2-normalised, so the vectors equal the notebook's per-state fit
+    neighbours  OP rows are multiplied against the state's Medicare matrix
+                in chunks sized so that one chunk's similarity matrix holds
+                at most ``chunk_pairs`` entries; pairs within the loose
+                distance T1 are kept, capped at the ``k`` nearest per OP record
+    states      run independently, in a process pool when ``workers > 1``
+
+Every returned pair carries its cosine distance and a ``tight`` flag
+(distance <= T2). The notebook's canopy pairs are the tight ones with no
+``k`` cap.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from lsh_blocking import block_codes, name_strings, shingle
+
+T1, T2 = 0.6, 0.4  # loose / tight cosine distance thresholds
+CHUNK_PAIRS = 4_000_000  # similarity entries per chunk (~50MB of float64 + indices)
+
+
+# -----------------------------
+# Vectors
+# -----------------------------
+
+def trigram_counts(texts, q: int = 3):
+    """Sparse char q-gram counts of the distinct texts, one shared vocabulary.
+
+    Texts are analysed as TfidfVectorizer(analyzer="char") does: lower-cased,
+    runs of whitespace collapsed to one space, no padding. Returns
+    ``(counts, codes)``: row ``codes[i]`` of ``counts`` belongs to
+    ``texts[i]``. Non-strings count as empty.
+    """
+    codes, uniques = pd.factorize(pd.Series([t if isinstance(t, str) else "" for t in texts], dtype=object))
+    analysed = pd.Series(uniques, dtype=object).str.lower().str.replace(r"\s\s+", " ", regex=True)
+    ids, offsets, vocab = shingle(analysed.to_numpy(), q)
+    counts = sparse.csr_matrix((np.ones(len(ids)), ids, offsets), shape=(len(uniques), len(vocab)))
+    counts.sum_duplicates()
+    return counts, codes
+
+
+def state_tfidf(counts: sparse.csr_matrix) -> sparse.csr_matrix:
+    """TfidfVectorizer weights (smooth IDF, L2 rows) as if fitted on exactly these rows."""
+    n = counts.shape[0]
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + n) / (1 + df)) + 1
+    return normalize(counts @ sparse.diags(idf), norm="l2", copy=False).tocsr()
+
+
+# -----------------------------
+# Nearest neighbours
+# -----------------------------
+
+def common_columns(left: sparse.csr_matrix, right: sparse.csr_matrix, cut: float, max_common: int = 64):
+    """The most frequent columns whose share of any cosine stays below ``cut``.
+
+    Takes the largest m such that, over the m columns with the highest
+    document frequency, max ||left_row|| * max ||right_row|| < cut. By
+    Cauchy-Schwarz no pair reaches ``cut`` on those columns alone.
+    """
+    df = np.bincount(right.indices, minlength=right.shape[1]) + np.bincount(left.indices, minlength=left.shape[1])
+    order = np.argsort(-df, kind="stable")[:max_common]
+    order = order[df[order] > 0]
+    left_rows = np.repeat(np.arange(left.shape[0]), np.diff(left.indptr))
+    right_rows = np.repeat(np.arange(right.shape[0]), np.diff(right.indptr))
+
+    def bound(m):
+        mask = np.zeros(left.shape[1])
+        mask[order[:m]] = 1.0
+        sq_left = np.bincount(left_rows, left.data ** 2 * mask[left.indices], minlength=left.shape[0])
+        sq_right = np.bincount(right_rows, right.data ** 2 * mask[right.indices], minlength=right.shape[0])
+        return np.sqrt(sq_left.max(initial=0) * sq_right.max(initial=0))
+
+    lo, hi = 0, len(order)  # bound(lo) < cut; find the largest such m
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        lo, hi = (mid, hi) if bound(mid) < cut else (lo, mid - 1)
+    return order[:lo]
+
+
+def nearest_pairs(left: sparse.csr_matrix, right: sparse.csr_matrix, max_distance: float = T1,
+                  k: int = None, chunk_pairs: int = CHUNK_PAIRS):
+    """(i, j, distance) for every left row i and right row j within ``max_distance``.
+
+    Rows must be L2-normalised. With ``k``, only the k nearest right rows
+    per left row are kept (ties go to the lower j). Output is sorted by
+    i, then distance, then j.
+
+    Names in one state all share its trigrams, so the full product is
+    dense. The ``common_columns`` are taken out first: only the rest are
+    multiplied, and their exact share is added back for the pairs whose
+    upper bound can still reach ``1 - max_distance``.
+    """
+    cut = 1.0 - max_distance
+    common = common_columns(left, right, cut) if cut > 0 else np.zeros(0, np.int64)
+    rare = np.ones(left.shape[1])
+    rare[common] = 0.0
+    left_common, right_common = left[:, common].toarray(), right[:, common].toarray()
+    left_norm, right_norm = np.linalg.norm(left_common, axis=1), np.linalg.norm(right_common, axis=1)
+    left_rare = (left @ sparse.diags(rare)).tocsr()
+    left_rare.eliminate_zeros()
+    right_t = (right @ sparse.diags(rare)).T.tocsr()
+    right_t.eliminate_zeros()
+
+    rows_per_chunk = max(1, chunk_pairs // max(right.shape[0], 1))
+    out_i, out_j, out_d = [], [], []
+    for lo in range(0, left.shape[0], rows_per_chunk):
+        sims = left_rare[lo:lo + rows_per_chunk] @ right_t
+        i = np.repeat(np.arange(lo, lo + sims.shape[0]), np.diff(sims.indptr))
+        j, sim = sims.indices, sims.data
+        del sims
+        # 1e-9 slack: the bound must never drop a pair on rounding alone
+        keep = np.flatnonzero(sim + left_norm[i] * right_norm[j] >= cut - 1e-9)
+        i, j = i[keep], j[keep]
+        sim = sim[keep] + np.einsum("ij,ij->i", left_common[i], right_common[j])
+        # clip as sklearn's cosine_distances does
+        distance = np.clip(1.0 - sim, 0.0, 2.0)
+        keep = distance <= max_distance
+        i, j, distance = i[keep], j[keep], distance[keep]
+        order = np.lexsort((j, distance, i))
+        i, j, distance = i[order], j[order], distance[order]
+        if k is not None:
+            starts = np.flatnonzero(np.concatenate([[True], i[1:] != i[:-1]])) if len(i) else np.zeros(0, int)
+            rank = np.arange(len(i)) - np.repeat(starts, np.diff(np.append(starts, len(i))))
+            i, j, distance = i[rank < k], j[rank < k], distance[rank < k]
+        out_i.append(i)
+        out_j.append(j)
+        out_d.append(distance)
+    if not out_i:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0)
+    return np.concatenate(out_i).astype(np.int64), np.concatenate(out_j).astype(np.int64), np.concatenate(out_d)
+
+
+def _state_pairs(left_counts, right_counts, left_rows, right_rows, t1, k, chunk_pairs):
+    weights = state_tfidf(sparse.vstack([left_counts, right_counts]).tocsr())
+    n_left = left_counts.shape[0]
+    i, j, distance = nearest_pairs(weights[:n_left], weights[n_left:], t1, k, chunk_pairs)
+    return left_rows[i], right_rows[j], distance
+
+
+def canopy_pairs(left_texts, right_texts, left_blocks, right_blocks, t1: float = T1, t2: float = T2,
+                 k: int = None, chunk_pairs: int = CHUNK_PAIRS, workers: int = 1) -> pd.DataFrame:
+    """Canopy pairs within each block (state).
+
+    Returns positions ``left`` / ``right`` with ``distance`` <= ``t1`` and
+    ``tight`` (distance <= ``t2``), sorted by left then right.
+    """
+    left_texts, right_texts = list(left_texts), list(right_texts)
+    counts, codes = trigram_counts(left_texts + right_texts)
+    left_codes, right_codes = codes[:len(left_texts)], codes[len(left_texts):]
+    left_block_ids, right_block_ids = block_codes(left_blocks, right_blocks)
+
+    right_sorted = np.argsort(right_block_ids, kind="stable")
+    right_bounds = np.searchsorted(right_block_ids[right_sorted], np.arange(right_block_ids.max(initial=-1) + 2))
+    blocks = [(np.flatnonzero(left_block_ids == block), right_sorted[right_bounds[block]:right_bounds[block + 1]])
+              for block in np.unique(left_block_ids[left_block_ids >= 0])]
+    blocks = [(left_rows, right_rows) for left_rows, right_rows in blocks if len(right_rows)]
+
+    def task(left_rows, right_rows):
+        # count rows are sliced per state only when that state is run
+        return counts[left_codes[left_rows]], counts[right_codes[right_rows]], left_rows, right_rows
+
+    if workers <= 1:
+        results = [_state_pairs(*task(*rows), t1, k, chunk_pairs) for rows in blocks]
+    else:
+        # biggest states first so one large state does not finish last
+        order = sorted(range(len(blocks)), key=lambda b: -len(blocks[b][0]) * len(blocks[b][1]))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_state_pairs, *task(*blocks[b]), t1, k, chunk_pairs) for b in order]
+            results = [future.result() for future in futures]
+
+    left = np.concatenate([r[0] for r in results] or [np.zeros(0, np.int64)]).astype(np.int64)
+    right = np.concatenate([r[1] for r in results] or [np.zeros(0, np.int64)]).astype(np.int64)
+    distance = np.concatenate([r[2] for r in results] or [np.zeros(0)])
+    order = np.lexsort((right, left))
+    return pd.DataFrame({"left": left[order], "right": right[order], "distance": distance[order],
+                         "tight": distance[order] <= t2})
+
+
+def canopy_block(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, t1: float = T1, t2: float = T2,
+                 k: int = None, workers: int = 1) -> pd.DataFrame:
+    """Phase 3 canopy blocking: ``index_op`` / ``index_med`` pairs within each state.
+
+    Keeps every pair within ``t1`` with its ``distance`` and ``tight`` flag;
+    ``pairs[pairs.tight]`` is the notebook's T2 canopy set.
+    """
+    op_names = name_strings(op_tier2['Covered_Recipient_First_Name'], op_tier2['Covered_Recipient_Last_Name'],
+                            op_tier2['Recipient_State'])
+    med_names = name_strings(med_clean['Rndrng_Prvdr_First_Name'], med_clean['Rndrng_Prvdr_Last_Org_Name'],
+                             med_clean['Rndrng_Prvdr_State_Abrvtn'])
+    pairs = canopy_pairs(op_names, med_names, op_tier2['Recipient_State'], med_clean['Rndrng_Prvdr_State_Abrvtn'],
+                         t1, t2, k, workers=workers)
+    return pd.DataFrame({"index_op": op_tier2.index.to_numpy()[pairs["left"].to_numpy()],
+                         "index_med": med_clean.index.to_numpy()[pairs["right"].to_numpy()],
+                         "distance": pairs["distance"].to_numpy(), "tight": pairs["tight"].to_numpy()})
@@ -0,0 +1,233 @@
+# closure.py
+"""
+Union-find transitive closure over linked records of several sources (Phase 5.9, 5.10).
+
+notebooks/5_entity_resolution.ipynb follows OP -> Med -> PECOS with one
+merge per hop on ``provider_id``: a record with k candidates multiplies the
+rows of every later merge, and a chain is only as long as the merges
+written out. Here every record is an integer node and every link an edge:
+
+    nodes      row r of source s is node ``offsets[s] + r``; ``node_values``
+               lays per-source arrays (NPI, last name) out the same way
+    union      ``UnionFind`` keeps parent and rank arrays. ``union`` takes a
+               batch of edges and works in rounds: the roots of all
+               endpoints are found at once and paths are compressed onto
+               them, then each edge joining two sets hooks the root of
+               lower (rank, id) under the other, ranks growing on ties.
+               Edges whose write lost to another edge's retry next round
+    clusters   ``components`` gives each node a dense cluster id;
+               ``cluster_summary`` counts records per source and distinct
+               values of each key per cluster, and flags clusters where a
+               key has more than one value (two NPIs, two last names)
+
+Edges can join any two sources or records of one source, so chains of any
+length close the same way.
+
+Run:  python lib/closure.py --state artifacts/phase5_entity_resolution/state --out artifacts/phase5_entity_resolution
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import write_artifact
+
+SOURCE_LABELS = {"op": "OP", "med": "Med", "pecos": "PECOS"}
+
+
+# -----------------------------
+# Union-find
+# -----------------------------
+
+class UnionFind:
+    """Disjoint sets over nodes ``0 .. n - 1``, array-backed, with path compression and union by rank."""
+
+    def __init__(self, n: int):
+        self.parent = np.arange(n, dtype=np.int64)
+        self.rank = np.zeros(n, dtype=np.int8)
+        self.rounds = 0
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, nodes) -> np.ndarray:
+        """Root of each node; the nodes are re-pointed at their roots."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        parent = self.parent
+        roots = parent[nodes]
+        active = np.flatnonzero(parent[roots] != roots)
+        while len(active):
+            roots[active] = parent[roots[active]]
+            active = active[parent[roots[active]] != roots[active]]
+        parent[nodes] = roots
+        return roots
+
+    def union(self, left, right) -> int:
+        """Join the sets of each edge ``(left[i], right[i])``. Returns the number of sets merged."""
+        a, b = self.find(left), self.find(right)
+        merged = 0
+        while True:
+            live = a != b
+            a, b = a[live], b[live]
+            if not len(a):
+                return merged
+            self.rounds += 1
+            # child: lower rank, then higher id; pointers always go up this order, so no cycles
+            rank_a, rank_b = self.rank[a], self.rank[b]
+            a_child = (rank_a < rank_b) | ((rank_a == rank_b) & (a > b))
+            child, root = np.where(a_child, a, b), np.where(a_child, b, a)
+            self.parent[child] = root
+            tie = (self.parent[child] == root) & (rank_a == rank_b) & (self.parent[root] == root)
+            self.rank[root[tie]] = self.rank[root[tie]] + 1
+            # every distinct child root got exactly one new parent
+            touched = np.zeros(len(self.parent), dtype=bool)
+            touched[child] = True
+            merged += int(np.count_nonzero(touched))
+            # hooks of one round can chain (a root hooked while it takes children): pointer jumping
+            # over the round's nodes halves every such chain per pass
+            touched[root] = True
+            self._jump(np.flatnonzero(touched))
+            a, b = self.find(a), self.find(b)
+
+    def _jump(self, nodes: np.ndarray):
+        parent = self.parent
+        while len(nodes):
+            up = parent[parent[nodes]]
+            moved = up != parent[nodes]
+            parent[nodes[moved]] = up[moved]
+            nodes = nodes[moved]
+
+    def components(self) -> np.ndarray:
+        """Cluster id of every node, numbered by each cluster's smallest node."""
+        parent = self.parent
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent[:] = grand
+        return pd.factorize(parent)[0].astype(np.int64)
+
+
+# -----------------------------
+# Record graph
+# -----------------------------
+
+def offsets(sizes: dict) -> dict:
+    """First node of each source; ``sizes`` maps source -> record count, in node order."""
+    starts = np.concatenate([[0], np.cumsum(list(sizes.values()))[:-1]])
+    return dict(zip(sizes, starts.astype(np.int64).tolist()))
+
+
+def link_graph(sizes: dict, links) -> UnionFind:
+    """Union-find over the records of ``sizes`` joined by ``links``.
+
+    Each link is ``(source_a, rows_a, source_b, rows_b)``: record
+    ``rows_a[i]`` of ``source_a`` is linked to ``rows_b[i]`` of ``source_b``.
+    """
+    start = offsets(sizes)
+    uf = UnionFind(sum(sizes.values()))
+    for source_a, rows_a, source_b, rows_b in links:
+        uf.union(start[source_a] + np.asarray(rows_a, dtype=np.int64),
+                 start[source_b] + np.asarray(rows_b, dtype=np.int64))
+    return uf
+
+
+def node_values(sizes: dict, values: dict) -> np.ndarray:
+    """One array over all nodes from per-source arrays; sources left out are missing."""
+    out = np.full(sum(sizes.values()), None, dtype=object)
+    start = offsets(sizes)
+    for source, array in values.items():
+        out[start[source]:start[source] + sizes[source]] = np.asarray(array, dtype=object)
+    return out
+
+
+def records(labels: np.ndarray, sizes: dict) -> pd.DataFrame:
+    """``source``, ``row`` and ``cluster`` of every record."""
+    source = np.repeat(np.arange(len(sizes), dtype=np.int8), list(sizes.values()))
+    row = np.concatenate([np.arange(n, dtype=np.int64) for n in sizes.values()]) if sizes else np.zeros(0, np.int64)
+    return pd.DataFrame({"source": pd.Categorical.from_codes(source, list(sizes)), "row": row, "cluster": labels})
+
+
+def _distinct_per_cluster(labels: np.ndarray, values: np.ndarray, n_clusters: int) -> np.ndarray:
+    codes, _ = pd.factorize(values)
+    keep = codes >= 0
+    keys = pd.unique(labels[keep] * np.int64(codes.max(initial=0) + 1) + codes[keep])
+    return np.bincount(keys // (codes.max(initial=0) + 1), minlength=n_clusters)
+
+
+def cluster_summary(labels: np.ndarray, sizes: dict, keys: dict = None) -> pd.DataFrame:
+    """One row per cluster: ``size``, ``n_<source>`` record counts, ``path`` and conflict flags.
+
+    ``keys`` maps a name to node values (``node_values``); each gives
+    ``n_<name>`` distinct non-missing values and ``conflict_<name>``
+    where there is more than one. ``path`` lists the sources present,
+    e.g. "OP → Med → PECOS".
+    """
+    n_clusters = int(labels.max(initial=-1)) + 1
+    source = np.repeat(np.arange(len(sizes)), list(sizes.values()))
+    counts = np.bincount(labels * len(sizes) + source, minlength=n_clusters * len(sizes)).reshape(n_clusters, -1)
+    out = pd.DataFrame({"cluster": np.arange(n_clusters, dtype=np.int64), "size": counts.sum(axis=1)})
+    path = np.full(n_clusters, "", dtype=object)
+    for j, name in enumerate(sizes):
+        out[f"n_{name}"] = counts[:, j]
+        label = SOURCE_LABELS.get(name, name)
+        path = np.where(counts[:, j] > 0, np.where(path == "", label, path + " → " + label), path)
+    out["path"] = path
+    for name, values in (keys or {}).items():
+        out[f"n_{name}"] = _distinct_per_cluster(labels, values, n_clusters)
+        out[f"conflict_{name}"] = out[f"n_{name}"] > 1
+    return out
+
+
+# -----------------------------
+# Phase 5 state
+# -----------------------------
+
+def state_graph(state: dict):
+    """Sizes, links and keys of the entity_resolution state: OP tier-2 rows, backbone providers, PECOS rows.
+
+    Links are every match / possible OP pair (``op_links``, so one OP row
+    can reach several providers) and every canonical PECOS enrollment.
+    Keys are the backbone NPI and upper-cased last names (Medicare,
+    PECOS).
+    """
+    prov, pecos = state["prov"], state["pecos"]
+    sizes = {"op": state["counts"]["op_tier2"], "med": len(prov), "pecos": state["counts"]["pecos_rows"]}
+    # "med" nodes are backbone rows (provider_ids skip the organizations 5.1.1 dropped)
+    med_row = pd.Series(np.arange(len(prov)), index=prov["provider_id"].to_numpy())
+    links = [("op", state["op_links"]["index_op"], "med", med_row[state["op_links"]["provider_id"]].to_numpy()),
+             ("pecos", pecos["pecos_row"], "med", med_row[pecos["provider_id"]].to_numpy())]
+    pecos_last = np.full(sizes["pecos"], None, dtype=object)
+    pecos_last[pecos["pecos_row"].to_numpy()] = pecos["LAST_NAME"].str.upper().to_numpy(dtype=object)
+    keys = {"npi": node_values(sizes, {"med": prov["npi"]}),
+            "last_name": node_values(sizes, {"med": prov["last_med"].str.upper(), "pecos": pecos_last})}
+    return sizes, links, keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phase 5 union-find closure: clusters and conflict flags")
+    parser.add_argument("--state", default="artifacts/phase5_entity_resolution/state")
+    parser.add_argument("--out", default="artifacts/phase5_entity_resolution")
+    args = parser.parse_args()
+
+    from entity_resolution import load_state
+
+    sizes, links, keys = state_graph(load_state(args.state))
+    start = time.perf_counter()
+    uf = link_graph(sizes, links)
+    labels = uf.components()
+    summary = cluster_summary(labels, sizes, keys)
+    os.makedirs(args.out, exist_ok=True)
+    write_artifact(summary, os.path.join(args.out, "closure_clusters.parquet"))
+    write_artifact(records(labels, sizes), os.path.join(args.out, "closure_records.parquet"))
+    linked = summary[summary["size"] > 1]
+    print(f"{sum(sizes.values()):,} records, {sum(len(l[1]) for l in links):,} links -> {len(linked):,} linked clusters "
+          f"({int(linked['conflict_npi'].sum()):,} with >1 NPI, {int(linked['conflict_last_name'].sum()):,} with "
+          f">1 last name) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+# entity_resolution.py
+"""
+Phase 5 entity resolution, built once and then updated from one source's delta.
+
+notebooks/5_entity_resolution.ipynb rebuilds every table from the full
+Phase 2 and Phase 4 artifacts: the 1,237,145-row backbone, the OP tier-1
+and tier-2 attachment, ``provpay``, the PECOS enrollments and the OP -> Med
+-> PECOS chains. Here those tables are a state that ``apply_delta``
+updates from a new Open Payments or PECOS drop:
+
+    backbone  5.1 / 5.1.1 ``prov``; an NPI resolves to the provider_id of
+              its first backbone row
+    OP        tier-2 rows of the delta are blocked against Medicare
+              (blocking strategies A/B/C by default), scored with
+              pair_features and tiered with match_classifier; the best
+              link per OP row as in 5.3. Tier-1 rows join on NPI (5.4.1)
+    payments  per-provider partials (sums, counts, min, max) that merge
+              by another sum / min / max; ``provider_payments`` (5.5) is
+              derived from them
+    PECOS     one enrollment per provider: the most recent ENRLMT_YEAR,
+              the earliest row on ties (4.6's dedupe)
+    closure   5.9's chains are recomputed only for touched provider_ids,
+              and so are the 5.8 unified rows
+
+``build`` on base + delta and ``apply_delta`` on ``build(base)`` give the
+same state, up to float summation order in the payment sums. Medicare is
+the backbone: a Medicare drop needs a full ``build``.
+
+Run:  python lib/entity_resolution.py --input artifacts/phase2_preprocessing --state artifacts/phase5_entity_resolution/state [--source op --delta open_payments_delta.parquet]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import read_artifact, read_feature_matrix, write_artifact
+from blocking import run_strategies, split_pair_ids, union_pairs
+from evaluation import MED_FIRST, MED_LAST, MED_STATE
+from match_classifier import classify, key_counts, pair_counts
+from pair_features import pair_features
+
+OP_NPI, MED_NPI, PECOS_NPI = "Covered_Recipient_NPI", "Rndrng_NPI", "NPI"
+PAYMENT_COLS = ["payment_count", "total_payment_amount", "max_payment",
+                "min_payment_date", "max_payment_date", "unique_manufacturers"]
+PECOS_COLS = ["ENRLMT_ID", "ENRLMT_YEAR", "FIRST_NAME", "LAST_NAME", "STATE_CD"]
+TIER_RANK = {"match": 0, "possible": 1}
+SOURCES = ("op", "pecos")
+STATE_FRAMES = ["prov", "op_links", "op_best", "payments", "pecos", "chains", "unified"]
+
+# partial -> (source column, aggregate over records, aggregate when merging partials)
+PARTIALS = {
+    "n_payments": ("payment_count", "sum", "sum"),
+    "sum_payment": ("total_payment_amount", "sum", "sum"),
+    "n_amounts": ("total_payment_amount", "count", "sum"),
+    "max_payment": ("max_payment", "max", "max"),
+    "first_payment_date": ("min_payment_date", "min", "min"),
+    "last_payment_date": ("max_payment_date", "max", "max"),
+    "unique_manufacturers": ("unique_manufacturers", "max", "max"),
+}
+
+
+# -----------------------------
+# Backbone
+# -----------------------------
+
+def npi_codes(values) -> np.ndarray:
+    """NPIs as int64 (the notebook's ``pd.to_numeric(...).astype("Int64")``), -1 where missing or invalid."""
+    numeric = pd.to_numeric(pd.Series(values), errors="coerce")
+    return np.where(numeric.notna(), numeric.fillna(-1), -1).astype(np.int64)
+
+
+def backbone(med_clean: pd.DataFrame) -> pd.DataFrame:
+    """5.1 / 5.1.1: every Medicare row as an "I" entity, then valid-NPI organizations again as "O"."""
+    cols = {MED_NPI: "npi", MED_FIRST: "first_med", MED_LAST: "last_med", MED_STATE: "state_med"}
+    prov = med_clean[list(cols)].rename(columns=cols).reset_index(drop=True)
+    prov["provider_id"] = np.arange(len(prov), dtype="int64")
+    prov["entity_type"] = "I"
+    org = med_clean[(med_clean["Rndrng_Prvdr_Ent_Cd"] == "O") & med_clean["NPI_VALID"]]
+    prov_org = org[[MED_NPI, MED_LAST, MED_STATE]].rename(columns=cols)
+    prov_org["first_med"] = np.nan
+    prov_org["entity_type"] = "O"
+    prov_org["provider_id"] = np.arange(len(prov), len(prov) + len(prov_org), dtype="int64")
+    prov_org = prov_org.drop_duplicates(subset="npi", keep="first")
+    return pd.concat([prov, prov_org], ignore_index=True)
+
+
+def _npi_index(prov: pd.DataFrame) -> pd.Series:
+    """provider_id by int64 NPI, first backbone row per NPI (the notebook's drop_duplicates on ``_merge_npi``)."""
+    npis = npi_codes(prov["npi"])
+    keep = (npis >= 0) & ~pd.Series(npis).duplicated().to_numpy()
+    return pd.Series(prov["provider_id"].to_numpy()[keep], index=npis[keep])
+
+
+def _lookup(index: pd.Series, keys) -> np.ndarray:
+    pos = index.index.get_indexer(keys)
+    return np.where(pos >= 0, index.to_numpy()[pos], -1)
+
+
+def _med_provider_ids(prov: pd.DataFrame, n_med: int) -> np.ndarray:
+    """provider_id of each Medicare row: the first backbone row with the same raw NPI (5.2's merge)."""
+    codes, _ = pd.factorize(prov["npi"].to_numpy()[:n_med], use_na_sentinel=False)
+    first = pd.Series(codes).drop_duplicates()
+    first_row = np.empty(len(first), dtype=np.int64)
+    first_row[first.to_numpy()] = first.index.to_numpy()
+    return prov["provider_id"].to_numpy()[first_row[codes]]
+
+
+# -----------------------------
+# Open Payments
+# -----------------------------
+
+def key_blocking(op_tier2: pd.DataFrame, med_clean: pd.DataFrame) -> np.ndarray:
+    """Union of blocking strategies A, B and C, as pair ids of row positions."""
+    return union_pairs(run_strategies(op_tier2, med_clean), len(op_tier2), len(med_clean))[0]
+
+
+def link_tier2(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, fls, offset: int = 0,
+               block=key_blocking, workers: int = 1) -> pd.DataFrame:
+    """Match / possible pairs of tier-2 OP rows: blocked, scored and tiered (Phases 3-4 for these rows only).
+
+    ``fls`` is ``match_classifier.key_counts(med_clean)``; ``index_op``
+    is the row position plus ``offset``. The features reach ``classify``
+    as float64, so the tiers are 4.3's at every threshold.
+    """
+    op_tier2, med_clean = op_tier2.reset_index(drop=True), med_clean.reset_index(drop=True)
+    left, right = split_pair_ids(block(op_tier2, med_clean))
+    features = pair_features(left, right, op_tier2, med_clean, workers)
+    tiers = classify(features, pair_counts(right, *fls))["match_tier"].to_numpy()
+    keep = np.isin(tiers, list(TIER_RANK))
+    return pd.DataFrame({"index_op": left[keep] + offset, "index_med": right[keep],
+                         "match_tier": tiers[keep].astype(object)})
+
+
+def best_links(pairs: pd.DataFrame, med_pid: np.ndarray):
+    """5.2 / 5.3: every pair with its provider_id, and the best pair per OP row (match first, then lowest index_med)."""
+    links = pairs[["index_op", "index_med", "match_tier"]].reset_index(drop=True)
+    links.insert(2, "provider_id", med_pid[links["index_med"].to_numpy()])
+    rank = links["match_tier"].astype(object).map(TIER_RANK).to_numpy()
+    ordered = links.iloc[np.lexsort((links["index_med"].to_numpy(), rank, links["index_op"].to_numpy()))]
+    best = ordered[~ordered["index_op"].duplicated()][["index_op", "provider_id", "match_tier"]]
+    return links, best.reset_index(drop=True)
+
+
+def _op_records(op_rows: pd.DataFrame, state: dict, med_clean: pd.DataFrame, fls, pairs, block, workers):
+    """New links, best links and provider-tagged payment records for OP rows (tier-2 rows numbered from the state)."""
+    offset = state["counts"]["op_tier2"]
+    tier2 = op_rows[op_rows["linkage_tier"] == "tier2_fuzzy"].reset_index(drop=True)
+    if pairs is None:
+        pairs = link_tier2(tier2, med_clean, fls, offset, block, workers)
+    links, best = best_links(pairs, _med_provider_ids(state["prov"], len(med_clean)))
+    tier2_records = tier2.iloc[best["index_op"].to_numpy() - offset][PAYMENT_COLS].assign(
+        provider_id=best["provider_id"].to_numpy())
+
+    tier1 = op_rows[op_rows["linkage_tier"] == "tier1_npi"]
+    pid = _lookup(_npi_index(state["prov"]), npi_codes(tier1[OP_NPI]))
+    tier1_records = tier1[pid >= 0][PAYMENT_COLS].assign(provider_id=pid[pid >= 0])
+    records = pd.concat([tier2_records, tier1_records], ignore_index=True)
+    return links, best, records, len(tier2)
+
+
+# -----------------------------
+# Payments
+# -----------------------------
+
+def payment_partials(records: pd.DataFrame) -> pd.DataFrame:
+    """Mergeable per-provider partials of OP payment records (``provider_id`` plus ``PAYMENT_COLS``)."""
+    return (records.groupby("provider_id", sort=True)
+            .agg(**{name: (col, how) for name, (col, how, _) in PARTIALS.items()}).reset_index())
+
+
+def merge_partials(*partials: pd.DataFrame) -> pd.DataFrame:
+    """Partials of the union of the records behind each input."""
+    frames = [p for p in partials if len(p)]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    return (pd.concat(frames, ignore_index=True).groupby("provider_id", sort=True)
+            .agg(**{name: (name, how) for name, (_, _, how) in PARTIALS.items()}).reset_index())
+
+
+def provider_payments(partials: pd.DataFrame) -> pd.DataFrame:
+    """5.5's ``provpay``: n_payments, sum_payment, avg_payment (mean record total), max, date range, manufacturers."""
+    out = partials[["provider_id", "n_payments", "sum_payment"]].copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["avg_payment"] = np.where(partials["n_amounts"] > 0, partials["sum_payment"] / partials["n_amounts"], np.nan)
+    for col in ("max_payment", "first_payment_date", "last_payment_date", "unique_manufacturers"):
+        out[col] = partials[col].to_numpy()
+    return out
+
+
+def _replace_rows(frame: pd.DataFrame, updated: pd.DataFrame, key: str = "provider_id") -> pd.DataFrame:
+    kept = frame[~frame[key].isin(updated[key])]
+    return pd.concat([kept, updated], ignore_index=True).sort_values(key, kind="stable").reset_index(drop=True)
+
+
+# -----------------------------
+# PECOS
+# -----------------------------
+
+def pecos_candidates(pecos_rows: pd.DataFrame, first_row: int, prov: pd.DataFrame,
+                     med_clean: pd.DataFrame) -> pd.DataFrame:
+    """4.6 / 5.6: PECOS rows whose NPI is a valid Medicare NPI of the same entity type, with provider_id.
+
+    ``pecos_row`` numbers the rows from ``first_row`` so ties break by
+    file order across drops. Organizations take the Medicare name (5.7).
+    """
+    npis = npi_codes(pecos_rows[PECOS_NPI])
+    pid = _lookup(_npi_index(prov), npis)
+    frames = []
+    for entity in ("I", "O"):
+        med = med_clean[(med_clean["Rndrng_Prvdr_Ent_Cd"] == entity) & med_clean["NPI_VALID"]]
+        med_npis = npi_codes(med[MED_NPI])
+        rows = np.flatnonzero((pecos_rows["ENRLMT_ENTITY"].to_numpy() == entity)
+                              & pd.Index(npis).isin(med_npis) & (pid >= 0))
+        frame = pecos_rows.iloc[rows][PECOS_COLS].reset_index(drop=True)
+        if entity == "O":
+            org_name = pd.Series(med[MED_LAST].to_numpy(), index=med_npis)
+            org_name = org_name[~org_name.index.duplicated()]
+            frame["LAST_NAME"] = org_name.reindex(npis[rows]).to_numpy()
+            frame["FIRST_NAME"] = np.nan
+        frame.insert(0, "provider_id", pid[rows])
+        frame.insert(1, "entity", entity)
+        frame["pecos_row"] = first_row + rows
+        frames.append(frame)
+    out = pd.concat(frames, ignore_index=True)
+    out["ENRLMT_YEAR"] = out["ENRLMT_YEAR"].astype("Int64")
+    return out
+
+
+def _enrollment_key(pecos: pd.DataFrame) -> np.ndarray:
+    # (provider_id, entity) as one int64, individuals first
+    return pecos["provider_id"].to_numpy() * 2 + (pecos["entity"].to_numpy() == "O")
+
+
+def canonical_enrollments(*candidates: pd.DataFrame) -> pd.DataFrame:
+    """One row per (provider_id, entity): most recent ENRLMT_YEAR, earliest ``pecos_row`` on ties."""
+    frame = pd.concat([c for c in candidates if len(c)] or candidates[:1], ignore_index=True)
+    year = frame["ENRLMT_YEAR"].astype("Float64").fillna(-np.inf).to_numpy(dtype=float)
+    key = _enrollment_key(frame)
+    order = np.lexsort((frame["pecos_row"].to_numpy(), -year, key))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = key[order][1:] != key[order][:-1]
+    return frame.iloc[order[first]].reset_index(drop=True)
+
+
+def _replace_enrollments(pecos: pd.DataFrame, updated: pd.DataFrame) -> pd.DataFrame:
+    kept = pecos[~np.isin(_enrollment_key(pecos), _enrollment_key(updated))]
+    frame = pd.concat([kept, updated], ignore_index=True)
+    return frame.iloc[np.argsort(_enrollment_key(frame), kind="stable")].reset_index(drop=True)
+
+
+def pecos_agg(pecos: pd.DataFrame) -> pd.DataFrame:
+    """5.7's ``pecos_agg``: individuals, then organizations, one row per provider_id."""
+    out = pecos.sort_values("entity", kind="stable").rename(columns={
+        "ENRLMT_ID": "pecos_enrollment_id", "ENRLMT_YEAR": "pecos_enrollment_year",
+        "FIRST_NAME": "pecos_first_name", "LAST_NAME": "pecos_last_name", "STATE_CD": "pecos_state"})
+    out = out[~out["provider_id"].duplicated()]
+    return out[["provider_id", "pecos_enrollment_id", "pecos_enrollment_year",
+                "pecos_first_name", "pecos_last_name", "pecos_state"]].reset_index(drop=True)
+
+
+# -----------------------------
+# Closure and unified table
+# -----------------------------
+
+def chains(best: pd.DataFrame, pecos: pd.DataFrame) -> pd.DataFrame:
+    """5.9: each linked tier-2 OP row with its provider's individual PECOS enrollment."""
+    link = pecos[pecos["entity"] == "I"][["provider_id", "ENRLMT_ID", "ENRLMT_YEAR"]]
+    out = best[["index_op", "provider_id", "match_tier"]].merge(link, on="provider_id", how="left")
+    tier = "Tier2_Fuzzy(" + out["match_tier"].astype(str) + ") → NPI → "
+    out["linkage_path"] = tier + np.where(out["ENRLMT_ID"].notna(), "PECOS", "no PECOS")
+    return out
+
+
+def unified_rows(prov: pd.DataFrame, pecos: pd.DataFrame, payments: pd.DataFrame) -> pd.DataFrame:
+    """5.7 / 5.8: ``prov`` rows with PECOS, payment and coverage columns."""
+    out = (prov.merge(pecos_agg(pecos), on="provider_id", how="left")
+           .merge(provider_payments(payments), on="provider_id", how="left"))
+    out["first_name_reconciled"] = out["first_med"].fillna(out["pecos_first_name"])
+    out["last_name_reconciled"] = out["last_med"].fillna(out["pecos_last_name"])
+    out["state_reconciled"] = out["state_med"].fillna(out["pecos_state"])
+    out["has_op_payments"] = out["n_payments"].notna()
+    out["has_pecos_enrollment"] = out["pecos_enrollment_id"].notna()
+    out["linkage_coverage"] = out["has_op_payments"].astype(int) + out["has_pecos_enrollment"].astype(int)
+    prefix = np.where(out["entity_type"].to_numpy() == "O", "Medicare+Org", "Medicare").astype(object)
+    out["data_sources"] = (prefix + np.where(out["has_op_payments"], "+OP", "")
+                           + np.where(out["has_pecos_enrollment"], "+PECOS", ""))
+    return out
+
+
+def _set_rows(column: pd.Series, rows: np.ndarray, values: pd.Series) -> pd.Series:
+    same_kind = (isinstance(column.dtype, np.dtype) and isinstance(values.dtype, np.dtype)
+                 and np.can_cast(values.dtype, column.dtype, "same_kind"))
+    if values.dtype != column.dtype and not same_kind:
+        column = column.astype(object)
+    if isinstance(column.dtype, np.dtype):
+        out = column.to_numpy(copy=True)
+        out[rows] = values.to_numpy()
+    else:
+        out = column.array.copy()
+        out[rows] = values.array if values.dtype == column.dtype else values.to_numpy()
+    return pd.Series(out, index=column.index, name=column.name)
+
+
+def _update_unified(state: dict, touched: np.ndarray) -> pd.DataFrame:
+    """Recompute the unified rows of ``touched`` provider_ids and write them in place of the old ones."""
+    unified = state["unified"]
+    prov = state["prov"]
+    rows = np.flatnonzero(prov["provider_id"].isin(touched).to_numpy())
+    if not len(rows):
+        return unified
+    payments = state["payments"][state["payments"]["provider_id"].isin(touched)]
+    pecos = state["pecos"][state["pecos"]["provider_id"].isin(touched)]
+    fresh = unified_rows(prov.iloc[rows], pecos, payments)
+    return pd.DataFrame({col: _set_rows(unified[col], rows, fresh[col]) for col in unified.columns})
+
+
+# -----------------------------
+# Build and update
+# -----------------------------
+
+def build(op_clean: pd.DataFrame, med_clean: pd.DataFrame, pecos_clean: pd.DataFrame, pairs: pd.DataFrame = None,
+          block=key_blocking, workers: int = 1) -> dict:
+    """The full Phase 5 state.
+
+    ``pairs`` are Phase 4's match / possible pairs (``index_op``,
+    ``index_med``, ``match_tier``); without them the tier-2 rows are
+    linked with ``link_tier2``.
+    """
+    med_clean = med_clean.reset_index(drop=True)
+    state = {"prov": backbone(med_clean), "counts": {"op_tier2": 0, "pecos_rows": 0}}
+    fls = key_counts(med_clean) if pairs is None else None
+    links, best, records, n_tier2 = _op_records(op_clean, state, med_clean, fls, pairs, block, workers)
+    state["op_links"], state["op_best"] = links, best
+    state["payments"] = payment_partials(records)
+    state["pecos"] = canonical_enrollments(pecos_candidates(pecos_clean, 0, state["prov"], med_clean))
+    state["chains"] = chains(best, state["pecos"])
+    state["unified"] = unified_rows(state["prov"], state["pecos"], state["payments"])
+    state["counts"] = {"op_tier2": n_tier2, "pecos_rows": len(pecos_clean)}
+    return state
+
+
+def apply_delta(state: dict, source: str, delta: pd.DataFrame, med_clean: pd.DataFrame, fls=None,
+                block=key_blocking, workers: int = 1):
+    """Fold one source's new rows into ``state``; returns ``(state, stats)``.
+
+    ``source`` "op": ``delta`` has open_payments_clean rows; only its
+    tier-2 rows are blocked and scored. ``source`` "pecos": ``delta`` has
+    pecos_clean rows. Payments, enrollments, chains and unified rows
+    change only for the provider_ids the delta touches.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"source must be one of {SOURCES}, got {source!r}")
+    med_clean = med_clean.reset_index(drop=True)
+    state = {**state, "counts": dict(state["counts"])}
+    stats = {"source": source, "rows": len(delta), "tier2_scored": 0}
+    if source == "op":
+        links, best, records, n_tier2 = _op_records(delta, state, med_clean,
+                                                    key_counts(med_clean) if fls is None else fls,
+                                                    None, block, workers)
+        new = payment_partials(records)
+        old = state["payments"][state["payments"]["provider_id"].isin(new["provider_id"])]
+        state["payments"] = _replace_rows(state["payments"], merge_partials(old, new))
+        state["op_links"] = pd.concat([state["op_links"], links], ignore_index=True)
+        state["op_best"] = pd.concat([state["op_best"], best], ignore_index=True)
+        state["chains"] = pd.concat([state["chains"], chains(best, state["pecos"])], ignore_index=True)
+        state["counts"]["op_tier2"] += n_tier2
+        stats["tier2_scored"] = n_tier2
+        touched = new["provider_id"].to_numpy()
+    else:
+        new = pecos_candidates(delta, state["counts"]["pecos_rows"], state["prov"], med_clean)
+        old = state["pecos"][state["pecos"]["provider_id"].isin(new["provider_id"])]
+        updated = canonical_enrollments(old, new)
+        state["pecos"] = _replace_enrollments(state["pecos"], updated)
+        touched = updated["provider_id"].to_numpy()
+        hit = state["chains"]["provider_id"].isin(touched).to_numpy()
+        if hit.any():
+            redone = chains(state["chains"][hit], state["pecos"]).set_axis(state["chains"].index[hit])
+            state["chains"] = pd.concat([state["chains"][~hit], redone]).sort_index()
+        state["counts"]["pecos_rows"] += len(delta)
+    state["unified"] = _update_unified(state, touched)
+    stats["providers_touched"] = len(np.unique(touched))
+    return state, stats
+
+
+# -----------------------------
+# State on disk
+# -----------------------------
+
+def save_state(state: dict, directory: str) -> str:
+    """One parquet file per state frame plus ``counts.json``."""
+    os.makedirs(directory, exist_ok=True)
+    for name in STATE_FRAMES:
+        write_artifact(state[name], os.path.join(directory, f"{name}.parquet"))
+    with open(os.path.join(directory, "counts.json"), "w") as fh:
+        json.dump(state["counts"], fh)
+    return directory
+
+
+def load_state(directory: str) -> dict:
+    with open(os.path.join(directory, "counts.json")) as fh:
+        state = {"counts": json.load(fh)}
+    for name in STATE_FRAMES:
+        state[name] = read_artifact(os.path.join(directory, f"{name}.parquet"))
+    return state
+
+
+def write_outputs(state: dict, out_dir: str):
+    """The Phase 5 deliverables this state covers."""
+    write_artifact(provider_payments(state["payments"]), os.path.join(out_dir, "provider_payments.parquet"))
+    write_artifact(state["unified"], os.path.join(out_dir, "unified_provider_entities.parquet"))
+    write_artifact(state["chains"], os.path.join(out_dir, "op_med_pecos_transitive_links.parquet"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phase 5 entity resolution: full build or incremental update")
+    parser.add_argument("--input", default="artifacts/phase2_preprocessing")
+    parser.add_argument("--features", default="artifacts/phase4_linkage/feature_matrix.parquet",
+                        help="Phase 4 feature matrix (full build only)")
+    parser.add_argument("--state", default="artifacts/phase5_entity_resolution/state")
+    parser.add_argument("--out", default="artifacts/phase5_entity_resolution")
+    parser.add_argument("--source", choices=SOURCES, help="source of --delta")
+    parser.add_argument("--delta", help="new open_payments_clean / pecos_clean rows (parquet)")
+    parser.add_argument("--workers", type=int, default=1, help="rapidfuzz scoring threads")
+    args = parser.parse_args()
+    if bool(args.source) != bool(args.delta):
+        parser.error("--source and --delta go together")
+
+    med_clean = pd.read_parquet(os.path.join(args.input, "medicare_clean.parquet")).reset_index(drop=True)
+    start = time.perf_counter()
+    if args.delta:
+        state, stats = apply_delta(load_state(args.state), args.source, pd.read_parquet(args.delta), med_clean,
+                                   workers=args.workers)
+        print(f"{stats['rows']:,} {args.source} rows ({stats['tier2_scored']:,} tier-2 scored), "
+              f"{stats['providers_touched']:,} providers updated")
+    else:
+        op_clean = pd.read_parquet(os.path.join(args.input, "open_payments_clean.parquet"))
+        pecos_clean = pd.read_parquet(os.path.join(args.input, "pecos_clean.parquet"))
+        pairs = read_feature_matrix(args.features, columns=["index_op", "index_med", "match_tier"])
+        state = build(op_clean, med_clean, pecos_clean, pairs)
+        print(f"built {len(state['unified']):,} providers")
+    save_state(state, args.state)
+    write_outputs(state, args.out)
+    print(f"state -> {args.state}, outputs -> {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# evaluation.py
+"""
+Findable records, ground truth and pair metrics for Phases 3 and 4.
+
+notebooks/3_linkage.ipynb (3.9) and 4_unified.ipynb (4.4, 4.5) find the
+tier-2 OP records whose exact (first, last, state) occurs in Medicare by
+building Python sets and dicts with ``iterrows()`` over 1.17M Medicare
+rows, then probing them with another ``iterrows()`` over OP. Here:
+
+    keys      (upper first, upper last, state) is coded once over both
+              sides (blocking.key_codes); a row with any part missing gets
+              -1 and matches nothing, as in 3.9
+    findable  OP rows whose code occurs in Medicare
+    truth     every (OP, Medicare) pair with equal codes, expanded by
+              blocking.block_pairs, as packed ``op << 32 | med`` ids
+    metrics   candidate pairs from any strategy, as pair ids, are joined
+              with the truth and the findable mask on those integers
+
+Positions are row positions; the notebooks reset both indexes, so they
+are also the ``index_op`` / ``index_med`` labels.
+"""
+
+import numpy as np
+import pandas as pd
+
+from blocking import block_pairs, key_codes, op_coverage, pair_ids, sorted_distinct, split_pair_ids
+
+OP_FIRST, OP_LAST, OP_STATE = "Covered_Recipient_First_Name", "Covered_Recipient_Last_Name", "Recipient_State"
+MED_FIRST, MED_LAST, MED_STATE = "Rndrng_Prvdr_First_Name", "Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_State_Abrvtn"
+
+# exact-key levels of the 4.4 diagnostic: part -> (OP column, Medicare column, upper-case)
+_PARTS = {"first": (OP_FIRST, MED_FIRST, True), "last": (OP_LAST, MED_LAST, True), "state": (OP_STATE, MED_STATE, False)}
+LEVELS = {"last_in_med": ("last",), "fullname_in_med": ("first", "last"), "fns_in_med": ("first", "last", "state")}
+
+
+# -----------------------------
+# Exact keys
+# -----------------------------
+
+def _part_codes(left: pd.Series, right: pd.Series, upper: bool):
+    codes, uniques = pd.factorize(np.concatenate([left.to_numpy(dtype=object), right.to_numpy(dtype=object)]))
+    if upper:
+        # upper-case each distinct value once; .str.upper() maps non-strings to NaN
+        upper_codes = pd.factorize(pd.Series(uniques, dtype=object).str.upper())[0]
+        codes = np.where(codes >= 0, upper_codes[codes], -1)
+    return codes[:len(left)], codes[len(left):]
+
+
+def exact_codes(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, parts=("first", "last", "state")):
+    """Shared int32 codes of the exact key over ``parts``; -1 where any part is missing."""
+    left_cols, right_cols = [], []
+    for part in parts:
+        op_col, med_col, upper = _PARTS[part]
+        left, right = _part_codes(op_tier2[op_col], med_clean[med_col], upper)
+        left_cols.append(left)
+        right_cols.append(right)
+    left_missing = np.any([c < 0 for c in left_cols], axis=0)
+    right_missing = np.any([c < 0 for c in right_cols], axis=0)
+    left_codes, right_codes = key_codes(left_cols, right_cols)
+    return np.where(left_missing, -1, left_codes), np.where(right_missing, -1, right_codes)
+
+
+def _occurs(left_codes: np.ndarray, right_codes: np.ndarray) -> np.ndarray:
+    present = np.zeros(int(max(left_codes.max(initial=-1), right_codes.max(initial=-1))) + 2, dtype=bool)
+    present[right_codes[right_codes >= 0]] = True
+    return (left_codes >= 0) & present[left_codes]
+
+
+def name_coverage(op_tier2: pd.DataFrame, med_clean: pd.DataFrame) -> pd.DataFrame:
+    """Per OP row, whether its last name / first+last / first+last+state occurs in Medicare (4.4)."""
+    return pd.DataFrame({level: _occurs(*exact_codes(op_tier2, med_clean, parts)) for level, parts in LEVELS.items()},
+                        index=op_tier2.index)
+
+
+def findable(op_tier2: pd.DataFrame, med_clean: pd.DataFrame) -> np.ndarray:
+    """Boolean mask of OP rows with an exact (first, last, state) match in Medicare (3.9)."""
+    return _occurs(*exact_codes(op_tier2, med_clean))
+
+
+def ground_truth(op_tier2: pd.DataFrame, med_clean: pd.DataFrame) -> np.ndarray:
+    """Sorted pair ids of every exact (first, last, state) OP x Medicare match (4.5)."""
+    return _truth(*exact_codes(op_tier2, med_clean))
+
+
+def _truth(left_codes: np.ndarray, right_codes: np.ndarray) -> np.ndarray:
+    left_rows, right_rows = np.flatnonzero(left_codes >= 0), np.flatnonzero(right_codes >= 0)
+    left, right = block_pairs(left_codes[left_rows], right_codes[right_rows])
+    return pair_ids(left_rows[left], right_rows[right])
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+
+def pair_metrics(candidates: np.ndarray, truth: np.ndarray, findable_mask: np.ndarray, n_right: int = None) -> dict:
+    """Metrics of one candidate pair-id array against the ground truth.
+
+    ``recall_ceiling_pct`` is 3.9's share of findable OP records with at
+    least one candidate; ``pairs_completeness`` the share of truth pairs
+    among the candidates and ``pairs_quality`` the share of candidates
+    that are truth pairs.
+    """
+    candidates = sorted_distinct(np.asarray(candidates, dtype=np.int64))[0]
+    hits = int(np.isin(truth, candidates, assume_unique=True).sum())
+    covered = np.zeros(len(findable_mask), dtype=bool)
+    covered[split_pair_ids(candidates)[0]] = True
+    n_findable = int(findable_mask.sum())
+    row = {"pairs": len(candidates)}
+    if n_right is not None:
+        row["reduction_ratio"] = 1 - len(candidates) / (len(findable_mask) * n_right)
+    row.update({
+        "op_coverage": op_coverage(candidates),
+        "recall_ceiling_pct": round(int((covered & findable_mask).sum()) / n_findable * 100, 2) if n_findable else 0,
+        "pairs_completeness": hits / len(truth) if len(truth) else 0.0,
+        "pairs_quality": hits / len(candidates) if len(candidates) else 0.0,
+    })
+    return row
+
+
+def evaluate(strategies: dict, op_tier2: pd.DataFrame, med_clean: pd.DataFrame, union: bool = True) -> pd.DataFrame:
+    """One metrics row per strategy (name -> pair ids), plus a "Union" row.
+
+    The columns start with 3.9's summary (strategy, pairs,
+    reduction_ratio, op_coverage, recall_ceiling_pct).
+    """
+    codes = exact_codes(op_tier2, med_clean)
+    mask, truth = _occurs(*codes), _truth(*codes)
+    strategies = dict(strategies)
+    if union and strategies:
+        strategies["Union"] = np.concatenate([np.asarray(ids, dtype=np.int64) for ids in strategies.values()])
+    return pd.DataFrame([{"strategy": name, **pair_metrics(ids, truth, mask, len(med_clean))}
+                         for name, ids in strategies.items()])
+
+
+def link_metrics(matches: np.ndarray, possibles: np.ndarray, truth: np.ndarray) -> dict:
+    """4.5's recall and precision of linked pairs (pair ids of the match and possible tiers).
+
+    OP-level recall and precision are measured on the OP records of the
+    ground truth; ``pair_precision`` is the share of match pairs that are
+    truth pairs. ``found_*`` count the truth OP records each tier reaches.
+    """
+    def distinct(ids):
+        return sorted_distinct(np.asarray(ids, dtype=np.int64))[0]
+
+    matches = distinct(matches)
+    truth_ops, match_ops = distinct(split_pair_ids(truth)[0]), distinct(split_pair_ids(matches)[0])
+    possible_ops = distinct(split_pair_ids(distinct(possibles))[0])
+    linked_ops = distinct(np.concatenate([match_ops, possible_ops]))
+    found_match = len(np.intersect1d(truth_ops, match_ops, assume_unique=True))
+    found_possible = len(np.intersect1d(truth_ops, possible_ops, assume_unique=True))
+    found_linked = len(np.intersect1d(truth_ops, linked_ops, assume_unique=True))
+    pair_hits = int(np.isin(matches, truth, assume_unique=True).sum())
+    return {
+        "truth_ops": len(truth_ops),
+        "truth_pairs": len(truth),
+        "found_match": found_match,
+        "found_possible": found_possible,
+        "found_linked": found_linked,
+        "recall_match": found_match / len(truth_ops) if len(truth_ops) else 0.0,
+        "recall_match_possible": found_linked / len(truth_ops) if len(truth_ops) else 0.0,
+        "linked_ops": len(linked_ops),
+        "precision_lower_bound": found_linked / len(linked_ops) if len(linked_ops) else 0.0,
+        "match_pairs": len(matches),
+        "pair_hits": pair_hits,
+        "pair_precision": pair_hits / len(matches) if len(matches) else 0.0,
+    }
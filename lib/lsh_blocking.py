@@ -0,0 +1,290 @@
+# lsh_blocking.py
+"""
+MinHash / LSH blocking on whole arrays.
+
+The same candidate pairs as the datasketch loop in notebooks 3 and 6
+(one MinHash per row built trigram by trigram, and one MinHashLSH per
+state), computed with NumPy:
+
+    shingle     every name string -> character trigrams, each trigram
+                hashed once per distinct trigram (sha1, first 4 bytes),
+                in CSR layout (hash ids + row offsets)
+    signature   datasketch's universal hashing, (a * h + b) mod (2^61 - 1),
+                applied to the trigram vocabulary once and reduced with a
+                per-row minimum -> uint32 matrix (rows x num_perm)
+    banding     each band of r values plus the state is hashed to one
+                64-bit key; candidates come from a hash join on the keys
+                (the smaller side is indexed, the larger probes it), and
+                every hit is checked against the raw band values, so key
+                collisions never add pairs
+
+Signatures match ``datasketch.MinHash(num_perm, seed=1)`` value for value,
+and (b, r) comes from the same false-positive/negative optimisation as
+``MinHashLSH``, so the pair sets are identical.
+"""
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+Q = 3  # trigram size
+SIGNATURE_BATCH = 32_768  # rows per batch when shingling and reducing signatures
+_CODE_BITS = 21  # a Unicode code point fits in 21 bits, so a trigram fits in 63
+
+
+# -----------------------------
+# Name strings and shingles
+# -----------------------------
+
+def name_strings(first: pd.Series, last: pd.Series, state: pd.Series) -> pd.Series:
+    """``"FIRST LAST STATE"`` per row, the notebook's ``ns()`` over whole columns.
+
+    Missing parts, blanks and the literal ``NAN`` are skipped.
+    """
+    joined = None
+    for col in (first, last, state):
+        codes, uniques = pd.factorize(col)
+        cleaned = pd.Series(uniques, dtype=object).astype(str).str.strip().str.upper()
+        cleaned = np.append(cleaned.where(cleaned != "NAN", "").to_numpy(dtype=object), "")
+        text = pd.Series(cleaned[codes], index=col.index)  # code -1 (missing) -> ""
+        if joined is None:
+            joined = text
+        else:
+            both = (joined != "") & (text != "")
+            joined = (joined + np.where(both, " ", "") + text)
+    return joined.rename(None)
+
+
+def _sha1_hash32(text: str) -> int:
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:4], "little")
+
+
+def shingle(texts, q: int = Q):
+    """Character q-grams of each text as hashed ids in CSR form.
+
+    Returns ``(ids, offsets, vocab_hashes)``: the q-grams of row i are
+    ``vocab_hashes[ids[offsets[i]:offsets[i + 1]]]``. Texts shorter than
+    q (and non-strings) get no q-grams.
+    """
+    if q > 3:
+        raise ValueError("q-grams are packed into 63 bits; q must be at most 3")
+    texts = np.asarray([t if isinstance(t, str) else "" for t in texts], dtype=object)
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    counts = np.maximum(lengths - q + 1, 0)
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    codes = []
+    for start in range(0, len(texts), SIGNATURE_BATCH):
+        batch = texts[start:start + SIGNATURE_BATCH]
+        width = int(lengths[start:start + SIGNATURE_BATCH].max(initial=0))
+        if width < q:
+            continue
+        points = np.array(batch.tolist(), dtype=f"U{width}").view(np.uint32).reshape(len(batch), width)
+        points = points.astype(np.uint64)
+        packed = np.zeros((len(batch), width - q + 1), dtype=np.uint64)
+        for k in range(q):
+            packed |= points[:, k:width - q + 1 + k] << np.uint64(_CODE_BITS * (q - 1 - k))
+        valid = np.arange(width - q + 1) < counts[start:start + SIGNATURE_BATCH, None]
+        codes.append(packed[valid])
+    codes = np.concatenate(codes) if codes else np.zeros(0, dtype=np.uint64)
+
+    ids, vocab = pd.factorize(codes)
+    mask = np.uint64((1 << _CODE_BITS) - 1)
+    shift = [np.uint64(_CODE_BITS * (q - 1 - k)) for k in range(q)]
+    vocab_hashes = np.fromiter(
+        (_sha1_hash32("".join(chr(int((c >> s) & mask)) for s in shift)) for c in vocab),
+        dtype=np.uint64, count=len(vocab),
+    )
+    return ids.astype(np.intp, copy=False), offsets, vocab_hashes
+
+
+# -----------------------------
+# Signatures
+# -----------------------------
+
+def permutations(num_perm: int, seed: int = 1):
+    """The (a, b) universal-hash parameters datasketch draws for ``seed``."""
+    gen = np.random.RandomState(seed)
+    ab = np.array([(gen.randint(1, MERSENNE_PRIME, dtype=np.uint64),
+                    gen.randint(0, MERSENNE_PRIME, dtype=np.uint64)) for _ in range(num_perm)],
+                  dtype=np.uint64)
+    return ab[:, 0], ab[:, 1]
+
+
+def minhash_signatures(texts, num_perm: int = 128, seed: int = 1, q: int = Q):
+    """MinHash signature per text as a ``(len(texts), num_perm)`` uint32 matrix.
+
+    Returns ``(signatures, has_shingles)``. Rows without q-grams keep the
+    all-``MAX_HASH`` signature of an empty MinHash and are flagged False.
+    """
+    ids, offsets, vocab_hashes = shingle(texts, q)
+    a, b = permutations(num_perm, seed)
+    # uint64 products wrap exactly as in MinHash.update
+    permuted = (((vocab_hashes[:, None] * a[None, :] + b[None, :]) % MERSENNE_PRIME) & MAX_HASH).astype(np.uint32)
+
+    # Rows sorted by q-gram count, longest first: the rows that still have a
+    # k-th q-gram are then a prefix, and each step is one contiguous gather
+    # of vocabulary rows and one elementwise minimum.
+    counts = np.diff(offsets)
+    order = np.argsort(-counts, kind="stable")
+    sorted_counts, starts = counts[order], offsets[:-1][order]
+    by_count = np.full((len(counts), num_perm), MAX_HASH, dtype=np.uint32)
+    for lo in range(0, len(order), SIGNATURE_BATCH):
+        batch_counts = sorted_counts[lo:lo + SIGNATURE_BATCH]
+        batch_starts = starts[lo:lo + SIGNATURE_BATCH]
+        block = by_count[lo:lo + SIGNATURE_BATCH]
+        for k in range(int(batch_counts[0]) if len(batch_counts) else 0):
+            active = np.searchsorted(-batch_counts, -k, "left")  # rows with more than k q-grams
+            np.minimum(block[:active], permuted[ids[batch_starts[:active] + k]], out=block[:active])
+    signatures = np.empty_like(by_count)
+    signatures[order] = by_count
+    return signatures, counts > 0
+
+
+# -----------------------------
+# Banding
+# -----------------------------
+
+@lru_cache(maxsize=None)
+def optimal_params(threshold: float, num_perm: int, weights=(0.5, 0.5)):
+    """(bands, rows per band) minimising weighted FP + FN area, as in MinHashLSH."""
+    from scipy.integrate import quad
+
+    fp_weight, fn_weight = weights
+    best, opt = float("inf"), (0, 0)
+    for b in range(1, num_perm + 1):
+        for r in range(1, num_perm // b + 1):
+            fp = quad(lambda s: 1 - (1 - s ** float(r)) ** float(b), 0.0, threshold)[0]
+            fn = quad(lambda s: 1 - (1 - (1 - s ** float(r)) ** float(b)), threshold, 1.0)[0]
+            error = fp * fp_weight + fn * fn_weight
+            if error < best:
+                best, opt = error, (b, r)
+    return opt
+
+
+def band_keys(values: np.ndarray) -> np.ndarray:
+    """64-bit bucket key per row of band values (n x r)."""
+    values = values.astype(np.uint64)  # one pass over the (strided) band
+    keys = np.zeros(len(values), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for k in range(values.shape[1]):
+            keys *= np.uint64(0x100000001B3)
+            keys ^= values[:, k]
+            keys ^= keys >> np.uint64(29)
+    return keys
+
+
+def _with_blocks(keys: np.ndarray, blocks: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        return keys ^ (blocks.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+
+
+def _join(left_keys: np.ndarray, right_keys: np.ndarray):
+    """All (i, j) with left_keys[i] == right_keys[j].
+
+    The smaller side's distinct keys go into a hash index that the larger
+    side probes, so a 10k x 1M join costs one pass over the million keys.
+    """
+    if len(left_keys) > len(right_keys):
+        j, i = _join(right_keys, left_keys)
+        return i, j
+    codes, uniques = pd.factorize(left_keys)
+    pos = pd.Index(uniques).get_indexer(right_keys)
+    hits = np.flatnonzero(pos >= 0)
+    group_sizes = np.bincount(codes, minlength=len(uniques))
+    group_starts = np.cumsum(group_sizes) - group_sizes
+    members = np.argsort(codes, kind="stable")  # left positions grouped by key
+    sizes = group_sizes[pos[hits]]
+    right = np.repeat(hits, sizes)
+    starts = np.repeat(group_starts[pos[hits]] - (np.cumsum(sizes) - sizes), sizes)
+    return members[starts + np.arange(len(right))], right
+
+
+def block_codes(left_blocks, right_blocks):
+    """Shared integer ids for two block columns; missing values get -1."""
+    codes = pd.factorize(pd.concat([pd.Series(left_blocks), pd.Series(right_blocks)], ignore_index=True))[0]
+    return codes[:len(left_blocks)], codes[len(left_blocks):]
+
+
+def text_signatures(left_texts, right_texts, num_perm: int = 128, seed: int = 1, q: int = Q):
+    """Signatures of the distinct texts of both sides.
+
+    Returns ``(signatures, has_shingles, left_codes, right_codes)``, where
+    the codes give each record's row in ``signatures``.
+    """
+    left_texts, right_texts = list(left_texts), list(right_texts)
+    codes, uniques = pd.factorize(pd.Series(left_texts + right_texts, dtype=object))
+    signatures, has_shingles = minhash_signatures(uniques, num_perm, seed, q)
+    return signatures, has_shingles, codes[:len(left_texts)], codes[len(left_texts):]
+
+
+def candidate_pairs(left_texts, right_texts, threshold: float = 0.5, num_perm: int = 128,
+                    left_blocks=None, right_blocks=None, seed: int = 1, q: int = Q,
+                    params=None) -> pd.DataFrame:
+    """LSH candidate pairs between two sets of texts.
+
+    A pair is a candidate when both records have q-grams, share a block
+    (when blocks are given; missing blocks never match) and agree on
+    every signature value of at least one band. ``params`` overrides the
+    (bands, rows) choice. Returns positions ``left`` / ``right``, sorted.
+    """
+    bands, rows = params or optimal_params(threshold, num_perm)
+    signatures, has_shingles, left_codes, right_codes = text_signatures(left_texts, right_texts, num_perm, seed, q)
+    left_block_ids, right_block_ids = (None, None) if left_blocks is None else block_codes(left_blocks, right_blocks)
+    pairs = band_pairs(signatures, has_shingles, left_codes, right_codes, bands, rows,
+                       left_block_ids, right_block_ids)
+    return pd.DataFrame({"left": (pairs >> np.uint64(32)).astype(np.int64),
+                         "right": (pairs & MAX_HASH).astype(np.int64)})
+
+
+def band_pairs(signatures: np.ndarray, has_shingles: np.ndarray, left_codes: np.ndarray,
+               right_codes: np.ndarray, bands: int, rows: int, left_block_ids: np.ndarray = None,
+               right_block_ids: np.ndarray = None) -> np.ndarray:
+    """Candidate pairs from precomputed signatures, as sorted ``left << 32 | right`` uint64.
+
+    ``left_codes`` / ``right_codes`` give each record's row in
+    ``signatures`` (-1 for none); block ids of -1 never match. Only the
+    first ``bands * rows`` columns are read, and MinHash permutations are
+    drawn in order, so the signatures for the largest ``num_perm`` serve
+    every smaller one as well.
+    """
+    if left_block_ids is None:
+        left_block_ids = np.zeros(len(left_codes), dtype=np.int64)
+        right_block_ids = np.zeros(len(right_codes), dtype=np.int64)
+
+    def usable(codes, block_ids):
+        return np.flatnonzero((codes >= 0) & has_shingles[np.maximum(codes, 0)] & (block_ids >= 0))
+
+    left_rows, right_rows = usable(left_codes, left_block_ids), usable(right_codes, right_block_ids)
+    left_sig, right_sig = left_codes[left_rows], right_codes[right_rows]
+    left_blk, right_blk = left_block_ids[left_rows], right_block_ids[right_rows]
+
+    packed = []
+    for band in range(bands):
+        cols = slice(band * rows, (band + 1) * rows)
+        keys = band_keys(signatures[:, cols])  # once per distinct text
+        i, j = _join(_with_blocks(keys[left_sig], left_blk), _with_blocks(keys[right_sig], right_blk))
+        exact = ((signatures[left_sig[i], cols] == signatures[right_sig[j], cols]).all(axis=1) &
+                 (left_blk[i] == right_blk[j]))
+        packed.append((left_rows[i[exact]].astype(np.uint64) << np.uint64(32)) |
+                      right_rows[j[exact]].astype(np.uint64))
+    return np.sort(pd.unique(np.concatenate(packed))) if packed else np.zeros(0, dtype=np.uint64)
+
+
+def lsh_block(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, threshold: float = 0.5,
+              num_perm: int = 128) -> pd.DataFrame:
+    """Phase 3 LSH blocking: ``index_op`` / ``index_med`` pairs within each state."""
+    op_names = name_strings(op_tier2['Covered_Recipient_First_Name'], op_tier2['Covered_Recipient_Last_Name'],
+                            op_tier2['Recipient_State'])
+    med_names = name_strings(med_clean['Rndrng_Prvdr_First_Name'], med_clean['Rndrng_Prvdr_Last_Org_Name'],
+                             med_clean['Rndrng_Prvdr_State_Abrvtn'])
+    pairs = candidate_pairs(op_names, med_names, threshold, num_perm,
+                            left_blocks=op_tier2['Recipient_State'],
+                            right_blocks=med_clean['Rndrng_Prvdr_State_Abrvtn'])
+    return pd.DataFrame({"index_op": op_tier2.index.to_numpy()[pairs["left"].to_numpy()],
+                         "index_med": med_clean.index.to_numpy()[pairs["right"].to_numpy()]})
@@ -0,0 +1,174 @@
+# lsh_sweep.py
+"""
+Phase 6 LSH hyperparameter sweep over the full (num_perm, threshold) grid.
+
+notebooks/6_lsh_benchmark.ipynb ran a single configuration because every
+one rebuilt all MinHashes from scratch. Here the expensive work is shared:
+
+    signatures   computed once, for the largest num_perm. MinHash draws its
+                 permutations in order, so the first 64 columns of a
+                 256-permutation signature are the 64-permutation signature
+    banding      each (num_perm, threshold) only re-bands the columns it
+                 needs with its own (b, r); configurations run in a process
+                 pool and read the signature matrix as memory-mapped .npy
+                 files in shared memory (/dev/shm where it exists)
+    Strategy B   the State + last-name Soundex baseline is joined once and
+                 every configuration is compared with it as packed pair ids
+
+Writes lsh_benchmark_results.csv with the notebook's columns plus the
+(bands, rows) used. runtime_sec is the banding time of that configuration
+alone; the shared signature pass is printed separately.
+
+Run:  python lib/lsh_sweep.py --input artifacts/phase2_preprocessing --out artifacts/phase6_lsh_benchmark [--workers 4]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+import lsh_blocking as lb
+from preprocessing_parallel import SHM_DIR
+
+NUM_PERMS = [64, 128, 256]
+THRESHOLDS = [0.3, 0.4, 0.5, 0.6, 0.7]
+
+OP_COLUMNS = ["Covered_Recipient_First_Name", "Covered_Recipient_Last_Name", "Recipient_State",
+              "LAST_NAME_SOUNDEX", "linkage_tier"]
+MED_COLUMNS = ["Rndrng_Prvdr_First_Name", "Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_State_Abrvtn",
+               "LAST_NAME_SOUNDEX"]
+_SHARED = ("signatures", "has_shingles", "left_codes", "right_codes", "left_blocks", "right_blocks", "pairs_b")
+
+
+# -----------------------------
+# Inputs and baseline
+# -----------------------------
+
+def load_inputs(input_dir: str):
+    """Tier-2 Open Payments and Medicare rows from the Phase 2 parquet files."""
+    op = pd.read_parquet(os.path.join(input_dir, "open_payments_clean.parquet"), columns=OP_COLUMNS)
+    op_tier2 = op[op["linkage_tier"] == "tier2_fuzzy"].reset_index(drop=True)
+    med_clean = pd.read_parquet(os.path.join(input_dir, "medicare_clean.parquet"), columns=MED_COLUMNS)
+    return op_tier2, med_clean
+
+
+def strategy_b_pairs(op_tier2: pd.DataFrame, med_clean: pd.DataFrame) -> np.ndarray:
+    """Strategy B (State + last-name Soundex) pairs as sorted ``op << 32 | med`` positions."""
+    op_key = op_tier2["LAST_NAME_SOUNDEX"].fillna("") + "|" + op_tier2["Recipient_State"].fillna("")
+    med_key = med_clean["LAST_NAME_SOUNDEX"].fillna("") + "|" + med_clean["Rndrng_Prvdr_State_Abrvtn"].fillna("")
+    pairs = (pd.DataFrame({"block": op_key.to_numpy(), "op": np.arange(len(op_key))})
+             .merge(pd.DataFrame({"block": med_key.to_numpy(), "med": np.arange(len(med_key))}), on="block"))
+    return np.sort((pairs["op"].to_numpy(np.uint64) << np.uint64(32)) | pairs["med"].to_numpy(np.uint64))
+
+
+def shared_arrays(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, num_perm: int) -> dict:
+    """Everything the configurations share: signatures, codes, block ids, Strategy B."""
+    op_names = lb.name_strings(op_tier2["Covered_Recipient_First_Name"], op_tier2["Covered_Recipient_Last_Name"],
+                               op_tier2["Recipient_State"])
+    med_names = lb.name_strings(med_clean["Rndrng_Prvdr_First_Name"], med_clean["Rndrng_Prvdr_Last_Org_Name"],
+                                med_clean["Rndrng_Prvdr_State_Abrvtn"])
+    signatures, has_shingles, left_codes, right_codes = lb.text_signatures(op_names, med_names, num_perm)
+    left_blocks, right_blocks = lb.block_codes(op_tier2["Recipient_State"], med_clean["Rndrng_Prvdr_State_Abrvtn"])
+    return dict(signatures=signatures, has_shingles=has_shingles, left_codes=left_codes, right_codes=right_codes,
+                left_blocks=left_blocks, right_blocks=right_blocks, pairs_b=strategy_b_pairs(op_tier2, med_clean))
+
+
+# -----------------------------
+# One configuration
+# -----------------------------
+
+_WORKER_ARRAYS = None
+
+
+def _load_shared(directory: str):
+    global _WORKER_ARRAYS
+    _WORKER_ARRAYS = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in _SHARED}
+
+
+def _config_in_worker(num_perm: int, threshold: float) -> dict:
+    return run_config(_WORKER_ARRAYS, num_perm, threshold)
+
+
+def run_config(arrays: dict, num_perm: int, threshold: float) -> dict:
+    """Band one (num_perm, threshold) and score it against Strategy B; one results row."""
+    bands, rows = lb.optimal_params(threshold, num_perm)
+    start = time.perf_counter()
+    pairs = lb.band_pairs(arrays["signatures"], np.asarray(arrays["has_shingles"]),
+                          np.asarray(arrays["left_codes"]), np.asarray(arrays["right_codes"]), bands, rows,
+                          np.asarray(arrays["left_blocks"]), np.asarray(arrays["right_blocks"]))
+    elapsed = time.perf_counter() - start
+
+    pairs_b = arrays["pairs_b"]
+    overlap = len(np.intersect1d(pairs, pairs_b, assume_unique=True))
+    fullcross = len(arrays["left_codes"]) * len(arrays["right_codes"])
+    return {
+        "num_perm": num_perm,
+        "threshold": threshold,
+        "candidate_pairs": len(pairs),
+        "reduction_ratio": 1 - len(pairs) / fullcross if fullcross > 0 else 0,
+        "pc_vs_strategy_B": round(overlap / len(pairs_b) * 100, 2) if len(pairs_b) > 0 else 0,
+        "unique_to_lsh": len(pairs) - overlap,
+        "overlap_with_B": overlap,
+        "runtime_sec": round(elapsed, 2),
+        "pairs_per_sec": round(len(pairs) / elapsed, 0) if elapsed > 0 else 0,
+        "bands": bands,
+        "rows": rows,
+    }
+
+
+# -----------------------------
+# Sweep
+# -----------------------------
+
+def sweep(op_tier2: pd.DataFrame, med_clean: pd.DataFrame, num_perms=NUM_PERMS, thresholds=THRESHOLDS,
+          workers: int = 1, shm_dir: str = None) -> pd.DataFrame:
+    """Results row per (num_perm, threshold), in grid order.
+
+    Signatures are computed once for ``max(num_perms)``. With
+    ``workers > 1`` configurations are banded in parallel processes.
+    """
+    grid = list(product(num_perms, thresholds))
+    start = time.perf_counter()
+    arrays = shared_arrays(op_tier2, med_clean, max(num_perms))
+    print(f"Signatures ({max(num_perms)} permutations, {len(arrays['signatures']):,} distinct names) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    if workers <= 1:
+        return pd.DataFrame([run_config(arrays, num_perm, threshold) for num_perm, threshold in grid])
+
+    directory = tempfile.mkdtemp(prefix="lsh-sweep-", dir=shm_dir or SHM_DIR)
+    try:
+        for name in _SHARED:
+            np.save(os.path.join(directory, f"{name}.npy"), arrays[name])
+        del arrays
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_shared, initargs=(directory,)) as pool:
+            futures = [pool.submit(_config_in_worker, num_perm, threshold) for num_perm, threshold in grid]
+            return pd.DataFrame([future.result() for future in futures])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phase 6 LSH hyperparameter sweep")
+    parser.add_argument("--input", default="artifacts/phase2_preprocessing")
+    parser.add_argument("--out", default="artifacts/phase6_lsh_benchmark")
+    parser.add_argument("--num-perms", type=int, nargs="+", default=NUM_PERMS)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=THRESHOLDS)
+    parser.add_argument("--workers", type=int, default=1, help="processes banding configurations")
+    args = parser.parse_args()
+
+    op_tier2, med_clean = load_inputs(args.input)
+    results = sweep(op_tier2, med_clean, args.num_perms, args.thresholds, args.workers)
+    os.makedirs(args.out, exist_ok=True)
+    results.to_csv(os.path.join(args.out, "lsh_benchmark_results.csv"), index=False)
+    print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# match_classifier.py
+"""
+Five-path match classification and ML scoring for Phase 4 (4.3, 4.7, 4.8).
+
+notebooks/4_unified.ipynb builds an ``fls_key`` string for every Medicare
+row and every comparison row, maps ``value_counts()`` back onto the pairs,
+and evaluates the path rules as pandas expressions over ``comp_df``. Any
+threshold change re-runs the cell. Here:
+
+    rarity    (upper first, upper last, state) is coded once per Medicare
+              row and counted per key (``key_counts``); a pair's
+              ``fls_count`` is the gather ``counts[codes[index_med]]``
+    rules     the five paths and the possible tier are numpy masks over
+              the feature columns, thresholds in one ``THRESHOLDS`` dict;
+              ``classify`` re-tiers under overrides from the same features
+    ML        ``predict_proba`` scores ``ML_FEATURE_COLS`` in batches of
+              ``BATCH_ROWS``; ``save_models`` / ``load_models`` keep the
+              fitted models with their feature list (joblib)
+
+Tiers, ``which_path`` (first qualifying path wins, as ``np.select`` in
+4.3) and ``ml_match_pred`` equal the notebook's for the same features.
+The rules compare float64 scores: pair_features returns them and the
+stored matrices keep ``RULE_FEATURE_COLS`` as float64, because a float32
+score just under a threshold can round onto it.
+
+Run:  python lib/match_classifier.py --features artifacts/phase4_linkage/pair_features.parquet --input artifacts/phase2_preprocessing --out artifacts/phase4_linkage [--models artifacts/phase4_linkage/match_models.joblib]
+"""
+
+import argparse
+import os
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from artifact_store import RULE_FEATURE_COLS, TIERS, write_feature_matrix
+from evaluation import MED_FIRST, MED_LAST, MED_STATE
+
+BATCH_ROWS = 100_000
+MODEL_FILE = "match_models.joblib"
+
+# 4.3 thresholds; "d_max_count" is the fls_count above which Path D also needs city or ZIP
+THRESHOLDS = {
+    "a_first_jw": 0.85, "a_last_jw": 0.85, "a_street_jw": 0.80,
+    "b_first_lev": 0.60,
+    "c2_first_jw": 0.92, "c2_first_lev": 0.75,
+    "d_max_count": 3,
+    "e_first_jw": 0.90, "e_first_lev": 0.80,
+    "possible_first_jw": 0.65, "possible_first_lev": 0.60, "possible_last_jw": 0.90, "possible_street_jw": 0.70,
+    "ml_prob": 0.5,
+}
+PATHS = ["A", "B", "C2", "D", "E", "possible", "none"]
+
+# 4.7: state_match is constant under same-state blocking, raw_score is not a model input
+ML_FEATURE_COLS = ['first_jw', 'first_lev', 'last_jw', 'last_lev',
+                   'first_soundex_match', 'last_soundex_match',
+                   'first_metaphone_match', 'last_metaphone_match',
+                   'street_jw', 'city_match', 'zip5_match',
+                   'name_avg', 'addr_avg',
+                   'name_len_ratio', 'full_name_jw']
+
+
+# -----------------------------
+# Name rarity
+# -----------------------------
+
+def _fls_part(values: pd.Series, upper: bool) -> np.ndarray:
+    codes, uniques = pd.factorize(values.to_numpy(dtype=object))
+    keys = pd.Series(uniques, dtype=object)
+    if upper:
+        keys = keys.str.upper()
+    # 4.3's fillna(''): missing values (code -1) share the key of ''
+    part, _ = pd.factorize(np.append(keys.fillna('').to_numpy(dtype=object), ''))
+    return part[codes]
+
+
+def key_counts(med_clean: pd.DataFrame):
+    """(first, last, state) ``fls_key`` code of every Medicare row and the row count of every key.
+
+    Returns ``(codes, counts)``; 4.3's ``fls_count`` of a pair is
+    ``counts[codes[index_med]]``.
+    """
+    key = np.zeros(len(med_clean), dtype=np.int64)
+    for col, upper in ((MED_FIRST, True), (MED_LAST, True), (MED_STATE, False)):
+        part = _fls_part(med_clean[col], upper)
+        key = key * (int(part.max(initial=0)) + 1) + part
+    codes, _ = pd.factorize(key)
+    return codes.astype(np.int32), np.bincount(codes).astype(np.int32)
+
+
+def pair_counts(index_med, codes: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """``fls_count`` of each pair: the ``key_counts`` count of its Medicare row (a position in ``med_clean``)."""
+    return counts[codes[np.asarray(index_med)]]
+
+
+# -----------------------------
+# Rules
+# -----------------------------
+
+def _thresholds(overrides: dict = None) -> dict:
+    unknown = set(overrides or ()) - set(THRESHOLDS)
+    if unknown:
+        raise ValueError(f"unknown thresholds: {sorted(unknown)}")
+    return {**THRESHOLDS, **(overrides or {})}
+
+
+def path_masks(features, fls_count, thresholds: dict = None) -> dict:
+    """Boolean mask of each path "A" .. "E" and of "possible" (4.3), under ``thresholds`` overrides."""
+    t = _thresholds(thresholds)
+    narrow = [col for col in RULE_FEATURE_COLS if np.asarray(features[col]).dtype == np.float32]
+    if narrow:
+        warnings.warn(f"{', '.join(narrow)} are float32: scores just under a 4.3 threshold may have rounded "
+                      f"onto it, so tiers can differ from the float64 rules", RuntimeWarning, stacklevel=2)
+    # float64 comparisons; a float32 array against a Python threshold would compare in float32
+    f = {col: np.asarray(features[col], dtype=np.float64) for col in
+         (*RULE_FEATURE_COLS, "city_match", "state_match", "zip5_match")}
+    zip5, city, state = f["zip5_match"] == 1.0, f["city_match"] == 1.0, f["state_match"] == 1.0
+    exact_last = f["last_lev"] == 1.0
+    masks = {
+        "A": (f["first_jw"] >= t["a_first_jw"]) & (f["last_jw"] >= t["a_last_jw"])
+             & (zip5 | (f["street_jw"] >= t["a_street_jw"])),
+        "B": exact_last & (f["first_lev"] >= t["b_first_lev"]) & zip5 & city,
+        "C2": (f["first_jw"] >= t["c2_first_jw"]) & (f["first_lev"] >= t["c2_first_lev"])
+              & (f["last_jw"] == 1.0) & (zip5 | city),
+        "D": (f["first_lev"] == 1.0) & exact_last & state
+             & ((np.asarray(fls_count) <= t["d_max_count"]) | city | zip5),
+        "E": exact_last & (f["first_jw"] >= t["e_first_jw"]) & (f["first_lev"] >= t["e_first_lev"]) & city & state,
+    }
+    matched = masks["A"] | masks["B"] | masks["C2"] | masks["D"] | masks["E"]
+    masks["possible"] = (~matched & (f["first_jw"] >= t["possible_first_jw"])
+                         & (f["first_lev"] >= t["possible_first_lev"]) & (f["last_jw"] >= t["possible_last_jw"])
+                         & (zip5 | city | (f["street_jw"] >= t["possible_street_jw"])))
+    return masks
+
+
+def classify(features, fls_count, thresholds: dict = None, ml_prob=None) -> pd.DataFrame:
+    """``match_tier`` and ``which_path`` (categoricals) of every pair, plus ``ml_match_pred`` if ``ml_prob`` is given.
+
+    ``features`` is any column mapping (the feature matrix, a DataFrame
+    from ``pair_features``); nothing is recomputed but the masks, so a
+    threshold sweep calls this once per setting.
+    """
+    t = _thresholds(thresholds)
+    masks = path_masks(features, fls_count, t)
+    path = np.select([masks[p] for p in PATHS[:-1]], np.arange(len(PATHS) - 1, dtype=np.int8),
+                     default=len(PATHS) - 1).astype(np.int8)
+    tier = np.select([path < PATHS.index("possible"), path == PATHS.index("possible")],
+                     [TIERS.index("match"), TIERS.index("possible")], default=TIERS.index("non_match")).astype(np.int8)
+    out = pd.DataFrame({"match_tier": pd.Categorical.from_codes(tier, TIERS),
+                        "which_path": pd.Categorical.from_codes(path, PATHS)})
+    if ml_prob is not None:
+        # model.predict(): class 1 when its probability is above ml_prob
+        out["ml_match_pred"] = (np.asarray(ml_prob) > t["ml_prob"]).astype(np.int8)
+    return out
+
+
+# -----------------------------
+# ML scoring
+# -----------------------------
+
+def predict_proba(model, features, batch_rows: int = BATCH_ROWS, feature_cols: list = None) -> np.ndarray:
+    """Match probability of every pair, ``batch_rows`` rows of ``feature_cols`` (float64) at a time."""
+    cols = [np.asarray(features[col]) for col in (feature_cols or ML_FEATURE_COLS)]
+    n = len(cols[0]) if cols else 0
+    out = np.empty(n)
+    for lo in range(0, n, batch_rows):
+        batch = np.column_stack([col[lo:lo + batch_rows] for col in cols]).astype(np.float64, copy=False)
+        out[lo:lo + len(batch)] = model.predict_proba(batch)[:, 1]
+    return out
+
+
+def save_models(models: dict, path: str, best: str = None, feature_cols: list = None) -> str:
+    """Write fitted models (name -> estimator), the best model's name and their feature list to ``path``."""
+    joblib.dump({"models": models, "best": best, "feature_cols": list(feature_cols or ML_FEATURE_COLS)}, path)
+    return path
+
+
+def load_models(path: str) -> dict:
+    """The dict written by ``save_models``: ``models``, ``best``, ``feature_cols``."""
+    return joblib.load(path)
+
+
+def score(bundle: dict, features, batch_rows: int = BATCH_ROWS, name: str = None) -> np.ndarray:
+    """``predict_proba`` of model ``name`` (default: the best) of a ``load_models`` bundle."""
+    model = bundle["models"][name or bundle["best"]]
+    return predict_proba(model, features, batch_rows, bundle["feature_cols"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phase 4 five-path classification and ML scoring")
+    parser.add_argument("--features", default="artifacts/phase4_linkage/pair_features.parquet")
+    parser.add_argument("--input", default="artifacts/phase2_preprocessing")
+    parser.add_argument("--out", default="artifacts/phase4_linkage")
+    parser.add_argument("--models", default=None, help=f"{MODEL_FILE} from save_models")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    args = parser.parse_args()
+
+    features = pd.read_parquet(args.features)
+    med_clean = pd.read_parquet(os.path.join(args.input, "medicare_clean.parquet"),
+                                columns=[MED_FIRST, MED_LAST, MED_STATE]).reset_index(drop=True)
+
+    start = time.perf_counter()
+    fls_count = pair_counts(features["index_med"], *key_counts(med_clean))
+    prob = score(load_models(args.models), features, args.batch_rows) if args.models else None
+    tiers = classify(features, fls_count, ml_prob=prob)
+    matrix = pd.concat([features.drop(columns="state_match"), tiers], axis=1)
+    if prob is not None:
+        matrix.insert(len(matrix.columns) - 1, "ml_match_prob", prob)
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, "feature_matrix.parquet")
+    write_feature_matrix(matrix, path)
+    counts = tiers["match_tier"].value_counts()
+    print(f"{len(matrix):,} pairs -> {path} in {time.perf_counter() - start:.1f}s "
+          f"(match {counts['match']:,}, possible {counts['possible']:,}, non_match {counts['non_match']:,})")
+
+
+if __name__ == "__main__":
+    main()
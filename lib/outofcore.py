@@ -0,0 +1,394 @@
+# outofcore.py
+"""
+Out-of-core Phase 5 and Phase 7: joins and aggregations as DuckDB queries over the parquet artifacts.
+
+notebooks/5_entity_resolution.ipynb and 7_temporal_drift.ipynb read
+open_payments_clean, medicare_clean, pecos_clean and the unified table
+whole into pandas before merging and grouping. A year of Open Payments is
+11M rows; several years do not fit. Here the same steps are SQL run by an
+embedded DuckDB with a memory limit, so scans stream from the parquet
+files and joins, sorts and windows spill to a temp directory:
+
+    connect    ``memory_limit``, ``temp_directory`` and ``threads``
+    Phase 5    ``entity_resolution_outputs``: entity_resolution.build
+               from Phase 4 pairs (5.1 backbone, 5.2 / 5.3 best link,
+               5.4.1 tier-1 NPIs, 5.5 provpay, 5.6 / 5.7 one enrollment
+               per provider, 5.8 unified table, 5.9 chains) plus 5.10's
+               data_quality_conflicts.csv
+    Phase 7    ``temporal_drift_outputs``: 7's year_stats, state_drift,
+               enrl_per_npi and tenure cohorts, year_linkage_risk
+
+Row positions (``index_op``, ``index_med``, ``pecos_row``) are parquet
+file row numbers, so each input is one parquet file as Phase 2 writes it.
+Large tables go from DuckDB straight to parquet with COPY. Per-year and
+per-cohort results are small: they come back to pandas as counts, and
+rates are taken there with the notebooks' own expressions, so the CSVs
+are the same.
+
+Run:  python lib/outofcore.py --phase 5 --memory-limit 2GB --temp-dir /tmp/duckdb
+      python lib/outofcore.py --phase 7 --memory-limit 2GB --temp-dir /tmp/duckdb
+"""
+
+import argparse
+import os
+import time
+
+import duckdb
+import pandas as pd
+
+TIERS = ("match", "possible")
+PAYMENT_COLS = ["payment_count", "total_payment_amount", "max_payment",
+                "min_payment_date", "max_payment_date", "unique_manufacturers"]
+COHORT_BINS = [0, 2, 5, 10, 15, 50]
+COHORT_LABELS = ["0-2yr", "3-5yr", "6-10yr", "11-15yr", "16+yr"]
+SNAPSHOT_YEAR = 2023
+
+
+# -----------------------------
+# Connection
+# -----------------------------
+
+def connect(memory_limit: str = "2GB", temp_directory: str = None, threads: int = None) -> duckdb.DuckDBPyConnection:
+    """In-memory DuckDB that spills to ``temp_directory`` past ``memory_limit``."""
+    con = duckdb.connect()
+    con.execute(f"SET memory_limit = {_quote(memory_limit)}")
+    if temp_directory:
+        os.makedirs(temp_directory, exist_ok=True)
+        con.execute(f"SET temp_directory = {_quote(temp_directory)}")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    # npi_codes(): NPIs as int64, NULL where missing or not numeric
+    con.execute("CREATE OR REPLACE TEMP MACRO npi_code(x) AS TRY_CAST(TRY_CAST(x AS DOUBLE) AS BIGINT)")
+    return con
+
+
+def _quote(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _parquet(path: str, row_number: str = None) -> str:
+    if row_number is None:
+        return f"read_parquet({_quote(path)})"
+    return (f"(SELECT * EXCLUDE (file_row_number), file_row_number AS {row_number} "
+            f"FROM read_parquet({_quote(path)}, file_row_number = true))")
+
+
+def _copy(con, query: str, path: str) -> int:
+    con.execute(f"COPY ({query}) TO {_quote(path)} (FORMAT parquet)")
+    return con.execute(f"SELECT count(*) FROM {_parquet(path)}").fetchone()[0]
+
+
+# -----------------------------
+# Phase 5
+# -----------------------------
+
+def _phase5_views(con, phase2_dir: str, features: str):
+    """Backbone, links and enrollments as temp tables; the three cleaned sources stay on disk as views."""
+    con.execute(f"CREATE OR REPLACE TEMP VIEW med AS SELECT * FROM "
+                f"{_parquet(os.path.join(phase2_dir, 'medicare_clean.parquet'), 'med_row')}")
+    con.execute(f"CREATE OR REPLACE TEMP VIEW op AS SELECT * FROM "
+                f"{_parquet(os.path.join(phase2_dir, 'open_payments_clean.parquet'), 'op_row')}")
+    con.execute(f"CREATE OR REPLACE TEMP VIEW pecos AS SELECT * FROM "
+                f"{_parquet(os.path.join(phase2_dir, 'pecos_clean.parquet'), 'pecos_row')}")
+    n_med = con.execute("SELECT count(*) FROM med").fetchone()[0]
+
+    # 5.1 / 5.1.1: every Medicare row as "I", valid-NPI organizations again as "O", first row per NPI
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE prov AS
+        SELECT Rndrng_NPI AS npi, Rndrng_Prvdr_First_Name AS first_med, Rndrng_Prvdr_Last_Org_Name AS last_med,
+               Rndrng_Prvdr_State_Abrvtn AS state_med, med_row AS provider_id, 'I' AS entity_type
+        FROM med
+        UNION ALL
+        SELECT npi, NULL, last_med, state_med, provider_id, 'O' FROM (
+            SELECT Rndrng_NPI AS npi, Rndrng_Prvdr_Last_Org_Name AS last_med,
+                   Rndrng_Prvdr_State_Abrvtn AS state_med,
+                   {n_med} + row_number() OVER (ORDER BY med_row) - 1 AS provider_id
+            FROM med WHERE Rndrng_Prvdr_Ent_Cd = 'O' AND NPI_VALID)
+        QUALIFY row_number() OVER (PARTITION BY npi ORDER BY provider_id) = 1
+        ORDER BY provider_id""")
+    # an NPI resolves to its first backbone row, always an "I" row (every Medicare row is one)
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE npi_index AS
+        SELECT npi_code(Rndrng_NPI) AS npi_key, min(med_row) AS provider_id
+        FROM med WHERE npi_code(Rndrng_NPI) IS NOT NULL GROUP BY 1""")
+
+    # 5.2 / 5.3: a Medicare row's provider_id is the first row with the same raw NPI; best pair per OP row
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE op_links AS
+        SELECT p.index_op, p.index_med, m.provider_id, p.match_tier
+        FROM (SELECT index_op, index_med, CAST(match_tier AS VARCHAR) AS match_tier FROM {_parquet(features)}
+              WHERE match_tier IN {TIERS}) p
+        JOIN (SELECT med_row, min(med_row) OVER (PARTITION BY Rndrng_NPI) AS provider_id FROM med) m
+          ON m.med_row = p.index_med""")
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE op_best AS
+        SELECT index_op, provider_id, match_tier FROM op_links
+        QUALIFY row_number() OVER (PARTITION BY index_op ORDER BY match_tier = 'possible', index_med) = 1
+        ORDER BY index_op""")
+    con.execute("""
+        CREATE OR REPLACE TEMP VIEW op_tier2 AS
+        SELECT row_number() OVER (ORDER BY op_row) - 1 AS index_op, * EXCLUDE (op_row)
+        FROM op WHERE linkage_tier = 'tier2_fuzzy'""")
+
+    # 4.6 / 5.6 / 5.7: PECOS rows of valid Medicare NPIs with the same entity type; one per (provider, entity)
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE pecos_enrollments AS
+        WITH valid_med AS (
+            SELECT npi_code(Rndrng_NPI) AS npi_key, Rndrng_Prvdr_Ent_Cd AS entity,
+                   first(Rndrng_Prvdr_Last_Org_Name ORDER BY med_row) AS org_name
+            FROM med WHERE NPI_VALID AND Rndrng_Prvdr_Ent_Cd IN ('I', 'O') AND npi_code(Rndrng_NPI) IS NOT NULL
+            GROUP BY ALL)
+        SELECT ix.provider_id, p.ENRLMT_ENTITY AS entity, p.ENRLMT_ID, TRY_CAST(p.ENRLMT_YEAR AS BIGINT) AS ENRLMT_YEAR,
+               CASE WHEN p.ENRLMT_ENTITY = 'O' THEN NULL ELSE p.FIRST_NAME END AS FIRST_NAME,
+               CASE WHEN p.ENRLMT_ENTITY = 'O' THEN v.org_name ELSE p.LAST_NAME END AS LAST_NAME,
+               p.STATE_CD, p.pecos_row
+        FROM pecos p
+        JOIN valid_med v ON v.npi_key = npi_code(p.NPI) AND v.entity = p.ENRLMT_ENTITY
+        JOIN npi_index ix ON ix.npi_key = npi_code(p.NPI)
+        QUALIFY row_number() OVER (PARTITION BY ix.provider_id, p.ENRLMT_ENTITY
+                                   ORDER BY TRY_CAST(p.ENRLMT_YEAR AS BIGINT) DESC NULLS LAST, p.pecos_row) = 1""")
+
+
+def _payments_query(con) -> str:
+    """5.4.1 / 5.5: tier-2 rows through their best link and tier-1 rows by NPI, aggregated per provider."""
+    cols = ", ".join(PAYMENT_COLS)
+    # sum() of integers is HUGEINT, which parquet stores as DOUBLE; keep the column's own type
+    count_type = con.execute("SELECT typeof(payment_count) FROM op LIMIT 1").fetchone()
+    count_type = count_type[0] if count_type and count_type[0] in ("TINYINT", "SMALLINT", "INTEGER", "BIGINT") \
+        else "DOUBLE"
+    return f"""
+        WITH records AS (
+            SELECT b.provider_id, {", ".join("t." + c for c in PAYMENT_COLS)}
+            FROM op_best b JOIN op_tier2 t USING (index_op)
+            UNION ALL
+            SELECT ix.provider_id, {cols}
+            FROM op JOIN npi_index ix ON ix.npi_key = npi_code(op.Covered_Recipient_NPI)
+            WHERE op.linkage_tier = 'tier1_npi')
+        SELECT provider_id,
+               CAST(sum(payment_count) AS {count_type}) AS n_payments,
+               coalesce(sum(total_payment_amount), 0) AS sum_payment,
+               sum(total_payment_amount) / nullif(count(total_payment_amount), 0) AS avg_payment,
+               max(max_payment) AS max_payment,
+               min(min_payment_date) AS first_payment_date,
+               max(max_payment_date) AS last_payment_date,
+               max(unique_manufacturers) AS unique_manufacturers
+        FROM records GROUP BY provider_id ORDER BY provider_id"""
+
+
+_UNIFIED = """
+    WITH pecos_agg AS (
+        SELECT provider_id, ENRLMT_ID AS pecos_enrollment_id, ENRLMT_YEAR AS pecos_enrollment_year,
+               FIRST_NAME AS pecos_first_name, LAST_NAME AS pecos_last_name, STATE_CD AS pecos_state
+        FROM pecos_enrollments
+        QUALIFY row_number() OVER (PARTITION BY provider_id ORDER BY entity) = 1)
+    SELECT prov.*, pecos_agg.* EXCLUDE (provider_id), payments.* EXCLUDE (provider_id),
+           coalesce(first_med, pecos_first_name) AS first_name_reconciled,
+           coalesce(last_med, pecos_last_name) AS last_name_reconciled,
+           coalesce(state_med, pecos_state) AS state_reconciled,
+           n_payments IS NOT NULL AS has_op_payments,
+           pecos_enrollment_id IS NOT NULL AS has_pecos_enrollment,
+           CAST(n_payments IS NOT NULL AS INTEGER) + CAST(pecos_enrollment_id IS NOT NULL AS INTEGER) AS linkage_coverage,
+           CASE WHEN entity_type = 'O' THEN 'Medicare+Org' ELSE 'Medicare' END
+               || CASE WHEN n_payments IS NOT NULL THEN '+OP' ELSE '' END
+               || CASE WHEN pecos_enrollment_id IS NOT NULL THEN '+PECOS' ELSE '' END AS data_sources
+    FROM prov
+    LEFT JOIN pecos_agg USING (provider_id)
+    LEFT JOIN payments USING (provider_id)
+    ORDER BY provider_id"""
+
+_CHAINS = """
+    SELECT b.index_op, b.provider_id, b.match_tier, e.ENRLMT_ID, e.ENRLMT_YEAR,
+           'Tier2_Fuzzy(' || b.match_tier || ') → NPI → '
+               || CASE WHEN e.ENRLMT_ID IS NOT NULL THEN 'PECOS' ELSE 'no PECOS' END AS linkage_path
+    FROM op_best b
+    LEFT JOIN (SELECT * FROM pecos_enrollments WHERE entity = 'I') e USING (provider_id)
+    ORDER BY b.index_op"""
+
+
+def _quality_conflicts(con) -> pd.DataFrame:
+    """5.10 Parts A and B as counts; percentages as the notebook takes them.
+
+    Part A counts 5.3's ``op_with_pid`` rows per OP row. That frame merges
+    each pair with every backbone row of its Medicare row's NPI (NULL
+    matching NULL, as in pandas), so a pair whose NPI repeats in Medicare
+    or also has an "O" row counts more than once.
+    """
+    n_conflicted, n_linked = con.execute("""
+        WITH npi_rows AS (SELECT npi, count(*) AS n FROM prov GROUP BY npi)
+        SELECT count(*) FILTER (WHERE n > 1), count(*)
+        FROM (SELECT l.index_op, sum(r.n) AS n
+              FROM op_links l
+              JOIN med m ON m.med_row = l.index_med
+              JOIN npi_rows r ON r.npi IS NOT DISTINCT FROM m.Rndrng_NPI
+              GROUP BY l.index_op)""").fetchone()
+    # pandas: a missing last name never equals anything
+    n_mismatch, n_checked = con.execute("""
+        SELECT count(*) FILTER (WHERE upper(first_med) <> upper(pecos_first_name)
+                                   OR NOT coalesce(upper(last_med) = upper(pecos_last_name), false)),
+               count(*)
+        FROM unified WHERE pecos_first_name IS NOT NULL AND first_med IS NOT NULL""").fetchone()
+    mismatch_rate = n_mismatch / n_checked if n_checked > 0 else 0
+    return pd.DataFrame([
+        {"conflict_type": "multi_match", "count": n_conflicted, "denominator": n_linked,
+         "pct_affected": n_conflicted / max(1, n_linked) * 100},
+        {"conflict_type": "name_mismatch", "count": n_mismatch, "denominator": n_checked,
+         "pct_affected": mismatch_rate * 100},
+    ])
+
+
+def entity_resolution_outputs(con, phase2_dir: str, features: str, out_dir: str) -> dict:
+    """Phase 5 deliverables from Phase 2 parquet and the Phase 4 feature matrix; returns row counts per file.
+
+    Same tables as entity_resolution.build(..., pairs=...) and its
+    write_outputs, plus provider_entities, the tier-2 OP rows with their
+    provider_id and data_quality_conflicts.csv.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    _phase5_views(con, phase2_dir, features)
+    con.execute(f"CREATE OR REPLACE TEMP TABLE payments AS {_payments_query(con)}")
+    con.execute(f"CREATE OR REPLACE TEMP VIEW unified AS {_UNIFIED}")
+    rows = {}
+    for name, query in (
+        ("provider_entities.parquet", "SELECT * FROM prov ORDER BY provider_id"),
+        ("provider_payments.parquet", "SELECT * FROM payments"),
+        ("open_payments_tier2_with_provider_id.parquet",
+         "SELECT t.*, b.provider_id, b.match_tier FROM op_tier2 t LEFT JOIN op_best b USING (index_op) "
+         "ORDER BY t.index_op"),
+        ("unified_provider_entities.parquet", "SELECT * FROM unified"),
+        ("op_med_pecos_transitive_links.parquet", _CHAINS),
+    ):
+        rows[name] = _copy(con, query, os.path.join(out_dir, name))
+    conflicts = _quality_conflicts(con)
+    conflicts.to_csv(os.path.join(out_dir, "data_quality_conflicts.csv"), index=False)
+    rows["data_quality_conflicts.csv"] = len(conflicts)
+    return rows
+
+
+# -----------------------------
+# Phase 7
+# -----------------------------
+
+def _year_counts(con, mp_tier1: str) -> pd.DataFrame:
+    """Per ENRLMT_YEAR: links and first / last / any name mismatches and state changes (7's 5.2 / 5.4)."""
+    return con.execute(f"""
+        WITH mp AS (
+            SELECT ENRLMT_YEAR,
+                   coalesce(upper(trim(Rndrng_Prvdr_First_Name, ' \t\n\r')) <> upper(trim(FIRST_NAME, ' \t\n\r')), false) AS f,
+                   coalesce(upper(trim(Rndrng_Prvdr_Last_Org_Name, ' \t\n\r')) <> upper(trim(LAST_NAME, ' \t\n\r')), false) AS l,
+                   coalesce(Rndrng_Prvdr_State_Abrvtn <> STATE_CD, false) AS s
+            FROM {_parquet(mp_tier1)})
+        SELECT ENRLMT_YEAR, count(*) AS total, count(*) FILTER (WHERE f OR l) AS n_mismatch,
+               count(*) FILTER (WHERE f) AS n_first_mm, count(*) FILTER (WHERE l) AS n_last_mm,
+               count(*) FILTER (WHERE s) AS n_changed
+        FROM mp GROUP BY ALL ORDER BY ENRLMT_YEAR NULLS LAST""").df()
+
+
+def _cohort_counts(con, pecos_clean: str, unified: str) -> tuple:
+    """enrl_per_npi per individual NPI (7's 5.6), kept in DuckDB; counts per tenure cohort (5.7) and overall."""
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE enrl_per_npi AS
+        SELECT NPI, count(DISTINCT ENRLMT_ID) AS n_enrollments, count(DISTINCT ENRLMT_YEAR) AS n_years,
+               min(ENRLMT_YEAR) AS first_year, max(ENRLMT_YEAR) AS last_year,
+               count(DISTINCT STATE_CD) AS n_states, count(DISTINCT LAST_NAME) AS n_names
+        FROM {_parquet(pecos_clean)} WHERE ENRLMT_ENTITY = 'I' AND NPI IS NOT NULL GROUP BY NPI""")
+    bins = " ".join(f"WHEN tenure > {lo} AND tenure <= {hi} THEN {_quote(label)}"
+                    for lo, hi, label in zip(COHORT_BINS[:-1], COHORT_BINS[1:], COHORT_LABELS))
+    cohorts = con.execute(f"""
+        WITH u AS (SELECT TRY_CAST(npi AS DOUBLE) AS npi, has_op_payments, has_pecos_enrollment
+                   FROM {_parquet(unified)}),
+        e AS (SELECT *, TRY_CAST(NPI AS DOUBLE) AS npi_num, CASE {bins} END AS cohort
+              FROM (SELECT *, {SNAPSHOT_YEAR} - first_year AS tenure FROM enrl_per_npi))
+        SELECT cohort, count(e.npi_num) AS n_providers, count(*) AS n_rows,
+               count(*) FILTER (WHERE n_states > 1) AS n_multi_state,
+               count(*) FILTER (WHERE n_names > 1) AS n_name_change,
+               count(u.has_op_payments) AS n_op_known, count(*) FILTER (WHERE u.has_op_payments) AS n_op,
+               count(u.has_pecos_enrollment) AS n_pecos_known,
+               count(*) FILTER (WHERE u.has_pecos_enrollment) AS n_pecos,
+               sum(n_enrollments) AS sum_enrollments, count(n_enrollments) AS n_enrollment_rows
+        FROM e LEFT JOIN u ON u.npi = e.npi_num
+        WHERE cohort IS NOT NULL GROUP BY cohort""").df()
+    overall = con.execute("""
+        SELECT count(*) AS n_npis, count(*) FILTER (WHERE n_enrollments > 1) AS multi_enrollment,
+               count(*) FILTER (WHERE n_years > 1) AS multi_year, count(*) FILTER (WHERE n_states > 1) AS multi_state,
+               count(*) FILTER (WHERE n_names > 1) AS name_change
+        FROM enrl_per_npi""").df().iloc[0].to_dict()
+    return cohorts, overall
+
+
+def temporal_drift_outputs(con, phase2_dir: str, phase4_dir: str, phase5_dir: str, out_dir: str) -> dict:
+    """Phase 7's CSVs from med_pecos_tier1_npi, pecos_clean and the unified table; returns the frames and summary."""
+    os.makedirs(out_dir, exist_ok=True)
+    counts = _year_counts(con, os.path.join(phase4_dir, "med_pecos_tier1_npi.parquet"))
+    by_year = counts[counts["ENRLMT_YEAR"].notna()].reset_index(drop=True)
+
+    year_stats = by_year[["ENRLMT_YEAR", "total", "n_mismatch", "n_first_mm", "n_last_mm"]].copy()
+    year_stats["mismatch_rate"] = (year_stats["n_mismatch"] / year_stats["total"] * 100).round(2)
+    year_stats["first_mm_rate"] = (year_stats["n_first_mm"] / year_stats["total"] * 100).round(2)
+    year_stats["last_mm_rate"] = (year_stats["n_last_mm"] / year_stats["total"] * 100).round(2)
+    state_drift = by_year[["ENRLMT_YEAR", "total", "n_changed"]].copy()
+    state_drift["change_rate"] = (state_drift["n_changed"] / state_drift["total"] * 100).round(2)
+
+    cohorts, overall = _cohort_counts(con, os.path.join(phase2_dir, "pecos_clean.parquet"),
+                                      os.path.join(phase5_dir, "unified_provider_entities.parquet"))
+    cohorts = cohorts.set_index("cohort").reindex([c for c in COHORT_LABELS if c in set(cohorts["cohort"])])
+    cohort_stats = pd.DataFrame({
+        "cohort": pd.Categorical(cohorts.index, categories=COHORT_LABELS, ordered=True),
+        "n_providers": cohorts["n_providers"].to_numpy(),
+        "multi_state_pct": (cohorts["n_multi_state"] / cohorts["n_rows"] * 100).to_numpy(),
+        "name_change_pct": (cohorts["n_name_change"] / cohorts["n_rows"] * 100).to_numpy(),
+        "has_op_pct": (cohorts["n_op"] / cohorts["n_op_known"] * 100).to_numpy(),
+        "has_pecos_pct": (cohorts["n_pecos"] / cohorts["n_pecos_known"] * 100).to_numpy(),
+        "avg_enrollments": (cohorts["sum_enrollments"] / cohorts["n_enrollment_rows"]).to_numpy(),
+    }).round(2)
+
+    # 5.9, unchanged: the inputs are a few dozen rows
+    combined = year_stats[["ENRLMT_YEAR", "total", "mismatch_rate"]].merge(
+        state_drift[["ENRLMT_YEAR", "change_rate"]], on="ENRLMT_YEAR")
+    combined["combined_risk"] = combined["mismatch_rate"] + combined["change_rate"]
+    q1, q3 = combined["combined_risk"].quantile([0.25, 0.75])
+    combined["anomalous"] = combined["combined_risk"] > q3 + 1.5 * (q3 - q1)
+
+    outputs = {"name_mismatch_by_year.csv": year_stats, "state_drift_by_year.csv": state_drift,
+               "tenure_cohort_analysis.csv": cohort_stats, "year_linkage_risk.csv": combined}
+    for name, frame in outputs.items():
+        frame.to_csv(os.path.join(out_dir, name), index=False)
+    n_links = int(counts["total"].sum())
+    summary = {
+        "name_mismatch_pct": counts["n_mismatch"].sum() / n_links * 100,
+        "state_change_pct": counts["n_changed"].sum() / n_links * 100,
+        "multi_enrollment_pct": overall["multi_enrollment"] / overall["n_npis"] * 100,
+        "name_change_pct": overall["name_change"] / overall["n_npis"] * 100,
+    }
+    return {**outputs, "summary": summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phase 5 / Phase 7 joins and aggregations in DuckDB over parquet")
+    parser.add_argument("--phase", type=int, choices=(5, 7), required=True)
+    parser.add_argument("--phase2", default="artifacts/phase2_preprocessing")
+    parser.add_argument("--phase4", default="artifacts/phase4_linkage")
+    parser.add_argument("--phase5", default="artifacts/phase5_entity_resolution")
+    parser.add_argument("--out", help="output directory (default: the phase's artifacts directory)")
+    parser.add_argument("--memory-limit", default="2GB")
+    parser.add_argument("--temp-dir", help="spill directory (DuckDB's default: .tmp next to the database)")
+    parser.add_argument("--threads", type=int)
+    args = parser.parse_args()
+
+    con = connect(args.memory_limit, args.temp_dir, args.threads)
+    start = time.perf_counter()
+    if args.phase == 5:
+        out = args.out or args.phase5
+        rows = entity_resolution_outputs(con, args.phase2, os.path.join(args.phase4, "feature_matrix.parquet"), out)
+        for name, n in rows.items():
+            print(f"  {name:<48s} {n:>12,} rows")
+    else:
+        out = args.out or "artifacts/phase7_temporal_drift"
+        summary = temporal_drift_outputs(con, args.phase2, args.phase4, args.phase5, out)["summary"]
+        for name, value in summary.items():
+            print(f"  {name:<24s} {value:6.2f}%")
+    print(f"Phase {args.phase} -> {out} in {time.perf_counter() - start:.1f}s "
+          f"(memory_limit {args.memory_limit})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# pair_features.py
+"""
+Pairwise similarity features for Phase 4 candidate pairs (section 4.2).
+
+notebooks/4_unified.ipynb merges every candidate pair with both source
+tables into a comparison DataFrame, then scores each field with a Python
+list comprehension over ``zip(s1, s2)``. Here:
+
+    codes       each field is factorized once over the rows the pairs
+                touch, with codes shared by both sides, so a pair of
+                strings becomes a pair of ints
+    dedupe      string similarities are computed once per distinct
+                (left code, right code) with rapidfuzz ``process.cpdist``
+                (native threads, ``workers``) and scattered back
+    exact       exact matches compare the shared codes of the
+                upper-cased values
+    output      ``FEATURE_COLS`` as float64, the values the 4.3 rules
+                compare; ``write_features`` casts all but
+                ``RULE_FEATURE_COLS`` to float32 for the parquet, one row
+                group per ``chunk_pairs`` pairs
+
+Values equal the notebook's: missing strings score 0.0 on Jaro-Winkler /
+Levenshtein, and exact matches treat missing as ''.
+
+Run:  python lib/pair_features.py --input artifacts/phase2_preprocessing --pairs artifacts/phase3_blocking/candidate_pairs.parquet --out artifacts/phase4_linkage [--workers 4]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from rapidfuzz import process
+from rapidfuzz.distance import JaroWinkler, Levenshtein
+
+from artifact_store import RULE_FEATURE_COLS
+from preprocessing_pipeline import ParquetSink
+
+CHUNK_PAIRS = 1_000_000
+
+# field -> (Open Payments column, Medicare column)
+FIELDS = {
+    "first_name": ("Covered_Recipient_First_Name", "Rndrng_Prvdr_First_Name"),
+    "last_name": ("Covered_Recipient_Last_Name", "Rndrng_Prvdr_Last_Org_Name"),
+    "street": ("Recipient_Primary_Business_Street_Address_Line1", "Rndrng_Prvdr_St1"),
+    "city": ("Recipient_City", "Rndrng_Prvdr_City"),
+    "state": ("Recipient_State", "Rndrng_Prvdr_State_Abrvtn"),
+    "zip5": ("Recipient_Zip5", "Rndrng_Prvdr_Zip5"),
+    "first_soundex": ("FIRST_NAME_SOUNDEX", "FIRST_NAME_SOUNDEX"),
+    "last_soundex": ("LAST_NAME_SOUNDEX", "LAST_NAME_SOUNDEX"),
+    "first_metaphone": ("FIRST_NAME_METAPHONE", "FIRST_NAME_METAPHONE"),
+    "last_metaphone": ("LAST_NAME_METAPHONE", "LAST_NAME_METAPHONE"),
+}
+OP_COLUMNS = [op_col for op_col, _ in FIELDS.values()]
+MED_COLUMNS = [med_col for _, med_col in FIELDS.values()]
+
+FEATURE_COLS = ['first_jw', 'first_lev', 'last_jw', 'last_lev',
+                'first_soundex_match', 'last_soundex_match',
+                'first_metaphone_match', 'last_metaphone_match',
+                'street_jw', 'city_match', 'state_match', 'zip5_match',
+                'name_avg', 'addr_avg', 'raw_score',
+                'name_len_ratio', 'full_name_jw']
+
+
+# -----------------------------
+# Shared codes
+# -----------------------------
+
+def shared_codes(left, right):
+    """Codes of two value arrays over one set of uniques; missing -> -1.
+
+    Returns ``(left_codes, right_codes, uniques)``.
+    """
+    left, right = np.asarray(left, dtype=object), np.asarray(right, dtype=object)
+    codes, uniques = pd.factorize(np.concatenate([left, right]))
+    return codes[:len(left)], codes[len(left):], np.asarray(uniques, dtype=object)
+
+
+def _exact_keys(values: pd.Series) -> np.ndarray:
+    # exact_match() in 4.2: fillna('').astype(str).str.upper()
+    return values.fillna('').astype(str).str.upper().to_numpy(dtype=object)
+
+
+# -----------------------------
+# Pair scores
+# -----------------------------
+
+def pair_scores(scorer, left_codes, right_codes, uniques, workers: int = 1) -> np.ndarray:
+    """``scorer`` of every (left_codes[i], right_codes[i]) string pair, 0.0 where either is missing.
+
+    Each distinct code pair is scored once.
+    """
+    out = np.zeros(len(left_codes))
+    valid = np.flatnonzero((left_codes >= 0) & (right_codes >= 0))
+    if not len(valid):
+        return out
+    keys = left_codes[valid].astype(np.int64) * len(uniques) + right_codes[valid]
+    inverse, distinct = pd.factorize(keys)
+    strings = np.array([str(v) for v in uniques], dtype=object)
+    scores = process.cpdist(strings[distinct // len(uniques)], strings[distinct % len(uniques)],
+                            scorer=scorer, dtype=np.float64, workers=workers)
+    out[valid] = scores[inverse]
+    return out
+
+
+def _features(left: pd.DataFrame, right: pd.DataFrame, left_rows, right_rows, workers: int) -> dict:
+    """Feature columns (float64) for pairs of row positions into ``left`` / ``right``."""
+    f = {}
+    codes = {}
+    for field, (op_col, med_col) in FIELDS.items():
+        if field in ("first_name", "last_name", "street"):
+            lc, rc, uniques = shared_codes(left[op_col], right[med_col])
+            codes[field] = lc[left_rows], rc[right_rows], uniques
+        else:
+            lc, rc, _ = shared_codes(_exact_keys(left[op_col]), _exact_keys(right[med_col]))
+            f[f"{field}_match"] = (lc[left_rows] == rc[right_rows]).astype(float)
+
+    f["first_jw"] = pair_scores(JaroWinkler.similarity, *codes["first_name"], workers)
+    f["first_lev"] = pair_scores(Levenshtein.normalized_similarity, *codes["first_name"], workers)
+    f["last_jw"] = pair_scores(JaroWinkler.similarity, *codes["last_name"], workers)
+    f["last_lev"] = pair_scores(Levenshtein.normalized_similarity, *codes["last_name"], workers)
+    f["street_jw"] = pair_scores(JaroWinkler.similarity, *codes["street"], workers)
+
+    f["name_avg"] = (f["first_jw"] + f["last_jw"]) / 2
+    f["addr_avg"] = (f["street_jw"] + f["city_match"] + f["zip5_match"]) / 3
+    f["raw_score"] = (f["name_avg"] + f["addr_avg"]) / 2
+
+    first = "Covered_Recipient_First_Name", "Rndrng_Prvdr_First_Name"
+    left_len = left[first[0]].fillna('').astype(str).str.len().to_numpy()[left_rows]
+    right_len = right[first[1]].fillna('').astype(str).str.len().to_numpy()[right_rows]
+    with np.errstate(invalid="ignore"):
+        ratio = np.minimum(left_len, right_len) / np.maximum(left_len, right_len)
+    f["name_len_ratio"] = np.nan_to_num(ratio, nan=0.0)
+
+    def full_names(frame, first_col, last_col):
+        return (frame[first_col].fillna('').astype(str) + ' ' + frame[last_col].fillna('').astype(str)).to_numpy()
+
+    lc, rc, uniques = shared_codes(full_names(left, first[0], "Covered_Recipient_Last_Name"),
+                                   full_names(right, first[1], "Rndrng_Prvdr_Last_Org_Name"))
+    f["full_name_jw"] = pair_scores(JaroWinkler.similarity, lc[left_rows], rc[right_rows], uniques, workers)
+    return f
+
+
+def pair_features(index_op, index_med, op: pd.DataFrame, med: pd.DataFrame, workers: int = 1) -> pd.DataFrame:
+    """``index_op`` / ``index_med`` plus the float64 ``FEATURE_COLS`` of each pair.
+
+    ``index_op`` / ``index_med`` are index labels of ``op`` / ``med``, as
+    in the notebook's merge on ``right_index``. Only the rows the pairs
+    touch are read.
+    """
+    index_op, index_med = np.asarray(index_op, dtype=np.int64), np.asarray(index_med, dtype=np.int64)
+    left_pos, right_pos = op.index.get_indexer(index_op), med.index.get_indexer(index_med)
+    if (left_pos < 0).any() or (right_pos < 0).any():
+        raise KeyError("candidate pairs reference rows missing from the source tables")
+    left_rows, left_used = pd.factorize(left_pos)
+    right_rows, right_used = pd.factorize(right_pos)
+    features = _features(op.iloc[left_used], med.iloc[right_used], left_rows, right_rows, workers)
+    out = pd.DataFrame({"index_op": index_op, "index_med": index_med})
+    for col in FEATURE_COLS:
+        out[col] = features[col].astype(np.float64, copy=False)
+    return out
+
+
+def write_features(index_op, index_med, op: pd.DataFrame, med: pd.DataFrame, path: str,
+                   chunk_pairs: int = CHUNK_PAIRS, workers: int = 1) -> int:
+    """Write ``pair_features`` to one parquet file, one row group per ``chunk_pairs`` pairs. Returns rows.
+
+    Features are stored as float32, except the float64 ``RULE_FEATURE_COLS``
+    that match_classifier compares with thresholds; the cast happens here,
+    after scoring.
+    """
+    index_op, index_med = np.asarray(index_op), np.asarray(index_med)
+    schema = pa.schema([("index_op", pa.int64()), ("index_med", pa.int64()),
+                        *[(col, pa.float64() if col in RULE_FEATURE_COLS else pa.float32())
+                          for col in FEATURE_COLS]])
+    sink = ParquetSink(path)
+    try:
+        for lo in range(0, max(len(index_op), 1), chunk_pairs):
+            frame = pair_features(index_op[lo:lo + chunk_pairs], index_med[lo:lo + chunk_pairs], op, med, workers)
+            sink.write(pa.Table.from_pandas(frame, preserve_index=False).cast(schema))
+    finally:
+        sink.close()
+    return sink.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phase 4 pairwise similarity features")
+    parser.add_argument("--input", default="artifacts/phase2_preprocessing")
+    parser.add_argument("--pairs", default="artifacts/phase3_blocking/candidate_pairs.parquet")
+    parser.add_argument("--out", default="artifacts/phase4_linkage")
+    parser.add_argument("--chunk-pairs", type=int, default=CHUNK_PAIRS)
+    parser.add_argument("--workers", type=int, default=1, help="rapidfuzz scoring threads")
+    args = parser.parse_args()
+
+    op = pd.read_parquet(os.path.join(args.input, "open_payments_clean.parquet"), columns=OP_COLUMNS + ["linkage_tier"])
+    op_tier2 = op[op["linkage_tier"] == "tier2_fuzzy"].reset_index(drop=True)
+    med_clean = pd.read_parquet(os.path.join(args.input, "medicare_clean.parquet"), columns=MED_COLUMNS)
+    pairs = pd.read_parquet(args.pairs, columns=["index_op", "index_med"])
+
+    start = time.perf_counter()
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, "pair_features.parquet")
+    rows = write_features(pairs["index_op"], pairs["index_med"], op_tier2, med_clean, path,
+                          args.chunk_pairs, args.workers)
+    print(f"{rows:,} pairs x {len(FEATURE_COLS)} features -> {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 # preprocessing.py
 
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
 import jellyfish
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 # -----------------------------
 # Name cleaning & phonetics
@@ -18,17 +25,51 @@ def clean_name(s: str) -> str:
     s = s.strip(".,;:-\"'")
     return s or None
 
+# Bounded memo for the per-value phonetic functions; name columns repeat a
+# few hundred thousand surnames across millions of rows.
+PHONETIC_CACHE_SIZE = 262_144
+
+
+@lru_cache(maxsize=PHONETIC_CACHE_SIZE, typed=True)
+def _soundex(s) -> str:
+    return jellyfish.soundex(str(s))
+
+
+@lru_cache(maxsize=PHONETIC_CACHE_SIZE, typed=True)
+def _metaphone(s) -> str:
+    return jellyfish.metaphone(str(s))
+
+
+def _memoized(cached, s):
+    try:
+        return cached(s)
+    except TypeError:  # unhashable input
+        return cached.__wrapped__(s)
+
+
 def soundex_code(s: str) -> str:
     """Return Soundex code or None."""
     if not s:
         return None
-    return jellyfish.soundex(str(s))
+    return _memoized(_soundex, s)
 
 def metaphone_code(s: str) -> str:
     """Return Metaphone code or None."""
     if not s:
         return None
-    return jellyfish.metaphone(str(s))
+    return _memoized(_metaphone, s)
+
+def clean_credential(s: str) -> str:
+    """Credential cleanup (M.D. -> MD): uppercase, strip, drop periods and commas."""
+    if s is None or pd.isna(s):
+        return None
+    s = str(s).strip().upper()
+    s = s.replace(".", "").replace(",", "").strip()
+    return s or None
+
+def phonetic_cache_info() -> dict:
+    """lru_cache statistics of the scalar phonetic functions."""
+    return {"soundex": _soundex.cache_info(), "metaphone": _metaphone.cache_info()}
 
 # -----------------------------
 # Address cleaning
@@ -84,6 +125,203 @@ def normalize_zip5(zip_str: str) -> str:
         return s[:5]
     return None
 
+# -----------------------------
+# Vectorized (Series) cleaners
+# -----------------------------
+#
+# clean_name_series(s) and friends return exactly s.map(clean_name) (etc.) as
+# an object Series with s's index and name, including how the scalar
+# functions treat non-string cells: None -> None, NaN -> str(nan) -> "NAN",
+# numbers -> str(number). Plain-ASCII strings go through Arrow compute
+# kernels. For ASCII, Python's \s and str.strip() whitespace is exactly
+# _ASCII_WS, and \D is [^0-9]. Everything else (non-ASCII text, NaN, numbers)
+# goes through the scalar function itself, once per distinct string or kind
+# of missing value.
+
+_ASCII_WS = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f "
+_ASCII_WS_RUN = r"[\t\n\x0b\x0c\r\x1c-\x1f ]+"
+
+
+def _null_if_empty(arr: pa.Array) -> pa.Array:
+    return pc.if_else(pc.equal(pc.binary_length(arr), 0), pa.scalar(None, arr.type), arr)
+
+
+def _strip_upper_collapse(arr: pa.Array) -> pa.Array:
+    """str(s).strip().upper(), then whitespace runs collapsed to one space (ASCII input)."""
+    arr = pc.ascii_upper(pc.ascii_trim(arr, characters=_ASCII_WS))
+    # the regex is the slow kernel; only rows with a control char or a double space need it
+    needs = pc.or_(pc.invert(pc.ascii_is_printable(arr)), pc.match_substring(arr, "  "))
+    if not pc.any(needs).as_py():
+        return arr
+    collapsed = pc.replace_substring_regex(arr.filter(needs), pattern=_ASCII_WS_RUN, replacement=" ")
+    return pc.replace_with_mask(arr, needs, collapsed)
+
+
+def _clean_strings(uniques: np.ndarray, scalar, ascii_kernel) -> np.ndarray:
+    """Clean an object array of distinct str values."""
+    out = np.empty(len(uniques), dtype=object)
+    if len(uniques) == 0:
+        return out
+    arr = pa.array(uniques, type=pa.large_string())
+    ascii = pc.string_is_ascii(arr).to_numpy(zero_copy_only=False)
+    if ascii.any():
+        out[ascii] = ascii_kernel(arr.filter(pa.array(ascii))).to_numpy(zero_copy_only=False)
+    if not ascii.all():
+        out[~ascii] = [scalar(v) for v in uniques[~ascii]]
+    return out
+
+
+def _apply_series(s: pd.Series, scalar, clean_uniques) -> pd.Series:
+    """Clean each distinct str once with clean_uniques, everything else via scalar."""
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biuf":
+        # numeric: one scalar call per distinct bit pattern (keeps -0.0 apart from 0.0)
+        arr = s.to_numpy()
+        keys = arr.view(f"u{arr.itemsize}") if arr.dtype.kind == "f" else arr
+        codes, uniques = pd.factorize(keys)
+        results = [scalar(v) for v in uniques.view(arr.dtype).tolist()]
+        return pd.Series(np.array(results + [None], dtype=object)[codes], index=s.index, name=s.name)
+
+    values = np.asarray(s, dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        codes, uniques = pd.factorize(values)  # missing cells get code -1
+        out = np.append(clean_uniques(uniques), None)[codes]
+        missing = np.flatnonzero(codes < 0)
+    else:
+        # mixed column: factorize would merge 1, 1.0 and True, so split out the str cells
+        out = np.full(len(values), None, dtype=object)
+        is_str = np.fromiter((type(v) is str for v in values), dtype=bool, count=len(values))
+        str_idx = np.flatnonzero(is_str)
+        codes, uniques = pd.factorize(values[str_idx])
+        out[str_idx] = clean_uniques(uniques)[codes]
+        null = pd.isna(values)
+        odd_idx = np.flatnonzero(~is_str & ~null)
+        out[odd_idx] = [scalar(v) for v in values[odd_idx]]
+        missing = np.flatnonzero(null)
+
+    # missing cells: every None, NaN, pd.NA... of one type gives the same result
+    if len(missing):
+        memo = {}
+        out[missing] = [memo[type(v)] if type(v) in memo else memo.setdefault(type(v), scalar(v))
+                        for v in values[missing]]
+    return pd.Series(out, index=s.index, name=s.name)
+
+
+def _clean_name_ascii(arr: pa.Array) -> pa.Array:
+    return _null_if_empty(pc.ascii_trim(_strip_upper_collapse(arr), characters=".,;:-\"'"))
+
+
+def _clean_credential_ascii(arr: pa.Array) -> pa.Array:
+    arr = pc.ascii_upper(pc.ascii_trim(arr, characters=_ASCII_WS))
+    arr = pc.replace_substring(pc.replace_substring(arr, pattern=".", replacement=""), pattern=",", replacement="")
+    return _null_if_empty(pc.ascii_trim(arr, characters=_ASCII_WS))
+
+
+def _clean_street_ascii(arr: pa.Array) -> pa.Array:
+    lists = pc.split_pattern(_strip_upper_collapse(arr), pattern=" ")
+    tokens = pc.list_flatten(lists)
+    abbrev = pa.array(list(USPS_ABBREV.values()), type=tokens.type)
+    slot = pc.index_in(tokens, value_set=pa.array(list(USPS_ABBREV), type=tokens.type))
+    mapped = pc.if_else(pc.is_null(slot), tokens, pc.take(abbrev, pc.fill_null(slot, 0)))
+    joined = pc.binary_join(type(lists).from_arrays(lists.offsets, mapped), pa.scalar(" ", tokens.type))
+    return _null_if_empty(pc.ascii_trim(joined, characters=".,"))
+
+
+def _clean_city_ascii(arr: pa.Array) -> pa.Array:
+    return _null_if_empty(_strip_upper_collapse(arr))
+
+
+def _clean_state_ascii(arr: pa.Array) -> pa.Array:
+    return _null_if_empty(pc.ascii_upper(pc.ascii_trim(arr, characters=_ASCII_WS)))
+
+
+def _normalize_zip5_ascii(arr: pa.Array) -> pa.Array:
+    digits = pc.replace_substring_regex(arr, pattern="[^0-9]", replacement="")
+    zip5 = pc.utf8_slice_codeunits(digits, 0, 5)
+    return pc.if_else(pc.greater_equal(pc.binary_length(digits), 5), zip5, pa.scalar(None, zip5.type))
+
+
+def _cleaner_series(s: pd.Series, scalar, ascii_kernel) -> pd.Series:
+    return _apply_series(s, scalar, partial(_clean_strings, scalar=scalar, ascii_kernel=ascii_kernel))
+
+
+def clean_name_series(s: pd.Series) -> pd.Series:
+    """Vectorized clean_name: same values as s.map(clean_name)."""
+    return _cleaner_series(s, clean_name, _clean_name_ascii)
+
+
+def clean_credential_series(s: pd.Series) -> pd.Series:
+    """Vectorized clean_credential: same values as s.map(clean_credential)."""
+    return _cleaner_series(s, clean_credential, _clean_credential_ascii)
+
+
+def clean_street_series(s: pd.Series) -> pd.Series:
+    """Vectorized clean_street (reads USPS_ABBREV at call time): same values as s.map(clean_street)."""
+    return _cleaner_series(s, clean_street, _clean_street_ascii)
+
+
+def clean_city_series(s: pd.Series) -> pd.Series:
+    """Vectorized clean_city: same values as s.map(clean_city)."""
+    return _cleaner_series(s, clean_city, _clean_city_ascii)
+
+
+def clean_state_series(s: pd.Series) -> pd.Series:
+    """Vectorized clean_state: same values as s.map(clean_state)."""
+    return _cleaner_series(s, clean_state, _clean_state_ascii)
+
+
+def normalize_zip5_series(s: pd.Series) -> pd.Series:
+    """Vectorized normalize_zip5: same values as s.map(normalize_zip5)."""
+    return _cleaner_series(s, normalize_zip5, _normalize_zip5_ascii)
+
+
+# -----------------------------
+# Batch phonetic encoding
+# -----------------------------
+#
+# soundex_code_series(s) / metaphone_code_series(s) return exactly
+# s.map(soundex_code) / s.map(metaphone_code). Each distinct string is
+# encoded once, optionally spread over a process pool, and the codes are
+# mapped back to the rows by their factorize code.
+
+_PHONETIC = {"soundex": jellyfish.soundex, "metaphone": jellyfish.metaphone}
+_POOL_MIN_UNIQUES = 50_000  # below this, starting workers costs more than it saves
+
+
+def _encode_chunk(algorithm: str, values: list) -> list:
+    encode = _PHONETIC[algorithm]
+    return [encode(v) if v else None for v in values]
+
+
+def _encode_uniques(uniques: np.ndarray, algorithm: str, processes: int = 0) -> np.ndarray:
+    """Phonetic code of each distinct str ("" -> None, as in the scalar functions)."""
+    values = uniques.tolist()
+    if processes and processes > 1 and len(values) >= _POOL_MIN_UNIQUES:
+        size = -(-len(values) // (processes * 4))
+        chunks = [values[i:i + size] for i in range(0, len(values), size)]
+        with ProcessPoolExecutor(processes) as pool:
+            codes = [c for part in pool.map(partial(_encode_chunk, algorithm), chunks) for c in part]
+    else:
+        codes = _encode_chunk(algorithm, values)
+    out = np.empty(len(codes), dtype=object)
+    out[:] = codes
+    return out
+
+
+def soundex_code_series(s: pd.Series, processes: int = 0) -> pd.Series:
+    """Vectorized soundex_code: same values as s.map(soundex_code).
+
+    processes > 1 encodes the distinct values in that many worker processes.
+    """
+    return _apply_series(s, soundex_code, partial(_encode_uniques, algorithm="soundex", processes=processes))
+
+
+def metaphone_code_series(s: pd.Series, processes: int = 0) -> pd.Series:
+    """Vectorized metaphone_code: same values as s.map(metaphone_code).
+
+    processes > 1 encodes the distinct values in that many worker processes.
+    """
+    return _apply_series(s, metaphone_code, partial(_encode_uniques, algorithm="metaphone", processes=processes))
+
 # -----------------------------
 # NPI validation (Luhn variant)
 # -----------------------------
@@ -110,3 +348,161 @@ def is_valid_npi(npi) -> bool:
     check_digit = (10 - (total % 10)) % 10
     return check_digit == int(s[-1])
 
+
+
+# -----------------------------
+# Bulk NPI validation
+# -----------------------------
+#
+# is_valid_npi_array(values)[i] == is_valid_npi(values[i]) for every cell.
+# The scalar function keeps the digits of str(npi), so what counts is how a
+# value prints: ints give their decimal digits (sign dropped), an integral
+# float below 1e16 prints as "<int>.0" and so has one extra trailing 0
+# digit, and NaN/inf/None/bools have no digits at all. ASCII strings are
+# reduced to their digits with Arrow kernels. Other values (non-ASCII
+# strings with Unicode digits, non-integral floats, arbitrary objects) go
+# through the scalar function.
+
+# Luhn over "80840" + all ten digits: the sum must be 0 mod 10. The prefix
+# always contributes 24, and digits at odd positions from the right are
+# doubled. A 10-digit NPI is split into its low and high five digits, and
+# each half's contribution (mod 10) is read from a 100k-entry table.
+_LUHN_DOUBLE = np.array([0, 2, 4, 6, 8, 1, 3, 5, 7, 9])
+_LUHN_CHUNK = 1 << 16  # keep the temporaries cache-sized
+
+
+def _luhn_table(double_even: bool) -> np.ndarray:
+    rest, total = np.arange(100_000), np.zeros(100_000, dtype=np.int64)
+    for pos in range(5):
+        digit, rest = rest % 10, rest // 10
+        total += _LUHN_DOUBLE[digit] if (pos % 2 == 0) == double_even else digit
+    return (total % 10).astype(np.uint8)
+
+
+_LUHN_LOW = _luhn_table(double_even=False)   # positions 0-4 from the right
+_LUHN_HIGH = _luhn_table(double_even=True)   # positions 5-9
+
+
+def _luhn_ok(npis: np.ndarray, lowest: int = 1_000_000_000) -> np.ndarray:
+    """Luhn check for 10-digit NPIs given as non-negative integers.
+
+    Values below ``lowest`` fail; strings pass 0 so that "0123456789" counts
+    as ten digits.
+    """
+    out = np.empty(len(npis), dtype=bool)
+    for start in range(0, len(npis), _LUHN_CHUNK):
+        chunk = npis[start:start + _LUHN_CHUNK]
+        ok = (chunk >= lowest) & (chunk < 10_000_000_000)
+        chunk = np.where(ok, chunk, 0).astype(np.int64)
+        high = chunk // 100_000
+        low = chunk - high * 100_000
+        out[start:start + _LUHN_CHUNK] = ok & ((_LUHN_LOW[low] + _LUHN_HIGH[high] + 4) % 10 == 0)
+    return out
+
+
+def _valid_ints(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind == "u":
+        return _luhn_ok(values.astype(np.uint64))
+    # |int64 min| overflows, but it has 19 digits and is invalid anyway
+    return _luhn_ok(np.abs(values.astype(np.int64)).astype(np.uint64))
+
+
+def _valid_floats(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.float64)
+    out = np.zeros(len(values), dtype=bool)
+    finite = np.isfinite(values)
+    integral = finite & (np.abs(values) < 1e16) & (values == np.trunc(values))
+    # str(123456789.0) == "123456789.0" -> digits "1234567890"
+    small = integral & (np.abs(values) < 1e9)
+    out[small] = _luhn_ok(np.abs(values[small]).astype(np.uint64) * 10)
+    odd = np.flatnonzero(finite & ~integral)
+    out[odd] = [is_valid_npi(v) for v in values[odd].tolist()]
+    return out
+
+
+def _valid_strings(arr: pa.Array) -> np.ndarray:
+    """Validity of a pyarrow string array; nulls are False (str(None) has no digits)."""
+    if len(arr) == arr.null_count:
+        return np.zeros(len(arr), dtype=bool)
+    # typical NPI column: every cell is null or 1-19 ASCII digits, which all parse as uint64
+    lengths = pc.binary_length(arr)
+    if pc.max(lengths).as_py() <= 19 and pc.all(pc.ascii_is_decimal(arr)).as_py():
+        numbers = pc.fill_null(pc.cast(arr, pa.uint64()), 0).to_numpy()
+        ten = pc.fill_null(pc.equal(lengths, 10), False).to_numpy(zero_copy_only=False)
+        return ten & _luhn_ok(numbers, lowest=0)
+
+    out = np.zeros(len(arr), dtype=bool)
+    ascii = pc.fill_null(pc.string_is_ascii(arr), False)
+    # the regex is the slow kernel; only rows with something besides digits need it
+    messy = pc.and_(ascii, pc.invert(pc.fill_null(pc.ascii_is_decimal(arr), False)))
+    digits = arr
+    if pc.any(messy).as_py():
+        digits = pc.replace_with_mask(
+            arr, messy, pc.replace_substring_regex(arr.filter(messy), pattern="[^0-9]", replacement=""))
+    ten = pc.and_kleene(ascii, pc.equal(pc.binary_length(digits), 10))
+    mask = ten.to_numpy(zero_copy_only=False)
+    if mask.any():
+        out[mask] = _luhn_ok(pc.cast(digits.filter(ten), pa.uint64()).to_numpy(), lowest=0)
+    other = pc.and_(pc.invert(ascii), pc.is_valid(arr))
+    other_idx = np.flatnonzero(other.to_numpy(zero_copy_only=False))
+    if len(other_idx):
+        out[other_idx] = [is_valid_npi(v) for v in arr.take(pa.array(other_idx)).to_pylist()]
+    return out
+
+
+def _valid_objects(values: np.ndarray) -> np.ndarray:
+    """Object array: str, int and float cells vectorized by type, the rest via the scalar."""
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        return _valid_strings(pa.array(values, type=pa.large_string(), from_pandas=True))
+    out = np.zeros(len(values), dtype=bool)
+    kinds = [type(v) for v in values]
+    handled = np.zeros(len(values), dtype=bool)
+    for kind, check in ((str, None), (int, _valid_ints), (float, _valid_floats)):
+        mask = np.fromiter((k is kind for k in kinds), dtype=bool, count=len(kinds))
+        handled |= mask
+        idx = np.flatnonzero(mask)
+        if not len(idx):
+            continue
+        if kind is str:
+            out[idx] = _valid_strings(pa.array(values[idx], type=pa.large_string()))
+            continue
+        try:
+            out[idx] = check(values[idx].astype(np.int64 if kind is int else np.float64))
+        except OverflowError:  # ints past int64 have more than 10 digits, but be exact
+            out[idx] = [is_valid_npi(v) for v in values[idx]]
+    # None/NaN/pd.NA/NaT print without digits and stay False
+    rest = np.flatnonzero(~handled & ~pd.isna(values))
+    out[rest] = [is_valid_npi(v) for v in values[rest]]
+    return out
+
+
+def is_valid_npi_array(values) -> np.ndarray:
+    """
+    Vectorized is_valid_npi over an int/str array, list or Series.
+    Returns a boolean mask equal to [is_valid_npi(v) for v in values].
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if isinstance(values, pa.Array):
+        if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+            return _valid_strings(values)
+        values = values.to_pandas()
+    if isinstance(values, pd.Series):
+        values = values.array
+    if isinstance(values, pd.api.extensions.ExtensionArray):
+        if isinstance(values.dtype, pd.StringDtype):
+            return is_valid_npi_array(pa.array(values, from_pandas=True))
+        if values.dtype.kind in "iuf":
+            # nullable numbers: pd.NA prints as "<NA>", which has no digits
+            na = np.asarray(values.isna(), dtype=bool)
+            return is_valid_npi_array(values.to_numpy(values.dtype.numpy_dtype, na_value=0)) & ~na
+        values = np.asarray(values, dtype=object)
+
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return _valid_ints(values)
+    if values.dtype.kind == "f":
+        return _valid_floats(values)
+    if values.dtype.kind == "b":
+        return np.zeros(len(values), dtype=bool)
+    return _valid_objects(values.astype(object))
@@ -0,0 +1,85 @@
+# preprocessing_parallel.py
+"""
+Process-parallel map over Arrow tables, in input order.
+
+The Phase 2 cleaners are row-local, so a source can be split into row
+ranges and each range cleaned in its own process. Tables travel between
+processes as Arrow IPC streams in shared memory (/dev/shm where it exists):
+the sender writes the stream once, and the receiver memory-maps it and
+reads the columns in place. No DataFrame is pickled. The executor keeps at
+most ``in_flight`` ranges queued and yields results in submission order,
+so the output matches a serial run row for row.
+"""
+
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+
+SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def write_ipc(table: pa.Table, path: str):
+    """Write ``table`` to ``path`` as one Arrow IPC stream."""
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_ipc(path: str) -> pa.Table:
+    """Memory-map an IPC stream written by :func:`write_ipc` (zero-copy).
+
+    The mapping stays alive while any column of the table is referenced,
+    so the file can be unlinked right away.
+    """
+    return pa.ipc.open_stream(pa.memory_map(path)).read_all()
+
+
+def _run(fn, in_path: str, out_path: str, start: int):
+    table = read_ipc(in_path)
+    os.unlink(in_path)
+    write_ipc(fn(table, start), out_path)
+
+
+def _collect(future, out_path: str) -> pa.Table:
+    future.result()
+    table = read_ipc(out_path)
+    os.unlink(out_path)
+    return table
+
+
+def map_tables(fn, tables, workers: int = 1, in_flight: int = None, shm_dir: str = None):
+    """Yield ``fn(table, start)`` for each input table, in input order.
+
+    ``start`` is the number of rows in the tables before this one, so
+    ``fn`` can number rows globally. ``fn`` must be picklable (a module
+    level function or a ``functools.partial`` of one) and return a
+    pa.Table. With ``workers <= 1`` everything runs in this process.
+    """
+    if workers <= 1:
+        start = 0
+        for table in tables:
+            yield fn(table, start)
+            start += table.num_rows
+        return
+
+    in_flight = in_flight or 2 * workers
+    directory = tempfile.mkdtemp(prefix="preprocessing-", dir=shm_dir or SHM_DIR)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            start = 0
+            for i, table in enumerate(tables):
+                in_path = os.path.join(directory, f"{i:08d}.in.arrow")
+                out_path = os.path.join(directory, f"{i:08d}.out.arrow")
+                write_ipc(table, in_path)
+                pending.append((pool.submit(_run, fn, in_path, out_path, start), out_path))
+                start += table.num_rows
+                if len(pending) >= in_flight:
+                    yield _collect(*pending.popleft())
+            while pending:
+                yield _collect(*pending.popleft())
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,557 @@
+# preprocessing_pipeline.py
+"""
+Streaming Phase 2 preprocessing: raw CMS CSVs -> *_clean.parquet.
+
+This produces the same three files as notebooks/2_preprocessing.ipynb, but
+it never holds a whole source in memory:
+
+    pass 1  read the CSV in bounded chunks, clean each chunk on its own
+            (names, addresses, NPI check, phonetics) and append it to a
+            staging parquet one row group at a time
+    pass 2  steps that need every row of a provider
+              PECOS           DUAL_ENTITY_FLAG, MULTI_NPI_ORG, PARENT_NPI,
+                              from small per-key tables, then a streamed
+                              rewrite of the staged rows
+              Medicare / OP   provider-level dedup; staged rows are
+                              hash-partitioned by provider key so each
+                              partition aggregates alone, and the results
+                              are put back into first-appearance order
+                              through range buckets
+
+Peak memory is set by the chunk size and the partition size
+(PARTITION_BYTES of raw CSV per partition), not by the input size. The
+spill files live in a temporary directory next to the outputs.
+
+Pass 1 cleaning can run on several processes (``workers``); chunks go to
+the pool as Arrow tables through preprocessing_parallel.map_tables and
+come back in order, so the outputs do not depend on the worker count.
+
+Run:  python lib/preprocessing_pipeline.py --data-dir data --out artifacts/phase2_preprocessing [--workers 8]
+"""
+
+import argparse
+import math
+import os
+import shutil
+import tempfile
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from preprocessing import (
+    clean_name_series, clean_credential_series,
+    clean_street_series, clean_city_series, clean_state_series,
+    normalize_zip5_series, soundex_code_series, metaphone_code_series,
+    is_valid_npi_array,
+)
+from preprocessing_parallel import map_tables
+
+DEFAULT_CHUNKSIZE = 200_000
+PARTITION_BYTES = 64 * 1024 ** 2  # raw CSV bytes per dedup partition
+
+MEDICARE_FILE = "MUP_PHY_R25_P05_V20_D23_Prov_Svc.csv"
+OPEN_PAYMENTS_FILE = "OP_DTL_GNRL_PGYR2023_P01232026_01102026.csv"
+PECOS_FILE = "Medicare_FFS_Public_Provider_Enrollment_Q3_2025.csv"
+
+
+# -----------------------------
+# Parquet sinks and spill partitions
+# -----------------------------
+
+class ParquetSink:
+    """Append DataFrames or Arrow tables to one parquet file, one row group per write.
+
+    The first frame fixes the schema and later frames are cast to it.
+    Columns that are all-null in the first frame take their type from
+    ``types`` and default to string.
+    """
+
+    def __init__(self, path: str, types: dict = None):
+        self.path = path
+        self.types = types or {}
+        self.rows = 0
+        self._writer = None
+
+    def write(self, frame):
+        if isinstance(frame, pd.DataFrame):
+            frame = pa.Table.from_pandas(frame, preserve_index=False)
+        table = frame.replace_schema_metadata(None)
+        if self._writer is None:
+            schema = pa.schema([
+                f.with_type(self.types.get(f.name, pa.string())) if pa.types.is_null(f.type) else f
+                for f in table.schema
+            ])
+            self._writer = pq.ParquetWriter(self.path, schema)
+        if not table.schema.equals(self._writer.schema):
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _Partitions:
+    """``n`` spill files; rows are routed to a file by a partition id per row."""
+
+    def __init__(self, directory: str, prefix: str, n: int, types: dict = None):
+        self.sinks = [ParquetSink(os.path.join(directory, f"{prefix}-{i:04d}.parquet"), types)
+                      for i in range(n)]
+
+    def write(self, frame, part: np.ndarray):
+        order = np.argsort(part, kind="stable")
+        bounds = np.searchsorted(part[order], np.arange(len(self.sinks) + 1))
+        if isinstance(frame, pa.Table):
+            frame = frame.take(order)
+            order = np.arange(len(order))
+        for i, sink in enumerate(self.sinks):
+            if bounds[i + 1] > bounds[i]:
+                if isinstance(frame, pa.Table):
+                    sink.write(frame.slice(bounds[i], bounds[i + 1] - bounds[i]))
+                else:
+                    sink.write(frame.iloc[order[bounds[i]:bounds[i + 1]]])
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def frames(self):
+        """Each non-empty partition as a DataFrame, in partition order."""
+        for sink in self.sinks:
+            if sink.rows:
+                yield pq.read_table(sink.path).to_pandas()
+
+
+def _hash_partition(keys: pd.Series, n: int) -> np.ndarray:
+    return (pd.util.hash_pandas_object(keys, index=False).to_numpy() % np.uint64(n)).astype(np.int64)
+
+
+def _partition_count(csv_path: str) -> int:
+    return max(1, math.ceil(os.path.getsize(csv_path) / PARTITION_BYTES))
+
+
+# pd.read_csv's default missing-value strings, so Arrow parses the same nulls
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def _read_tables(path: str, chunksize: int, dtypes: dict, usecols: list = None, encoding: str = "utf8"):
+    """Arrow tables of ``chunksize`` rows, parsed like pd.read_csv(dtype=str).
+
+    Columns not in ``dtypes`` are read as strings; ``usecols`` keeps the
+    file's column order, as pandas does.
+    """
+    header = pd.read_csv(path, nrows=0, encoding=encoding).columns
+    columns = [c for c in header if usecols is None or c in usecols]
+    convert = pacsv.ConvertOptions(
+        column_types={c: pa.from_numpy_dtype(np.dtype(dtypes[c])) if c in dtypes else pa.string()
+                      for c in columns},
+        include_columns=columns, null_values=PANDAS_NA_VALUES, strings_can_be_null=True,
+    )
+    reader = pacsv.open_csv(path, read_options=pacsv.ReadOptions(encoding=encoding),
+                            convert_options=convert)
+    pending, rows = [], 0
+    for batch in reader:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize)
+            rest = table.slice(chunksize)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending)
+
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    """Arrow chunk -> the frame pd.read_csv would give (NaN, not None, in str columns)."""
+    frame = table.to_pandas()
+    for field in table.schema:
+        if pa.types.is_string(field.type) and table[field.name].null_count:
+            col = frame[field.name].astype(object)
+            frame[field.name] = col.where(col.notna(), np.nan)
+    return frame
+
+
+def _with_partition(frame: pd.DataFrame, keys: pd.Series, n: int) -> pa.Table:
+    """Cleaned chunk as Arrow, plus the hash partition of each row in ``_part``."""
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    return table.append_column("_part", pa.array(_hash_partition(keys, n)))
+
+
+def _write_partitioned(parts: "_Partitions", tables) -> int:
+    """Route each ``_part``-tagged table to its partitions; returns rows written."""
+    rows = 0
+    for table in tables:
+        part = table["_part"].to_numpy()
+        parts.write(table.drop_columns(["_part"]), part)
+        rows += table.num_rows
+    return rows
+
+
+def _add_phonetics(frame: pd.DataFrame, mask: pd.Series, first: str, last: str):
+    """FIRST/LAST_NAME_SOUNDEX/METAPHONE for the rows in mask, None elsewhere."""
+    for col, source, encode in (
+        ("FIRST_NAME_SOUNDEX", first, soundex_code_series),
+        ("LAST_NAME_SOUNDEX", last, soundex_code_series),
+        ("FIRST_NAME_METAPHONE", first, metaphone_code_series),
+        ("LAST_NAME_METAPHONE", last, metaphone_code_series),
+    ):
+        values = pd.Series(None, index=frame.index, dtype=object)
+        values[mask] = encode(frame.loc[mask, source])
+        frame[col] = values
+
+
+def _dedup_in_order(parts: _Partitions, out_path: str, n_rows: int, dedup, spill: str, name: str) -> int:
+    """Run ``dedup`` on each hash partition and write the results in ``_row`` order.
+
+    ``dedup`` returns one row per provider with the ``_row`` of its first
+    appearance. The results go to range buckets of ``_row`` first, so
+    that the final file can be written bucket by bucket in order.
+    """
+    types = parts.sinks[0].types
+    buckets = _Partitions(spill, f"{name}-ordered", len(parts.sinks), types)
+    width = max(1, math.ceil(n_rows / len(parts.sinks)))
+    for frame in parts.frames():
+        result = dedup(frame)
+        buckets.write(result, (result["_row"].to_numpy() // width).astype(np.int64))
+    buckets.close()
+
+    sink = ParquetSink(out_path, types)
+    for frame in buckets.frames():
+        sink.write(frame.sort_values("_row", kind="stable").drop(columns="_row"))
+    sink.close()
+    return sink.rows
+
+
+# -----------------------------
+# PECOS
+# -----------------------------
+
+PECOS_DTYPES = {"NPI": "int64", "PECOS_ASCT_CNTL_ID": "int64"}
+
+
+def clean_pecos_chunk(pecos: pd.DataFrame) -> pd.DataFrame:
+    """Section 2.2 on one chunk: enrollment ID parts, names, phonetics, NPI check."""
+    pecos['ENRLMT_ENTITY'] = pecos['ENRLMT_ID'].str[0]
+    pecos['ENRLMT_DATE'] = pd.to_datetime(pecos['ENRLMT_ID'].str[1:9], format='%Y%m%d', errors='coerce')
+    pecos['ENRLMT_YEAR'] = pecos['ENRLMT_DATE'].dt.year
+    pecos['ENRLMT_SEQ'] = pecos['ENRLMT_ID'].str[9:]
+
+    for col in ['FIRST_NAME', 'MDL_NAME', 'LAST_NAME', 'ORG_NAME']:
+        if col in pecos.columns:
+            pecos[col] = clean_name_series(pecos[col])
+
+    _add_phonetics(pecos, pecos['ENRLMT_ENTITY'] == 'I', 'FIRST_NAME', 'LAST_NAME')
+    pecos['NPI_VALID'] = is_valid_npi_array(pecos['NPI'])
+    return pecos
+
+
+def _clean_pecos_table(table: pa.Table, start: int) -> pa.Table:
+    return pa.Table.from_pandas(clean_pecos_chunk(_to_frame(table)), preserve_index=False)
+
+
+def _pecos_key_tables(stage_path: str):
+    """Dual-entity NPIs, multi-NPI org IDs and the canonical (lowest) org NPI.
+
+    Only distinct (NPI, entity) and (org ID, NPI) pairs are kept, so memory
+    follows the number of providers rather than the number of rows.
+    """
+    entity_pairs, org_pairs = [], []
+    stage = pq.ParquetFile(stage_path)
+    for i in range(stage.num_row_groups):
+        keys = stage.read_row_group(i, columns=['NPI', 'ENRLMT_ENTITY', 'PECOS_ASCT_CNTL_ID']).to_pandas()
+        entity_pairs.append(keys[['NPI', 'ENRLMT_ENTITY']].dropna().drop_duplicates())
+        org = keys.loc[keys['ENRLMT_ENTITY'] == 'O', ['PECOS_ASCT_CNTL_ID', 'NPI']]
+        org_pairs.append(org.drop_duplicates())
+
+    entities = pd.concat(entity_pairs, ignore_index=True).drop_duplicates()
+    entity_per_npi = entities.groupby('NPI')['ENRLMT_ENTITY'].nunique()
+    dual_npis = entity_per_npi[entity_per_npi > 1].index
+
+    orgs = pd.concat(org_pairs, ignore_index=True).drop_duplicates()
+    org_npi_counts = orgs.groupby('PECOS_ASCT_CNTL_ID')['NPI'].nunique()
+    multi_npi_orgs = org_npi_counts[org_npi_counts > 1].index
+    canonical = orgs.groupby('PECOS_ASCT_CNTL_ID')['NPI'].min()
+    return dual_npis, multi_npi_orgs, canonical
+
+
+def preprocess_pecos(csv_path: str, out_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                     spill_dir: str = None, workers: int = 1) -> dict:
+    """PECOS enrollment CSV -> pecos_clean.parquet (one row per enrollment)."""
+    spill = tempfile.mkdtemp(prefix="pecos-", dir=spill_dir or os.path.dirname(os.path.abspath(out_path)))
+    try:
+        stage = ParquetSink(os.path.join(spill, "stage.parquet"))
+        chunks = _read_tables(csv_path, chunksize, PECOS_DTYPES, encoding='latin')
+        for table in map_tables(_clean_pecos_table, chunks, workers):
+            stage.write(table)
+        stage.close()
+
+        dual_npis, multi_npi_orgs, canonical = _pecos_key_tables(stage.path)
+        out = ParquetSink(out_path, types={'PARENT_NPI': pa.float64()})
+        staged = pq.ParquetFile(stage.path)
+        for i in range(staged.num_row_groups):
+            pecos = staged.read_row_group(i).to_pandas()
+            pecos['DUAL_ENTITY_FLAG'] = pecos['NPI'].isin(dual_npis)
+            pecos['ENROLLED_BY_2023'] = pecos['ENRLMT_YEAR'] <= 2023
+            pecos['MULTI_NPI_ORG'] = (pecos['ENRLMT_ENTITY'] == 'O') & \
+                pecos['PECOS_ASCT_CNTL_ID'].isin(multi_npi_orgs)
+            pecos['PARENT_NPI'] = pecos['PECOS_ASCT_CNTL_ID'].map(canonical).astype('float64')
+            out.write(pecos)
+        out.close()
+        return {"rows_in": stage.rows, "rows_out": out.rows, "dual_entity_npis": len(dual_npis),
+                "multi_npi_orgs": len(multi_npi_orgs)}
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+
+
+# -----------------------------
+# Medicare
+# -----------------------------
+
+MEDICARE_PROVIDER_COLS = [
+    'Rndrng_NPI', 'Rndrng_Prvdr_Last_Org_Name', 'Rndrng_Prvdr_First_Name',
+    'Rndrng_Prvdr_MI', 'Rndrng_Prvdr_Crdntls', 'Rndrng_Prvdr_Ent_Cd',
+    'Rndrng_Prvdr_St1', 'Rndrng_Prvdr_City',
+    'Rndrng_Prvdr_State_Abrvtn', 'Rndrng_Prvdr_State_FIPS', 'Rndrng_Prvdr_Zip5',
+    'Rndrng_Prvdr_RUCA', 'Rndrng_Prvdr_RUCA_Desc', 'Rndrng_Prvdr_Cntry',
+    'Rndrng_Prvdr_Type', 'Rndrng_Prvdr_Mdcr_Prtcptg_Ind',
+    'NPI_VALID', 'FIRST_NAME_SOUNDEX', 'LAST_NAME_SOUNDEX',
+    'FIRST_NAME_METAPHONE', 'LAST_NAME_METAPHONE'
+]
+MEDICARE_SERVICE_COLS = ['HCPCS_Cd', 'Tot_Srvcs', 'Tot_Benes', 'Avg_Sbmtd_Chrg', 'Avg_Mdcr_Pymt_Amt']
+# raw columns read; St2 and the redundant payment averages are never loaded
+MEDICARE_USECOLS = [c for c in MEDICARE_PROVIDER_COLS if not c.startswith(('NPI_', 'FIRST_', 'LAST_'))] + \
+    MEDICARE_SERVICE_COLS
+MEDICARE_DTYPES = {
+    'Rndrng_NPI': 'int64', 'Rndrng_Prvdr_RUCA': 'float64', 'Tot_Benes': 'int64',
+    'Tot_Srvcs': 'float64', 'Avg_Sbmtd_Chrg': 'float64', 'Avg_Mdcr_Pymt_Amt': 'float64',
+}
+
+
+def clean_medicare_chunk(medicare: pd.DataFrame) -> pd.DataFrame:
+    """Section 2.3 row-level steps on one chunk of service rows."""
+    medicare['Rndrng_Prvdr_First_Name'] = clean_name_series(medicare['Rndrng_Prvdr_First_Name'])
+    medicare['Rndrng_Prvdr_Last_Org_Name'] = clean_name_series(medicare['Rndrng_Prvdr_Last_Org_Name'])
+    medicare['Rndrng_Prvdr_MI'] = clean_name_series(medicare['Rndrng_Prvdr_MI'])
+    medicare['Rndrng_Prvdr_Crdntls'] = clean_credential_series(medicare['Rndrng_Prvdr_Crdntls'])
+
+    medicare['Rndrng_Prvdr_St1'] = clean_street_series(medicare['Rndrng_Prvdr_St1'])
+    medicare['Rndrng_Prvdr_City'] = clean_city_series(medicare['Rndrng_Prvdr_City'])
+    medicare['Rndrng_Prvdr_State_Abrvtn'] = clean_state_series(medicare['Rndrng_Prvdr_State_Abrvtn'])
+
+    medicare['NPI_VALID'] = is_valid_npi_array(medicare['Rndrng_NPI'])
+    _add_phonetics(medicare, medicare['Rndrng_Prvdr_Ent_Cd'] == 'I',
+                   'Rndrng_Prvdr_First_Name', 'Rndrng_Prvdr_Last_Org_Name')
+
+    medicare['_total_submitted_charges'] = medicare['Avg_Sbmtd_Chrg'] * medicare['Tot_Srvcs']
+    medicare['_total_medicare_payment'] = medicare['Avg_Mdcr_Pymt_Amt'] * medicare['Tot_Srvcs']
+    return medicare[MEDICARE_PROVIDER_COLS + ['HCPCS_Cd', 'Tot_Srvcs', 'Tot_Benes',
+                                              '_total_submitted_charges', '_total_medicare_payment']]
+
+
+def _clean_medicare_table(table: pa.Table, start: int, parts: int) -> pa.Table:
+    clean = clean_medicare_chunk(_to_frame(table)).assign(_row=np.arange(start, start + table.num_rows))
+    return _with_partition(clean, clean['Rndrng_NPI'], parts)
+
+
+def dedup_medicare(medicare: pd.DataFrame) -> pd.DataFrame:
+    """Collapse service rows to one row per NPI (weighted totals, first provider row)."""
+    service_agg = medicare.groupby('Rndrng_NPI').agg(
+        total_services=('Tot_Srvcs', 'sum'),
+        total_beneficiaries=('Tot_Benes', 'sum'),
+        total_submitted_charges=('_total_submitted_charges', 'sum'),
+        total_medicare_payment=('_total_medicare_payment', 'sum'),
+        unique_hcpcs_count=('HCPCS_Cd', 'nunique'),
+        service_row_count=('HCPCS_Cd', 'count'),
+    ).reset_index()
+    provider_info = medicare[MEDICARE_PROVIDER_COLS + ['_row']].drop_duplicates(subset='Rndrng_NPI', keep='first')
+    return provider_info.merge(service_agg, on='Rndrng_NPI', how='left')
+
+
+def preprocess_medicare(csv_path: str, out_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                        spill_dir: str = None, workers: int = 1) -> dict:
+    """Medicare service-level CSV -> medicare_clean.parquet (one row per NPI)."""
+    spill = tempfile.mkdtemp(prefix="medicare-", dir=spill_dir or os.path.dirname(os.path.abspath(out_path)))
+    try:
+        parts = _Partitions(spill, "rows", _partition_count(csv_path))
+        chunks = _read_tables(csv_path, chunksize, MEDICARE_DTYPES, usecols=MEDICARE_USECOLS)
+        clean = partial(_clean_medicare_table, parts=len(parts.sinks))
+        rows = _write_partitioned(parts, map_tables(clean, chunks, workers))
+        parts.close()
+        out_rows = _dedup_in_order(parts, out_path, rows, dedup_medicare, spill, "medicare")
+        return {"rows_in": rows, "rows_out": out_rows}
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+
+
+# -----------------------------
+# Open Payments
+# -----------------------------
+
+OP_USECOLS = [
+    "Covered_Recipient_Profile_ID",
+    "Covered_Recipient_First_Name",
+    "Covered_Recipient_Last_Name",
+    "Recipient_Primary_Business_Street_Address_Line1",
+    "Recipient_City",
+    "Recipient_State",
+    "Recipient_Zip_Code",
+    "Covered_Recipient_NPI",
+    "Total_Amount_of_Payment_USDollars",
+    "Date_of_Payment",
+    "Submitting_Applicable_Manufacturer_or_Applicable_GPO_Name",
+    "Applicable_Manufacturer_or_Applicable_GPO_Making_Payment_Name",
+    "Applicable_Manufacturer_or_Applicable_GPO_Making_Payment_State",
+    "Applicable_Manufacturer_or_Applicable_GPO_Making_Payment_Country",
+    "Program_Year"
+]
+OP_DTYPES = {"Covered_Recipient_Profile_ID": "float64", "Total_Amount_of_Payment_USDollars": "float64"}
+OP_PROVIDER_COLS = [
+    'Covered_Recipient_NPI', 'Covered_Recipient_Profile_ID',
+    'Covered_Recipient_First_Name', 'Covered_Recipient_Last_Name',
+    'Recipient_Primary_Business_Street_Address_Line1',
+    'Recipient_City', 'Recipient_State', 'Recipient_Zip5',
+    'NPI_VALID', 'LINKABLE', 'linkage_tier',
+    'FIRST_NAME_SOUNDEX', 'LAST_NAME_SOUNDEX',
+    'FIRST_NAME_METAPHONE', 'LAST_NAME_METAPHONE'
+]
+OP_PAYMENT_COLS = ['Total_Amount_of_Payment_USDollars',
+                   'Applicable_Manufacturer_or_Applicable_GPO_Making_Payment_Name', 'Date_of_Payment']
+
+
+def clean_open_payments_chunk(op: pd.DataFrame, start: int = 0) -> pd.DataFrame:
+    """Section 2.4 row-level steps on one chunk; ``start`` is the chunk's first row number."""
+    no_identity = (
+        op['Covered_Recipient_First_Name'].isna() &
+        op['Covered_Recipient_Last_Name'].isna() &
+        op['Covered_Recipient_NPI'].isna()
+    )
+    op['LINKABLE'] = ~no_identity
+
+    op['Covered_Recipient_NPI'] = pd.to_numeric(op['Covered_Recipient_NPI'], errors='coerce').astype('float64')
+    has_npi_value = op['Covered_Recipient_NPI'].notna()
+
+    op['Covered_Recipient_First_Name'] = clean_name_series(op['Covered_Recipient_First_Name'])
+    op['Covered_Recipient_Last_Name'] = clean_name_series(op['Covered_Recipient_Last_Name'])
+
+    op['Recipient_Primary_Business_Street_Address_Line1'] = (
+        clean_street_series(op['Recipient_Primary_Business_Street_Address_Line1'])
+    )
+    op['Recipient_City'] = clean_city_series(op['Recipient_City'])
+    op['Recipient_State'] = clean_state_series(op['Recipient_State'])
+    op['Recipient_Zip5'] = normalize_zip5_series(op['Recipient_Zip_Code'])
+
+    # is_valid_npi(int(x)) where the NPI exists, None elsewhere
+    valid = is_valid_npi_array(op['Covered_Recipient_NPI'].fillna(0).astype('int64'))
+    op['NPI_VALID'] = pd.Series(np.where(has_npi_value, valid, None), index=op.index, dtype=object)
+
+    _add_phonetics(op, op['Covered_Recipient_First_Name'].notna(),
+                   'Covered_Recipient_First_Name', 'Covered_Recipient_Last_Name')
+
+    has_npi = op['NPI_VALID'] == True  # noqa: E712 (object column with None)
+    has_real_name_and_state = (
+        op['Covered_Recipient_First_Name'].notna() &
+        (op['Covered_Recipient_First_Name'] != 'NAN') &
+        op['Covered_Recipient_Last_Name'].notna() &
+        (op['Covered_Recipient_Last_Name'] != 'NAN') &
+        op['Recipient_State'].notna() &
+        (op['Recipient_State'] != 'NAN')
+    )
+    op['linkage_tier'] = 'unmatchable'
+    op.loc[has_npi, 'linkage_tier'] = 'tier1_npi'
+    op.loc[~has_npi & has_real_name_and_state, 'linkage_tier'] = 'tier2_fuzzy'
+
+    op['Date_of_Payment'] = pd.to_datetime(op['Date_of_Payment'], format='%m/%d/%Y', errors='coerce')
+
+    # NPI as primary key, Profile_ID as fallback, row number as last resort
+    row = pd.RangeIndex(start, start + len(op))
+    pid_valid = op['Covered_Recipient_Profile_ID'].notna()
+    group_key = pd.Series('ROW_' + row.astype(str), index=op.index)
+    group_key[pid_valid] = 'PID_' + op.loc[pid_valid, 'Covered_Recipient_Profile_ID'].astype(str)
+    npi_str = op.loc[has_npi_value, 'Covered_Recipient_NPI'].astype('int64').astype(str)
+    group_key[has_npi_value] = 'NPI_' + npi_str
+    op['_group_key'] = group_key
+    op['_row'] = np.asarray(row)
+    return op[OP_PROVIDER_COLS + OP_PAYMENT_COLS + ['_group_key', '_row']]
+
+
+def _clean_open_payments_table(table: pa.Table, start: int, parts: int) -> pa.Table:
+    clean = clean_open_payments_chunk(_to_frame(table), start=start)
+    return _with_partition(clean, clean['_group_key'], parts)
+
+
+def dedup_open_payments(op: pd.DataFrame) -> pd.DataFrame:
+    """Collapse payments to one row per NPI / Profile ID / unlinked row."""
+    payment_agg = op.groupby('_group_key').agg(
+        total_payment_amount=('Total_Amount_of_Payment_USDollars', 'sum'),
+        payment_count=('Total_Amount_of_Payment_USDollars', 'count'),
+        avg_payment=('Total_Amount_of_Payment_USDollars', 'mean'),
+        max_payment=('Total_Amount_of_Payment_USDollars', 'max'),
+        unique_manufacturers=('Applicable_Manufacturer_or_Applicable_GPO_Making_Payment_Name', 'nunique'),
+        min_payment_date=('Date_of_Payment', 'min'),
+        max_payment_date=('Date_of_Payment', 'max'),
+    ).reset_index()
+    provider_info = op[OP_PROVIDER_COLS + ['_group_key', '_row']].drop_duplicates(
+        subset='_group_key', keep='first'
+    )
+    return provider_info.merge(payment_agg, on='_group_key', how='left').drop(columns=['_group_key'])
+
+
+def preprocess_open_payments(csv_path: str, out_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                             spill_dir: str = None, workers: int = 1) -> dict:
+    """Open Payments general-payments CSV -> open_payments_clean.parquet (one row per recipient)."""
+    spill = tempfile.mkdtemp(prefix="open-payments-", dir=spill_dir or os.path.dirname(os.path.abspath(out_path)))
+    try:
+        parts = _Partitions(spill, "rows", _partition_count(csv_path), types={'NPI_VALID': pa.bool_()})
+        chunks = _read_tables(csv_path, chunksize, OP_DTYPES, usecols=OP_USECOLS)
+        clean = partial(_clean_open_payments_table, parts=len(parts.sinks))
+        rows = _write_partitioned(parts, map_tables(clean, chunks, workers))
+        parts.close()
+        out_rows = _dedup_in_order(parts, out_path, rows, dedup_open_payments, spill, "open-payments")
+        return {"rows_in": rows, "rows_out": out_rows}
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+
+
+# -----------------------------
+# Entry point
+# -----------------------------
+
+def run(data_dir: str, out_dir: str, chunksize: int = DEFAULT_CHUNKSIZE, spill_dir: str = None,
+        workers: int = 1) -> dict:
+    """Preprocess all three sources; returns row counts per output file."""
+    os.makedirs(out_dir, exist_ok=True)
+    steps = [
+        ("pecos_clean.parquet", preprocess_pecos, PECOS_FILE),
+        ("medicare_clean.parquet", preprocess_medicare, MEDICARE_FILE),
+        ("open_payments_clean.parquet", preprocess_open_payments, OPEN_PAYMENTS_FILE),
+    ]
+    return {
+        out_name: step(os.path.join(data_dir, raw), os.path.join(out_dir, out_name), chunksize, spill_dir,
+                       workers)
+        for out_name, step, raw in steps
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming Phase 2 preprocessing")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--out", default="artifacts/phase2_preprocessing")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--spill-dir", default=None)
+    parser.add_argument("--workers", type=int, default=1, help="cleaning processes for pass 1")
+    args = parser.parse_args()
+    for name, summary in run(args.data_dir, args.out, args.chunksize, args.spill_dir, args.workers).items():
+        print(f"{name:32s} {summary['rows_in']:>12,} rows in {summary['rows_out']:>12,} rows out")
+
+
+if __name__ == "__main__":
+    main()
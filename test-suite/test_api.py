@@ -10,7 +10,11 @@ NOTE: Requires the unified parquet at the path expected by app.py.
 """
 import os
 import sys
+import time
+import asyncio
+import threading
 import pytest
+import pandas as pd
 
 # Add the API directory to path so we can import app
 # API_DIR = os.environ.get("API_DIR", "../web-api")
@@ -20,11 +24,19 @@ sys.path.insert(0, API_DIR)
 try:
     from fastapi.testclient import TestClient
     from app import app
+    import app as api
     API_AVAILABLE = True
 except Exception:
     API_AVAILABLE = False
 
 
+@pytest.fixture(scope="module")
+def api_module():
+    if not API_AVAILABLE:
+        pytest.skip("FastAPI app not importable — check API_DIR path")
+    return api
+
+
 @pytest.fixture(scope="module")
 def client():
     if not API_AVAILABLE:
@@ -139,3 +151,410 @@ class TestPaymentEndpoint:
     def test_invalid_npi_payments_returns_404(self, client):
         r = client.get("/providers/0000000000/payments")
         assert r.status_code == 404
+
+
+# ── NPI Index ─────────────────────────────────────────────────
+
+class TestNpiIndex:
+    """Index helpers run on a small in-memory frame (no parquet needed)."""
+
+    @pytest.fixture
+    def frame(self):
+        return pd.DataFrame({
+            "npi": [1003000126, 1992999999, 1003000126, 1234567893],
+            "provider_id": [10, 11, 12, 13],
+        })
+
+    def test_lookup_finds_row(self, api_module, frame):
+        index = api_module._build_npi_index(frame)
+        pos = api_module._lookup_npi(index, 1234567893)
+        assert frame.iloc[pos]["provider_id"] == 13
+
+    def test_duplicate_npi_resolves_to_first_row(self, api_module, frame):
+        index = api_module._build_npi_index(frame)
+        pos = api_module._lookup_npi(index, 1003000126)
+        assert frame.iloc[pos]["provider_id"] == 10
+
+    def test_missing_npi_returns_none(self, api_module, frame):
+        index = api_module._build_npi_index(frame)
+        assert api_module._lookup_npi(index, 1000000000) is None
+        assert api_module._lookup_npi(index, -1) is None
+        assert api_module._lookup_npi(index, 10 ** 30) is None
+
+    def test_empty_frame(self, api_module):
+        index = api_module._build_npi_index(pd.DataFrame())
+        assert api_module._lookup_npi(index, 1003000126) is None
+
+    def test_vectorized_lookup(self, api_module, frame):
+        index = api_module._build_npi_index(frame)
+        probe = [1234567893, 1003000126, 1000000000, 1992999999]
+        assert api_module._lookup_npis(index, probe).tolist() == [3, 0, -1, 1]
+
+
+# ── Serialization ─────────────────────────────────────────────
+
+class TestSerialization:
+    """Columnar page serializer on mixed dtypes (no parquet needed)."""
+
+    @pytest.fixture
+    def page(self):
+        return pd.DataFrame({
+            "npi": pd.Series([1003000126, 1992999999], dtype="int64"),
+            "n_payments": pd.array([4, None], dtype="Int64"),
+            "sum_payment": [12.5, float("nan")],
+            "has_op_payments": [True, False],
+            "first_payment_date": pd.to_datetime(["2023-03-01", None]),
+            "first_med": ["ARDALAN", None],
+        })
+
+    def test_types_are_json_native(self, api_module, page):
+        first, second = api_module._records(page)
+        assert first == {
+            "npi": 1003000126, "n_payments": 4, "sum_payment": 12.5,
+            "has_op_payments": True, "first_payment_date": "2023-03-01T00:00:00",
+            "first_med": "ARDALAN",
+        }
+        assert second["n_payments"] is None
+        assert second["sum_payment"] is None
+        assert second["first_payment_date"] is None
+        assert second["first_med"] is None
+        assert second["has_op_payments"] is False
+
+    def test_response_is_raw_json(self, api_module, page):
+        r = api_module._json_response({"results": api_module._records(page)})
+        assert r.media_type == "application/json"
+        assert r.body.startswith(b'{"results":[{"npi":1003000126,')
+
+    def test_source_frame_not_mutated(self, api_module, page):
+        api_module._records(page)
+        assert page["first_med"].isna().sum() == 1
+
+
+# ── Name Index ────────────────────────────────────────────────
+
+class TestNameIndex:
+    """Trigram search must return exactly what the full-table scan returned."""
+
+    QUERIES = ["smith", "SMITH", "ith", "mi", "A", "O'BRIEN", "zzzz",
+               "SMI.H", "^LEE$", "JOHN SMITH", "ß", " "]
+
+    @pytest.fixture
+    def frame(self):
+        return pd.DataFrame({
+            "first_name_reconciled": ["JOHN", "Mary", None, "LEE", "ANNA", "strauß", "JOHN SMITH"],
+            "last_name_reconciled": ["SMITH", "BLACKSMITH", "O'BRIEN", "LEE", None, "KIM", "DOE"],
+        })
+
+    @staticmethod
+    def scan(frame, query):
+        q = query.upper()
+        mask = (
+            frame["first_name_reconciled"].fillna("").astype(str).str.upper().str.contains(q, na=False) |
+            frame["last_name_reconciled"].fillna("").astype(str).str.upper().str.contains(q, na=False)
+        )
+        return mask[mask].index.tolist()
+
+    def test_matches_full_scan(self, frame):
+        from name_index import NameIndex
+        index = NameIndex(frame, ["first_name_reconciled", "last_name_reconciled"])
+        for q in self.QUERIES:
+            assert index.search(q).tolist() == self.scan(frame, q), q
+
+    def test_empty_frame(self):
+        from name_index import NameIndex
+        index = NameIndex(pd.DataFrame(), ["first_name_reconciled"])
+        assert len(index.search("SMITH")) == 0
+
+
+# ── State Partitions ──────────────────────────────────────────
+
+class TestStatePartitions:
+    """Per-state row positions on a small categorical frame."""
+
+    @pytest.fixture
+    def frame(self):
+        return pd.DataFrame({
+            "state_reconciled": pd.Categorical(["NY", "CA", "ny", None, "NY", "TX"]),
+        })
+
+    def test_rows_grouped_case_insensitively(self, api_module, frame):
+        keys, row_part, rows = api_module._build_state_partitions(frame)
+        assert rows[keys["NY"]].tolist() == [0, 2, 4]
+        assert rows[keys["CA"]].tolist() == [1]
+        assert set(keys) == {"CA", "NY", "TX"}
+
+    def test_missing_state_unpartitioned(self, api_module, frame):
+        keys, row_part, rows = api_module._build_state_partitions(frame)
+        assert row_part[3] == -1
+        assert row_part[2] == keys["NY"]
+
+    def test_encode_categoricals(self, api_module):
+        frame = pd.DataFrame({"state_reconciled": ["NY", "CA"], "entity_type": ["I", "O"]})
+        api_module._encode_categoricals(frame)
+        assert isinstance(frame["state_reconciled"].dtype, pd.CategoricalDtype)
+        assert isinstance(frame["entity_type"].dtype, pd.CategoricalDtype)
+
+
+# ── Stats Caching ─────────────────────────────────────────────
+
+class TestStatsCaching:
+    """ETag revalidation and per-state breakdowns (needs the loaded table)."""
+
+    def test_stats_has_etag(self, client):
+        r = client.get("/stats")
+        assert r.status_code == 200
+        assert r.headers["etag"].startswith('"')
+
+    def test_matching_etag_returns_304(self, client):
+        etag = client.get("/stats").headers["etag"]
+        r = client.get("/stats", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.content == b""
+
+    def test_stale_etag_returns_body(self, client):
+        r = client.get("/stats/coverage", headers={"If-None-Match": '"stale"'})
+        assert r.status_code == 200
+        assert len(r.json()) > 0
+
+    def test_by_state_totals_add_up(self, client):
+        data = client.get("/stats", params={"by_state": True}).json()
+        per_state = sum(s["total_providers"] for s in data["by_state"].values())
+        assert 0 < per_state <= data["total_providers"]
+
+    def test_coverage_by_state_has_state(self, client):
+        data = client.get("/stats/coverage", params={"by_state": True}).json()
+        assert all("state" in row and "data_sources" in row for row in data)
+
+
+class TestStatsCube:
+    """Cube roll-ups on a small frame (no parquet needed)."""
+
+    @pytest.fixture
+    def frame(self):
+        return pd.DataFrame({
+            "state_reconciled": pd.Categorical(["NY", "NY", "CA", None]),
+            "entity_type": pd.Categorical(["I", "O", "I", "I"]),
+            "data_sources": pd.Categorical(["Medicare+PECOS", "Medicare+Org", "Medicare+PECOS", "Medicare"]),
+            "has_pecos_enrollment": [True, False, True, False],
+            "has_op_payments": [False, False, True, False],
+        })
+
+    def test_summary_matches_direct_counts(self, api_module, frame):
+        summary = api_module._summarize(api_module._build_stats_cube(frame))
+        assert summary == {
+            "total_providers": 4, "individuals": 3, "organizations": 1,
+            "with_pecos": 2, "with_op_payments": 1, "pecos_coverage_pct": 50.0,
+        }
+
+    def test_coverage_counts(self, api_module, frame):
+        cube = api_module._build_stats_cube(frame)
+        counts = api_module._coverage_counts(cube, ["data_sources"])
+        assert counts[0] == {"data_sources": "Medicare+PECOS", "count": 2}
+        assert sum(c["count"] for c in counts) == 4
+
+
+# ── Batch Lookup ──────────────────────────────────────────────
+
+class TestBatchLookup:
+
+    KNOWN_NPI = "1003000126"
+
+    def test_found_not_found_invalid(self, client):
+        r = client.post("/providers/batch", json={"npis": [self.KNOWN_NPI, "1234567893", "1234567890"]})
+        assert r.status_code == 200
+        data = r.json()
+        assert [row["npi"] for row in data["found"]] == [int(self.KNOWN_NPI)]
+        assert data["not_found"] == ["1234567893"]
+        assert data["invalid"] == ["1234567890"]
+
+    def test_duplicates_collapsed(self, client):
+        data = client.post("/providers/batch", json={"npis": [self.KNOWN_NPI, int(self.KNOWN_NPI)]}).json()
+        assert data["requested"] == 1
+        assert len(data["found"]) == 1
+
+    def test_ndjson_one_line_per_npi(self, client):
+        r = client.post("/providers/batch", params={"format": "ndjson"},
+                        json={"npis": [self.KNOWN_NPI, "1234567893"]})
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        lines = [line for line in r.text.splitlines() if line]
+        assert len(lines) == 2
+        assert '"status":"found"' in lines[0]
+        assert '"status":"not_found"' in lines[1]
+
+    def test_empty_and_oversized_batches_rejected(self, client, api_module):
+        assert client.post("/providers/batch", json={"npis": []}).status_code == 422
+        too_many = ["1"] * (api_module.BATCH_MAX_NPIS + 1)
+        assert client.post("/providers/batch", json={"npis": too_many}).status_code == 422
+
+
+# ── Hot Reload ────────────────────────────────────────────────
+
+class TestHotReload:
+    """Snapshot swap against a small parquet in tmp_path (restored afterwards)."""
+
+    @pytest.fixture
+    def parquet(self, api_module, tmp_path, monkeypatch):
+        path = tmp_path / "unified_provider_entities.parquet"
+        pd.DataFrame({
+            "npi": [1003000126, 1234567893],
+            "first_name_reconciled": ["ARDALAN", "JANE"],
+            "last_name_reconciled": ["ENKESHAFI", "DOE"],
+            "state_reconciled": ["MD", "NY"],
+            "entity_type": ["I", "I"],
+            "data_sources": ["Medicare+PECOS", "Medicare"],
+            "has_pecos_enrollment": [True, False],
+            "has_op_payments": [False, False],
+        }).to_parquet(path)
+        monkeypatch.setattr(api_module, "_CANDIDATES", [str(path)])
+        monkeypatch.setattr(api_module, "_SNAPSHOT", api_module._SNAPSHOT)
+        monkeypatch.setattr(api_module, "PARQUET_PATH", api_module.PARQUET_PATH)
+        monkeypatch.setattr(api_module, "ADMIN_TOKEN", "secret")
+        return path
+
+    def test_health_reports_snapshot(self, client):
+        data = client.get("/health").json()
+        assert data["snapshot"]["version"] >= 1
+        assert data["reload"]["in_progress"] is False
+
+    def test_reload_swaps_snapshot(self, client, api_module, parquet):
+        old = api_module._SNAPSHOT
+        r = client.post("/admin/reload", params={"wait": True}, headers={"X-Admin-Token": "secret"})
+        assert r.status_code == 202
+        assert r.json()["snapshot"]["version"] == old.version + 1
+
+        health = client.get("/health").json()
+        assert health["provider_count"] == 2
+        assert health["snapshot"]["version"] == old.version + 1
+        assert client.get("/providers", params={"name": "doe"}).json()["total"] == 1
+        # anything still holding the old snapshot keeps reading the old table
+        assert len(old.df) > 2 and old.npi_index is not api_module._SNAPSHOT.npi_index
+
+    def test_failed_reload_keeps_snapshot(self, client, api_module, parquet):
+        parquet.write_bytes(b"not a parquet file")
+        old = api_module._SNAPSHOT
+        assert client.post("/admin/reload", params={"wait": True},
+                           headers={"X-Admin-Token": "secret"}).status_code == 500
+        assert api_module._SNAPSHOT is old
+        assert client.get("/health").json()["reload"]["last_error"]
+        api_module._RELOAD_STATUS["last_error"] = None
+
+    def test_admin_token_required(self, client, api_module, monkeypatch):
+        monkeypatch.setattr(api_module, "ADMIN_TOKEN", "secret")
+        assert client.post("/admin/reload").status_code == 403
+        assert client.post("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    def test_admin_reload_disabled_without_token(self, client, api_module, monkeypatch):
+        monkeypatch.setattr(api_module, "ADMIN_TOKEN", "")
+        old = api_module._SNAPSHOT
+        for headers in ({}, {"X-Admin-Token": ""}):
+            assert client.post("/admin/reload", params={"wait": True}, headers=headers).status_code == 403
+        assert api_module._SNAPSHOT is old
+
+    def test_one_background_reload_at_a_time(self, api_module, monkeypatch):
+        release, calls = threading.Event(), []
+
+        def slow_failing_load(version):
+            calls.append(version)
+            release.wait(5)
+            raise OSError("test loader")
+
+        monkeypatch.setattr(api_module, "_load_snapshot", slow_failing_load)
+        old = api_module._SNAPSHOT
+        # the second caller sees the lock already taken, before the first thread has run
+        assert api_module._start_background_reload() is True
+        assert api_module._start_background_reload() is False
+        release.set()
+        deadline = time.monotonic() + 5
+        while api_module._RELOAD_LOCK.locked() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert calls == [old.version + 1] and not api_module._RELOAD_LOCK.locked()
+        assert api_module._SNAPSHOT is old
+        api_module._RELOAD_STATUS["last_error"] = None
+
+
+# ── Shared Store ──────────────────────────────────────────────
+
+class TestSharedStore:
+    """Memory-mapped store round trip in tmp_path (no real parquet needed)."""
+
+    @pytest.fixture
+    def parquet(self, tmp_path):
+        path = tmp_path / "unified_provider_entities.parquet"
+        pd.DataFrame({
+            "npi": [1003000126, 1234567893, 1992999999],
+            "first_name_reconciled": ["ARDALAN", None, "JANE"],
+            "last_name_reconciled": ["ENKESHAFI", "DOE", "SMITH"],
+            "state_reconciled": ["MD", "ny", None],
+            "entity_type": ["I", "I", "O"],
+            "data_sources": ["Medicare+PECOS", "Medicare", "Medicare"],
+            "n_payments": pd.array([3, None, 1], dtype="Int64"),
+            "sum_payment": [12.5, float("nan"), 3.0],
+            "first_payment_date": pd.to_datetime(["2023-01-02", None, "2023-05-06"]),
+            "has_pecos_enrollment": [True, False, False],
+            "has_op_payments": [True, False, True],
+        }).to_parquet(path)
+        return str(path)
+
+    def test_round_trip(self, api_module, parquet, tmp_path):
+        store = api_module.shared_store
+        frame = pd.read_parquet(parquet)
+        store.write_store(str(tmp_path / "store"), frame, {"a": frame["npi"].to_numpy()},
+                          {"s": ["X", "Y"]}, store.source_stat(parquet))
+        mapped, arrays, strings, _ = store.open_store(str(tmp_path / "store"))
+        assert api_module._records(mapped) == api_module._records(frame)
+        assert not mapped["npi"].to_numpy().flags.writeable
+        assert arrays["a"].tolist() == frame["npi"].tolist()
+        assert list(strings["s"]) == ["X", "Y"]
+        assert store.is_current(str(tmp_path / "store"), parquet)
+
+    def test_mapped_snapshot_matches_parquet(self, api_module, parquet, tmp_path, monkeypatch):
+        monkeypatch.setattr(api_module, "_CANDIDATES", [parquet])
+        built = api_module._load_snapshot(1)
+        monkeypatch.setattr(api_module, "SHARED_STORE_DIR", str(tmp_path / "store"))
+        mapped = api_module._load_snapshot(1)
+        assert mapped.store == str(tmp_path / "store")
+        assert mapped.mtime_ns == built.mtime_ns
+        assert api_module._lookup_npi(mapped.npi_index, 1234567893) == 1
+        for query in ["DOE", "a", "SMI", "[AE]N"]:
+            assert mapped.name_index.search(query).tolist() == built.name_index.search(query).tolist()
+        assert mapped.state_index[0] == built.state_index[0]
+        assert [r.tolist() for r in mapped.state_index[2]] == [r.tolist() for r in built.state_index[2]]
+
+    def test_stale_store_rebuilt(self, api_module, parquet, tmp_path, monkeypatch):
+        monkeypatch.setattr(api_module, "_CANDIDATES", [parquet])
+        monkeypatch.setattr(api_module, "SHARED_STORE_DIR", str(tmp_path / "store"))
+        api_module._load_snapshot(1)
+        pd.read_parquet(parquet).iloc[:2].to_parquet(parquet)
+        assert not api_module.shared_store.is_current(str(tmp_path / "store"), parquet)
+        assert len(api_module._load_snapshot(2).df) == 2
+
+
+# ── Metrics ───────────────────────────────────────────────────
+
+class TestMetrics:
+
+    def test_route_counts_and_stages(self, client):
+        client.get("/providers", params={"name": "ENKESHAFI", "state": "MD"})
+        text = client.get("/metrics").text
+        assert 'route="/providers",method="GET",status="200"' in text
+        for stage in ("index", "filter", "slice", "serialize", "queue"):
+            assert f'api_stage_duration_seconds_count{{pid="{os.getpid()}",route="/providers",stage="{stage}"}}' in text
+        assert 'api_rows_returned_total{pid="%d",route="/providers"}' % os.getpid() in text
+
+    def test_unmatched_paths_share_label(self, client):
+        client.get("/no/such/path")
+        assert 'route="unmatched",method="GET",status="404"' in client.get("/metrics").text
+
+    def test_histogram_buckets_cumulative(self, api_module, monkeypatch):
+        metrics = api_module.metrics
+        monkeypatch.setattr(metrics, "_REGISTRY", [])
+        h = metrics.Histogram("t_seconds", "test", ("route",), buckets=(0.1, 1.0))
+        for v in (0.05, 0.1, 0.5, 3.0):
+            h.observe(v, "/x")
+        lines = list(h.samples())
+        assert [line.rsplit(" ", 1)[1] for line in lines[:3]] == ["2", "3", "4"]
+        assert lines[-1].endswith(" 4") and h.count("/x") == 4
+
+    def test_cpu_handlers_are_async(self, api_module):
+        assert asyncio.iscoroutinefunction(api_module.search_providers)
+        assert asyncio.iscoroutinefunction(api_module.health)
@@ -0,0 +1,98 @@
+"""
+Test Suite — Typed Parquet Artifact Store
+=========================================
+Checks lib/artifact_store on a synthetic Phase 4 feature matrix: column
+types, match/possible reads against a pandas filter, projection,
+row-group skipping on match_tier, and an Int64-with-nulls round trip.
+
+Run:  pytest test_artifact_store.py -v
+"""
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+import pyarrow.parquet as pq  # noqa: E402
+
+import artifact_store as store  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def matrix():
+    rng = np.random.default_rng(3)
+    n = 20_000
+    return pd.DataFrame({
+        "index_op": rng.integers(0, 4_683, n),
+        "index_med": rng.integers(0, 1_175_281, n),
+        "first_jw": rng.random(n),
+        "raw_score": rng.random(n),
+        "match_tier": rng.choice(["match", "possible", "non_match"], n, p=[0.02, 0.03, 0.95]),
+        "which_path": rng.choice(["A_exact", "B_fuzzy", None], n),
+        "ml_match_pred": rng.integers(0, 2, n),
+    })
+
+
+@pytest.fixture(scope="module")
+def path(matrix, tmp_path_factory):
+    out = str(tmp_path_factory.mktemp("phase4") / "feature_matrix.parquet")
+    store.write_feature_matrix(matrix, out, row_group_size=1_000)
+    return out
+
+
+def _sorted(frame):
+    return frame.sort_values(["index_op", "index_med", "first_jw"]).reset_index(drop=True)
+
+
+class TestArtifactStore:
+
+    def test_column_types(self, path):
+        schema = pq.read_schema(path)
+        assert str(schema.field("first_jw").type) == "double" and str(schema.field("raw_score").type) == "float"
+        assert str(schema.field("ml_match_pred").type) == "int8"
+        column = pq.ParquetFile(path).metadata.row_group(0).column(schema.get_field_index("match_tier"))
+        assert "RLE_DICTIONARY" in column.encodings and column.statistics.has_min_max
+        full = store.read_feature_matrix(path, tiers=None)
+        assert isinstance(full["match_tier"].dtype, pd.CategoricalDtype)
+        assert isinstance(full["which_path"].dtype, pd.CategoricalDtype)
+
+    def test_matched_read_equals_pandas_filter(self, matrix, path):
+        got = store.read_feature_matrix(path)
+        want = matrix[matrix["match_tier"].isin(["match", "possible"])]
+        assert len(got) == len(want)
+        got = _sorted(got.astype({"match_tier": str}))
+        want = _sorted(want.astype({"raw_score": np.float32, "ml_match_pred": np.int8}))
+        pd.testing.assert_frame_equal(got.drop(columns="which_path"), want.drop(columns="which_path"))
+        assert got["which_path"].astype(object).fillna("").tolist() == want["which_path"].fillna("").tolist()
+
+    def test_projection(self, path):
+        got = store.read_feature_matrix(path, columns=["index_op", "index_med", "match_tier"])
+        assert list(got.columns) == ["index_op", "index_med", "match_tier"]
+        assert set(got["match_tier"].cat.categories) == {"match", "possible"}
+
+    def test_row_groups_skipped(self, matrix, path):
+        n_groups = pq.ParquetFile(path).num_row_groups
+        n_matched = matrix["match_tier"].isin(["match", "possible"]).sum()
+        read = store.row_groups_read(path, [("match_tier", "in", ["match", "possible"])])
+        assert read == -(-n_matched // 1_000) and read < n_groups
+
+    def test_unlisted_tiers_sort_last(self, tmp_path):
+        frame = pd.DataFrame({"index_op": [0, 1, 2, 3], "index_med": [0, 0, 0, 0],
+                              "match_tier": ["non_match", "review", "match", "possible"]})
+        out = str(tmp_path / "fm.parquet")
+        store.write_feature_matrix(frame, out)
+        assert store.read_artifact(out)["match_tier"].tolist() == ["match", "possible", "non_match", "review"]
+
+    def test_nullable_int_round_trip(self, tmp_path):
+        frame = pd.DataFrame({"index_op": [2, 0, 1], "ENRLMT_YEAR": pd.array([2018, None, 2021], dtype="Int64"),
+                              "match_tier": ["possible", "match", "match"]})
+        out = str(tmp_path / "state.parquet")
+        store.write_artifact(frame, out, {"match_tier": store._DICT}, sort_by=["index_op"])
+        back = store.read_artifact(out)
+        assert str(back["ENRLMT_YEAR"].dtype) == "Int64"
+        pd.testing.assert_series_equal(back["ENRLMT_YEAR"], pd.Series([None, 2021, 2018], dtype="Int64", name="ENRLMT_YEAR"))
+        assert isinstance(back["match_tier"].dtype, pd.CategoricalDtype)
+        assert back["index_op"].tolist() == [0, 1, 2]
@@ -0,0 +1,122 @@
+"""
+Test Suite — Integer-Coded Blocking (Strategies A / B / C)
+==========================================================
+Checks lib/blocking against the string-key merges and set unions of
+notebooks/3_linkage.ipynb sections 3.3-3.8 on a synthetic fixture.
+
+Run:  pytest test_blocking.py -v
+"""
+import os
+import sys
+import warnings
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+import blocking  # noqa: E402
+
+LAST = ["Smith", "SMITH", "Smyth", "Lee", "Nguyen", None, "O_Brien"]
+STATES = ["CA", "NY", None]
+
+
+def _frame(rng, n, first, last, state):
+    last_names = rng.choice(np.array(LAST, dtype=object), n)
+    return pd.DataFrame({
+        first: rng.choice(np.array(["John", "Mary", None], dtype=object), n),
+        last: last_names,
+        state: rng.choice(np.array(STATES, dtype=object), n),
+        "FIRST_NAME_SOUNDEX": rng.choice(np.array(["J500", "M600", None], dtype=object), n),
+        "LAST_NAME_SOUNDEX": [None if v is None else v.upper()[:1] + "530" for v in last_names],
+    })
+
+
+@pytest.fixture(scope="module")
+def frames():
+    rng = np.random.default_rng(11)
+    op = _frame(rng, 300, "Covered_Recipient_First_Name", "Covered_Recipient_Last_Name", "Recipient_State")
+    med = _frame(rng, 2_000, "Rndrng_Prvdr_First_Name", "Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_State_Abrvtn")
+    return op, med
+
+
+def notebook_pairs(op, med, op_key, med_key):
+    """The notebook's merge on string keys, as a set of (index_op, index_med)."""
+    pairs = (op_key.rename("_block").reset_index().rename(columns={"index": "index_op"})
+             .merge(med_key.rename("_block").reset_index().rename(columns={"index": "index_med"}), on="_block"))
+    return set(zip(pairs["index_op"], pairs["index_med"]))
+
+
+def notebook_strategies(op, med):
+    st_op, st_med = op["Recipient_State"].fillna(""), med["Rndrng_Prvdr_State_Abrvtn"].fillna("")
+    return {
+        "A": notebook_pairs(op, med, op["LAST_NAME_SOUNDEX"].fillna("") + "_" + st_op,
+                            med["LAST_NAME_SOUNDEX"].fillna("") + "_" + st_med),
+        "B": notebook_pairs(op, med, op["Covered_Recipient_Last_Name"].fillna("").str.upper() + "_" + st_op,
+                            med["Rndrng_Prvdr_Last_Org_Name"].fillna("").str.upper() + "_" + st_med),
+        "C": notebook_pairs(op, med, op["FIRST_NAME_SOUNDEX"].fillna("") + "_" + op["LAST_NAME_SOUNDEX"].fillna("")
+                            + "_" + st_op,
+                            med["FIRST_NAME_SOUNDEX"].fillna("") + "_" + med["LAST_NAME_SOUNDEX"].fillna("")
+                            + "_" + st_med),
+    }
+
+
+class TestBlocking:
+
+    @pytest.mark.parametrize("strategy", ["A", "B", "C"])
+    def test_strategy_matches_notebook_merge(self, frames, strategy):
+        op, med = frames
+        pairs = blocking.strategy_pairs(op, med, strategy)
+        expected = notebook_strategies(op, med)[strategy]
+        assert len(expected) > 1_000
+        assert set(zip(pairs["index_op"], pairs["index_med"])) == expected
+        assert len(pairs) == len(expected)
+        assert pairs["index_op"].dtype == np.int64 and pairs["index_med"].dtype == np.int64
+
+    def test_pairs_sorted_and_labels_kept(self, frames):
+        op, med = frames
+        med = med.set_axis(med.index + 50_000)
+        pairs = blocking.strategy_pairs(op, med, "A")
+        ids = blocking.pair_ids(pairs["index_op"], pairs["index_med"])
+        assert (np.diff(ids) > 0).all()
+        assert pairs["index_med"].min() >= 50_000
+
+    def test_composite_codes_do_not_collide(self):
+        left, right = blocking.key_codes([["A_B", "A", None], ["C", "B_C", "x"]],
+                                         [["A", "A_B", None], ["B_C", "C", "x"]])
+        assert left.dtype == np.int32
+        assert left[0] == right[1] and left[1] == right[0] and left[0] != left[1]
+        assert left[2] == right[2]  # missing matches missing
+
+    def test_union_stats_match_set_algebra(self, frames):
+        op, med = frames
+        ids = blocking.run_strategies(op, med)
+        union, stats = blocking.union_pairs(ids, len(op), len(med))
+        sets = notebook_strategies(op, med)
+        everything = set().union(*sets.values())
+        assert set(zip(*blocking.split_pair_ids(union))) == everything
+        for name, s in sets.items():
+            others = set().union(*(v for k, v in sets.items() if k != name))
+            row = stats.set_index("strategy").loc[name]
+            assert row["pairs"] == len(s)
+            assert row["unique_pairs"] == len(s - others)
+            assert row["op_coverage"] == len({p[0] for p in s})
+            assert row["reduction_ratio"] == pytest.approx(1 - len(s) / (len(op) * len(med)))
+        assert stats.iloc[-1]["pairs"] == len(everything)
+
+    def test_block_cap_skips_oversized_blocks_with_warning(self):
+        left = np.array([0, 0, 1, 2], dtype=np.int32)
+        right = np.array([0, 0, 0, 1, 2, 2], dtype=np.int32)  # block 0 is 2 x 3
+        with pytest.warns(RuntimeWarning, match="1 blocks over max_block_pairs=4"):
+            got = blocking.block_pairs(left, right, max_block_pairs=4)
+        assert list(zip(*got)) == [(2, 3), (3, 4), (3, 5)]
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert len(blocking.block_pairs(left, right, max_block_pairs=6)[0]) == 9
+
+    def test_pair_ids_round_trip(self):
+        op = np.array([0, 5, 2 ** 31 - 1])
+        med = np.array([2 ** 31 - 1, 0, 7])
+        back = blocking.split_pair_ids(blocking.pair_ids(op, med))
+        assert back[0].tolist() == op.tolist() and back[1].tolist() == med.tolist()
@@ -0,0 +1,130 @@
+"""
+Test Suite — Sparse Canopy Blocking
+===================================
+Checks lib/canopy_blocking against the per-state TfidfVectorizer +
+cosine_distances loop of notebooks/3_linkage.ipynb section 3.6 on a
+synthetic fixture: T2 pairs, T1 distances, top-k cap, chunking, workers,
+and the common-column split against the dense product.
+
+Run:  pytest test_canopy_blocking.py -v
+"""
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+pytest.importorskip("sklearn")
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+from sklearn.metrics.pairwise import cosine_distances  # noqa: E402
+
+import canopy_blocking as cb  # noqa: E402
+
+FIRST = ["JOHN", "JON", "MARY", "MARIE", None, "ANN", "JOSÉ"]
+LAST = ["SMITH", "SMYTH", "LEE", "NGUYEN", "DE  LA CRUZ", None, "ACME CLINIC"]
+STATES = ["CA", "NY", "TX", None]
+
+
+def name_str(first, last, state):
+    parts = [str(x).strip().upper() for x in [first, last, state] if pd.notna(x)]
+    return " ".join(p for p in parts if p and p != "NAN")
+
+
+def notebook_canopy(op, med, threshold):
+    """Section 3.6 loop, returning {(index_op, index_med): distance} within ``threshold``."""
+    op_can = op.apply(lambda r: name_str(r["Covered_Recipient_First_Name"], r["Covered_Recipient_Last_Name"],
+                                         r["Recipient_State"]), axis=1)
+    med_can = med.apply(lambda r: name_str(r["Rndrng_Prvdr_First_Name"], r["Rndrng_Prvdr_Last_Org_Name"],
+                                           r["Rndrng_Prvdr_State_Abrvtn"]), axis=1)
+    states = sorted(set(op["Recipient_State"].dropna()) & set(med["Rndrng_Prvdr_State_Abrvtn"].dropna()))
+    found = {}
+    for state in states:
+        op_st, med_st = op_can[op["Recipient_State"] == state], med_can[med["Rndrng_Prvdr_State_Abrvtn"] == state]
+        all_str = pd.concat([op_st.reset_index(drop=True), med_st.reset_index(drop=True)], ignore_index=True)
+        mat = TfidfVectorizer(analyzer="char", ngram_range=(3, 3)).fit_transform(all_str)
+        dist = cosine_distances(mat[:len(op_st)], mat[len(op_st):])
+        for i in range(len(op_st)):
+            for j in np.where(dist[i] <= threshold)[0]:
+                found[(op_st.index[i], med_st.index[j])] = dist[i, j]
+    return found
+
+
+def _people(rng, n, first_col, last_col, state_col):
+    last = rng.choice(np.array(LAST, dtype=object), n)
+    noisy = rng.random(n) < 0.5
+    last[noisy] = [f"{v}{rng.choice(list('AEX'))}" if isinstance(v, str) else v for v in last[noisy]]
+    return pd.DataFrame({first_col: rng.choice(np.array(FIRST, dtype=object), n), last_col: last,
+                         state_col: rng.choice(np.array(STATES, dtype=object), n)})
+
+
+@pytest.fixture(scope="module")
+def frames():
+    rng = np.random.default_rng(1)
+    op = _people(rng, 200, "Covered_Recipient_First_Name", "Covered_Recipient_Last_Name", "Recipient_State")
+    med = _people(rng, 2_000, "Rndrng_Prvdr_First_Name", "Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_State_Abrvtn")
+    med.index = med.index + 10_000
+    return op, med
+
+
+@pytest.fixture(scope="module")
+def pairs(frames):
+    return cb.canopy_block(*frames)
+
+
+class TestCanopy:
+
+    def test_tight_pairs_match_notebook(self, frames, pairs):
+        expected = notebook_canopy(*frames, cb.T2)
+        assert len(expected) > 1_000
+        tight = pairs[pairs["tight"]]
+        assert set(zip(tight["index_op"], tight["index_med"])) == set(expected)
+
+    def test_loose_pairs_and_distances_match_notebook(self, frames, pairs):
+        expected = notebook_canopy(*frames, cb.T1)
+        assert set(zip(pairs["index_op"], pairs["index_med"])) == set(expected)
+        got = pairs["distance"].to_numpy()
+        want = np.array([expected[p] for p in zip(pairs["index_op"], pairs["index_med"])])
+        np.testing.assert_allclose(got, want, atol=1e-12)
+
+    def test_top_k_keeps_nearest(self, frames, pairs):
+        capped = cb.canopy_block(*frames, k=3)
+        assert capped.groupby("index_op").size().max() == 3
+        for index_op, group in capped.groupby("index_op"):
+            nearest = pairs[pairs["index_op"] == index_op].sort_values(["distance", "index_med"]).head(3)
+            assert sorted(group["index_med"]) == sorted(nearest["index_med"])
+
+    def test_chunking_and_workers_do_not_change_pairs(self, frames, pairs):
+        op, med = frames
+        names = [cb.name_strings(op.iloc[:, 0], op.iloc[:, 1], op.iloc[:, 2]),
+                 cb.name_strings(med.iloc[:, 0], med.iloc[:, 1], med.iloc[:, 2])]
+        small = cb.canopy_pairs(*names, op.iloc[:, 2], med.iloc[:, 2], chunk_pairs=1)
+        parallel = cb.canopy_pairs(*names, op.iloc[:, 2], med.iloc[:, 2], workers=2)
+        pd.testing.assert_frame_equal(small, parallel)
+        assert len(small) == len(pairs)
+
+    @pytest.mark.parametrize("max_distance", [0.2, 0.6, 0.9])
+    def test_nearest_pairs_match_dense_product(self, frames, max_distance):
+        op, _ = frames
+        names = cb.name_strings(op.iloc[:, 0], op.iloc[:, 1], op.iloc[:, 2])
+        counts, codes = cb.trigram_counts(list(names))
+        weights = cb.state_tfidf(counts[codes])
+        left, right = weights[:50], weights[50:]
+        # at 0.9 the cut is too low for any column, i.e. the plain product
+        assert (len(cb.common_columns(left, right, 1 - max_distance)) > 0) == (max_distance < 0.9)
+        i, j, distance = cb.nearest_pairs(left, right, max_distance)
+        dense = np.clip(1 - (left @ right.T).toarray(), 0, 2)
+        want_i, want_j = np.nonzero((dense <= max_distance) & ((left @ right.T).toarray() > 0))
+        assert set(zip(i, j)) == set(zip(want_i, want_j))
+        np.testing.assert_allclose(distance, dense[i, j], atol=1e-12)
+
+    def test_trigram_counts_match_sklearn_analyzer(self):
+        texts = ["JOHN  SMITH CA", "AB", None, "JOSÉ DE LA CRUZ", "JOHN  SMITH CA"]
+        counts, codes = cb.trigram_counts(texts)
+        analyzer = TfidfVectorizer(analyzer="char", ngram_range=(3, 3)).build_analyzer()
+        for text, code in zip(texts, codes):
+            expected = pd.Series(analyzer(text) if isinstance(text, str) else [], dtype=object).value_counts()
+            assert sorted(counts[code].data.tolist()) == sorted(expected.tolist())
+        assert codes[0] == codes[4]
@@ -0,0 +1,117 @@
+"""
+Test Suite — Union-Find Closure
+===============================
+Checks lib/closure on small graphs against a textbook union-find loop:
+components, merge counts and rank bounds on random, path and star graphs,
+batched unions, and the cluster summary (per-source counts, paths, NPI and
+last-name conflicts) of an entity_resolution state.
+
+Run:  pytest test_closure.py -v
+"""
+import os
+import sys
+
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+import closure  # noqa: E402
+
+
+def loop_components(n, left, right):
+    """Union-find one edge at a time (path compression, union by rank), labels by smallest node."""
+    parent, rank = list(range(n)), [0] * n
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for a, b in zip(left, right):
+        ra, rb = find(a), find(b)
+        if ra == rb:
+            continue
+        if rank[ra] < rank[rb]:
+            ra, rb = rb, ra
+        parent[rb] = ra
+        rank[ra] += rank[ra] == rank[rb]
+    return pd.factorize(np.array([find(x) for x in range(n)]))[0]
+
+
+GRAPHS = {
+    "random": (5_000, np.random.default_rng(0).integers(0, 5_000, (2, 4_000))),
+    "path": (3_000, np.array([np.arange(2_999), np.arange(1, 3_000)])),
+    "shuffled_path": (3_000, np.random.default_rng(1).permutation(3_000)[[np.arange(2_999), np.arange(1, 3_000)]]),
+    "star": (2_000, np.array([np.full(1_999, 1_999), np.arange(1_999)])),
+}
+
+
+class TestClosure:
+
+    @pytest.mark.parametrize("name", list(GRAPHS))
+    def test_components_match_loop(self, name):
+        n, (left, right) = GRAPHS[name]
+        uf = closure.UnionFind(n)
+        merged = uf.union(left, right)
+        labels = uf.components()
+        expected = loop_components(n, left, right)
+        assert labels.tolist() == expected.tolist()
+        assert merged == n - (expected.max() + 1)
+        # union by rank: a set of rank r has at least 2**r nodes
+        assert 2 ** int(uf.rank.max()) <= np.bincount(labels).max()
+        assert (uf.parent[uf.parent] == uf.parent).all()
+
+    def test_batches_and_self_links(self):
+        n, (left, right) = GRAPHS["random"]
+        uf = closure.UnionFind(n)
+        for lo in range(0, len(left), 700):
+            uf.union(left[lo:lo + 700], right[lo:lo + 700])
+        assert uf.union(left, right) == 0 and uf.union([3, 3], [3, 3]) == 0
+        assert uf.components().tolist() == loop_components(n, left, right).tolist()
+        np.testing.assert_array_equal(uf.find(left), uf.find(right))
+
+    def test_cluster_summary(self):
+        sizes = {"op": 4, "med": 4, "pecos": 3}
+        # op0 -> med0 and med1 (two NPIs); op1 -> med2 -> pecos0 -> med3 (same NPI, longer chain)
+        uf = closure.link_graph(sizes, [("op", [0, 0, 1], "med", [0, 1, 2]),
+                                        ("pecos", [0, 0], "med", [2, 3]), ("op", [3], "op", [2])])
+        labels = uf.components()
+        keys = {"npi": closure.node_values(sizes, {"med": [11, 12, 13, 13]}),
+                "last_name": closure.node_values(sizes, {"med": ["LEE", "LEE", "KIM", "KIM"],
+                                                         "pecos": ["KIMM", None, "ROSS"]})}
+        summary = closure.cluster_summary(labels, sizes, keys).set_index("cluster")
+        rec = closure.records(labels, sizes)
+        first = summary.loc[rec.loc[(rec["source"] == "op") & (rec["row"] == 0), "cluster"].item()]
+        second = summary.loc[rec.loc[(rec["source"] == "op") & (rec["row"] == 1), "cluster"].item()]
+        third = summary.loc[rec.loc[(rec["source"] == "op") & (rec["row"] == 2), "cluster"].item()]
+        assert (first["size"], first["n_op"], first["n_med"], first["n_pecos"]) == (3, 1, 2, 0)
+        assert first["path"] == "OP → Med" and first["conflict_npi"] and not first["conflict_last_name"]
+        assert (second["size"], second["path"], second["n_npi"]) == (4, "OP → Med → PECOS", 1)
+        assert not second["conflict_npi"] and second["conflict_last_name"]
+        assert (third["n_op"], third["path"], third["n_npi"]) == (2, "OP", 0)
+        assert summary["size"].sum() == 11 and len(summary) == 5
+
+    def test_state_graph(self):
+        prov = pd.DataFrame({"npi": [101, 102, 103, 103], "last_med": ["Lee", "Kim", "Ross", "Ross"],
+                             "provider_id": [0, 1, 2, 4]})
+        state = {
+            "prov": prov, "counts": {"op_tier2": 3, "pecos_rows": 4},
+            "op_links": pd.DataFrame({"index_op": [0, 0, 2], "index_med": [0, 1, 2], "provider_id": [0, 1, 4]}),
+            "pecos": pd.DataFrame({"provider_id": [0, 4], "pecos_row": [1, 3], "LAST_NAME": ["LEE", "Rossi"]}),
+        }
+        sizes, links, keys = closure.state_graph(state)
+        labels = closure.link_graph(sizes, links).components()
+        summary = closure.cluster_summary(labels, sizes, keys)
+        assert sizes == {"op": 3, "med": 4, "pecos": 4}
+        # op0 reaches providers 0 and 1 (multi-match) and provider 0's enrollment
+        assert summary.loc[labels[0], "path"] == "OP → Med → PECOS" and summary.loc[labels[0], "conflict_npi"]
+        assert summary.loc[labels[0], "n_last_name"] == 2
+        # provider_id 4 is backbone row 3: op2 -> row 3 -> PECOS row 3, last name Ross vs ROSSI
+        assert labels[2] == labels[3 + 3] == labels[3 + 4 + 3]
+        assert summary.loc[labels[2], "conflict_last_name"] and not summary.loc[labels[2], "conflict_npi"]
@@ -0,0 +1,248 @@
+"""
+Test Suite — Incremental Entity Resolution
+==========================================
+Checks lib/entity_resolution against notebooks/5_entity_resolution.ipynb
+on a synthetic Medicare / Open Payments / PECOS fixture: the 5.1 backbone,
+5.5's provider payments, delta tiers against 4.3's rules at a score just
+under 0.90, and the state after an Open Payments or PECOS delta against a
+full rebuild over base + delta, dtypes included (also through a saved
+state, down to the output parquet schemas).
+
+Run:  pytest test_entity_resolution.py -v
+"""
+import os
+import sys
+
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+from rapidfuzz.distance import JaroWinkler  # noqa: E402
+
+import entity_resolution as er  # noqa: E402
+from artifact_store import RULE_FEATURE_COLS  # noqa: E402
+from blocking import pair_ids, split_pair_ids  # noqa: E402
+from match_classifier import classify  # noqa: E402
+from pair_features import pair_features  # noqa: E402
+
+FIRST = np.array(["JOHN", "JON", "ANN", "ANNA", "MARIA", "LEE", "LEA"], dtype=object)
+LAST = np.array(["SMITH", "SMYTH", "LEE", "GARCIA", "NGUYEN", "CLINIC"], dtype=object)
+SOUNDEX = {"JOHN": "J500", "JON": "J500", "ANN": "A500", "ANNA": "A500", "MARIA": "M600", "LEE": "L000", "LEA": "L000",
+           "SMITH": "S530", "SMYTH": "S530", "GARCIA": "G620", "NGUYEN": "N250", "CLINIC": "C452"}
+
+
+def make_med(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    first, last = rng.choice(FIRST, n), rng.choice(LAST, n)
+    med = pd.DataFrame({
+        "Rndrng_NPI": 1_000_000_000 + rng.integers(0, n - 40, n),
+        "Rndrng_Prvdr_First_Name": first, "Rndrng_Prvdr_Last_Org_Name": last,
+        "Rndrng_Prvdr_St1": rng.choice(["1 MAIN ST", "20 OAK AVE", "5 ELM RD"], n),
+        "Rndrng_Prvdr_City": rng.choice(["AUSTIN", "DALLAS"], n),
+        "Rndrng_Prvdr_State_Abrvtn": rng.choice(["TX", "CA"], n),
+        "Rndrng_Prvdr_Zip5": rng.choice(["73301", "75201"], n),
+        "Rndrng_Prvdr_Ent_Cd": np.where(rng.random(n) < 0.1, "O", "I"),
+        "NPI_VALID": rng.random(n) < 0.95,
+    })
+    med.loc[med["Rndrng_Prvdr_Ent_Cd"] == "O", "Rndrng_Prvdr_First_Name"] = None
+    for side, col in (("FIRST", "Rndrng_Prvdr_First_Name"), ("LAST", "Rndrng_Prvdr_Last_Org_Name")):
+        med[f"{side}_NAME_SOUNDEX"] = med[col].map(SOUNDEX)
+        med[f"{side}_NAME_METAPHONE"] = med[col].str[:3]
+    return med
+
+
+def make_op(med, n=400, seed=1):
+    rng = np.random.default_rng(seed)
+    src = med.iloc[rng.integers(0, len(med), n)].reset_index(drop=True)
+    first = np.where(rng.random(n) < 0.3, rng.choice(FIRST, n), src["Rndrng_Prvdr_First_Name"].fillna("JOHN"))
+    tier1 = rng.random(n) < 0.4
+    op = pd.DataFrame({
+        "Covered_Recipient_NPI": np.where(tier1, src["Rndrng_NPI"].astype(float), np.nan),
+        "Covered_Recipient_First_Name": first,
+        # typos keep last_jw >= 0.9 but lose the exact last name: the possible tier
+        "Covered_Recipient_Last_Name": np.where(rng.random(n) < 0.25, src["Rndrng_Prvdr_Last_Org_Name"] + "E",
+                                                src["Rndrng_Prvdr_Last_Org_Name"]),
+        "Recipient_Primary_Business_Street_Address_Line1": src["Rndrng_Prvdr_St1"].to_numpy(),
+        "Recipient_City": src["Rndrng_Prvdr_City"].to_numpy(),
+        "Recipient_State": src["Rndrng_Prvdr_State_Abrvtn"].to_numpy(),
+        "Recipient_Zip5": np.where(rng.random(n) < 0.8, src["Rndrng_Prvdr_Zip5"], "10001"),
+        "linkage_tier": np.where(tier1, "tier1_npi", "tier2_fuzzy"),
+        "payment_count": rng.integers(1, 20, n),
+        "total_payment_amount": np.where(rng.random(n) < 0.1, np.nan, rng.gamma(2.0, 150.0, n).round(2)),
+        "max_payment": rng.gamma(2.0, 80.0, n).round(2),
+        "min_payment_date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 180, n), unit="D"),
+        "max_payment_date": pd.Timestamp("2023-07-01") + pd.to_timedelta(rng.integers(0, 180, n), unit="D"),
+        "unique_manufacturers": rng.integers(1, 6, n),
+    })
+    for side, col in (("FIRST", "Covered_Recipient_First_Name"), ("LAST", "Covered_Recipient_Last_Name")):
+        op[f"{side}_NAME_SOUNDEX"] = op[col].map(SOUNDEX).fillna(op[col].str[:-1].map(SOUNDEX))
+        op[f"{side}_NAME_METAPHONE"] = op[col].str[:3]
+    return op
+
+
+def make_pecos(med, n=300, seed=2):
+    rng = np.random.default_rng(seed)
+    src = med.iloc[rng.integers(0, len(med), n)].reset_index(drop=True)
+    return pd.DataFrame({
+        "NPI": np.where(rng.random(n) < 0.9, src["Rndrng_NPI"].astype(str), "9999999999"),
+        "ENRLMT_ENTITY": np.where(rng.random(n) < 0.9, src["Rndrng_Prvdr_Ent_Cd"], "I"),
+        "ENRLMT_ID": [f"E{seed}{i:05d}" for i in range(n)],
+        "ENRLMT_YEAR": pd.array(np.where(rng.random(n) < 0.1, None, rng.integers(2015, 2019, n)), dtype="Int64"),
+        "FIRST_NAME": src["Rndrng_Prvdr_First_Name"].to_numpy(),
+        "LAST_NAME": src["Rndrng_Prvdr_Last_Org_Name"].to_numpy(),
+        "STATE_CD": src["Rndrng_Prvdr_State_Abrvtn"].to_numpy(),
+    })
+
+
+@pytest.fixture(scope="module")
+def sources():
+    med = make_med()
+    return med, make_op(med), make_op(med, 150, seed=3), make_pecos(med), make_pecos(med, 120, seed=4)
+
+
+def _nulls_as_nan(frame):
+    # parquet gives None for missing strings where pandas built NaN
+    frame = frame.reset_index(drop=True)
+    for col in frame.columns[frame.dtypes == object]:
+        frame[col] = frame[col].where(frame[col].notna(), np.nan)
+    return frame
+
+
+def assert_same_state(got, expected):
+    assert got["counts"] == expected["counts"]
+    for name in er.STATE_FRAMES:
+        pd.testing.assert_frame_equal(_nulls_as_nan(got[name]), _nulls_as_nan(expected[name]),
+                                      obj=name)
+
+
+class TestEntityResolution:
+
+    def test_backbone_matches_notebook(self, sources):
+        med = sources[0]
+        # 5.1 / 5.1.1
+        prov = med[['Rndrng_NPI', 'Rndrng_Prvdr_First_Name', 'Rndrng_Prvdr_Last_Org_Name',
+                    'Rndrng_Prvdr_State_Abrvtn']].copy()
+        prov.columns = ['npi', 'first_med', 'last_med', 'state_med']
+        prov['provider_id'] = range(len(prov))
+        prov['entity_type'] = 'I'
+        med_org = med[med['Rndrng_Prvdr_Ent_Cd'] == 'O']
+        med_org_valid = med_org[med_org['NPI_VALID']]
+        prov_org = med_org_valid[['Rndrng_NPI', 'Rndrng_Prvdr_Last_Org_Name', 'Rndrng_Prvdr_State_Abrvtn']].copy()
+        prov_org.columns = ['npi', 'last_med', 'state_med']
+        prov_org['first_med'] = np.nan
+        prov_org['entity_type'] = 'O'
+        prov_org['provider_id'] = range(len(prov), len(prov) + len(prov_org))
+        prov_org = prov_org.drop_duplicates(subset='npi', keep='first')
+        expected = pd.concat([prov, prov_org], ignore_index=True)
+        pd.testing.assert_frame_equal(er.backbone(med), expected, check_dtype=False)
+
+    def test_provider_payments_match_notebook(self, sources):
+        med, op = sources[0], sources[1]
+        state = er.build(op, med, sources[3])
+        tier1 = op[op["linkage_tier"] == "tier1_npi"].copy()
+        tier1["_npi"] = pd.to_numeric(tier1["Covered_Recipient_NPI"], errors="coerce").astype("Int64")
+        prov = state["prov"].assign(_npi=pd.to_numeric(state["prov"]["npi"]).astype("Int64"))
+        linked1 = tier1.merge(prov[["_npi", "provider_id"]].drop_duplicates("_npi"), on="_npi")
+        tier2 = op[op["linkage_tier"] == "tier2_fuzzy"].reset_index(drop=True)
+        linked2 = tier2.iloc[state["op_best"]["index_op"]].assign(provider_id=state["op_best"]["provider_id"].to_numpy())
+        records = pd.concat([linked2, linked1])
+        # 5.5
+        expected = records.groupby('provider_id').agg(
+            n_payments=('payment_count', 'sum'), sum_payment=('total_payment_amount', 'sum'),
+            avg_payment=('total_payment_amount', 'mean'), max_payment=('max_payment', 'max'),
+            first_payment_date=('min_payment_date', 'min'), last_payment_date=('max_payment_date', 'max'),
+            unique_manufacturers=('unique_manufacturers', 'max')).reset_index()
+        assert len(state["op_best"]) > 50 and expected["avg_payment"].isna().any()
+        pd.testing.assert_frame_equal(er.provider_payments(state["payments"]), expected, check_dtype=False)
+
+    def test_delta_tiers_match_notebook(self, sources, monkeypatch):
+        med, op, _, pecos, _ = sources
+        # last_jw of "ANLC" / "ASNELC" is 0.8999999999999999: under the possible tier's 0.90, so non_match;
+        # its float32 cast is 0.9
+        assert JaroWinkler.similarity("ANLC", "ASNELC") < 0.9 <= np.float32(JaroWinkler.similarity("ANLC", "ASNELC"))
+        med = pd.concat([med, med.iloc[[0]].assign(
+            Rndrng_Prvdr_First_Name="JOHN", Rndrng_Prvdr_Last_Org_Name="ASNELC", Rndrng_Prvdr_St1="5 ELM RD",
+            Rndrng_Prvdr_City="AUSTIN", Rndrng_Prvdr_State_Abrvtn="TX", Rndrng_Prvdr_Zip5="73301",
+            Rndrng_Prvdr_Ent_Cd="I", FIRST_NAME_SOUNDEX="J500", FIRST_NAME_METAPHONE="JOH",
+            LAST_NAME_SOUNDEX="A254", LAST_NAME_METAPHONE="ASN")], ignore_index=True)
+        tier2 = op[op["linkage_tier"] == "tier2_fuzzy"]
+        delta = pd.concat([tier2.iloc[:5], tier2.iloc[[0]].assign(
+            Covered_Recipient_First_Name="JOHN", Covered_Recipient_Last_Name="ANLC",
+            Recipient_Primary_Business_Street_Address_Line1="900 PINE BLVD", Recipient_City="AUSTIN",
+            Recipient_State="TX", Recipient_Zip5="10001", FIRST_NAME_SOUNDEX="J500", FIRST_NAME_METAPHONE="JOH",
+            LAST_NAME_SOUNDEX="A542", LAST_NAME_METAPHONE="ANL")], ignore_index=True)
+
+        def every_pair(op_rows, med_rows):
+            return pair_ids(np.repeat(np.arange(len(op_rows)), len(med_rows)),
+                            np.tile(np.arange(len(med_rows)), len(op_rows)))
+
+        base = er.build(op, med, pecos)
+        fed = []
+        monkeypatch.setattr(er, "classify", lambda features, *args: fed.append(features.dtypes) or classify(features, *args))
+        state, _ = er.apply_delta(base, "op", delta, med, block=every_pair)
+        assert len(fed) == 1 and (fed[0][RULE_FEATURE_COLS] == np.float64).all()
+        comp_df = pair_features(*split_pair_ids(every_pair(delta, med)), delta, med)
+        fls_key = (med['Rndrng_Prvdr_First_Name'].str.upper().fillna('') + '|' +
+                   med['Rndrng_Prvdr_Last_Org_Name'].str.upper().fillna('') + '|' +
+                   med['Rndrng_Prvdr_State_Abrvtn'].fillna(''))
+        fls_count = fls_key.iloc[comp_df['index_med']].map(fls_key.value_counts()).to_numpy()
+        # 4.3
+        path_a = ((comp_df['first_jw'] >= 0.85) & (comp_df['last_jw'] >= 0.85) &
+                  ((comp_df['zip5_match'] == 1.0) | (comp_df['street_jw'] >= 0.80)))
+        path_b = ((comp_df['last_lev'] == 1.0) & (comp_df['first_lev'] >= 0.60) &
+                  (comp_df['zip5_match'] == 1.0) & (comp_df['city_match'] == 1.0))
+        path_c2 = ((comp_df['first_jw'] >= 0.92) & (comp_df['first_lev'] >= 0.75) & (comp_df['last_jw'] == 1.0) &
+                   ((comp_df['zip5_match'] == 1.0) | (comp_df['city_match'] == 1.0)))
+        path_d = ((comp_df['first_lev'] == 1.0) & (comp_df['last_lev'] == 1.0) & (comp_df['state_match'] == 1.0) &
+                  ((fls_count <= 3) | ((comp_df['city_match'] == 1.0) | (comp_df['zip5_match'] == 1.0))))
+        path_e = ((comp_df['last_lev'] == 1.0) & (comp_df['first_jw'] >= 0.90) & (comp_df['first_lev'] >= 0.80) &
+                  (comp_df['city_match'] == 1.0) & (comp_df['state_match'] == 1.0))
+        match_mask = path_a | path_b | path_c2 | path_d | path_e
+        possible_mask = (~match_mask & (comp_df['first_jw'] >= 0.65) & (comp_df['first_lev'] >= 0.60) &
+                         (comp_df['last_jw'] >= 0.90) &
+                         ((comp_df['zip5_match'] == 1.0) | (comp_df['city_match'] == 1.0) | (comp_df['street_jw'] >= 0.70)))
+        comp_df['match_tier'] = np.where(match_mask, 'match', np.where(possible_mask, 'possible', 'non_match'))
+        expected = comp_df[comp_df['match_tier'] != 'non_match'][['index_op', 'index_med', 'match_tier']]
+        got = state["op_links"].iloc[len(base["op_links"]):]
+        assert len(got) == len(expected) > 0
+        assert (got["index_op"] - state["counts"]["op_tier2"] + len(delta)).tolist() == expected["index_op"].tolist()
+        assert got["index_med"].tolist() == expected["index_med"].tolist()
+        assert got["match_tier"].astype(str).tolist() == expected["match_tier"].tolist()
+        boundary = comp_df[(comp_df["index_op"] == len(delta) - 1) & (comp_df["index_med"] == len(med) - 1)]
+        assert boundary["last_jw"].dtype == np.float64 and boundary["match_tier"].tolist() == ["non_match"]
+        assert classify(boundary.assign(last_jw=0.9), [1])["match_tier"].tolist() == ["possible"]
+
+    def test_op_delta_equals_rebuild(self, sources):
+        med, op, op_delta, pecos, _ = sources
+        state, stats = er.apply_delta(er.build(op, med, pecos), "op", op_delta, med)
+        expected = er.build(pd.concat([op, op_delta], ignore_index=True), med, pecos)
+        assert 0 < stats["tier2_scored"] < len(op_delta) and stats["providers_touched"] > 0
+        assert_same_state(state, expected)
+
+    def test_pecos_delta_equals_rebuild(self, sources):
+        med, op, _, pecos, pecos_delta = sources
+        state, stats = er.apply_delta(er.build(op, med, pecos), "pecos", pecos_delta, med)
+        expected = er.build(op, med, pd.concat([pecos, pecos_delta], ignore_index=True))
+        assert stats["providers_touched"] > 0
+        assert_same_state(state, expected)
+        with pytest.raises(ValueError, match="source"):
+            er.apply_delta(state, "medicare", med, med)
+
+    def test_saved_state_takes_deltas(self, sources, tmp_path):
+        med, op, op_delta, pecos, pecos_delta = sources
+        er.save_state(er.build(op, med, pecos), str(tmp_path / "state"))
+        state = er.load_state(str(tmp_path / "state"))
+        state, _ = er.apply_delta(state, "op", op_delta, med)
+        state, _ = er.apply_delta(state, "pecos", pecos_delta, med)
+        expected = er.build(pd.concat([op, op_delta], ignore_index=True), med,
+                            pd.concat([pecos, pecos_delta], ignore_index=True))
+        assert_same_state(state, expected)
+        er.write_outputs(state, str(tmp_path / "incremental"))
+        er.write_outputs(expected, str(tmp_path / "rebuild"))
+        for name in ("unified_provider_entities", "op_med_pecos_transitive_links"):
+            got, want = (pq.read_schema(str(tmp_path / run / f"{name}.parquet")) for run in ("incremental", "rebuild"))
+            assert got.remove_metadata() == want.remove_metadata(), name
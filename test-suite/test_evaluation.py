@@ -0,0 +1,131 @@
+"""
+Test Suite — Evaluation Harness
+===============================
+Checks lib/evaluation against the iterrows() lookups of
+notebooks/3_linkage.ipynb 3.9 and 4_unified.ipynb 4.4-4.5 on a synthetic
+fixture: findable records, ground-truth pairs, per-strategy metrics and
+linked-pair recall / precision.
+
+Run:  pytest test_evaluation.py -v
+"""
+import os
+import sys
+from collections import defaultdict
+
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+import blocking  # noqa: E402
+import evaluation as ev  # noqa: E402
+
+FIRST = ["John", "JOHN", "Mary", "Ann", None]
+LAST = ["Smith", "SMITH", "Lee", "Nguyen", None]
+STATES = ["CA", "NY", None]
+
+
+def _frame(rng, n, cols):
+    return pd.DataFrame({col: rng.choice(np.array(values, dtype=object), n)
+                         for col, values in zip(cols, (FIRST, LAST, STATES))})
+
+
+@pytest.fixture(scope="module")
+def frames():
+    rng = np.random.default_rng(21)
+    op = _frame(rng, 200, [ev.OP_FIRST, ev.OP_LAST, ev.OP_STATE])
+    med = _frame(rng, 1_000, [ev.MED_FIRST, ev.MED_LAST, ev.MED_STATE])
+    return op, med
+
+
+def notebook_findable(op_tier2, med_clean):
+    """Section 3.9."""
+    med_keys = set(zip(med_clean['Rndrng_Prvdr_First_Name'].str.upper(),
+                       med_clean['Rndrng_Prvdr_Last_Org_Name'].str.upper(),
+                       med_clean['Rndrng_Prvdr_State_Abrvtn']))
+    return {idx for idx, r in op_tier2.iterrows()
+            if (str(r['Covered_Recipient_First_Name']).upper(), str(r['Covered_Recipient_Last_Name']).upper(),
+                str(r['Recipient_State'])) in med_keys}
+
+
+def notebook_ground_truth(op_tier2, med_clean):
+    """Section 4.5's lookup and probe (complete rows only: it keys missing values as 'NAN')."""
+    med_lookup = defaultdict(list)
+    for idx, row in med_clean.iterrows():
+        key = (str(row['Rndrng_Prvdr_First_Name']).upper().strip(),
+               str(row['Rndrng_Prvdr_Last_Org_Name']).upper().strip(),
+               str(row['Rndrng_Prvdr_State_Abrvtn']).strip())
+        med_lookup[key].append(idx)
+    pairs = set()
+    for idx, row in op_tier2.iterrows():
+        key = (row['Covered_Recipient_First_Name'].upper(), row['Covered_Recipient_Last_Name'].upper(),
+               str(row['Recipient_State']).strip())
+        pairs.update((idx, med_idx) for med_idx in med_lookup.get(key, []))
+    return pairs
+
+
+def _ids(pairs):
+    return blocking.pair_ids(*zip(*pairs)) if pairs else np.zeros(0, np.int64)
+
+
+class TestEvaluation:
+
+    def test_findable_matches_notebook(self, frames):
+        mask = ev.findable(*frames)
+        expected = notebook_findable(*frames)
+        assert 0 < len(expected) < len(frames[0])
+        assert set(np.flatnonzero(mask)) == expected
+
+    def test_ground_truth_matches_notebook(self, frames):
+        op, med = (f.dropna().reset_index(drop=True) for f in frames)
+        truth = ev.ground_truth(op, med)
+        assert (np.diff(truth) > 0).all()
+        assert set(zip(*map(list, blocking.split_pair_ids(truth)))) == notebook_ground_truth(op, med)
+        # with missing values, no pair has a missing key part
+        left, right = blocking.split_pair_ids(ev.ground_truth(*frames))
+        assert not frames[0].iloc[left].isna().any().any() and not frames[1].iloc[right].isna().any().any()
+
+    def test_name_coverage_levels(self, frames):
+        op, med = frames
+        coverage = ev.name_coverage(op, med)
+        med_last = set(med[ev.MED_LAST].str.upper().dropna())
+        expected = op[ev.OP_LAST].str.upper().isin(med_last) & op[ev.OP_LAST].notna()
+        assert coverage["last_in_med"].tolist() == expected.tolist()
+        assert coverage["fns_in_med"].tolist() == ev.findable(op, med).tolist()
+        assert (coverage["fns_in_med"] <= coverage["fullname_in_med"]).all()
+
+    def test_strategy_metrics_match_set_algebra(self, frames):
+        op, med = frames
+        rng = np.random.default_rng(0)
+        truth = set(zip(*map(list, blocking.split_pair_ids(ev.ground_truth(op, med)))))
+        strategies = {"exact": truth,
+                      "noise": set(zip(rng.integers(0, len(op), 3_000).tolist(), rng.integers(0, len(med), 3_000).tolist()))}
+        table = ev.evaluate({name: _ids(s) for name, s in strategies.items()}, op, med).set_index("strategy")
+        findable = notebook_findable(op, med)
+        strategies["Union"] = strategies["exact"] | strategies["noise"]
+        for name, s in strategies.items():
+            row = table.loc[name]
+            assert row["pairs"] == len(s)
+            assert row["op_coverage"] == len({p[0] for p in s})
+            assert row["recall_ceiling_pct"] == round(len(findable & {p[0] for p in s}) / len(findable) * 100, 2)
+            assert row["pairs_completeness"] == pytest.approx(len(s & truth) / len(truth))
+            assert row["pairs_quality"] == pytest.approx(len(s & truth) / len(s))
+            assert row["reduction_ratio"] == pytest.approx(1 - len(s) / (len(op) * len(med)))
+        assert table.loc["exact", "pairs_completeness"] == 1.0
+
+    def test_link_metrics_match_notebook(self, frames):
+        truth_pairs = sorted(zip(*map(list, blocking.split_pair_ids(ev.ground_truth(*frames)))))
+        matches = set(truth_pairs[::2]) | {(0, 999), (1, 998)}
+        possibles = set(truth_pairs[1::3]) | {(2, 997)}
+        got = ev.link_metrics(_ids(matches), _ids(possibles), _ids(truth_pairs))
+        gt_ops = {p[0] for p in truth_pairs}
+        our_match_ops, our_all = {p[0] for p in matches}, {p[0] for p in matches | possibles}
+        assert got["found_match"] == len(gt_ops & our_match_ops)
+        assert got["found_possible"] == len(gt_ops & {p[0] for p in possibles})
+        assert got["found_linked"] == len(gt_ops & our_all) and got["linked_ops"] == len(our_all)
+        assert got["recall_match"] == pytest.approx(len(gt_ops & our_match_ops) / len(gt_ops))
+        assert got["recall_match_possible"] == pytest.approx(len(gt_ops & our_all) / len(gt_ops))
+        assert got["precision_lower_bound"] == pytest.approx(len(our_all & gt_ops) / len(our_all))
+        assert got["pair_precision"] == pytest.approx(len(matches & set(truth_pairs)) / len(matches))
@@ -0,0 +1,140 @@
+"""
+Test Suite — NumPy MinHash / LSH Blocking
+=========================================
+Checks lib/lsh_blocking against datasketch: signatures value for value,
+(b, r) band parameters, and the Phase 3 per-state MinHashLSH loop pair
+for pair on a synthetic OP tier-2 / Medicare fixture.
+
+Run:  pytest test_lsh_blocking.py -v
+"""
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+datasketch = pytest.importorskip("datasketch")
+from datasketch import MinHash, MinHashLSH  # noqa: E402
+from datasketch.lsh import _optimal_param  # noqa: E402
+
+import lsh_blocking as lb  # noqa: E402
+
+Q = 3
+FIRST = ["JOHN", "JON", "MARY", "MARIE", "JOSÉ", "LI", None, "NAN", "  ann ", "ELIZABETH"]
+LAST = ["SMITH", "SMYTH", "O'BRIEN", "NGUYEN", "GARCÍA", "LEE", "DE LA CRUZ", None, "ACME CLINIC LLC"]
+STATES = ["CA", "NY", "TX", None]
+
+
+def mk_minhash(text, num_perm):
+    m = MinHash(num_perm=num_perm)
+    if not isinstance(text, str) or len(text) < Q:
+        return None
+    for i in range(len(text) - Q + 1):
+        m.update(text[i:i + Q].encode("utf-8"))
+    return m
+
+
+def ns(first, last, state):
+    parts = [str(x).strip().upper() for x in [first, last, state] if pd.notna(x)]
+    return " ".join(p for p in parts if p and p != "NAN")
+
+
+def notebook_lsh(op_tier2, med_clean, threshold, num_perm):
+    """Phase 3 section 3.7, verbatim apart from names."""
+    op_lsh = op_tier2.apply(lambda r: ns(r['Covered_Recipient_First_Name'], r['Covered_Recipient_Last_Name'],
+                                         r['Recipient_State']), axis=1)
+    med_lsh = med_clean.apply(lambda r: ns(r['Rndrng_Prvdr_First_Name'], r['Rndrng_Prvdr_Last_Org_Name'],
+                                           r['Rndrng_Prvdr_State_Abrvtn']), axis=1)
+    states = sorted(set(op_tier2['Recipient_State'].dropna().unique()) &
+                    set(med_clean['Rndrng_Prvdr_State_Abrvtn'].dropna().unique()))
+    pairs = set()
+    for state in states:
+        op_st = op_lsh[op_tier2['Recipient_State'] == state]
+        med_st = med_lsh[med_clean['Rndrng_Prvdr_State_Abrvtn'] == state]
+        lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
+        for idx, text in med_st.items():
+            mh = mk_minhash(text, num_perm)
+            if mh:
+                lsh.insert(f"m_{idx}", mh)
+        for idx_op, text in op_st.items():
+            mh_op = mk_minhash(text, num_perm)
+            if mh_op is None:
+                continue
+            for key in lsh.query(mh_op):
+                pairs.add((idx_op, int(key.split("_")[1])))
+    return pairs
+
+
+def _people(rng, n, first_col, last_col, state_col):
+    first = rng.choice(np.array(FIRST, dtype=object), n)
+    last = rng.choice(np.array(LAST, dtype=object), n)
+    # spelling noise so that most pairs are near, not exact, duplicates
+    noisy = rng.random(n) < 0.5
+    last[noisy] = [f"{v}{rng.choice(list('AEX'))}" if isinstance(v, str) else v for v in last[noisy]]
+    return pd.DataFrame({first_col: first, last_col: last,
+                         state_col: rng.choice(np.array(STATES, dtype=object), n)})
+
+
+@pytest.fixture(scope="module")
+def fixture_frames():
+    rng = np.random.default_rng(7)
+    op = _people(rng, 150, "Covered_Recipient_First_Name", "Covered_Recipient_Last_Name", "Recipient_State")
+    med = _people(rng, 1_500, "Rndrng_Prvdr_First_Name", "Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_State_Abrvtn")
+    med.index = med.index + 10_000  # positions and labels differ
+    return op, med
+
+
+class TestSignatures:
+
+    def test_matches_datasketch(self):
+        rng = np.random.default_rng(0)
+        alphabet = list("ABCXYZ '-.É日") + ["SMITH", "LEE"]
+        texts = ["".join(rng.choice(alphabet, rng.integers(0, 10))) for _ in range(300)] + ["", "AB", None]
+        signatures, has = lb.minhash_signatures(texts, num_perm=64)
+        for text, sig, flag in zip(texts, signatures, has):
+            mh = mk_minhash(text, 64)
+            assert flag == (mh is not None)
+            if mh is not None:
+                assert sig.tolist() == mh.hashvalues.tolist()
+
+    def test_permutations_match_datasketch(self):
+        a, b = lb.permutations(32)
+        expected = MinHash(num_perm=32).permutations
+        assert a.tolist() == expected[0].tolist() and b.tolist() == expected[1].tolist()
+
+    @pytest.mark.parametrize("num_perm,threshold", [(64, 0.3), (128, 0.5), (256, 0.7)])
+    def test_band_params(self, num_perm, threshold):
+        assert lb.optimal_params(threshold, num_perm) == _optimal_param(threshold, num_perm, 0.5, 0.5)
+
+    def test_name_strings(self, fixture_frames):
+        op, _ = fixture_frames
+        cols = ["Covered_Recipient_First_Name", "Covered_Recipient_Last_Name", "Recipient_State"]
+        expected = [ns(*row) for row in op[cols].itertuples(index=False)]
+        assert lb.name_strings(*(op[c] for c in cols)).tolist() == expected
+
+
+class TestCandidatePairs:
+
+    @pytest.mark.parametrize("num_perm,threshold", [(128, 0.5), (64, 0.3)])
+    def test_matches_notebook_loop(self, fixture_frames, num_perm, threshold):
+        op, med = fixture_frames
+        pairs = lb.lsh_block(op, med, threshold=threshold, num_perm=num_perm)
+        expected = notebook_lsh(op, med, threshold, num_perm)
+        assert len(expected) > 100
+        assert set(zip(pairs["index_op"], pairs["index_med"])) == expected
+        assert not pairs.duplicated().any()
+
+    def test_key_collisions_are_filtered(self, fixture_frames, monkeypatch):
+        op, med = fixture_frames
+        expected = lb.lsh_block(op, med)
+        monkeypatch.setattr(lb, "band_keys", lambda values:
+                            np.zeros(len(values), dtype=np.uint64))
+        assert lb.lsh_block(op, med).equals(expected)
+
+    def test_without_blocks_and_short_texts(self):
+        pairs = lb.candidate_pairs(["JOHN SMITH", "AB", "MARY LEE"], ["JOHN SMITH", "JON SMITH", "AB", ""],
+                                   threshold=0.5, num_perm=64)
+        assert pairs.values.tolist() == [[0, 0], [0, 1]]
@@ -0,0 +1,110 @@
+"""
+Test Suite — Phase 6 LSH Sweep
+==============================
+Checks lib/lsh_sweep against per-configuration lsh_block runs: prefix
+reuse of the widest signature matrix, Strategy B as the notebook merges
+it, every row of the results grid, and the process-pool path.
+
+Run:  pytest test_lsh_sweep.py -v
+"""
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+pytest.importorskip("scipy")
+import lsh_blocking as lb  # noqa: E402
+import lsh_sweep  # noqa: E402
+
+FIRST = ["JOHN", "JON", "MARY", "MARIE", "LI", None, "ELIZABETH"]
+LAST = ["SMITH", "SMYTH", "OBRIEN", "NGUYEN", "GARCIA", "LEE", "DE LA CRUZ", None]
+STATES = ["CA", "NY", "TX", None]
+NUM_PERMS = [64, 128]
+THRESHOLDS = [0.3, 0.5, 0.7]
+
+
+def _people(rng, n, first_col, last_col, state_col):
+    last = rng.choice(np.array(LAST, dtype=object), n)
+    noisy = rng.random(n) < 0.5
+    last[noisy] = [f"{v}{rng.choice(list('AEX'))}" if isinstance(v, str) else v for v in last[noisy]]
+    frame = pd.DataFrame({first_col: rng.choice(np.array(FIRST, dtype=object), n), last_col: last,
+                          state_col: rng.choice(np.array(STATES, dtype=object), n)})
+    frame["LAST_NAME_SOUNDEX"] = frame[last_col].str[:2]  # any last-name key will do for Strategy B
+    return frame
+
+
+@pytest.fixture(scope="module")
+def frames():
+    rng = np.random.default_rng(3)
+    op = _people(rng, 120, "Covered_Recipient_First_Name", "Covered_Recipient_Last_Name", "Recipient_State")
+    med = _people(rng, 1_200, "Rndrng_Prvdr_First_Name", "Rndrng_Prvdr_Last_Org_Name", "Rndrng_Prvdr_State_Abrvtn")
+    return op, med
+
+
+@pytest.fixture(scope="module")
+def serial_results(frames):
+    return lsh_sweep.sweep(*frames, NUM_PERMS, THRESHOLDS, workers=1)
+
+
+def notebook_b(op, med):
+    """Phase 6 section 4.3 Strategy B, as a set of (index_op, index_med)."""
+    op_b = op["LAST_NAME_SOUNDEX"].fillna("") + "|" + op["Recipient_State"].fillna("")
+    med_b = med["LAST_NAME_SOUNDEX"].fillna("") + "|" + med["Rndrng_Prvdr_State_Abrvtn"].fillna("")
+    pairs = (op_b.rename("block_B").reset_index().rename(columns={"index": "index_op"})
+             .merge(med_b.rename("block_B").reset_index().rename(columns={"index": "index_med"}), on="block_B"))
+    return set(zip(pairs["index_op"], pairs["index_med"]))
+
+
+class TestSweep:
+
+    def test_signature_prefix_matches_smaller_num_perm(self, frames):
+        op, _ = frames
+        texts = lb.name_strings(op["Covered_Recipient_First_Name"], op["Covered_Recipient_Last_Name"],
+                                op["Recipient_State"])
+        wide, has_wide = lb.minhash_signatures(texts, num_perm=256)
+        narrow, has_narrow = lb.minhash_signatures(texts, num_perm=64)
+        assert np.array_equal(wide[:, :64], narrow) and np.array_equal(has_wide, has_narrow)
+
+    def test_strategy_b_matches_notebook_merge(self, frames):
+        op, med = frames
+        packed = lsh_sweep.strategy_b_pairs(op, med)
+        got = set(zip((packed >> np.uint64(32)).astype(int), (packed & lb.MAX_HASH).astype(int)))
+        assert got == notebook_b(op, med)
+
+    def test_grid_matches_independent_runs(self, frames, serial_results):
+        op, med = frames
+        set_b = notebook_b(op, med)
+        assert list(zip(serial_results["num_perm"], serial_results["threshold"])) == \
+            [(p, t) for p in NUM_PERMS for t in THRESHOLDS]
+        for row in serial_results.itertuples():
+            pairs = lb.lsh_block(op, med, threshold=row.threshold, num_perm=row.num_perm)
+            lsh_pairs = set(zip(pairs["index_op"], pairs["index_med"]))
+            assert row.candidate_pairs == len(lsh_pairs)
+            assert row.overlap_with_B == len(lsh_pairs & set_b)
+            assert row.unique_to_lsh == len(lsh_pairs - set_b)
+            assert row.pc_vs_strategy_B == round(len(lsh_pairs & set_b) / len(set_b) * 100, 2)
+            assert row.reduction_ratio == pytest.approx(1 - len(lsh_pairs) / (len(op) * len(med)))
+            assert (row.bands, row.rows) == lb.optimal_params(row.threshold, row.num_perm)
+
+    def test_workers_match_serial(self, frames, serial_results, tmp_path):
+        parallel = lsh_sweep.sweep(*frames, NUM_PERMS, THRESHOLDS, workers=2, shm_dir=str(tmp_path))
+        timing = ["runtime_sec", "pairs_per_sec"]
+        pd.testing.assert_frame_equal(parallel.drop(columns=timing), serial_results.drop(columns=timing))
+        assert os.listdir(tmp_path) == []
+
+    def test_results_csv_has_notebook_columns(self, frames, tmp_path, monkeypatch):
+        op, med = frames
+        op.assign(linkage_tier="tier2_fuzzy").to_parquet(tmp_path / "open_payments_clean.parquet")
+        med.to_parquet(tmp_path / "medicare_clean.parquet")
+        monkeypatch.setattr(sys, "argv", ["lsh_sweep.py", "--input", str(tmp_path), "--out", str(tmp_path / "out"),
+                                          "--num-perms", "64", "--thresholds", "0.5"])
+        lsh_sweep.main()
+        results = pd.read_csv(tmp_path / "out" / "lsh_benchmark_results.csv")
+        assert list(results.columns[:9]) == ["num_perm", "threshold", "candidate_pairs", "reduction_ratio",
+                                             "pc_vs_strategy_B", "unique_to_lsh", "overlap_with_B",
+                                             "runtime_sec", "pairs_per_sec"]
+        assert len(results) == 1
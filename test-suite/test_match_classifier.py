@@ -0,0 +1,156 @@
+"""
+Test Suite — Five-Path Match Classifier
+=======================================
+Checks lib/match_classifier against notebooks/4_unified.ipynb on a
+synthetic feature matrix: 4.3's fls_count and five-path tiers, a score
+just under a threshold (in memory and from the stored matrix), 4.8's
+Path A re-tiering, batched ML scores against a single predict_proba, and
+the saved model bundle.
+
+Run:  pytest test_match_classifier.py -v
+"""
+import os
+import sys
+
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+from rapidfuzz.distance import JaroWinkler  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+
+import match_classifier as mc  # noqa: E402
+from artifact_store import read_feature_matrix, write_feature_matrix  # noqa: E402
+
+# values on and around every 4.3 threshold
+GRID = [0.0, 0.5, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.92, 0.95, 1.0]
+BINARY = ['first_soundex_match', 'last_soundex_match', 'first_metaphone_match', 'last_metaphone_match',
+          'city_match', 'state_match', 'zip5_match']
+
+
+@pytest.fixture(scope="module")
+def med_clean():
+    rng = np.random.default_rng(22)
+    n = 2_000
+    return pd.DataFrame({
+        mc.MED_FIRST: rng.choice(np.array(["John", "JOHN", "Ann", None], dtype=object), n),
+        mc.MED_LAST: rng.choice(np.array(["Smith", "Lee", "lee", None], dtype=object), n),
+        mc.MED_STATE: rng.choice(np.array(["CA", "NY", None], dtype=object), n),
+    })
+
+
+@pytest.fixture(scope="module")
+def comp_df(med_clean):
+    rng = np.random.default_rng(4)
+    n = 30_000
+    frame = pd.DataFrame({"index_op": rng.integers(0, 500, n), "index_med": rng.integers(0, len(med_clean), n)})
+    for col in mc.ML_FEATURE_COLS + ["state_match"]:
+        frame[col] = rng.choice([0.0, 1.0], n) if col in BINARY else rng.choice(GRID, n)
+    for col, med_col in (("first_name_med", mc.MED_FIRST), ("last_name_med", mc.MED_LAST), ("state_med", mc.MED_STATE)):
+        frame[col] = med_clean[med_col].to_numpy()[frame["index_med"]]
+    return frame
+
+
+def notebook_fls_count(comp_df, med_clean):
+    """Section 4.3's fls_key value counts mapped onto the pairs."""
+    fls_key = (med_clean['Rndrng_Prvdr_First_Name'].str.upper().fillna('') + '|' +
+               med_clean['Rndrng_Prvdr_Last_Org_Name'].str.upper().fillna('') + '|' +
+               med_clean['Rndrng_Prvdr_State_Abrvtn'].fillna(''))
+    fls_counts = fls_key.value_counts()
+    fls_key_med = (comp_df['first_name_med'].str.upper().fillna('') + '|' +
+                   comp_df['last_name_med'].str.upper().fillna('') + '|' + comp_df['state_med'].fillna(''))
+    return fls_key_med.map(fls_counts).fillna(0).astype(int)
+
+
+def notebook_paths(comp_df, fls_count, a_first=0.85, a_last=0.85):
+    """Section 4.3's masks (Path A thresholds as in 4.8's sweep)."""
+    path_a = ((comp_df['first_jw'] >= a_first) & (comp_df['last_jw'] >= a_last) &
+              ((comp_df['zip5_match'] == 1.0) | (comp_df['street_jw'] >= 0.80)))
+    path_b = ((comp_df['last_lev'] == 1.0) & (comp_df['first_lev'] >= 0.60) &
+              (comp_df['zip5_match'] == 1.0) & (comp_df['city_match'] == 1.0))
+    path_c2 = ((comp_df['first_jw'] >= 0.92) & (comp_df['first_lev'] >= 0.75) & (comp_df['last_jw'] == 1.0) &
+               ((comp_df['zip5_match'] == 1.0) | (comp_df['city_match'] == 1.0)))
+    path_d = ((comp_df['first_lev'] == 1.0) & (comp_df['last_lev'] == 1.0) & (comp_df['state_match'] == 1.0) &
+              ((fls_count <= 3) | ((fls_count > 3) & ((comp_df['city_match'] == 1.0) | (comp_df['zip5_match'] == 1.0)))))
+    path_e = ((comp_df['last_lev'] == 1.0) & (comp_df['first_jw'] >= 0.90) & (comp_df['first_lev'] >= 0.80) &
+              (comp_df['city_match'] == 1.0) & (comp_df['state_match'] == 1.0))
+    match_mask = path_a | path_b | path_c2 | path_d | path_e
+    possible_mask = (~match_mask & (comp_df['first_jw'] >= 0.65) & (comp_df['first_lev'] >= 0.60) &
+                     (comp_df['last_jw'] >= 0.90) &
+                     ((comp_df['zip5_match'] == 1.0) | (comp_df['city_match'] == 1.0) | (comp_df['street_jw'] >= 0.70)))
+    tier = pd.Series('non_match', index=comp_df.index)
+    tier[possible_mask] = 'possible'
+    tier[match_mask] = 'match'
+    which = np.select([path_a, path_b, path_c2, path_d, path_e, possible_mask],
+                      ['A', 'B', 'C2', 'D', 'E', 'possible'], default='none')
+    return tier, which
+
+
+@pytest.fixture(scope="module")
+def model(comp_df):
+    tier, _ = notebook_paths(comp_df, pd.Series(0, index=comp_df.index))
+    return RandomForestClassifier(n_estimators=20, max_depth=6, random_state=42).fit(
+        comp_df[mc.ML_FEATURE_COLS].values, (tier == 'match').astype(int))
+
+
+class TestMatchClassifier:
+
+    def test_fls_count_matches_notebook(self, comp_df, med_clean):
+        expected = notebook_fls_count(comp_df, med_clean)
+        got = mc.pair_counts(comp_df["index_med"], *mc.key_counts(med_clean))
+        assert expected.max() > 3
+        assert got.tolist() == expected.tolist()
+
+    def test_tiers_match_notebook(self, comp_df, med_clean):
+        fls_count = mc.pair_counts(comp_df["index_med"], *mc.key_counts(med_clean))
+        tier, which = notebook_paths(comp_df, notebook_fls_count(comp_df, med_clean))
+        got = mc.classify(comp_df, fls_count)
+        assert set(tier) == {"match", "possible", "non_match"} and len(set(which)) == len(mc.PATHS)
+        assert got["match_tier"].astype(str).tolist() == tier.tolist()
+        assert got["which_path"].astype(str).tolist() == which.tolist()
+
+    def test_threshold_boundary(self, tmp_path):
+        # JW("ANLC", "ASNELC") is 0.8999999999999999: under Path E's 0.90, so the pair is only "possible";
+        # its float32 cast is 0.9
+        jw = JaroWinkler.similarity("ANLC", "ASNELC")
+        pair = pd.DataFrame({"index_op": [0], "index_med": [0], "first_jw": [jw], "first_lev": [0.8],
+                             "last_jw": [1.0], "last_lev": [1.0], "street_jw": [0.5], "city_match": [1.0],
+                             "state_match": [1.0], "zip5_match": [0.0]})
+        tier, which = notebook_paths(pair, pd.Series([1]))
+        assert jw < 0.9 <= np.float32(jw) and tier.tolist() == ["possible"]
+        got = mc.classify(pair, np.array([1]))
+        assert got["match_tier"].astype(str).tolist() == ["possible"] and got["which_path"].tolist() == which.tolist()
+        # stored feature matrix keeps the rule scores float64, so re-tiering from disk agrees
+        path = str(tmp_path / "feature_matrix.parquet")
+        write_feature_matrix(pd.concat([pair, got], axis=1), path)
+        stored = read_feature_matrix(path, tiers=None)
+        assert stored["first_jw"].dtype == np.float64
+        assert mc.classify(stored, np.array([1]))["match_tier"].astype(str).tolist() == ["possible"]
+        # float32 rule scores are flagged
+        with pytest.warns(RuntimeWarning, match="first_jw"):
+            mc.classify(pair.astype({"first_jw": np.float32}), np.array([1]))
+
+    def test_retier_path_a(self, comp_df, med_clean):
+        fls_count = mc.pair_counts(comp_df["index_med"], *mc.key_counts(med_clean))
+        for first, last in ((0.80, 0.85), (0.92, 0.85), (0.85, 0.95)):
+            tier, _ = notebook_paths(comp_df, notebook_fls_count(comp_df, med_clean), first, last)
+            got = mc.classify(comp_df, fls_count, {"a_first_jw": first, "a_last_jw": last})
+            assert got["match_tier"].astype(str).tolist() == tier.tolist()
+        with pytest.raises(ValueError, match="a_first"):
+            mc.classify(comp_df, fls_count, {"a_first": 0.9})
+
+    def test_batched_scores_equal_predict(self, comp_df, model):
+        X_all = comp_df[mc.ML_FEATURE_COLS].values
+        prob = mc.predict_proba(model, comp_df, batch_rows=7_000)
+        np.testing.assert_array_equal(prob, model.predict_proba(X_all)[:, 1])
+        pred = mc.classify(comp_df, np.zeros(len(comp_df)), ml_prob=prob)["ml_match_pred"]
+        assert pred.tolist() == model.predict(X_all).tolist()
+
+    def test_saved_models_round_trip(self, comp_df, model, tmp_path):
+        path = mc.save_models({"Random Forest": model}, str(tmp_path / mc.MODEL_FILE), best="Random Forest")
+        bundle = mc.load_models(path)
+        assert bundle["best"] == "Random Forest" and bundle["feature_cols"] == mc.ML_FEATURE_COLS
+        np.testing.assert_array_equal(mc.score(bundle, comp_df), mc.predict_proba(model, comp_df))
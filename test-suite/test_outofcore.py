@@ -0,0 +1,236 @@
+"""
+Test Suite — Out-of-Core Phase 5 / Phase 7
+==========================================
+Checks lib/outofcore (DuckDB over parquet) on synthetic Phase 2 / Phase 4
+artifacts: the Phase 5 outputs against entity_resolution.build with the
+same Phase 4 pairs and the notebook's 5.4 / 5.10, the Phase 7 CSVs against
+7_temporal_drift.ipynb's pandas code, and the memory and spill settings.
+
+Run:  pytest test_outofcore.py -v
+"""
+import os
+import sys
+
+import pytest
+import numpy as np
+import pandas as pd
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+import entity_resolution as er  # noqa: E402
+import outofcore  # noqa: E402
+from artifact_store import read_feature_matrix, write_feature_matrix  # noqa: E402
+
+FIRST = np.array(["JOHN", "JON", "ANN", "MARIA", "LEE", None], dtype=object)
+LAST = np.array(["SMITH", "SMYTH", "LEE", "GARCIA", "NGUYEN"], dtype=object)
+STATES = np.array(["TX", "CA", "NY"], dtype=object)
+
+
+def make_artifacts(root, n_med=500, n_op=600, n_pecos=700, seed=0):
+    rng = np.random.default_rng(seed)
+    p2, p4 = os.path.join(root, "phase2"), os.path.join(root, "phase4")
+    os.makedirs(p2), os.makedirs(p4)
+    org = rng.random(n_med) < 0.1
+    med = pd.DataFrame({
+        "Rndrng_NPI": 1_000_000_000 + rng.integers(0, n_med - 60, n_med),
+        "Rndrng_Prvdr_First_Name": np.where(org, None, rng.choice(FIRST[:-1], n_med)),
+        "Rndrng_Prvdr_Last_Org_Name": rng.choice(LAST, n_med),
+        "Rndrng_Prvdr_State_Abrvtn": rng.choice(STATES, n_med),
+        "Rndrng_Prvdr_Ent_Cd": np.where(org, "O", "I"),
+        "NPI_VALID": rng.random(n_med) < 0.95,
+    })
+    src = rng.integers(0, n_med, n_op)
+    tier1 = rng.random(n_op) < 0.5
+    op = pd.DataFrame({
+        "Covered_Recipient_NPI": np.where(tier1, med["Rndrng_NPI"].to_numpy()[src].astype(float), np.nan),
+        "Covered_Recipient_Last_Name": med["Rndrng_Prvdr_Last_Org_Name"].to_numpy()[src],
+        "linkage_tier": np.where(tier1, "tier1_npi", "tier2_fuzzy"),
+        "payment_count": rng.integers(1, 20, n_op),
+        "total_payment_amount": np.where(rng.random(n_op) < 0.1, np.nan, rng.gamma(2.0, 150.0, n_op).round(2)),
+        "max_payment": rng.gamma(2.0, 80.0, n_op).round(2),
+        "min_payment_date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 180, n_op), unit="D"),
+        "max_payment_date": pd.Timestamp("2023-07-01") + pd.to_timedelta(rng.integers(0, 180, n_op), unit="D"),
+        "unique_manufacturers": rng.integers(1, 6, n_op),
+    })
+    rows = rng.integers(0, n_med, n_pecos)
+    pecos = pd.DataFrame({
+        "NPI": np.where(rng.random(n_pecos) < 0.9, med["Rndrng_NPI"].to_numpy()[rows].astype(str), "N/A"),
+        "ENRLMT_ENTITY": np.where(rng.random(n_pecos) < 0.9, med["Rndrng_Prvdr_Ent_Cd"].to_numpy()[rows], "I"),
+        "ENRLMT_ID": [f"E{i:05d}" for i in range(n_pecos)],
+        "ENRLMT_YEAR": pd.array(np.where(rng.random(n_pecos) < 0.1, None, rng.integers(2005, 2024, n_pecos)),
+                                dtype="Int64"),
+        "FIRST_NAME": np.where(rng.random(n_pecos) < 0.2, rng.choice(FIRST, n_pecos),
+                               med["Rndrng_Prvdr_First_Name"].to_numpy()[rows]),
+        "LAST_NAME": np.where(rng.random(n_pecos) < 0.2, rng.choice(LAST, n_pecos),
+                              med["Rndrng_Prvdr_Last_Org_Name"].to_numpy()[rows]),
+        "STATE_CD": np.where(rng.random(n_pecos) < 0.1, rng.choice(STATES, n_pecos),
+                             med["Rndrng_Prvdr_State_Abrvtn"].to_numpy()[rows]),
+    })
+    n_tier2 = int((~tier1).sum())
+    pairs = pd.DataFrame({"index_op": rng.integers(0, n_tier2, 900), "index_med": rng.integers(0, n_med, 900),
+                          "match_tier": rng.choice(["match", "possible", "non_match"], 900)})
+    pairs = pairs.drop_duplicates(["index_op", "index_med"])
+    # 4.6's Med -> PECOS tier-1 links, with a padded name and a missing year
+    mp = pecos.merge(med.assign(NPI=med["Rndrng_NPI"].astype(str)), on="NPI")
+    mp.loc[mp.index[:5], "FIRST_NAME"] = " " + mp["FIRST_NAME"].iloc[:5].fillna("X").str.lower() + " "
+    med.to_parquet(os.path.join(p2, "medicare_clean.parquet"), index=False)
+    op.to_parquet(os.path.join(p2, "open_payments_clean.parquet"), index=False)
+    pecos.to_parquet(os.path.join(p2, "pecos_clean.parquet"), index=False)
+    write_feature_matrix(pairs, os.path.join(p4, "feature_matrix.parquet"))
+    mp.to_parquet(os.path.join(p4, "med_pecos_tier1_npi.parquet"), index=False)
+    return p2, p4
+
+
+@pytest.fixture(scope="module")
+def artifacts(tmp_path_factory):
+    root = tmp_path_factory.mktemp("outofcore")
+    p2, p4 = make_artifacts(str(root))
+    p5, p7 = str(root / "phase5"), str(root / "phase7")
+    con = outofcore.connect("256MB", str(root / "spill"), threads=2)
+    rows = outofcore.entity_resolution_outputs(con, p2, os.path.join(p4, "feature_matrix.parquet"), p5)
+    drift = outofcore.temporal_drift_outputs(con, p2, p4, p5, p7)
+    return p2, p4, p5, p7, rows, drift
+
+
+def _frame(path):
+    frame = pd.read_parquet(path)
+    # NULL strings come back as None, pandas' merges leave NaN
+    for col in frame.columns[frame.dtypes == object]:
+        frame[col] = frame[col].where(frame[col].notna(), np.nan)
+    return frame
+
+
+def _same(got, expected):
+    expected = expected.reset_index(drop=True).astype({c: object for c in expected.columns
+                                                       if isinstance(expected[c].dtype, pd.CategoricalDtype)})
+    for col in expected.columns[expected.dtypes == object]:
+        expected[col] = expected[col].where(expected[col].notna(), np.nan)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), expected, check_dtype=False)
+
+
+class TestOutOfCore:
+
+    def test_phase5_matches_build(self, artifacts):
+        p2, p4, p5, _, rows, _ = artifacts
+        med = pd.read_parquet(os.path.join(p2, "medicare_clean.parquet"))
+        op = pd.read_parquet(os.path.join(p2, "open_payments_clean.parquet"))
+        pairs = read_feature_matrix(os.path.join(p4, "feature_matrix.parquet"),
+                                    columns=["index_op", "index_med", "match_tier"])
+        state = er.build(op, med, pd.read_parquet(os.path.join(p2, "pecos_clean.parquet")), pairs)
+        assert rows["unified_provider_entities.parquet"] == len(state["unified"]) > len(med)
+        assert state["unified"]["has_pecos_enrollment"].any() and state["unified"]["has_op_payments"].any()
+        _same(_frame(os.path.join(p5, "provider_entities.parquet")), state["prov"])
+        _same(_frame(os.path.join(p5, "provider_payments.parquet")), er.provider_payments(state["payments"]))
+        _same(_frame(os.path.join(p5, "unified_provider_entities.parquet")), state["unified"])
+        _same(_frame(os.path.join(p5, "op_med_pecos_transitive_links.parquet")), state["chains"])
+
+    def test_phase5_notebook_tables(self, artifacts):
+        p2, p4, p5, *_ = artifacts
+        op = pd.read_parquet(os.path.join(p2, "open_payments_clean.parquet"))
+        pairs = read_feature_matrix(os.path.join(p4, "feature_matrix.parquet"),
+                                    columns=["index_op", "index_med", "match_tier"])
+        state = er.build(op, pd.read_parquet(os.path.join(p2, "medicare_clean.parquet")),
+                         pd.read_parquet(os.path.join(p2, "pecos_clean.parquet")), pairs)
+        # 5.4
+        optier2 = op[op["linkage_tier"] == "tier2_fuzzy"].copy().reset_index(drop=True)
+        optier2.index.name = "index_op"
+        optier2_with_pid = optier2.reset_index().merge(state["op_best"], on="index_op", how="left")
+        _same(_frame(os.path.join(p5, "open_payments_tier2_with_provider_id.parquet")), optier2_with_pid)
+        # 5.2 / 5.3: op_with_pid through med_with_pid, one row per backbone row of the pair's NPI
+        medclean_reset = pd.read_parquet(os.path.join(p2, "medicare_clean.parquet")).reset_index().rename(
+            columns={"index": "index_med"})
+        med_with_pid = medclean_reset.merge(state["prov"][["npi", "provider_id"]], left_on="Rndrng_NPI",
+                                            right_on="npi", how="left")
+        op_med_matches = pairs[pairs["match_tier"].isin(["match", "possible"])].astype({"match_tier": object})
+        op_with_pid = (op_med_matches[["index_op", "index_med"]]
+                       .merge(med_with_pid[["index_med", "provider_id"]], on="index_med", how="left"))
+        op_with_pid = op_with_pid.merge(op_med_matches[["index_op", "index_med", "match_tier"]],
+                                        on=["index_op", "index_med"], how="left")
+        assert len(op_with_pid) > len(state["op_links"])
+        # 5.10 on op_with_pid and prov_enhanced
+        prov_enhanced = state["unified"]
+        n_conflicted_op = op_with_pid.groupby("index_op").filter(lambda g: len(g) > 1)["index_op"].nunique()
+        has_both = prov_enhanced[prov_enhanced["pecos_first_name"].notna() & prov_enhanced["first_med"].notna()].copy()
+        has_both["first_mismatch"] = has_both["first_med"].str.upper() != has_both["pecos_first_name"].str.upper()
+        has_both["last_mismatch"] = has_both["last_med"].str.upper() != has_both["pecos_last_name"].str.upper()
+        n_mismatch = (has_both["first_mismatch"] | has_both["last_mismatch"]).sum()
+        n_linked = len(op_with_pid["index_op"].unique())
+        expected = pd.DataFrame([
+            {"conflict_type": "multi_match", "count": n_conflicted_op, "denominator": n_linked,
+             "pct_affected": n_conflicted_op / max(1, n_linked) * 100},
+            {"conflict_type": "name_mismatch", "count": n_mismatch, "denominator": len(has_both),
+             "pct_affected": n_mismatch / len(has_both) * 100},
+        ])
+        assert n_conflicted_op > 0 and n_mismatch > 0
+        pd.testing.assert_frame_equal(pd.read_csv(os.path.join(p5, "data_quality_conflicts.csv")), expected,
+                                      check_dtype=False)
+
+    def test_phase7_matches_notebook(self, artifacts):
+        p2, p4, p5, p7, _, drift = artifacts
+        mp = pd.read_parquet(os.path.join(p4, "med_pecos_tier1_npi.parquet"))
+        # 5.2 / 5.4
+        mp["med_first"] = mp["Rndrng_Prvdr_First_Name"].str.upper().str.strip()
+        mp["med_last"] = mp["Rndrng_Prvdr_Last_Org_Name"].str.upper().str.strip()
+        mp["pecos_first"] = mp["FIRST_NAME"].str.upper().str.strip()
+        mp["pecos_last"] = mp["LAST_NAME"].str.upper().str.strip()
+        mp["first_mismatch"] = (mp["med_first"] != mp["pecos_first"]) & mp["med_first"].notna() & mp["pecos_first"].notna()
+        mp["last_mismatch"] = (mp["med_last"] != mp["pecos_last"]) & mp["med_last"].notna() & mp["pecos_last"].notna()
+        mp["any_mismatch"] = mp["first_mismatch"] | mp["last_mismatch"]
+        year_stats = mp.groupby("ENRLMT_YEAR").agg(
+            total=("any_mismatch", "count"), n_mismatch=("any_mismatch", "sum"),
+            n_first_mm=("first_mismatch", "sum"), n_last_mm=("last_mismatch", "sum")).reset_index()
+        year_stats["mismatch_rate"] = (year_stats["n_mismatch"] / year_stats["total"] * 100).round(2)
+        year_stats["first_mm_rate"] = (year_stats["n_first_mm"] / year_stats["total"] * 100).round(2)
+        year_stats["last_mm_rate"] = (year_stats["n_last_mm"] / year_stats["total"] * 100).round(2)
+        mp["state_changed"] = ((mp["Rndrng_Prvdr_State_Abrvtn"] != mp["STATE_CD"])
+                               & mp["Rndrng_Prvdr_State_Abrvtn"].notna() & mp["STATE_CD"].notna())
+        state_drift = mp.groupby("ENRLMT_YEAR").agg(total=("state_changed", "count"),
+                                                    n_changed=("state_changed", "sum")).reset_index()
+        state_drift["change_rate"] = (state_drift["n_changed"] / state_drift["total"] * 100).round(2)
+        assert mp["ENRLMT_YEAR"].isna().any() and year_stats["n_first_mm"].sum() > 0
+        for name, expected in (("name_mismatch_by_year.csv", year_stats), ("state_drift_by_year.csv", state_drift)):
+            pd.testing.assert_frame_equal(pd.read_csv(os.path.join(p7, name)), expected, check_dtype=False)
+        assert drift["summary"]["name_mismatch_pct"] == pytest.approx(mp["any_mismatch"].mean() * 100)
+        assert drift["summary"]["state_change_pct"] == pytest.approx(mp["state_changed"].mean() * 100)
+
+        # 5.6 / 5.7
+        pecos, unified = pd.read_parquet(os.path.join(p2, "pecos_clean.parquet")), pd.read_parquet(
+            os.path.join(p5, "unified_provider_entities.parquet"))
+        pecos_indiv = pecos[pecos["ENRLMT_ENTITY"] == "I"].copy()
+        enrl_per_npi = pecos_indiv.groupby("NPI").agg(
+            n_enrollments=("ENRLMT_ID", "nunique"), n_years=("ENRLMT_YEAR", "nunique"),
+            first_year=("ENRLMT_YEAR", "min"), last_year=("ENRLMT_YEAR", "max"),
+            n_states=("STATE_CD", "nunique"), n_names=("LAST_NAME", "nunique")).reset_index()
+        enrl_per_npi["tenure"] = 2023 - enrl_per_npi["first_year"]
+        enrl_per_npi["cohort"] = pd.cut(enrl_per_npi["tenure"], bins=[0, 2, 5, 10, 15, 50],
+                                        labels=["0-2yr", "3-5yr", "6-10yr", "11-15yr", "16+yr"], right=True)
+        unified_slim = unified[["npi", "has_op_payments", "has_pecos_enrollment", "linkage_coverage"]].copy()
+        unified_slim["npi"] = pd.to_numeric(unified_slim["npi"], errors="coerce")
+        enrl_per_npi["NPI"] = pd.to_numeric(enrl_per_npi["NPI"], errors="coerce")
+        cohort_merged = enrl_per_npi.merge(unified_slim, left_on="NPI", right_on="npi", how="left")
+        cohort_stats = cohort_merged.groupby("cohort", observed=True).agg(
+            n_providers=("NPI", "count"),
+            multi_state_pct=("n_states", lambda x: (x > 1).mean() * 100),
+            name_change_pct=("n_names", lambda x: (x > 1).mean() * 100),
+            has_op_pct=("has_op_payments", lambda x: x.mean() * 100),
+            has_pecos_pct=("has_pecos_enrollment", lambda x: x.mean() * 100),
+            avg_enrollments=("n_enrollments", "mean")).round(2).reset_index()
+        assert cohort_merged["has_op_payments"].isna().any() and len(cohort_stats) == 5
+        pd.testing.assert_frame_equal(pd.read_csv(os.path.join(p7, "tenure_cohort_analysis.csv")),
+                                      cohort_stats.astype({"cohort": str}), check_dtype=False)
+        assert drift["summary"]["name_change_pct"] == pytest.approx((enrl_per_npi["n_names"] > 1).mean() * 100)
+
+        # 5.9
+        risk = pd.read_csv(os.path.join(p7, "year_linkage_risk.csv"))
+        assert risk["ENRLMT_YEAR"].tolist() == year_stats["ENRLMT_YEAR"].tolist()
+        np.testing.assert_allclose(risk["combined_risk"], year_stats["mismatch_rate"] + state_drift["change_rate"])
+
+    def test_connection_settings(self, tmp_path):
+        con = outofcore.connect("300MB", str(tmp_path / "spill"), threads=1)
+        limit = con.execute("SELECT current_setting('memory_limit')").fetchone()[0]
+        assert limit.endswith("MiB") and 280 <= float(limit.split()[0]) <= 300
+        assert con.execute("SELECT current_setting('temp_directory')").fetchone()[0] == str(tmp_path / "spill")
+        assert con.execute("SELECT current_setting('threads')").fetchone()[0] == 1
+        assert con.execute("SELECT npi_code('1234567890'), npi_code(1.0e9), npi_code('N/A')").fetchone() == (
+            1234567890, 1_000_000_000, None)
@@ -0,0 +1,152 @@
+"""
+Test Suite — lib/preprocessing Vectorized Helpers
+=================================================
+Checks that every *_series cleaner and phonetic encoder returns exactly
+what Series.map with the scalar function returns, and that
+is_valid_npi_array agrees with is_valid_npi cell by cell, on hand-picked
+edge cases and random input.
+
+Run:  pytest test_preprocessing.py -v
+"""
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+import preprocessing as pp  # noqa: E402
+
+CLEANERS = ["clean_name", "clean_credential", "clean_street", "clean_city", "clean_state", "normalize_zip5"]
+
+EDGE_CASES = [
+    "  john  smith ", "o'brien.", "", " ", None, np.nan, pd.NA, 5, 5.0, -0.0,
+    "José", "ÉLODIE  d'arc", "ß", "  \t\x1cmary\x1f", "a b", "a  b",
+    "123 main street apt 4", "SUITE. 5", "1 BOULEVARD,", "ST.", "-- .,",
+    "10001-1234", "1234", "(212) 555", "１２３４５", "a . ", b"bytes",
+    "M.D.", " d.o., ph.d ", ".,", "m d",
+]
+
+
+def assert_same(expected: pd.Series, actual: pd.Series):
+    assert actual.index.equals(expected.index)
+    assert actual.name == expected.name
+    assert actual.tolist() == expected.tolist()
+    assert [type(v) for v in actual] == [type(v) for v in expected]
+
+
+def random_corpus(n: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    alphabet = list("abcXYZ019 .,;:-'\"\t\n\x0b\x1cé ") + ["STREET", "ST", "AVE", "SUITE."]
+    cells = ["".join(rng.choice(alphabet, size=rng.integers(0, 12))) for _ in range(n)]
+    values = np.array(cells, dtype=object)
+    values[rng.random(n) < 0.1] = None
+    values[rng.random(n) < 0.05] = np.nan
+    return pd.Series(values, index=pd.RangeIndex(100, 100 + n), name="col")
+
+
+class TestSeriesEquivalence:
+
+    @pytest.mark.parametrize("name", CLEANERS)
+    def test_edge_cases(self, name):
+        s = pd.Series(np.array(EDGE_CASES, dtype=object), name="x")
+        assert_same(s.map(getattr(pp, name)), getattr(pp, f"{name}_series")(s))
+
+    @pytest.mark.parametrize("name", CLEANERS)
+    def test_random_corpus(self, name):
+        s = random_corpus(5_000)
+        assert_same(s.map(getattr(pp, name)), getattr(pp, f"{name}_series")(s))
+
+    @pytest.mark.parametrize("values", [
+        [10001, 2, -3, 10001],
+        [10001.0, np.nan, -0.0, 0.0, 1e16, 123456789.5],
+        [True, False],
+    ])
+    def test_numeric_input(self, values):
+        s = pd.Series(values)
+        for name in ("clean_name", "normalize_zip5"):
+            assert_same(s.map(getattr(pp, name)), getattr(pp, f"{name}_series")(s))
+
+    def test_empty_series(self):
+        s = pd.Series([], dtype=object)
+        assert pp.clean_name_series(s).tolist() == []
+
+    def test_usps_abbrev_read_at_call_time(self, monkeypatch):
+        monkeypatch.setitem(pp.USPS_ABBREV, "DRIVE", "DR")
+        s = pd.Series(["12 oak drive", "12 oak street"])
+        assert pp.clean_street_series(s).tolist() == ["12 OAK DR", "12 OAK ST"]
+
+
+NPI_CASES = [
+    1053656744, "1053656744", " 1053-656-744 ", "1053656745", 1234567893, -1234567893,
+    123456789.0, 1234567893.0, 12345678.93, "12345678.93", 1e20, np.nan, float("inf"),
+    None, pd.NA, True, "", "abc", "10536567440", 10**30, b"1053656744", "١٠٥٣٦٥٦٧٤٤",
+    "0123456789", "0000000000", "00123456789", 123456789,
+]
+
+
+class TestBulkNpiValidation:
+
+    def test_edge_cases(self):
+        values = np.array(NPI_CASES, dtype=object)
+        expected = [pp.is_valid_npi(v) for v in NPI_CASES]
+        assert pp.is_valid_npi_array(values).tolist() == expected
+        assert pp.is_valid_npi_array(NPI_CASES).tolist() == expected
+
+    @pytest.mark.parametrize("dtype", ["int64", "uint64", "float64", "str", "string[pyarrow]", "Int64"])
+    def test_random_npis(self, dtype):
+        rng = np.random.default_rng(1)
+        ints = np.concatenate([rng.integers(1_000_000_000, 10_000_000_000, 20_000),
+                               rng.integers(0, 100_000_000_000, 2_000)])
+        if dtype == "float64":
+            values = pd.Series(np.concatenate([ints, ints[:1_000] / 100, [np.nan, -0.0]]))
+        elif dtype in ("str", "string[pyarrow]"):
+            values = pd.Series(list(ints.astype(str)) + [None, "12-345 678 93", "x"], dtype=dtype)
+        elif dtype == "Int64":
+            values = pd.Series(list(ints) + [None], dtype="Int64")
+        else:
+            values = pd.Series(ints if dtype == "int64" else ints.astype("uint64"))
+        expected = [pp.is_valid_npi(v) for v in values]
+        assert pp.is_valid_npi_array(values).tolist() == expected
+
+    def test_arrow_input(self):
+        arr = pa.chunked_array([["1053656744", None], ["1053656745"]])
+        assert pp.is_valid_npi_array(arr).tolist() == [True, False, False]
+
+
+PHONETIC_CASES = [
+    "SMITH", "smith", "", "  ", None, np.nan, 0, 5, 1.5, True, False,
+    "JOSÉ", "O'BRIEN", "MARY ANN", "ß", "X", "-",
+]
+
+
+class TestPhonetics:
+
+    @pytest.mark.parametrize("name", ["soundex_code", "metaphone_code"])
+    def test_edge_cases(self, name):
+        s = pd.Series(np.array(PHONETIC_CASES, dtype=object), name="x")
+        assert_same(s.map(getattr(pp, name)), getattr(pp, f"{name}_series")(s))
+
+    @pytest.mark.parametrize("name", ["soundex_code", "metaphone_code"])
+    def test_random_corpus(self, name):
+        s = random_corpus(5_000)
+        assert_same(s.map(getattr(pp, name)), getattr(pp, f"{name}_series")(s))
+
+    def test_process_pool(self, monkeypatch):
+        monkeypatch.setattr(pp, "_POOL_MIN_UNIQUES", 0)
+        s = pd.Series([f"NAME{i % 300}" for i in range(2_000)] + [None, ""])
+        assert_same(s.map(pp.metaphone_code), pp.metaphone_code_series(s, processes=2))
+
+    def test_scalar_cache(self):
+        pp._soundex.cache_clear()
+        for _ in range(3):
+            assert pp.soundex_code("NGUYEN") == "N250"
+        info = pp.phonetic_cache_info()["soundex"]
+        assert (info.hits, info.misses) == (2, 1)
+        assert info.maxsize == pp.PHONETIC_CACHE_SIZE
+
+    def test_unhashable_input(self):
+        assert pp.soundex_code(["SMITH"]) == pp._soundex.__wrapped__(["SMITH"])
@@ -0,0 +1,288 @@
+"""
+Test Suite — Streaming Phase 2 Pipeline
+=======================================
+Runs lib/preprocessing_pipeline on small raw CSVs with tiny chunks,
+several spill partitions and 1 or 3 cleaning processes, and compares every
+output to the in-memory notebook logic (Series.apply with the scalar
+cleaners, whole-frame groupby/merge).
+
+Run:  pytest test_preprocessing_pipeline.py -v
+"""
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+LIB_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "lib"))
+sys.path.insert(0, LIB_DIR)
+
+import preprocessing_pipeline as pipeline  # noqa: E402
+from preprocessing import (  # noqa: E402
+    clean_name, clean_credential, soundex_code, metaphone_code,
+    clean_street, clean_city, clean_state, normalize_zip5, is_valid_npi,
+)
+
+NAMES = ["smith", " O'Brien ", "nguyen", "JOSÉ", "lee", "", None, "de la cruz"]
+STREETS = ["12 Main Street", "4 oak ave.", "PO BOX 7", None]
+NPIS = [1053656744, 1234567893, 1234567890, 1003000126, 1114920123, 1245319599]
+
+
+def _pick(rng, values, n):
+    return [values[i] for i in rng.integers(0, len(values), n)]
+
+
+def _read_like_pipeline(path, dtypes, **kwargs):
+    from collections import defaultdict
+    return pd.read_csv(path, dtype=defaultdict(lambda: str, dtypes), **kwargs)
+
+
+def _assert_frames_equal(actual: pd.DataFrame, expected: pd.DataFrame):
+    assert list(actual.columns) == list(expected.columns)
+    assert len(actual) == len(expected)
+    for col in expected.columns:
+        a, e = actual[col].tolist(), expected[col].tolist()
+        same = [(x == y) or (pd.isna(x) and pd.isna(y)) if not isinstance(x, float) or not isinstance(y, float)
+                else (x == y or (np.isnan(x) and np.isnan(y)) or abs(x - y) <= 1e-9 * max(abs(x), abs(y)))
+                for x, y in zip(a, e)]
+        assert all(same), f"{col}: first mismatch at row {same.index(False)}"
+
+
+@pytest.fixture(autouse=True)
+def small_partitions(monkeypatch):
+    monkeypatch.setattr(pipeline, "PARTITION_BYTES", 2_000)
+
+
+# ── PECOS ────────────────────────────────────────────────────
+
+@pytest.fixture
+def pecos_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 300
+    entity = _pick(rng, ["I", "I", "O"], n)
+    frame = pd.DataFrame({
+        "NPI": 1_000_000_000 + rng.integers(0, 150, n) * 13,
+        "MULTIPLE_NPI_FLAG": _pick(rng, ["Y", "N"], n),
+        "PECOS_ASCT_CNTL_ID": rng.integers(1000, 1040, n),
+        "ENRLMT_ID": [f"{e}{y}0{m}15{s:06d}" for e, y, m, s in
+                      zip(entity, rng.integers(2003, 2026, n), rng.integers(1, 10, n), rng.integers(0, 999, n))],
+        "PROVIDER_TYPE_CD": _pick(rng, ["14-08", "12-70"], n),
+        "PROVIDER_TYPE_DESC": _pick(rng, ["PRACTITIONER - FAMILY PRACTICE", "PART B SUPPLIER"], n),
+        "STATE_CD": _pick(rng, ["NY", "CA", "TX"], n),
+        "FIRST_NAME": _pick(rng, NAMES, n),
+        "MDL_NAME": _pick(rng, ["A", "b.", None], n),
+        "LAST_NAME": _pick(rng, NAMES, n),
+        "ORG_NAME": _pick(rng, ["ACME CLINIC LLC", None], n),
+    })
+    frame.loc[7, "ENRLMT_ID"] = "Ixxxxxxxx123"  # unparseable date
+    path = tmp_path / "pecos.csv"
+    frame.to_csv(path, index=False, encoding="latin")
+    return str(path)
+
+
+def notebook_pecos(path):
+    pecos = _read_like_pipeline(path, pipeline.PECOS_DTYPES, encoding="latin")
+    pecos['ENRLMT_ENTITY'] = pecos['ENRLMT_ID'].str[0]
+    pecos['ENRLMT_DATE'] = pd.to_datetime(pecos['ENRLMT_ID'].str[1:9], format='%Y%m%d', errors='coerce')
+    pecos['ENRLMT_YEAR'] = pecos['ENRLMT_DATE'].dt.year
+    pecos['ENRLMT_SEQ'] = pecos['ENRLMT_ID'].str[9:]
+    for col in ['FIRST_NAME', 'MDL_NAME', 'LAST_NAME', 'ORG_NAME']:
+        pecos[col] = pecos[col].apply(clean_name)
+    is_individual = pecos['ENRLMT_ENTITY'] == 'I'
+    pecos.loc[is_individual, 'FIRST_NAME_SOUNDEX'] = pecos.loc[is_individual, 'FIRST_NAME'].apply(soundex_code)
+    pecos.loc[is_individual, 'LAST_NAME_SOUNDEX'] = pecos.loc[is_individual, 'LAST_NAME'].apply(soundex_code)
+    pecos.loc[is_individual, 'FIRST_NAME_METAPHONE'] = pecos.loc[is_individual, 'FIRST_NAME'].apply(metaphone_code)
+    pecos.loc[is_individual, 'LAST_NAME_METAPHONE'] = pecos.loc[is_individual, 'LAST_NAME'].apply(metaphone_code)
+    pecos['NPI_VALID'] = pecos['NPI'].apply(is_valid_npi)
+    entity_per_npi = pecos.groupby('NPI')['ENRLMT_ENTITY'].nunique()
+    pecos['DUAL_ENTITY_FLAG'] = pecos['NPI'].isin(entity_per_npi[entity_per_npi > 1].index)
+    pecos['ENROLLED_BY_2023'] = pecos['ENRLMT_YEAR'] <= 2023
+    org_mask = pecos['ENRLMT_ENTITY'] == 'O'
+    org_npi_counts = pecos.loc[org_mask].groupby('PECOS_ASCT_CNTL_ID')['NPI'].nunique()
+    multi_npi_orgs = org_npi_counts[org_npi_counts > 1]
+    pecos['MULTI_NPI_ORG'] = False
+    pecos.loc[org_mask & pecos['PECOS_ASCT_CNTL_ID'].isin(multi_npi_orgs.index), 'MULTI_NPI_ORG'] = True
+    canonical = pecos.loc[org_mask].groupby('PECOS_ASCT_CNTL_ID')['NPI'].min().rename('PARENT_NPI')
+    return pecos.merge(canonical, on='PECOS_ASCT_CNTL_ID', how='left')
+
+
+class TestPecosPipeline:
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_matches_notebook(self, pecos_csv, tmp_path, workers):
+        out = tmp_path / "pecos_clean.parquet"
+        summary = pipeline.preprocess_pecos(pecos_csv, str(out), chunksize=37, workers=workers)
+        expected = notebook_pecos(pecos_csv)
+        _assert_frames_equal(pd.read_parquet(out), expected)
+        assert summary["rows_out"] == len(expected)
+        assert summary["dual_entity_npis"] > 0
+
+    def test_row_group_per_chunk_and_no_spill_left(self, pecos_csv, tmp_path):
+        out = tmp_path / "pecos_clean.parquet"
+        pipeline.preprocess_pecos(pecos_csv, str(out), chunksize=100)
+        assert pq.ParquetFile(out).num_row_groups == 3
+        assert sorted(os.listdir(tmp_path)) == ["pecos.csv", "pecos_clean.parquet"]
+
+
+# ── Medicare ─────────────────────────────────────────────────
+
+@pytest.fixture
+def medicare_csv(tmp_path):
+    rng = np.random.default_rng(1)
+    n_prov, n = 60, 700
+    providers = pd.DataFrame({
+        "Rndrng_NPI": 1_000_000_000 + rng.choice(999_999, n_prov, replace=False) * 997,
+        "Rndrng_Prvdr_Last_Org_Name": _pick(rng, NAMES, n_prov),
+        "Rndrng_Prvdr_First_Name": _pick(rng, NAMES, n_prov),
+        "Rndrng_Prvdr_MI": _pick(rng, ["J", None, "k."], n_prov),
+        "Rndrng_Prvdr_Crdntls": _pick(rng, ["M.D.", "d.o.", None, "MD, PHD"], n_prov),
+        "Rndrng_Prvdr_Ent_Cd": _pick(rng, ["I", "I", "O"], n_prov),
+        "Rndrng_Prvdr_St1": _pick(rng, STREETS, n_prov),
+        "Rndrng_Prvdr_St2": _pick(rng, ["SUITE 5", None], n_prov),
+        "Rndrng_Prvdr_City": _pick(rng, ["new york", "Austin "], n_prov),
+        "Rndrng_Prvdr_State_Abrvtn": _pick(rng, ["ny", "TX"], n_prov),
+        "Rndrng_Prvdr_State_FIPS": _pick(rng, ["36", "48"], n_prov),
+        "Rndrng_Prvdr_Zip5": _pick(rng, ["02134", "78701"], n_prov),
+        "Rndrng_Prvdr_RUCA": _pick(rng, [1.0, 4.1, None], n_prov),
+        "Rndrng_Prvdr_RUCA_Desc": _pick(rng, ["Metropolitan area core", None], n_prov),
+        "Rndrng_Prvdr_Cntry": "US",
+        "Rndrng_Prvdr_Type": _pick(rng, ["Internal Medicine", "Ambulance Service Provider"], n_prov),
+        "Rndrng_Prvdr_Mdcr_Prtcptg_Ind": "Y",
+    })
+    rows = providers.iloc[rng.integers(0, n_prov, n)].reset_index(drop=True)
+    rows["HCPCS_Cd"] = _pick(rng, ["99213", "99214", "G0439", None], n)
+    rows["HCPCS_Desc"] = "desc"
+    rows["Tot_Benes"] = rng.integers(11, 500, n)
+    rows["Tot_Srvcs"] = rng.integers(11, 900, n).astype(float)
+    rows["Avg_Sbmtd_Chrg"] = rng.uniform(10, 400, n).round(2)
+    rows["Avg_Mdcr_Alowd_Amt"] = rng.uniform(10, 200, n).round(2)
+    rows["Avg_Mdcr_Pymt_Amt"] = rng.uniform(10, 200, n).round(2)
+    rows["Avg_Mdcr_Stdzd_Amt"] = rng.uniform(10, 200, n).round(2)
+    path = tmp_path / "medicare.csv"
+    rows.to_csv(path, index=False)
+    return str(path)
+
+
+def notebook_medicare(path):
+    medicare = _read_like_pipeline(path, pipeline.MEDICARE_DTYPES)
+    for col in ['Rndrng_Prvdr_First_Name', 'Rndrng_Prvdr_Last_Org_Name', 'Rndrng_Prvdr_MI']:
+        medicare[col] = medicare[col].apply(clean_name)
+    medicare['Rndrng_Prvdr_Crdntls'] = medicare['Rndrng_Prvdr_Crdntls'].apply(clean_credential)
+    medicare['Rndrng_Prvdr_St1'] = medicare['Rndrng_Prvdr_St1'].apply(clean_street)
+    medicare['Rndrng_Prvdr_City'] = medicare['Rndrng_Prvdr_City'].apply(clean_city)
+    medicare['Rndrng_Prvdr_State_Abrvtn'] = medicare['Rndrng_Prvdr_State_Abrvtn'].apply(clean_state)
+    medicare['NPI_VALID'] = medicare['Rndrng_NPI'].apply(is_valid_npi)
+    is_indiv = medicare['Rndrng_Prvdr_Ent_Cd'] == 'I'
+    first, last = 'Rndrng_Prvdr_First_Name', 'Rndrng_Prvdr_Last_Org_Name'
+    medicare.loc[is_indiv, 'FIRST_NAME_SOUNDEX'] = medicare.loc[is_indiv, first].apply(soundex_code)
+    medicare.loc[is_indiv, 'LAST_NAME_SOUNDEX'] = medicare.loc[is_indiv, last].apply(soundex_code)
+    medicare.loc[is_indiv, 'FIRST_NAME_METAPHONE'] = medicare.loc[is_indiv, first].apply(metaphone_code)
+    medicare.loc[is_indiv, 'LAST_NAME_METAPHONE'] = medicare.loc[is_indiv, last].apply(metaphone_code)
+    medicare['_row'] = np.arange(len(medicare))
+    return pipeline.dedup_medicare(medicare.assign(
+        _total_submitted_charges=medicare['Avg_Sbmtd_Chrg'] * medicare['Tot_Srvcs'],
+        _total_medicare_payment=medicare['Avg_Mdcr_Pymt_Amt'] * medicare['Tot_Srvcs'],
+    )).drop(columns='_row')
+
+
+class TestMedicarePipeline:
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_matches_notebook(self, medicare_csv, tmp_path, workers):
+        out = tmp_path / "medicare_clean.parquet"
+        summary = pipeline.preprocess_medicare(medicare_csv, str(out), chunksize=53, workers=workers)
+        expected = notebook_medicare(medicare_csv)
+        _assert_frames_equal(pd.read_parquet(out), expected)
+        assert summary == {"rows_in": 700, "rows_out": len(expected)}
+
+    def test_uses_several_partitions(self, medicare_csv):
+        assert pipeline._partition_count(medicare_csv) > 4
+
+
+# ── Open Payments ────────────────────────────────────────────
+
+@pytest.fixture
+def open_payments_csv(tmp_path):
+    rng = np.random.default_rng(2)
+    n = 500
+    npi = np.array(_pick(rng, NPIS + [None] * 3, n), dtype=object)
+    frame = pd.DataFrame({
+        "Change_Type": "NEW",
+        "Covered_Recipient_Profile_ID": _pick(rng, [101.0, 202.0, 303.0, None], n),
+        "Covered_Recipient_NPI": npi,
+        "Covered_Recipient_First_Name": _pick(rng, NAMES, n),
+        "Covered_Recipient_Last_Name": _pick(rng, NAMES, n),
+        "Recipient_Primary_Business_Street_Address_Line1": _pick(rng, STREETS, n),
+        "Recipient_City": _pick(rng, ["boston", None], n),
+        "Recipient_State": _pick(rng, ["ma", "CA", None], n),
+        "Recipient_Zip_Code": _pick(rng, ["02134-1234", "9021", "90210", None], n),
+        "Total_Amount_of_Payment_USDollars": rng.uniform(1, 5000, n).round(2),
+        "Date_of_Payment": _pick(rng, ["01/15/2023", "12/31/2023", "bad"], n),
+        "Submitting_Applicable_Manufacturer_or_Applicable_GPO_Name": "ACME",
+        "Applicable_Manufacturer_or_Applicable_GPO_Making_Payment_Name": _pick(rng, ["ACME", "GLOBEX", None], n),
+        "Applicable_Manufacturer_or_Applicable_GPO_Making_Payment_State": "NJ",
+        "Applicable_Manufacturer_or_Applicable_GPO_Making_Payment_Country": "United States",
+        "Program_Year": 2023,
+    })
+    frame.loc[:5, ["Covered_Recipient_First_Name", "Covered_Recipient_Last_Name", "Covered_Recipient_NPI",
+                   "Covered_Recipient_Profile_ID"]] = None
+    path = tmp_path / "open_payments.csv"
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def notebook_open_payments(path):
+    op = _read_like_pipeline(path, pipeline.OP_DTYPES, usecols=pipeline.OP_USECOLS)
+    op['LINKABLE'] = ~(op['Covered_Recipient_First_Name'].isna() & op['Covered_Recipient_Last_Name'].isna() &
+                       op['Covered_Recipient_NPI'].isna())
+    op['Covered_Recipient_NPI'] = pd.to_numeric(op['Covered_Recipient_NPI'], errors='coerce')
+    op['Covered_Recipient_First_Name'] = op['Covered_Recipient_First_Name'].apply(clean_name)
+    op['Covered_Recipient_Last_Name'] = op['Covered_Recipient_Last_Name'].apply(clean_name)
+    op['Recipient_Primary_Business_Street_Address_Line1'] = \
+        op['Recipient_Primary_Business_Street_Address_Line1'].apply(clean_street)
+    op['Recipient_City'] = op['Recipient_City'].apply(clean_city)
+    op['Recipient_State'] = op['Recipient_State'].apply(clean_state)
+    op['Recipient_Zip5'] = op['Recipient_Zip_Code'].apply(normalize_zip5)
+    op['NPI_VALID'] = op['Covered_Recipient_NPI'].apply(lambda x: is_valid_npi(int(x)) if pd.notna(x) else None)
+    has_name = op['Covered_Recipient_First_Name'].notna()
+    first, last = 'Covered_Recipient_First_Name', 'Covered_Recipient_Last_Name'
+    op.loc[has_name, 'FIRST_NAME_SOUNDEX'] = op.loc[has_name, first].apply(soundex_code)
+    op.loc[has_name, 'LAST_NAME_SOUNDEX'] = op.loc[has_name, last].apply(soundex_code)
+    op.loc[has_name, 'FIRST_NAME_METAPHONE'] = op.loc[has_name, first].apply(metaphone_code)
+    op.loc[has_name, 'LAST_NAME_METAPHONE'] = op.loc[has_name, last].apply(metaphone_code)
+    has_npi = op['NPI_VALID'] == True  # noqa: E712
+    real = (op[first].notna() & (op[first] != 'NAN') & op[last].notna() & (op[last] != 'NAN') &
+            op['Recipient_State'].notna() & (op['Recipient_State'] != 'NAN'))
+    op['linkage_tier'] = 'unmatchable'
+    op.loc[has_npi, 'linkage_tier'] = 'tier1_npi'
+    op.loc[~has_npi & real, 'linkage_tier'] = 'tier2_fuzzy'
+    op['Date_of_Payment'] = pd.to_datetime(op['Date_of_Payment'], format='%m/%d/%Y', errors='coerce')
+    npi_str = op.loc[op['Covered_Recipient_NPI'].notna(), 'Covered_Recipient_NPI'].astype(int).astype(str)
+    pid_valid = op['Covered_Recipient_Profile_ID'].notna()
+    op['_group_key'] = 'ROW_' + op.index.astype(str)
+    op.loc[pid_valid, '_group_key'] = 'PID_' + op.loc[pid_valid, 'Covered_Recipient_Profile_ID'].astype(str)
+    op.loc[op['Covered_Recipient_NPI'].notna(), '_group_key'] = 'NPI_' + npi_str
+    op['_row'] = np.arange(len(op))
+    return pipeline.dedup_open_payments(op).drop(columns='_row')
+
+
+class TestOpenPaymentsPipeline:
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    def test_matches_notebook(self, open_payments_csv, tmp_path, workers):
+        out = tmp_path / "open_payments_clean.parquet"
+        summary = pipeline.preprocess_open_payments(open_payments_csv, str(out), chunksize=41, workers=workers)
+        expected = notebook_open_payments(open_payments_csv)
+        actual = pd.read_parquet(out)
+        _assert_frames_equal(actual, expected)
+        assert summary == {"rows_in": 500, "rows_out": len(expected)}
+        assert set(actual['linkage_tier']) == {"tier1_npi", "tier2_fuzzy", "unmatchable"}
+
+    def test_npi_valid_keeps_missing(self, open_payments_csv, tmp_path):
+        out = tmp_path / "open_payments_clean.parquet"
+        pipeline.preprocess_open_payments(open_payments_csv, str(out), chunksize=500)
+        actual = pd.read_parquet(out)
+        missing = actual['Covered_Recipient_NPI'].isna()
+        assert missing.any() and actual.loc[missing, 'NPI_VALID'].isna().all()
+        assert actual.loc[~missing, 'NPI_VALID'].isin([True, False]).all()
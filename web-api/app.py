@@ -7,14 +7,40 @@ Run:  uvicorn app:app --reload --port 8000
 Docs: http://localhost:8000/docs
 """
 import os
+import re
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import hmac
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 import pandas as pd
 import numpy as np
-from fastapi import FastAPI, HTTPException, Query
+import pyarrow.parquet as pq
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Union
+
+import metrics
+import shared_store
+from metrics import stage
+from name_index import NameIndex
 
 # ── Load Data ────────────────────────────────────────────────
 _THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+_LIB_DIR = os.path.join(_THIS_DIR, "..", "lib")
+if _LIB_DIR not in sys.path:
+    sys.path.insert(0, _LIB_DIR)
+
+from preprocessing import is_valid_npi_array  # noqa: E402
+
 _CANDIDATES = [
     os.environ.get("PARQUET_PATH", ""),
     os.path.join(_THIS_DIR, "..", "artifacts", "phase5_entity_resolution", "unified_provider_entities.parquet"),
@@ -23,28 +49,47 @@ _CANDIDATES = [
     os.path.join(_THIS_DIR, "..", "unified_provider_entities.parquet"),
 ]
 
-PARQUET_PATH = None
-for candidate in _CANDIDATES:
-    if candidate and os.path.isfile(candidate):
-        PARQUET_PATH = os.path.abspath(candidate)
-        break
+# Low-cardinality string columns are read straight into categoricals so the
+# per-row object arrays are never built.
+_CATEGORICAL_COLUMNS = ["state_reconciled", "entity_type", "data_sources"]
+
+
+def _find_parquet() -> Optional[str]:
+    for candidate in _CANDIDATES:
+        if candidate and os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    return None
+
+
+def _read_frame(path: str) -> pd.DataFrame:
+    names = set(pq.read_schema(path).names)
+    dictionary = [v for c in _CATEGORICAL_COLUMNS for v in (c, c.replace("_", "")) if v in names]
+    frame = pd.read_parquet(path, read_dictionary=dictionary)
+    print(f"Loaded {len(frame):,} providers from {path}")
+    return frame
+
+
+PARQUET_PATH = _find_parquet()
+
+# When set, workers map a shared on-disk copy of the table and indexes
+# (shared_store.py) instead of each reading the parquet into private memory.
+SHARED_STORE_DIR = os.environ.get("SHARED_STORE_DIR", "")
 
 if PARQUET_PATH:
-    df = pd.read_parquet(PARQUET_PATH)
-    print(f"Loaded {len(df):,} providers from {PARQUET_PATH}")
-    print(f"Columns: {df.columns.tolist()}")
+    _COLUMNS = pq.read_schema(PARQUET_PATH).names
+    print(f"Columns: {_COLUMNS}")
 else:
-    df = pd.DataFrame()
+    _COLUMNS = []
     searched = [c for c in _CANDIDATES if c]
     print(f"WARNING: No parquet found. Searched: {searched}")
 
 # ── Column Name Resolution ───────────────────────────────────
 def _col(name: str) -> str:
     """Return the actual column name, handling underscore variants."""
-    if name in df.columns:
+    if name in _COLUMNS:
         return name
     no_under = name.replace("_", "")
-    if no_under in df.columns:
+    if no_under in _COLUMNS:
         return no_under
     return name
 
@@ -63,48 +108,434 @@ COL_LINKAGE = _col("linkage_coverage")
 COL_SOURCES = _col("data_sources")
 
 
+# ── Categorical Encoding ─────────────────────────────────────
+def _encode_categoricals(frame: pd.DataFrame) -> int:
+    """Make sure the low-cardinality string columns are categoricals, in place.
+
+    Returns an estimate of the resident memory saved versus object dtype:
+    one 8-byte pointer per row per column (pyarrow already shares repeated
+    string objects) minus the categorical codes and categories.
+    """
+    cols = [c for c in (COL_STATE, COL_ENTITY_TYPE, COL_SOURCES) if c in frame.columns]
+    for c in cols:
+        if not isinstance(frame[c].dtype, pd.CategoricalDtype):
+            frame[c] = frame[c].astype("category")
+    if not cols:
+        return 0
+    categorical = int(frame[cols].memory_usage(deep=True, index=False).sum())
+    return 8 * len(frame) * len(cols) - categorical
+
+
+# ── NPI Index ────────────────────────────────────────────────
+def _build_npi_index(frame: pd.DataFrame):
+    """Build a sorted (npi, row position) index for binary-search lookups.
+
+    Rows with a missing or non-numeric NPI are left out. The sort is stable,
+    so duplicate NPIs keep table order and a lookup always resolves to the
+    first matching row — the same row the old boolean-mask + iloc[0] returned.
+    """
+    if len(frame) == 0 or COL_NPI not in frame.columns:
+        return np.empty(0, dtype="int64"), np.empty(0, dtype="int64")
+    npis = pd.to_numeric(frame[COL_NPI], errors="coerce")
+    positions = np.flatnonzero(npis.notna().to_numpy())
+    keys = npis.to_numpy()[positions].astype("int64")
+    order = np.argsort(keys, kind="stable")
+    return keys[order], positions[order]
+
+
+def _lookup_npi(npi_index, npi_val: int) -> Optional[int]:
+    """Return the row position for an NPI, or None if it is not in the index."""
+    keys, positions = npi_index
+    if not 0 <= npi_val <= np.iinfo(np.int64).max:
+        return None
+    i = int(np.searchsorted(keys, npi_val, side="left"))
+    if i < len(keys) and keys[i] == npi_val:
+        return int(positions[i])
+    return None
+
+
+def _lookup_npis(npi_index, npi_vals: np.ndarray) -> np.ndarray:
+    """Vectorized _lookup_npi: row position per NPI, -1 where it is not indexed."""
+    keys, positions = npi_index
+    npi_vals = np.asarray(npi_vals, dtype="int64")
+    if len(keys) == 0:
+        return np.full(len(npi_vals), -1, dtype="int64")
+    slots = np.minimum(np.searchsorted(keys, npi_vals, side="left"), len(keys) - 1)
+    return np.where(keys[slots] == npi_vals, positions[slots], -1)
+
+
+# ── State Partitions ─────────────────────────────────────────
+def _build_state_partitions(frame: pd.DataFrame):
+    """Group row positions by state.
+
+    Returns (partition id per state key, partition id per row, sorted row
+    positions per partition). State keys are uppercased, the same
+    normalization the old per-request filter applied. Rows with no state
+    get partition -1 and never match a state filter.
+    """
+    if len(frame) == 0 or COL_STATE not in frame.columns:
+        return {}, np.empty(0, dtype="int16"), []
+    col = frame[COL_STATE]
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.astype("category")
+    keys = {}
+    part_of_code = np.array(
+        [keys.setdefault(str(c).upper(), len(keys)) for c in col.cat.categories] + [-1],
+        dtype="int16",
+    )
+    row_part = part_of_code[col.cat.codes.to_numpy()]  # code -1 picks the trailing -1
+    order = np.argsort(row_part, kind="stable")
+    bounds = np.searchsorted(row_part[order], np.arange(len(keys) + 1))
+    rows = [order[bounds[i]:bounds[i + 1]] for i in range(len(keys))]
+    return keys, row_part, rows
+
+
+# ── Snapshots ────────────────────────────────────────────────
+class Snapshot:
+    """One loaded parquet plus every index and cache derived from it.
+
+    The frame and its indexes are never modified after the snapshot is built;
+    ``stats_cache`` is the one mutable part, a per-snapshot memo that
+    _stats_cube fills lazily on first use. Handlers read the current
+    snapshot once at the start of a request and use only that object, so a
+    reload can swap in a new one while in-flight requests finish on the old.
+    """
+
+    def __init__(self, frame: pd.DataFrame, path: Optional[str], version: int,
+                 indexes=None, store: Optional[str] = None, mtime_ns: Optional[int] = None):
+        if indexes is None:
+            if len(frame):
+                saved = _encode_categoricals(frame)
+                print(f"Categorical state/entity_type/data_sources: ~{saved / 1e6:,.1f} MB less than object dtype")
+            indexes = (
+                _build_npi_index(frame),
+                _build_state_partitions(frame),
+                NameIndex(frame, [COL_FIRST_NAME, COL_LAST_NAME]),
+            )
+        self.df = frame
+        self.path = path
+        self.store = store
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc)
+        if mtime_ns is None and path:
+            mtime_ns = os.stat(path).st_mtime_ns
+        self.mtime_ns = mtime_ns
+        self.npi_index, self.state_index, self.name_index = indexes
+        self.stats_cache = {}
+
+    def describe(self) -> dict:
+        mtime = (datetime.fromtimestamp(self.mtime_ns / 1e9, tz=timezone.utc).isoformat()
+                 if self.mtime_ns is not None else None)
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat(),
+            "parquet_mtime": mtime,
+            "shared_store": self.store,
+        }
+
+
+# ── Shared Store ─────────────────────────────────────────────
+def _store_payload(snap: Snapshot):
+    """Split a snapshot's indexes into the flat arrays shared_store writes."""
+    npi_keys, npi_positions = snap.npi_index
+    state_keys, row_part, state_rows = snap.state_index
+    arrays = {
+        "npi_keys": npi_keys,
+        "npi_positions": npi_positions,
+        "state_row_part": row_part,
+        "state_rows": np.concatenate(state_rows) if state_rows else np.empty(0, dtype="int64"),
+        "state_offsets": np.cumsum([0] + [len(r) for r in state_rows], dtype="int64"),
+    }
+    arrays.update({f"name_{k}": v for k, v in snap.name_index.to_arrays().items()})
+    strings = {"state_keys": list(state_keys), "name_vocab": snap.name_index.vocab}
+    return arrays, strings
+
+
+def build_shared_store(directory: str, path: str):
+    """Read and index the parquet at path, then write it as the store's live version."""
+    snap = Snapshot(_read_frame(path), path, version=0)
+    arrays, strings = _store_payload(snap)
+    shared_store.write_store(directory, snap.df, arrays, strings, shared_store.source_stat(path))
+    print(f"Wrote shared store for {path} to {directory}")
+
+
+def _open_shared_snapshot(path: str, version: int) -> Snapshot:
+    """Map the store, building it first if it is missing or older than the parquet.
+
+    The store lock makes the first worker to get here build it while the
+    others wait, then every worker maps the same files.
+    """
+    with shared_store.locked(SHARED_STORE_DIR):
+        if not shared_store.is_current(SHARED_STORE_DIR, path):
+            build_shared_store(SHARED_STORE_DIR, path)
+        frame, arrays, strings, meta = shared_store.open_store(SHARED_STORE_DIR)
+
+    offsets = arrays["state_offsets"]
+    state_index = (
+        {key: i for i, key in enumerate(strings["state_keys"])},
+        arrays["state_row_part"],
+        [arrays["state_rows"][offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)],
+    )
+    name_arrays = {k[len("name_"):]: v for k, v in arrays.items() if k.startswith("name_")}
+    indexes = (
+        (arrays["npi_keys"], arrays["npi_positions"]),
+        state_index,
+        NameIndex.from_arrays(strings["name_vocab"], name_arrays, len(frame)),
+    )
+    print(f"Mapped {len(frame):,} providers from shared store {SHARED_STORE_DIR}")
+    return Snapshot(frame, meta["source"]["path"], version, indexes=indexes,
+                    store=SHARED_STORE_DIR, mtime_ns=meta["source"]["mtime_ns"])
+
+
+def _load_snapshot(version: int) -> Snapshot:
+    path = _find_parquet()
+    if path is None:
+        raise FileNotFoundError(f"No parquet found. Searched: {[c for c in _CANDIDATES if c]}")
+    if SHARED_STORE_DIR:
+        return _open_shared_snapshot(path, version)
+    return Snapshot(_read_frame(path), path, version)
+
+
+_SNAPSHOT = _load_snapshot(1) if PARQUET_PATH else Snapshot(pd.DataFrame(), None, version=1)
+
+_RELOAD_LOCK = threading.Lock()
+_RELOAD_STATUS = {"in_progress": False, "last_error": None}
+
+
+def _current() -> Snapshot:
+    """The snapshot a request should use from start to finish (503 if empty)."""
+    snap = _SNAPSHOT
+    if len(snap.df) == 0:
+        raise HTTPException(status_code=503, detail="No data loaded")
+    return snap
+
+
+def reload_snapshot() -> Snapshot:
+    """Load and index the parquet again, then swap it in atomically.
+
+    Runs in the calling thread. Only one reload runs at a time. If loading
+    fails, the current snapshot stays in place and the error is recorded for
+    /health.
+    """
+    with _RELOAD_LOCK:
+        return _reload_locked()
+
+
+def _reload_locked() -> Snapshot:
+    """reload_snapshot() body; the caller holds _RELOAD_LOCK."""
+    global _SNAPSHOT, PARQUET_PATH
+    _RELOAD_STATUS["in_progress"] = True
+    try:
+        snap = _load_snapshot(_SNAPSHOT.version + 1)
+        _SNAPSHOT, PARQUET_PATH = snap, snap.path
+        _RELOAD_STATUS["last_error"] = None
+        return snap
+    except Exception as exc:
+        _RELOAD_STATUS["last_error"] = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _RELOAD_STATUS["in_progress"] = False
+
+
+def _start_background_reload() -> bool:
+    """Kick off a reload on a daemon thread; False if one is already running.
+
+    The lock is taken here, not in the thread, so two callers cannot both
+    start a loader; the thread releases it when the reload ends.
+    """
+    if not _RELOAD_LOCK.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            _reload_locked()
+        except Exception as exc:
+            print(f"WARNING: reload failed, keeping snapshot v{_SNAPSHOT.version}: {exc}")
+        finally:
+            _RELOAD_LOCK.release()
+
+    try:
+        threading.Thread(target=run, name="snapshot-reload", daemon=True).start()
+    except BaseException:
+        _RELOAD_LOCK.release()
+        raise
+    return True
+
+
+def _watch_parquet(stop: threading.Event, interval: float):
+    """Reload whenever the parquet's mtime differs from the live snapshot's."""
+    while not stop.wait(interval):
+        path = _find_parquet()
+        if path is None:
+            continue
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        snap = _SNAPSHOT
+        if path != snap.path or mtime_ns != snap.mtime_ns:
+            _start_background_reload()
+
+
 # ── Helpers ──────────────────────────────────────────────────
-def _safe_dict(row_or_df, orient="records"):
-    """Convert a row/DataFrame to JSON-safe dict, handling nullable int types."""
-    if isinstance(row_or_df, pd.Series):
-        d = {}
-        for k, v in row_or_df.items():
-            if pd.isna(v):
-                d[k] = None
-            elif isinstance(v, (np.integer,)):
-                d[k] = int(v)
-            elif isinstance(v, (np.floating,)):
-                d[k] = float(v)
-            elif isinstance(v, (np.bool_,)):
-                d[k] = bool(v)
-            else:
-                d[k] = v
-        return d
-
-    # DataFrame path
-    records = []
-    for _, row in row_or_df.iterrows():
-        d = {}
-        for k, v in row.items():
-            if pd.isna(v):
-                d[k] = None
-            elif isinstance(v, (np.integer,)):
-                d[k] = int(v)
-            elif isinstance(v, (np.floating,)):
-                d[k] = float(v)
-            elif isinstance(v, (np.bool_,)):
-                d[k] = bool(v)
-            else:
-                d[k] = v
-        records.append(d)
-    return records
+# Same settings Starlette's JSONResponse uses, so the bytes on the wire match.
+_JSON_KWARGS = dict(ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def _column_values(col: pd.Series) -> list:
+    """Convert one column to JSON-ready Python values in a single pass.
+
+    Numeric, boolean and nullable Int64 columns come out as plain int/float/bool,
+    naive datetimes as ISO-8601 strings, and every missing value as None.
+    """
+    missing = col.isna().to_numpy()
+    if isinstance(col.dtype, np.dtype) and col.dtype.kind == "M":
+        stamps = col.to_numpy(dtype="datetime64[us]")
+        whole_seconds = stamps.astype("int64") % 1_000_000 == 0
+        values = np.where(
+            whole_seconds,
+            np.datetime_as_string(stamps, unit="s"),
+            np.datetime_as_string(stamps, unit="us"),
+        ).astype(object)
+    else:
+        values = col.to_numpy(dtype=object)
+    if missing.any():
+        values = np.where(missing, None, values)
+    return values.tolist()
+
+
+def _json_default(v):
+    """Fallback for the few cell types json can't encode natively."""
+    if isinstance(v, np.generic):
+        return v.item()
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    raise TypeError(f"Object of type {type(v).__name__} is not JSON serializable")
+
+
+def _records(frame: pd.DataFrame) -> list:
+    """Convert a DataFrame page to a list of JSON-safe dicts, column by column."""
+    columns = [_column_values(frame[c]) for c in frame.columns]
+    keys = [str(c) for c in frame.columns]
+    return [dict(zip(keys, vals)) for vals in zip(*columns)]
+
+
+def _json_response(payload) -> Response:
+    """Encode a payload once and hand FastAPI the raw bytes."""
+    body = json.dumps(payload, default=_json_default, **_JSON_KWARGS).encode("utf-8")
+    return Response(content=body, media_type="application/json")
+
+
+def _provider_row(snap: Snapshot, npi: str) -> pd.DataFrame:
+    """Resolve an NPI path parameter to its one-row provider frame via the NPI index."""
+    try:
+        npi_val = int(npi)
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Invalid NPI: {npi}")
+
+    pos = _lookup_npi(snap.npi_index, npi_val)
+    if pos is None:
+        raise HTTPException(status_code=404, detail=f"NPI {npi} not found")
+
+    return snap.df.iloc[pos:pos + 1]
+
+
+# ── Precomputed Stats ────────────────────────────────────────
+# A snapshot is immutable, so /stats and /stats/coverage are served from one
+# aggregate cube (providers per state × entity_type × data_sources). The cube,
+# encoded bodies and their ETags live in the snapshot's stats_cache, so a
+# reload starts from an empty cache.
+def _build_stats_cube(frame: pd.DataFrame) -> pd.DataFrame:
+    """Count providers and coverage flags per (state, entity_type, data_sources)."""
+    keys = [c for c in (COL_STATE, COL_ENTITY_TYPE, COL_SOURCES) if c in frame.columns]
+    return (
+        frame.groupby(keys, observed=True, dropna=False)
+        .agg(
+            providers=(COL_HAS_PECOS, "size"),
+            with_pecos=(COL_HAS_PECOS, "sum"),
+            with_op_payments=(COL_HAS_OP, "sum"),
+        )
+        .reset_index()
+    )
+
+
+def _stats_cube(snap: Snapshot) -> pd.DataFrame:
+    if "cube" not in snap.stats_cache:
+        snap.stats_cache["cube"] = _build_stats_cube(snap.df)
+    return snap.stats_cache["cube"]
+
+
+def _summarize(cube: pd.DataFrame) -> dict:
+    """Roll a slice of the cube up into the /stats summary shape."""
+    total = int(cube["providers"].sum())
+    result = {"total_providers": total}
+
+    if COL_ENTITY_TYPE in cube.columns:
+        result["individuals"] = int(cube.loc[cube[COL_ENTITY_TYPE] == "I", "providers"].sum())
+        result["organizations"] = int(cube.loc[cube[COL_ENTITY_TYPE] == "O", "providers"].sum())
+
+    with_pecos = int(cube["with_pecos"].sum())
+    result["with_pecos"] = with_pecos
+    result["with_op_payments"] = int(cube["with_op_payments"].sum())
+    result["pecos_coverage_pct"] = round(with_pecos / total * 100, 2) if total else 0.0
+    return result
+
+
+def _coverage_counts(cube: pd.DataFrame, keys) -> list:
+    counts = (
+        cube.groupby(keys, observed=True)["providers"].sum()
+        .rename("count")
+        .reset_index()
+        .sort_values("count", ascending=False, kind="stable")
+    )
+    counts = counts.rename(columns={COL_SOURCES: "data_sources", COL_STATE: "state"})
+    if "state" in counts.columns:
+        counts["state"] = counts["state"].astype(str)
+        counts = counts.sort_values("state", kind="stable")
+    return _records(counts)
+
+
+def _cached_json(snap: Snapshot, request: Request, route: str, key, build) -> Response:
+    """Serve a cached JSON body with a strong ETag; 304 when the client has it."""
+    entry = snap.stats_cache.get(key)
+    if entry is None:
+        scanned = len(snap.df) if "cube" not in snap.stats_cache else 0
+        with stage(route, "aggregate"):
+            payload = build()
+        with stage(route, "serialize"):
+            body = json.dumps(payload, default=_json_default, **_JSON_KWARGS).encode("utf-8")
+        entry = snap.stats_cache[key] = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+        metrics.rows(route, scanned=scanned, returned=0)
+    body, etag = entry
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # ── App Setup ────────────────────────────────────────────────
+RELOAD_POLL_SECONDS = float(os.environ.get("RELOAD_POLL_SECONDS", "0"))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    stop = threading.Event()
+    if RELOAD_POLL_SECONDS > 0:
+        threading.Thread(target=_watch_parquet, args=(stop, RELOAD_POLL_SECONDS),
+                         name="parquet-watcher", daemon=True).start()
+    yield
+    stop.set()
+
+
 app = FastAPI(
     title="CMS Provider Entity Resolution API",
     description="Query the unified provider entity table across Medicare, PECOS, and Open Payments.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -113,39 +544,104 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+# ── Concurrency ──────────────────────────────────────────────
+# Handlers doing pandas/numpy work run on a small dedicated pool instead of
+# Starlette's 40-thread default. Fewer threads contend for the GIL at once,
+# so the event loop keeps accepting connections and answering /health and
+# /metrics under load, and surplus requests wait in the pool's queue (timed
+# as the "queue" stage) instead of all slowing down together.
+API_CPU_THREADS = int(os.environ.get("API_CPU_THREADS", "4"))
+_CPU_POOL = ThreadPoolExecutor(max_workers=API_CPU_THREADS, thread_name_prefix="api-cpu")
+
+
+def _cpu_bound(route: str):
+    """Turn a sync handler into an async one that runs on the CPU pool."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        async def handler(*args, **kwargs):
+            queued = time.perf_counter()
+
+            def run():
+                metrics.STAGE.observe(time.perf_counter() - queued, route, "queue")
+                metrics.IN_FLIGHT.inc(amount=1)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    metrics.IN_FLIGHT.inc(amount=-1)
+
+            return await asyncio.get_running_loop().run_in_executor(_CPU_POOL, run)
+        return handler
+    return wrap
 
 
 # ── Endpoints ────────────────────────────────────────────────
 
 @app.get("/health")
-def health():
+async def health():
+    snap = _SNAPSHOT
     return {
         "status": "ok",
-        "provider_count": len(df),
-        "parquet_path": PARQUET_PATH or "NOT FOUND",
+        "provider_count": len(snap.df),
+        "parquet_path": snap.path or "NOT FOUND",
+        "snapshot": snap.describe(),
+        "reload": dict(_RELOAD_STATUS),
     }
 
 
-@app.get("/providers/{npi}")
-def get_provider(npi: str):
-    """Look up a single provider by NPI."""
-    if len(df) == 0:
-        raise HTTPException(status_code=503, detail="No data loaded")
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of this worker's request metrics."""
+    metrics.SNAPSHOT_VERSION.set(value=_SNAPSHOT.version)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
-    try:
-        npi_val = int(npi)
-    except ValueError:
-        raise HTTPException(status_code=404, detail=f"Invalid NPI: {npi}")
 
-    matches = df[df[COL_NPI] == npi_val]
-    if matches.empty:
-        raise HTTPException(status_code=404, detail=f"NPI {npi} not found")
+@app.post("/admin/reload", status_code=202)
+def admin_reload(
+    wait: bool = Query(False, description="Block until the new snapshot is live"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Load the parquet again in the background and swap it in when indexed.
+
+    Disabled (403) unless ADMIN_TOKEN is set; the X-Admin-Token header must match it.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin reload disabled: ADMIN_TOKEN is not set")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    if wait:
+        try:
+            snap = reload_snapshot()
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=f"Reload failed: {exc}")
+        return {"status": "reloaded", "snapshot": snap.describe()}
+
+    started = _start_background_reload()
+    return {
+        "status": "started" if started else "already_running",
+        "snapshot": _SNAPSHOT.describe(),
+    }
 
-    row = matches.iloc[0]
-    return _safe_dict(row)
+
+@app.get("/providers/{npi}")
+@_cpu_bound("/providers/{npi}")
+def get_provider(npi: str):
+    """Look up a single provider by NPI."""
+    route = "/providers/{npi}"
+    snap = _current()
+    with stage(route, "index"):
+        row = _provider_row(snap, npi)
+    with stage(route, "serialize"):
+        response = _json_response(_records(row)[0])
+    metrics.rows(route, scanned=1, returned=1)
+    return response
 
 
 @app.get("/providers")
+@_cpu_bound("/providers")
 def search_providers(
     name: Optional[str] = Query(None, description="Name to search (first or last)"),
     state: Optional[str] = Query(None, description="Two-letter state code"),
@@ -153,81 +649,161 @@ def search_providers(
     offset: int = Query(0, ge=0),
 ):
     """Search providers by name and/or state."""
-    if len(df) == 0:
-        raise HTTPException(status_code=503, detail="No data loaded")
+    route = "/providers"
+    snap = _current()
+    df = snap.df
 
     if name is None and state is None:
         raise HTTPException(status_code=422, detail="Provide at least 'name' or 'state'")
 
-    result = df
-
-    if name:
-        name_upper = name.upper()
-        name_mask = (
-            result[COL_FIRST_NAME].fillna("").astype(str).str.upper().str.contains(name_upper, na=False) |
-            result[COL_LAST_NAME].fillna("").astype(str).str.upper().str.contains(name_upper, na=False)
-        )
-        result = result[name_mask]
-
-    if state:
-        result = result[result[COL_STATE].astype(str).str.upper() == state.upper()]
-
-    total = len(result)
-    page = result.iloc[offset:offset + limit]
-
-    return {
-        "total": total,
-        "limit": limit,
-        "offset": offset,
-        "results": _safe_dict(page),
-    }
+    state_keys, row_part, state_rows = snap.state_index
+    part = state_keys.get(state.upper(), -1) if state else None
+
+    with stage(route, "index"):
+        if name:
+            rows = snap.name_index.search(name)
+        elif part is not None:
+            rows = state_rows[part] if part >= 0 else np.empty(0, dtype="int64")
+        else:
+            rows = None
+    scanned = len(df) if rows is None else len(rows)
+
+    if name and part is not None:
+        with stage(route, "filter"):
+            rows = rows[row_part[rows] == part]
+
+    total = len(df) if rows is None else len(rows)
+    with stage(route, "slice"):
+        if rows is None:
+            page = df.iloc[offset:offset + limit]
+        else:
+            page = df.iloc[rows[offset:offset + limit]]
+
+    with stage(route, "serialize"):
+        response = _json_response({
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "results": _records(page),
+        })
+    metrics.rows(route, scanned=scanned, returned=len(page))
+    return response
 
 
 @app.get("/providers/{npi}/payments")
+@_cpu_bound("/providers/{npi}/payments")
 def get_payments(npi: str):
     """Get payment summary for a provider."""
-    if len(df) == 0:
-        raise HTTPException(status_code=503, detail="No data loaded")
-
-    try:
-        npi_val = int(npi)
-    except ValueError:
-        raise HTTPException(status_code=404, detail=f"Invalid NPI: {npi}")
-
-    matches = df[df[COL_NPI] == npi_val]
-    if matches.empty:
-        raise HTTPException(status_code=404, detail=f"NPI {npi} not found")
-
-    row = matches.iloc[0]
-    return _safe_dict(row)
+    route = "/providers/{npi}/payments"
+    snap = _current()
+    with stage(route, "index"):
+        row = _provider_row(snap, npi)
+    with stage(route, "serialize"):
+        response = _json_response(_records(row)[0])
+    metrics.rows(route, scanned=1, returned=1)
+    return response
+
+
+BATCH_MAX_NPIS = 10_000
+_NDJSON_CHUNK = 1_000
+
+
+class BatchLookupRequest(BaseModel):
+    npis: List[Union[str, int]] = Field(..., min_length=1, max_length=BATCH_MAX_NPIS)
+
+
+def _resolve_batch(snap: Snapshot, raw_npis):
+    """Validate and resolve a batch of NPIs in one index pass.
+
+    Returns (distinct NPIs in request order, row position per NPI with -1 for
+    not found, mask of NPIs that failed the Luhn check).
+    """
+    npis = list(dict.fromkeys(str(v).strip() for v in raw_npis))
+    valid = is_valid_npi_array(npis)
+    npi_vals = np.array([int(re.sub(r"\D", "", v)) if ok else 0 for v, ok in zip(npis, valid)],
+                        dtype="int64")
+    positions = np.where(valid, _lookup_npis(snap.npi_index, npi_vals), -1)
+    return npis, positions, ~valid
+
+
+def _ndjson_lines(snap: Snapshot, npis, positions, invalid):
+    """One JSON line per requested NPI, rows serialized a chunk at a time."""
+    for start in range(0, len(npis), _NDJSON_CHUNK):
+        pos = positions[start:start + _NDJSON_CHUNK]
+        bad = invalid[start:start + _NDJSON_CHUNK]
+        with stage("/providers/batch", "serialize"):
+            rows = iter(_records(snap.df.iloc[pos[pos >= 0]]))
+            lines = []
+            for npi, p, b in zip(npis[start:start + _NDJSON_CHUNK], pos, bad):
+                status = "invalid" if b else ("found" if p >= 0 else "not_found")
+                provider = next(rows) if p >= 0 else None
+                lines.append(json.dumps({"npi": npi, "status": status, "provider": provider},
+                                        default=_json_default, **_JSON_KWARGS))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@app.post("/providers/batch")
+@_cpu_bound("/providers/batch")
+def batch_providers(
+    body: BatchLookupRequest,
+    format: str = Query("json", pattern="^(json|ndjson)$",
+                        description="'ndjson' streams one line per NPI"),
+):
+    """Look up many NPIs at once. NPIs failing the Luhn check are reported as invalid."""
+    route = "/providers/batch"
+    snap = _current()
+    with stage(route, "index"):
+        npis, positions, invalid = _resolve_batch(snap, body.npis)
+    found = positions >= 0
+    metrics.rows(route, scanned=len(npis), returned=int(found.sum()))
+
+    if format == "ndjson":
+        return StreamingResponse(_ndjson_lines(snap, npis, positions, invalid),
+                                 media_type="application/x-ndjson")
+
+    with stage(route, "serialize"):
+        return _json_response({
+            "requested": len(npis),
+            "found": _records(snap.df.iloc[positions[found]]),
+            "not_found": [n for n, p, b in zip(npis, positions, invalid) if p < 0 and not b],
+            "invalid": [n for n, b in zip(npis, invalid) if b],
+        })
 
 
 @app.get("/stats")
-def get_stats():
+@_cpu_bound("/stats")
+def get_stats(
+    request: Request,
+    by_state: bool = Query(False, description="Add a per-state breakdown"),
+):
     """Dataset-level summary statistics."""
-    if len(df) == 0:
-        raise HTTPException(status_code=503, detail="No data loaded")
+    snap = _current()
 
-    total = len(df)
-    result = {"total_providers": total}
+    def build():
+        cube = _stats_cube(snap)
+        result = _summarize(cube)
+        if by_state and COL_STATE in cube.columns:
+            known = cube[cube[COL_STATE].notna()]
+            groups = {str(state): group for state, group in known.groupby(COL_STATE, observed=True)}
+            result["by_state"] = {state: _summarize(groups[state]) for state in sorted(groups)}
+        return result
 
-    if COL_ENTITY_TYPE in df.columns:
-        result["individuals"] = int((df[COL_ENTITY_TYPE] == "I").sum())
-        result["organizations"] = int((df[COL_ENTITY_TYPE] == "O").sum())
-
-    result["with_pecos"] = int(df[COL_HAS_PECOS].sum())
-    result["with_op_payments"] = int(df[COL_HAS_OP].sum())
-    result["pecos_coverage_pct"] = round(float(df[COL_HAS_PECOS].mean()) * 100, 2)
-
-    return result
+    return _cached_json(snap, request, "/stats", ("stats", by_state), build)
 
 
 @app.get("/stats/coverage")
-def get_coverage():
+@_cpu_bound("/stats/coverage")
+def get_coverage(
+    request: Request,
+    by_state: bool = Query(False, description="Break counts down by state"),
+):
     """Coverage breakdown by data source combination."""
-    if len(df) == 0:
-        raise HTTPException(status_code=503, detail="No data loaded")
+    snap = _current()
+
+    def build():
+        cube = _stats_cube(snap)
+        if by_state and COL_STATE in cube.columns:
+            return _coverage_counts(cube[cube[COL_STATE].notna()], [COL_STATE, COL_SOURCES])
+        return _coverage_counts(cube, [COL_SOURCES])
 
-    counts = df[COL_SOURCES].value_counts().reset_index()
-    counts.columns = ["data_sources", "count"]
-    return counts.to_dict(orient="records")
+    return _cached_json(snap, request, "/stats/coverage", ("coverage", by_state), build)
@@ -0,0 +1,185 @@
+"""
+Request Metrics
+===============
+A small in-process registry of counters and histograms, rendered in the
+Prometheus text exposition format at ``/metrics``.
+
+Recording a value takes one lock and one bisect, so the metrics can stay
+on in production. Each uvicorn worker keeps its own registry; a scrape sees
+the worker that answered it, and the ``pid`` label on every series keeps
+workers apart in the time series database.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond index hits to multi-second scans.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_PID = str(os.getpid())
+_REGISTRY = []
+
+
+def _label_text(names, values) -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    return ",".join(pairs)
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels=()):
+        self.name, self.doc, self.labels = name, doc, ("pid",) + tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def inc(self, *labels, amount: float = 1):
+        key = (_PID,) + labels
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get((_PID,) + labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{{{_label_text(self.labels, key)}}} {v:g}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down (in-flight work, snapshot version)."""
+
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[(_PID,) + labels] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.doc, self.labels = name, doc, ("pid",) + tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels → [count per bucket (+Inf last), sum]
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, *labels):
+        key = (_PID,) + labels
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][slot] += 1
+            entry[1] += value
+
+    def count(self, *labels) -> int:
+        entry = self._values.get((_PID,) + labels)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        for key, (counts, total) in items:
+            base = _label_text(self.labels, key)
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f'{self.name}_bucket{{{base},le="{le}"}} {running}'
+            yield f"{self.name}_sum{{{base}}} {total:.6f}"
+            yield f"{self.name}_count{{{base}}} {running}"
+
+
+def render() -> str:
+    """Every registered metric in Prometheus text format."""
+    lines = []
+    for metric in _REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.doc}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# ── API Metrics ──────────────────────────────────────────────
+REQUESTS = Counter("api_requests_total", "HTTP requests by route, method and status.",
+                   ("route", "method", "status"))
+LATENCY = Histogram("api_request_duration_seconds", "Time from request start to last body byte.",
+                    ("route", "method"))
+STAGE = Histogram("api_stage_duration_seconds",
+                  "Time per handler stage (queue, index, filter, slice, aggregate, serialize).",
+                  ("route", "stage"))
+ROWS_SCANNED = Counter("api_rows_scanned_total", "Table rows a handler had to examine.", ("route",))
+ROWS_RETURNED = Counter("api_rows_returned_total", "Rows serialized into responses.", ("route",))
+IN_FLIGHT = Gauge("api_worker_threads_busy", "Handlers running on the CPU-bound thread pool.")
+SNAPSHOT_VERSION = Gauge("api_snapshot_version", "Version of the snapshot this worker is serving.")
+
+
+@contextmanager
+def stage(route: str, name: str):
+    """Time a block as one stage of a route's handler."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE.observe(time.perf_counter() - start, route, name)
+
+
+def rows(route: str, scanned: int, returned: int):
+    ROWS_SCANNED.inc(route, amount=scanned)
+    ROWS_RETURNED.inc(route, amount=returned)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording count and latency per matched route template.
+
+    Latency runs until the last body chunk is sent, so streamed NDJSON
+    responses are timed in full. Unmatched paths share one ``unmatched``
+    label so arbitrary URLs cannot blow up the series count.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status, recorded = [500], [False]
+
+        def record():
+            if recorded[0]:
+                return
+            recorded[0] = True
+            route = scope.get("route")
+            label = getattr(route, "path", "unmatched")
+            REQUESTS.inc(label, scope["method"], str(status[0]))
+            LATENCY.observe(time.perf_counter() - start, label, scope["method"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status[0] = 500
+            record()
+            raise
@@ -0,0 +1,154 @@
+"""
+Trigram Name Index
+==================
+Substring search over the reconciled first/last name columns without
+scanning the table on every request.
+
+Both columns are uppercased once and dictionary-encoded into a shared
+vocabulary of distinct names (a few hundred thousand values for 1.24M rows).
+An inverted index maps every character trigram to the sorted ids of the
+names containing it. A literal query intersects the posting lists of its
+trigrams, confirms the surviving names with a real substring test, and
+expands them back to row positions.
+
+Semantics match the original scan,
+``col.fillna("").astype(str).str.upper().str.contains(query.upper())``,
+OR-ed across both columns. That scan treated the query as a regex, so
+queries with regex metacharacters are still run as a regex, but only over
+the vocabulary instead of every row.
+"""
+import numpy as np
+import pandas as pd
+
+_REGEX_CHARS = set(".^$*+?{}[]\\|()")
+
+# Unicode code points fit in 21 bits, so three of them pack into one int64.
+_SHIFT = 21
+_CHUNK = 50_000
+
+
+def _trigram_keys(codes: np.ndarray, lengths: np.ndarray):
+    """Return (key, row) pairs for every trigram in a block of UTF-32 names."""
+    width = codes.shape[1]
+    if width < 3:
+        return np.empty(0, dtype="int64"), np.empty(0, dtype="int64")
+    c = codes.astype("int64")
+    keys = (c[:, :-2] << (2 * _SHIFT)) | (c[:, 1:-1] << _SHIFT) | c[:, 2:]
+    valid = np.arange(width - 2)[None, :] < (lengths[:, None] - 2)
+    rows = np.broadcast_to(np.arange(len(codes))[:, None], keys.shape)
+    return keys[valid], rows[valid]
+
+
+def _query_keys(query: str) -> np.ndarray:
+    points = np.array([ord(ch) for ch in query], dtype="int64")
+    keys = (points[:-2] << (2 * _SHIFT)) | (points[1:-1] << _SHIFT) | points[2:]
+    return np.unique(keys)
+
+
+def _expand(offsets: np.ndarray, values: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """Concatenate values[offsets[g]:offsets[g + 1]] for every g in groups."""
+    starts, lengths = offsets[groups], offsets[groups + 1] - offsets[groups]
+    group_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return values[np.arange(lengths.sum()) - group_start + np.repeat(starts, lengths)]
+
+
+class NameIndex:
+    """Trigram index over one or more name columns of a frame."""
+
+    def __init__(self, frame: pd.DataFrame, columns):
+        columns = [c for c in columns if c in frame.columns]
+        n = self._n = len(frame)
+        upper = [frame[c].fillna("").astype(str).str.upper() for c in columns]
+
+        if upper:
+            codes, vocab = pd.factorize(pd.concat(upper, ignore_index=True), sort=False)
+        else:
+            codes, vocab = np.empty(0, dtype="int64"), []
+        self.vocab = np.asarray(vocab, dtype=object)
+
+        # name id → row positions (ascending within each name)
+        positions = np.tile(np.arange(n, dtype="int64"), len(upper))
+        order = np.argsort(codes, kind="stable")
+        self._rows = positions[order]
+        self._row_offsets = np.append(0, np.cumsum(np.bincount(codes, minlength=len(self.vocab))))
+
+        # trigram → name ids, deduplicated and sorted by (trigram, name id)
+        keys, ids = [], []
+        for start in range(0, len(self.vocab), _CHUNK):
+            block = self.vocab[start:start + _CHUNK]
+            lengths = np.fromiter((len(s) for s in block), dtype="int64", count=len(block))
+            utf32 = np.array(block.tolist(), dtype="U").view(np.uint32).reshape(len(block), -1)
+            k, r = _trigram_keys(utf32, lengths)
+            keys.append(k)
+            ids.append(r + start)
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype="int64")
+        ids = np.concatenate(ids) if ids else np.empty(0, dtype="int64")
+        order = np.lexsort((ids, keys))
+        keys, ids = keys[order], ids[order]
+        fresh = np.ones(len(keys), dtype=bool)
+        fresh[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+        keys, ids = keys[fresh], ids[fresh]
+        self._tri_keys, starts = np.unique(keys, return_index=True)
+        self._tri_offsets = np.append(starts, len(keys))
+        self._tri_ids = ids
+
+    _ARRAYS = ("_rows", "_row_offsets", "_tri_keys", "_tri_offsets", "_tri_ids")
+
+    def to_arrays(self) -> dict:
+        """The index's integer arrays by name, for saving to a shared store."""
+        return {name.lstrip("_"): getattr(self, name) for name in self._ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, vocab, arrays: dict, n_rows: int) -> "NameIndex":
+        """Rebuild an index from to_arrays() output without re-tokenizing.
+
+        ``vocab`` may be any array of str that supports integer-array
+        indexing (a read-only memory-mapped store returns a pyarrow-backed one).
+        """
+        self = cls.__new__(cls)
+        self._n = n_rows
+        self.vocab = vocab
+        for name in cls._ARRAYS:
+            setattr(self, name, arrays[name.lstrip("_")])
+        return self
+
+    def _matching_names(self, query: str) -> np.ndarray:
+        """Ids of vocabulary names containing ``query`` (already uppercased)."""
+        if _REGEX_CHARS & set(query):
+            hits = pd.Series(self.vocab, dtype=object).str.contains(query, na=False)
+            return np.flatnonzero(hits.to_numpy())
+
+        if len(query) < 3:
+            candidates = np.arange(len(self.vocab))
+        else:
+            candidates = None
+            postings = []
+            for key in _query_keys(query):
+                i = np.searchsorted(self._tri_keys, key)
+                if i == len(self._tri_keys) or self._tri_keys[i] != key:
+                    return np.empty(0, dtype="int64")
+                postings.append(self._tri_ids[self._tri_offsets[i]:self._tri_offsets[i + 1]])
+            for posting in sorted(postings, key=len):
+                candidates = posting if candidates is None else \
+                    np.intersect1d(candidates, posting, assume_unique=True)
+                if len(candidates) == 0:
+                    return candidates
+
+        names = self.vocab[candidates]
+        if isinstance(names, np.ndarray):
+            keep = np.fromiter((query in s for s in names), dtype=bool, count=len(names))
+        else:  # pyarrow-backed vocabulary from a shared store: vectorized in Arrow
+            keep = pd.Series(names, copy=False).str.contains(query, regex=False).to_numpy(dtype=bool)
+        return candidates[keep]
+
+    def search(self, query: str) -> np.ndarray:
+        """Return sorted row positions where any indexed column contains ``query``."""
+        ids = self._matching_names(query.upper())
+        if len(ids) == 0:
+            return np.empty(0, dtype="int64")
+        rows = _expand(self._row_offsets, self._rows, ids)
+        if len(rows) * 16 < self._n:
+            return np.unique(rows)
+        hit = np.zeros(self._n, dtype=bool)
+        hit[rows] = True
+        return np.flatnonzero(hit)
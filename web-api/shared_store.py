@@ -0,0 +1,191 @@
+"""
+Memory-Mapped Shared Store
+==========================
+An on-disk copy of the provider table and its lookup indexes that uvicorn
+workers map read-only instead of each reading the parquet into private
+memory. The OS page cache holds one copy of the pages no matter how many
+workers map them.
+
+Layout of a store directory::
+
+    CURRENT              name of the live version directory
+    .lock                flock() target while a version is being written
+    v-<token>/
+        table.arrow      uncompressed Arrow IPC file, one record batch
+        <name>.npy       int arrays (indexes), opened with mmap_mode="r"
+        <name>.arrow     string arrays (e.g. the name-index vocabulary)
+        meta.json        source parquet stat + column encodings
+
+Columns are laid out so that reading them back copies as little as
+possible. Strings are stored as ``large_string`` and come back as pyarrow
+backed ``string`` columns. Floats keep NaN as a value rather than as a
+null, and datetimes are stored as their int64 ticks. Both therefore come
+back as zero-copy numpy views. Bools, nullable ints and categorical codes
+are rebuilt in private memory; they are small.
+
+A new version is written to its own directory, and ``CURRENT`` is then
+replaced atomically. Workers that still map the old files keep a valid
+mapping until they let go of it.
+"""
+import fcntl
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+_CURRENT = "CURRENT"
+_LOCK = ".lock"
+_TABLE = "table.arrow"
+_META = "meta.json"
+
+
+# ── Source Fingerprint ───────────────────────────────────────
+def source_stat(path: str) -> dict:
+    """What a store records about its parquet, used to tell if it is stale."""
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def current_meta(directory: str) -> Optional[dict]:
+    """meta.json of the live version, or None if the store has none yet."""
+    try:
+        with open(os.path.join(directory, _CURRENT)) as f:
+            version = f.read().strip()
+        with open(os.path.join(directory, version, _META)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_current(directory: str, parquet_path: str) -> bool:
+    meta = current_meta(directory)
+    return meta is not None and meta["source"] == source_stat(parquet_path)
+
+
+@contextmanager
+def locked(directory: str):
+    """Exclusive cross-process lock on the store (one writer at a time)."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, _LOCK), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ── Column Encoding ──────────────────────────────────────────
+def _encode_column(col: pd.Series):
+    """Return (arrow array, encoding tag) for one frame column."""
+    dtype = col.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind == "M":
+        return pa.array(col.to_numpy().view("int64")), str(dtype)
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        return pa.array(col.to_numpy(), from_pandas=False), None
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pa.array(col), "category"
+    if isinstance(dtype, pd.Int64Dtype):
+        return pa.array(col), "Int64"
+    arr = pa.array(col, from_pandas=True)
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        return arr.cast(pa.large_string()), "string"
+    return arr, None
+
+
+def _decode_column(chunked: pa.ChunkedArray, encoding: Optional[str]):
+    if encoding == "string":
+        return pd.arrays.ArrowStringArray(chunked)
+    if encoding is not None and encoding.startswith("datetime64"):
+        return chunked.chunk(0).to_numpy(zero_copy_only=True).view(encoding)
+    if encoding == "Int64":
+        return pd.array(chunked.to_pandas(), dtype="Int64")
+    if chunked.null_count == 0 and chunked.num_chunks == 1 and \
+            (pa.types.is_integer(chunked.type) or pa.types.is_floating(chunked.type)):
+        return chunked.chunk(0).to_numpy(zero_copy_only=True)
+    return chunked.to_pandas()
+
+
+# ── Write / Open ─────────────────────────────────────────────
+def write_store(directory: str, frame: pd.DataFrame, arrays: dict, strings: dict,
+                source: dict, extra: Optional[dict] = None) -> str:
+    """Write a new version of the store and make it live. Call under locked().
+
+    ``arrays`` maps names to numeric ndarrays and ``strings`` maps names to
+    sequences of str. Both come back from open_store() under the same names.
+    Older versions are removed once the new one is live.
+    """
+    version = f"v-{source['mtime_ns']}-{os.getpid()}"
+    target = os.path.join(directory, version)
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(target)
+
+    columns, encodings = [], {}
+    for name in frame.columns:
+        arr, encoding = _encode_column(frame[name])
+        columns.append(arr)
+        if encoding:
+            encodings[str(name)] = encoding
+    table = pa.Table.from_arrays(columns, names=[str(c) for c in frame.columns])
+    with pa.OSFile(os.path.join(target, _TABLE), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(frame), 1))
+
+    for name, values in arrays.items():
+        np.save(os.path.join(target, f"{name}.npy"), np.ascontiguousarray(values))
+    for name, values in strings.items():
+        col = pa.array(list(values), type=pa.large_string())
+        with pa.OSFile(os.path.join(target, f"{name}.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, pa.schema([("value", col.type)])) as writer:
+                writer.write_batch(pa.record_batch([col], names=["value"]))
+
+    with open(os.path.join(target, _META), "w") as f:
+        json.dump({"source": source, "encodings": encodings, "rows": len(frame),
+                   **(extra or {})}, f)
+
+    tmp = os.path.join(directory, f"{_CURRENT}.{os.getpid()}")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(directory, _CURRENT))
+
+    for entry in os.listdir(directory):
+        if entry.startswith("v-") and entry != version:
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return target
+
+
+def _read_ipc(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def open_store(directory: str):
+    """Map the live version read-only.
+
+    Returns (frame, arrays, strings, meta). String arrays come back as
+    pyarrow-backed pandas arrays, and none of the returned objects may be
+    written to.
+    """
+    with open(os.path.join(directory, _CURRENT)) as f:
+        target = os.path.join(directory, f.read().strip())
+    with open(os.path.join(target, _META)) as f:
+        meta = json.load(f)
+
+    table = _read_ipc(os.path.join(target, _TABLE))
+    encodings = meta["encodings"]
+    frame = pd.DataFrame(
+        {name: _decode_column(table.column(name), encodings.get(name)) for name in table.column_names},
+        copy=False,
+    )
+
+    arrays, strings = {}, {}
+    for entry in sorted(os.listdir(target)):
+        stem, ext = os.path.splitext(entry)
+        if ext == ".npy":
+            arrays[stem] = np.load(os.path.join(target, entry), mmap_mode="r")
+        elif ext == ".arrow" and entry != _TABLE:
+            strings[stem] = pd.arrays.ArrowStringArray(_read_ipc(os.path.join(target, entry)).column(0))
+    return frame, arrays, strings, meta